@@ -5,11 +5,35 @@ Implements the agent layer of the firmware testing system.
 Agents are nodes in the LangGraph state machine that wrap core engines.
 """
 
-from .base_agent import BaseAgent, AgentState
-from .code_agent import CodeAgent
-from .test_agent import TestAgent
-from .analysis_agent import AnalysisAgent
-from .kb_agent import KBAgent
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .base_agent import BaseAgent, AgentState
+    from .code_agent import CodeAgent
+    from .test_agent import TestAgent
+    from .analysis_agent import AnalysisAgent
+    from .kb_agent import KBAgent
+
+# Agents are imported on first access so that importing one agent module
+# (e.g. src.agents.base_agent) does not load every engine behind the others
+_EXPORTS = {
+    "BaseAgent": ".base_agent",
+    "AgentState": ".base_agent",
+    "CodeAgent": ".code_agent",
+    "TestAgent": ".test_agent",
+    "AnalysisAgent": ".analysis_agent",
+    "KBAgent": ".kb_agent",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
 
 __all__ = [
     "BaseAgent",
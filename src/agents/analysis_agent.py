@@ -37,7 +37,9 @@ class AnalysisAgent(BaseAgent):
             confidence_threshold=self.config.get("confidence_threshold", 0.8),
             max_history_depth=self.config.get("max_history_depth", 10),
             enable_ai_analysis=self.config.get("enable_ai", True),
-            pattern_db_path=self.config.get("pattern_db_path")
+            pattern_db_path=self.config.get("pattern_db_path"),
+            log_parse_workers=self.config.get("log_parse_workers", 0),
+            history_dir=self.config.get("history_dir")
         )
         
         self.analyzer = ResultAnalyzer(analyzer_config)
@@ -91,28 +93,18 @@ class AnalysisAgent(BaseAgent):
             }
         
         try:
-            # Calculate statistics
-            total_tests = len(test_results)
-            passed = sum(1 for r in test_results if r.get("status") == "passed")
-            failed = sum(1 for r in test_results if r.get("status") == "failed")
-            skipped = sum(1 for r in test_results if r.get("status") == "skipped")
+            total_tests, passed, failed, skipped, test_outputs = self._result_stats(test_results)
             
-            # Extract test outputs for analysis
-            test_outputs = {}
-            for result in test_results:
-                test_id = result.get("test_id", "")
-                output = result.get("output", "") or result.get("error_message", "")
-                test_outputs[test_id] = output
-            
-            # Run analysis
-            report = self.analyzer.analyze_results(
-                test_run_id=task_id,
+            # Run analysis against this task's iteration history
+            report = self.analyzer.analyze_iteration(
+                task_id=task_id,
                 total_tests=total_tests,
                 passed=passed,
                 failed=failed,
                 skipped=skipped,
                 test_outputs=test_outputs,
-                iteration=iteration
+                iteration=iteration,
+                patch_content=self.blob_store.resolve(state.get("patch_content", ""))
             )
             
             # Convert report to dict
@@ -142,7 +134,19 @@ class AnalysisAgent(BaseAgent):
                         "message": f.message[:200] if f.message else ""
                     }
                     for f in report.failures
-                ]
+                ],
+                "clusters": [
+                    {
+                        "signature": c.signature,
+                        "category": c.category.value,
+                        "count": len(c.failures),
+                        "test_ids": c.test_ids,
+                        "is_new": c.is_new,
+                        "root_cause": c.root_cause.root_cause if c.root_cause else ""
+                    }
+                    for c in report.clusters
+                ],
+                "resolved_signatures": report.resolved_signatures
             }
             
             # Determine next action
@@ -161,6 +165,49 @@ class AnalysisAgent(BaseAgent):
                 "next_action": "error"
             }
     
+    def score_candidate(self, state: AgentState, test_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Score the test results of a candidate patch without recording them
+        
+        New issues are failure signatures absent from the task's last
+        recorded iteration.
+        
+        Args:
+            state: Current state (task_id)
+            test_results: Test results of the candidate
+            
+        Returns:
+            {"pass_rate", "failed", "new_issues"}
+        """
+        task_id = state.get("task_id", "unknown")
+        total_tests, passed, failed, _, test_outputs = self._result_stats(test_results)
+        # Only failure signatures are needed; root-cause analysis runs for the winner
+        signatures = self.analyzer.failure_signatures(test_outputs, failed)
+        
+        last = self.analyzer.task_history(task_id).last
+        known = last.signatures if last is not None else frozenset()
+        
+        return {
+            "pass_rate": passed / total_tests if total_tests > 0 else 0.0,
+            "failed": failed,
+            "new_issues": len(signatures - known)
+        }
+    
+    def _result_stats(self, test_results: List[Dict[str, Any]]):
+        """Counts by status and {test_id: output} (blob handles are read one at a time)"""
+        total_tests = len(test_results)
+        passed = sum(1 for r in test_results if r.get("status") == "passed")
+        failed = sum(1 for r in test_results if r.get("status") == "failed")
+        skipped = sum(1 for r in test_results if r.get("status") == "skipped")
+        
+        test_outputs = {}
+        for result in test_results:
+            test_id = result.get("test_id", "")
+            output = result.get("output", "") or result.get("error_message", "")
+            test_outputs[test_id] = output
+        
+        return total_tests, passed, failed, skipped, self.blob_store.lazy_texts(test_outputs)
+    
     async def _parse_logs(self, state: AgentState) -> Dict[str, Any]:
         """
         Parse log files and extract structured data
@@ -5,12 +5,14 @@ Abstract base class for all agents in the system.
 Agents are nodes in the LangGraph state machine, receiving state and returning updated state.
 """
 
-from typing import TypedDict, List, Dict, Any, Optional, Union, cast
+from typing import Annotated, TypedDict, List, Dict, Any, Optional, Union, cast
 from dataclasses import dataclass
 from abc import ABC, abstractmethod
 import logging
+import operator
 
 from src.models.code import WorkflowAction
+from src.tools.storage import BlobStore
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,12 @@ class AgentState(TypedDict):
     """全局共享状态定义 - LangGraph状态机的核心数据结构
 
     状态字段遵循 STATE_MACHINE.md 设计规范，确保设计文档与实现的一致性。
+
+    messages / errors / decision_trace 为追加通道（operator.add 归约）：
+    节点只返回本次新增的条目，其余字段按节点返回的部分更新覆盖。
+
+    大体积内容（测试输出、图、补丁）存放在 BlobStore 中，状态里只保存
+    {"blob", "size", "media_type", "preview"} 句柄，由 Agent 按需解析。
     """
 
     # 任务标识
@@ -31,13 +39,13 @@ class AgentState(TypedDict):
     repo_path: str
     current_commit: str
     target_files: List[str]
-    patch_content: str
+    patch_content: Union[str, Dict[str, Any]]  # 超过内联阈值时为 blob 句柄
     patch_applied: bool
     repo_snapshot: Dict[str, Any]  # 当前 commit/patch 信息，用于回滚
 
     # 测试上下文
     test_plan: Dict[str, Any]
-    test_results: List[Dict[str, Any]]
+    test_results: List[Dict[str, Any]]  # output / error_message 过大时为 blob 句柄
     artifacts: List[str]
 
     # 分析结果
@@ -47,11 +55,11 @@ class AgentState(TypedDict):
 
     # 错误与恢复
     error_state: Optional[Dict[str, Any]]  # 最近一次错误分类与恢复尝试次数
-    decision_trace: List[Dict[str, Any]]  # 状态转移链路及原因（可用于审计与回放）
+    decision_trace: Annotated[List[Dict[str, Any]], operator.add]  # 状态转移链路及原因（可用于审计与回放）
 
     # 错误与消息
-    messages: List[str]
-    errors: List[str]
+    messages: Annotated[List[str], operator.add]
+    errors: Annotated[List[str], operator.add]
 
 
 @dataclass
@@ -82,6 +90,11 @@ class BaseAgent(ABC):
         """
         self.config = config or {}
         self.agent_type = self.__class__.__name__
+        # 大体积产物的内容寻址存储（各 Agent 使用同一目录即可共享）
+        self.blob_store = BlobStore(
+            self.config.get("blob_dir", "/tmp/blob_store"),
+            inline_limit=self.config.get("blob_inline_limit", BlobStore.DEFAULT_INLINE_LIMIT)
+        )
         self._initialize_engine()
         logger.info(f"{self.agent_type} initialized with config: {self.config}")
     
@@ -94,7 +107,7 @@ class BaseAgent(ABC):
         """
         pass
     
-    async def __call__(self, state: AgentState) -> AgentState:
+    async def __call__(self, state: AgentState) -> Dict[str, Any]:
         """
         LangGraph节点入口
         
@@ -102,7 +115,7 @@ class BaseAgent(ABC):
             state: 当前状态
             
         Returns:
-            更新后的状态
+            状态的部分更新（只含变化的字段；追加通道只含新增条目）
         """
         try:
             logger.info(f"{self.agent_type} executing with task_id={state.get('task_id')}")
@@ -110,40 +123,23 @@ class BaseAgent(ABC):
             # 执行Agent逻辑
             result = await self.execute(state)
             
-            # 合并状态
-            merged: AgentState = {**state, **result}  # type: ignore[assignment]
-            
-            # 添加执行消息
-            messages = merged.get("messages", [])
-            messages.append(f"{self.agent_type}: 执行完成")
-            merged["messages"] = messages
+            # 添加执行消息与状态转移记录
+            update = dict(result)
+            update["messages"] = [*result.get("messages", []), f"{self.agent_type}: 执行完成"]
+            if "next_action" in result:
+                update["decision_trace"] = [*result.get("decision_trace", []), {
+                    "agent": self.agent_type,
+                    "iteration": state.get("iteration", 0),
+                    "next_action": str(result["next_action"])
+                }]
             
-            return merged
+            return update
         except Exception as e:
             logger.error(f"{self.agent_type} execution failed: {e}")
-            errors = state.get("errors", [])
-            errors.append(f"{self.agent_type}错误: {str(e)}")
             return {
-                "task_id": state.get("task_id", ""),
-                "iteration": state.get("iteration", 0),
-                "max_iterations": state.get("max_iterations", 10),
-                "goal": state.get("goal", ""),
-                "repo_path": state.get("repo_path", ""),
-                "current_commit": state.get("current_commit", ""),
-                "target_files": state.get("target_files", []),
-                "patch_content": state.get("patch_content", ""),
-                "patch_applied": state.get("patch_applied", False),
-                "repo_snapshot": state.get("repo_snapshot", {}),
-                "test_plan": state.get("test_plan", {}),
-                "test_results": state.get("test_results", []),
-                "artifacts": state.get("artifacts", []),
-                "analysis_report": state.get("analysis_report", {}),
                 "next_action": "escalate",
                 "converged": False,
-                "error_state": state.get("error_state"),
-                "decision_trace": state.get("decision_trace", []),
-                "messages": state.get("messages", []),
-                "errors": errors
+                "errors": [f"{self.agent_type}错误: {str(e)}"]
             }
     
     @abstractmethod
@@ -162,16 +158,12 @@ class BaseAgent(ABC):
         pass
     
     def _add_message(self, state: AgentState, message: str) -> Dict[str, Any]:
-        """添加消息到状态"""
-        messages = state.get("messages", [])
-        messages.append(message)
-        return {"messages": messages}
+        """添加消息（追加通道的增量更新）"""
+        return {"messages": [message]}
     
     def _add_error(self, state: AgentState, error: str) -> Dict[str, Any]:
-        """添加错误到状态"""
-        errors = state.get("errors", [])
-        errors.append(error)
-        return {"errors": errors}
+        """添加错误（追加通道的增量更新）"""
+        return {"errors": [error]}
     
     def _check_convergence(self, state: AgentState, pass_rate: float) -> Dict[str, Any]:
         """检查是否收敛"""
@@ -6,6 +6,7 @@ Responsible for code understanding and code modification in the state machine.
 """
 
 import logging
+from dataclasses import asdict
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 
@@ -13,6 +14,8 @@ from src.agents.base_agent import BaseAgent, AgentState
 from src.tools.code_analysis.analyzer import CodeAnalyzer
 from src.tools.code_analysis.parser import TreeSitterParser
 from src.tools.code_modification.modifier import CodeModifier
+from src.tools.code_modification.worktree import head_commit
+from src.tools.llm.response_cache import LLMResponseCache, ResponseCacheConfig
 from src.models.code import AnalyzerConfig, AnalysisType
 
 logger = logging.getLogger(__name__)
@@ -38,12 +41,44 @@ class CodeAgent(BaseAgent):
         )
         self.analyzer = CodeAnalyzer(analyzer_config)
         
-        # Initialize CodeModifier
+        # Initialize CodeModifier (in-process patch application unless "git" is configured)
         git_path = self.config.get("git_path", "git")
-        self.modifier = CodeModifier(git_path=git_path)
-        
+        self.modifier = CodeModifier(
+            git_path=git_path,
+            backend=self.config.get("patch_backend", "native"),
+            fuzz=self.config.get("patch_fuzz", 2)
+        )
+
+        # Initialize LLM response cache (opt-out via enable_llm_cache)
+        self.response_cache: Optional[LLMResponseCache] = None
+        if self.config.get("enable_llm_cache", True):
+            cache_config = ResponseCacheConfig(
+                cache_dir=self.config.get("llm_cache_dir", "/tmp/llm_cache"),
+                ttl_seconds=self.config.get("llm_cache_ttl", 7 * 24 * 3600),
+                max_entries=self.config.get("llm_cache_max_entries", 1000),
+                max_bytes=self.config.get("llm_cache_max_bytes", 256 * 1024 * 1024),
+                max_cacheable_temperature=self.config.get("llm_cache_max_temperature", 0.0),
+                semantic_lookup=self.config.get("llm_cache_semantic", False),
+                similarity_threshold=self.config.get("llm_cache_similarity", 0.97)
+            )
+            try:
+                self.response_cache = LLMResponseCache(cache_config)
+            except OSError as e:
+                logger.warning(f"Failed to initialize LLM response cache: {e}")
+
         logger.info("CodeAgent engines initialized")
     
+    def set_embedding_provider(self, embedding_fn) -> None:
+        """
+        Enable near-duplicate prompt lookup in the LLM response cache
+
+        Args:
+            embedding_fn: Callable or coroutine function mapping text to an
+                embedding vector (typically KBAgent's embedding pipeline)
+        """
+        if self.response_cache is not None:
+            self.response_cache.embedding_fn = embedding_fn
+    
     async def execute(self, state: AgentState) -> Dict[str, Any]:
         """
         Execute CodeAgent logic based on current state and next_action
@@ -102,6 +137,9 @@ class CodeAgent(BaseAgent):
             # Perform full analysis
             analysis_type = AnalysisType.FULL
             report = await self.analyzer.analyze_files(target_files, analysis_type)
+            # Graphs go into state as plain dicts (inline or as a JSON blob);
+            # read them back with blob_store.resolve_json
+            dependency_graph = asdict(report.dependency_graph) if report.dependency_graph else None
             
             return {
                 "analysis_report": {
@@ -111,8 +149,8 @@ class CodeAgent(BaseAgent):
                     "issues_by_severity": report.issues_by_severity,
                     "summary": report.summary,
                     "suggestions": report.suggestions,
-                    "dependency_graph": report.dependency_graph,
-                    "call_graph": report.call_graph
+                    "dependency_graph": self.blob_store.offload_json(dependency_graph),
+                    "call_graph": self.blob_store.offload_json(dict(report.call_graph))
                 },
                 "messages": [f"Analyzed {len(target_files)} files, found {report.total_issues} issues"]
             }
@@ -158,7 +196,7 @@ class CodeAgent(BaseAgent):
                 )
                 if patch_content:
                     return {
-                        "patch_content": patch_content,
+                        "patch_content": self.blob_store.offload(patch_content),
                         "next_action": "apply_patch",
                         "messages": [f"Generated patch using LLM for {issues} issues"]
                     }
@@ -169,15 +207,49 @@ class CodeAgent(BaseAgent):
         patch_content = self._generate_placeholder_patch(analysis_report)
         
         return {
-            "patch_content": patch_content,
+            "patch_content": self.blob_store.offload(patch_content),
             "next_action": "apply_patch",
             "messages": [f"Generated placeholder patch for {issues} issues"]
         }
     
+    async def propose_patch(self, state: AgentState, temperature: float = 0.3) -> str:
+        """
+        Generate one candidate patch without applying it
+        
+        Used by speculative exploration, which samples several candidates at
+        different temperatures. Falls back to the placeholder patch if the LLM
+        is disabled or returns nothing.
+        
+        Args:
+            state: Current state with analysis_report and task description
+            temperature: LLM sampling temperature
+            
+        Returns:
+            Patch content ("" if there are no issues to fix)
+        """
+        analysis_report = state.get("analysis_report", {})
+        if analysis_report.get("total_issues", 0) == 0:
+            return ""
+        
+        if self.config.get("enable_ai", True):
+            try:
+                patch_content = await self._generate_patch_with_llm(
+                    analysis_report,
+                    state.get("task_request", {}).get("goal", ""),
+                    temperature=temperature
+                )
+                if patch_content:
+                    return patch_content
+            except Exception as e:
+                logger.warning(f"LLM patch generation failed: {e}, falling back to placeholder")
+        
+        return self._generate_placeholder_patch(analysis_report)
+    
     async def _generate_patch_with_llm(
         self, 
         analysis_report: Dict[str, Any],
-        task_description: str
+        task_description: str,
+        temperature: float = 0.3
     ) -> str:
         """
         Generate patch content using LLM API
@@ -187,6 +259,7 @@ class CodeAgent(BaseAgent):
         Args:
             analysis_report: The code analysis report
             task_description: Description of the task/goal
+            temperature: Sampling temperature
             
         Returns:
             Git-formatted patch content
@@ -241,7 +314,7 @@ Do not include any other text in your response. If no fix is needed, return "NO_
                 model=llm_model,
                 prompt=prompt,
                 max_tokens=2000,
-                temperature=0.3
+                temperature=temperature
             )
             
             # Parse the response to extract patch
@@ -276,13 +349,18 @@ Do not include any other text in your response. If no fix is needed, return "NO_
         model: str,
         prompt: str,
         max_tokens: int = 2000,
-        temperature: float = 0.3
+        temperature: float = 0.3,
+        use_cache: bool = True
     ) -> Dict[str, Any]:
         """
         Call LLM API
-        
+
         IR-03: 模型API集成
-        
+
+        Responses are served from the LLM response cache when possible;
+        requests with a sampling temperature above the cacheable limit
+        (by default any temperature above 0) always go to the API.
+
         Args:
             endpoint: API endpoint URL
             api_key: API authentication key
@@ -290,12 +368,37 @@ Do not include any other text in your response. If no fix is needed, return "NO_
             prompt: Input prompt
             max_tokens: Maximum tokens in response
             temperature: Temperature for sampling
-            
+            use_cache: Set False to bypass the response cache
+
         Returns:
             API response as dictionary
         """
+        cache = self.response_cache if use_cache else None
+        if cache is not None:
+            cached = await cache.get(model, prompt, temperature, max_tokens, endpoint)
+            if cached is not None:
+                return cached
+
+        response = await self._post_llm_request(
+            endpoint, api_key, model, prompt, max_tokens, temperature
+        )
+
+        if cache is not None:
+            await cache.put(model, prompt, temperature, response, max_tokens, endpoint)
+        return response
+
+    async def _post_llm_request(
+        self,
+        endpoint: str,
+        api_key: str,
+        model: str,
+        prompt: str,
+        max_tokens: int,
+        temperature: float
+    ) -> Dict[str, Any]:
+        """Send a chat completion request to the LLM API"""
         import httpx
-        
+
         headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
@@ -328,7 +431,7 @@ Do not include any other text in your response. If no fix is needed, return "NO_
             Patch application result
         """
         repo_path = state.get("repo_path", "")
-        patch_content = state.get("patch_content", "")
+        patch_content = self.blob_store.resolve(state.get("patch_content", ""))
         
         if not patch_content:
             return {
@@ -342,35 +445,25 @@ Do not include any other text in your response. If no fix is needed, return "NO_
                 "next_action": "error"
             }
         
-        # Check for conflicts first
-        has_conflicts = not self.modifier.check_conflicts(patch_content, repo_path)
+        # Conflict check and application in one pass; nothing is written on conflict
+        result = self.modifier.apply_checked(patch_content, repo_path)
         
-        if has_conflicts:
+        if not result.applied:
             return {
                 "patch_applied": False,
-                "errors": ["Patch has conflicts, cannot apply"],
+                "errors": ["Patch has conflicts, cannot apply"] + [str(c) for c in result.conflicts],
                 "next_action": "modify"  # Go back to generate new patch
             }
         
-        # Apply the patch
-        success = self.modifier.apply_patch(patch_content, repo_path)
+        # Get new commit hash after patch application
+        new_commit = self._get_current_commit(repo_path)
         
-        if success:
-            # Get new commit hash after patch application
-            new_commit = self._get_current_commit(repo_path)
-            
-            return {
-                "patch_applied": True,
-                "current_commit": new_commit,
-                "next_action": "test",  # Proceed to testing
-                "messages": ["Patch applied successfully"]
-            }
-        else:
-            return {
-                "patch_applied": False,
-                "errors": ["Failed to apply patch"],
-                "next_action": "modify"
-            }
+        return {
+            "patch_applied": True,
+            "current_commit": new_commit,
+            "next_action": "test",  # Proceed to testing
+            "messages": ["Patch applied successfully"] + result.notes
+        }
     
     def _find_c_files(self, repo_path: str) -> List[str]:
         """Find all C/C++ files in the repository"""
@@ -424,15 +517,4 @@ Do not include any other text in your response. If no fix is needed, return "NO_
     
     def _get_current_commit(self, repo_path: str) -> str:
         """Get the current git commit hash"""
-        import subprocess
-        
-        try:
-            result = subprocess.run(
-                ["git", "rev-parse", "HEAD"],
-                cwd=repo_path,
-                capture_output=True,
-                text=True
-            )
-            return result.stdout.strip()
-        except Exception:
-            return ""
+        return head_commit(repo_path, self.config.get("git_path", "git"))
@@ -5,13 +5,31 @@ Wraps KnowledgeBase engine for RAG-based knowledge retrieval and storage.
 Responsible for interacting with the RAG system in the state machine.
 """
 
+import asyncio
 import logging
+import os
+import threading
+from concurrent.futures import Future
 from typing import Dict, Any, List, Optional
 from dataclasses import dataclass
 from datetime import datetime
 import uuid
 
+import numpy as np
+
 from src.agents.base_agent import BaseAgent, AgentState
+from src.knowledge.embedding import (
+    EmbeddingService,
+    EmbeddingServiceConfig,
+    api_encoder,
+    sentence_transformer_encoder,
+)
+from src.knowledge.vector_index import LocalVectorIndex, LocalIndexConfig
+from src.knowledge.ann_index import ANNIndexConfig, create_ann_index
+from src.knowledge.keyword_index import BM25Index, KeywordIndexConfig
+from src.knowledge.hybrid import CrossEncoderReranker, reciprocal_rank_fusion
+from src.knowledge.capture_queue import CaptureQueueConfig, KnowledgeCaptureQueue
+from src.knowledge.ingestion import DocumentChunk, IngestionConfig, IngestionPipeline, IngestionStats
 
 logger = logging.getLogger(__name__)
 
@@ -30,10 +48,51 @@ class KBAgentConfig:
     # Embedding配置
     embedding_model: str = "text-embedding-ada-002"
     embedding_dim: int = 1536
+    embedding_batch_size: int = 64
+    embedding_batch_window_ms: float = 5.0
+    embedding_cache_size: int = 10000
+    # 共享Embedding模型服务地址（多个进程复用同一个已加载模型）
+    embedding_server_url: Optional[str] = None
+    
+    # 启动配置：延迟到首次使用时在后台连接Qdrant并加载模型
+    lazy_init: bool = True
     
     # 检索配置
     default_max_results: int = 10
     min_confidence_score: float = 0.5
+    
+    # 本地向量索引配置（Qdrant不可用时的回退）
+    enable_local_index: bool = True
+    local_index_dir: str = "/tmp/firmware_kb_index"
+    local_index_backend: str = "exact"  # "exact", "ivf" 或 "hnswlib"
+    
+    # 近似检索参数（召回率/延迟权衡）
+    ann_nlist: int = 1024
+    ann_nprobe: int = 16
+    ann_pq_m: int = 0
+    ann_ef_search: int = 64
+    
+    # 混合检索配置（BM25 + 向量，RRF融合）
+    enable_hybrid_search: bool = True
+    keyword_index_dir: str = "/tmp/firmware_kb_keywords"
+    hybrid_candidates: int = 50
+    rrf_k: int = 60
+    rerank_model: Optional[str] = None
+    rerank_top_n: int = 20
+    
+    # 知识沉淀写入队列配置（write-behind）
+    enable_capture_queue: bool = True
+    capture_spool_path: str = "/tmp/firmware_kb_spool.jsonl"
+    capture_batch_size: int = 32
+    capture_flush_interval_ms: float = 200.0
+    capture_max_retries: int = 3
+    
+    # 文档导入配置 (FR-22)
+    ingest_chunk_size: int = 2000
+    ingest_chunk_overlap: int = 200
+    ingest_workers: int = 4
+    # 默认为 <local_index_dir>/ingest_<collection_name>.json，每个知识库独立
+    ingest_checkpoint_path: Optional[str] = None
 
 
 class KBAgent(BaseAgent):
@@ -57,19 +116,113 @@ class KBAgent(BaseAgent):
             collection_name=self.config.get("collection_name", "firmware_knowledge"),
             embedding_model=self.config.get("embedding_model", "text-embedding-ada-002"),
             embedding_dim=self.config.get("embedding_dim", 1536),
+            embedding_batch_size=self.config.get("embedding_batch_size", 64),
+            embedding_batch_window_ms=self.config.get("embedding_batch_window_ms", 5.0),
+            embedding_cache_size=self.config.get("embedding_cache_size", 10000),
+            embedding_server_url=self.config.get("embedding_server_url"),
+            lazy_init=self.config.get("lazy_init", True),
             default_max_results=self.config.get("default_max_results", 10),
             min_confidence_score=self.config.get("min_confidence_score", 0.5),
-            postgres_url=self.config.get("postgres_url", "postgresql://localhost/firmware_kb")
+            postgres_url=self.config.get("postgres_url", "postgresql://localhost/firmware_kb"),
+            enable_local_index=self.config.get("enable_local_index", True),
+            local_index_dir=self.config.get("local_index_dir", "/tmp/firmware_kb_index"),
+            local_index_backend=self.config.get("local_index_backend", "exact"),
+            ann_nlist=self.config.get("ann_nlist", 1024),
+            ann_nprobe=self.config.get("ann_nprobe", 16),
+            ann_pq_m=self.config.get("ann_pq_m", 0),
+            ann_ef_search=self.config.get("ann_ef_search", 64),
+            enable_hybrid_search=self.config.get("enable_hybrid_search", True),
+            keyword_index_dir=self.config.get("keyword_index_dir", "/tmp/firmware_kb_keywords"),
+            hybrid_candidates=self.config.get("hybrid_candidates", 50),
+            rrf_k=self.config.get("rrf_k", 60),
+            rerank_model=self.config.get("rerank_model"),
+            rerank_top_n=self.config.get("rerank_top_n", 20),
+            enable_capture_queue=self.config.get("enable_capture_queue", True),
+            capture_spool_path=self.config.get("capture_spool_path", "/tmp/firmware_kb_spool.jsonl"),
+            capture_batch_size=self.config.get("capture_batch_size", 32),
+            capture_flush_interval_ms=self.config.get("capture_flush_interval_ms", 200.0),
+            capture_max_retries=self.config.get("capture_max_retries", 3),
+            ingest_chunk_size=self.config.get("ingest_chunk_size", 2000),
+            ingest_chunk_overlap=self.config.get("ingest_chunk_overlap", 200),
+            ingest_workers=self.config.get("ingest_workers", 4),
+            ingest_checkpoint_path=self.config.get("ingest_checkpoint_path")
         )
+        if not self.config_obj.ingest_checkpoint_path:
+            # Import progress belongs to the KB it was imported into
+            self.config_obj.ingest_checkpoint_path = os.path.join(
+                self.config_obj.local_index_dir, f"ingest_{self.config_obj.collection_name}.json"
+            )
+        
+        # Backends are connected by _connect_backends(), either now or on first use
+        self._vector_db_client: Optional[Any] = None
+        self._qdrant_client: Optional[Any] = None
+        self._embedding_model: Optional[Any] = None
+        self._embedding_service: Optional[str] = None
+        self._embedder: Optional[EmbeddingService] = None
+        self._local_index: Optional[Any] = None
+        self._keyword_index: Optional[BM25Index] = None
+        self._reranker: Optional[CrossEncoderReranker] = None
+        self._backends_ready: Optional[Future] = None
+        self._backends_lock = threading.Lock()
         
-        # Initialize vector DB client (Qdrant)
-        self._init_qdrant_client()
+        # Initialize write-behind queue for knowledge capture
+        self._init_capture_queue()
         
-        # Initialize embedding service
-        self._init_embedding_service()
+        if not self.config_obj.lazy_init:
+            self.warm_up().result()
         
         logger.info(f"KBAgent initialized with Qdrant at {self.config_obj.qdrant_host}:{self.config_obj.qdrant_port}")
     
+    def warm_up(self) -> Future:
+        """
+        Start connecting backends in a background thread
+        
+        Connecting to Qdrant and loading the embedding model can take seconds,
+        so it happens on first use rather than in the constructor. Calling
+        this early (e.g. when the workflow starts) overlaps that cost with
+        other work.
+        
+        Returns:
+            Readiness future resolved once all backends are initialized
+        """
+        with self._backends_lock:
+            if self._backends_ready is None:
+                future: Future = Future()
+                self._backends_ready = future
+                threading.Thread(
+                    target=self._connect_backends, args=(future,), name="kb-agent-init", daemon=True
+                ).start()
+            return self._backends_ready
+    
+    async def ensure_ready(self) -> None:
+        """Wait until backends are initialized, starting initialization if needed"""
+        await asyncio.wrap_future(self.warm_up())
+    
+    @property
+    def is_ready(self) -> bool:
+        """Whether backend initialization has completed"""
+        return self._backends_ready is not None and self._backends_ready.done()
+    
+    def _connect_backends(self, future: Future) -> None:
+        """Initialize Qdrant, embedding model and local indexes, resolving ``future``"""
+        try:
+            # Initialize vector DB client (Qdrant)
+            self._init_qdrant_client()
+            
+            # Initialize embedding service
+            self._init_embedding_service()
+            
+            # Initialize local vector index fallback
+            self._init_local_index()
+            
+            # Initialize keyword index and reranker for hybrid retrieval
+            self._init_hybrid_search()
+            
+            future.set_result(True)
+        except BaseException as e:
+            logger.error(f"KBAgent backend initialization failed: {e}")
+            future.set_exception(e)
+    
     def _init_qdrant_client(self):
         """Initialize Qdrant vector database client
         
@@ -114,12 +267,34 @@ class KBAgent(BaseAgent):
         
         KR-04: Vectorize query using embedding service
         """
+        service_config = EmbeddingServiceConfig(
+            batch_size=self.config_obj.embedding_batch_size,
+            batch_window_ms=self.config_obj.embedding_batch_window_ms,
+            cache_size=self.config_obj.embedding_cache_size
+        )
+        
+        if self.config_obj.embedding_server_url:
+            # Share one loaded model with other processes via the model server
+            self._embedder = EmbeddingService(
+                api_encoder(self.config_obj.embedding_server_url, "", self.config_obj.embedding_model),
+                service_config
+            )
+            self._embedding_service = "server"
+            logger.info(f"Using shared embedding server at {self.config_obj.embedding_server_url}")
+            return
+        
         try:
             from sentence_transformers import SentenceTransformer
             
             # Use local embedding model
             model_name = self.config.get("embedding_model_path", "all-MiniLM-L6-v2")
             self._embedding_model = SentenceTransformer(model_name)
+            self._embedder = EmbeddingService(
+                sentence_transformer_encoder(
+                    self._embedding_model, self.config_obj.embedding_batch_size
+                ),
+                service_config
+            )
             self._embedding_service = "local"
             logger.info(f"Initialized local embedding model: {model_name}")
             
@@ -127,11 +302,178 @@ class KBAgent(BaseAgent):
             # Fallback to API-based embedding
             self._embedding_model = None
             self._embedding_service = "api"
+            api_endpoint = self.config.get("embedding_api_endpoint", "")
+            if api_endpoint:
+                self._embedder = EmbeddingService(
+                    api_encoder(
+                        api_endpoint,
+                        self.config.get("embedding_api_key", ""),
+                        self.config_obj.embedding_model
+                    ),
+                    service_config
+                )
             logger.info("Using API-based embedding service")
         except Exception as e:
             logger.warning(f"Failed to initialize embedding service: {e}")
             self._embedding_service = None
     
+    def _init_local_index(self):
+        """Initialize the in-process vector index used when Qdrant is unreachable
+        
+        KR-04: 语义检索能力 - 离线环境下的本地向量检索
+        """
+        if self._vector_db_client is not None or not self.config_obj.enable_local_index:
+            return
+        
+        backend = self.config_obj.local_index_backend
+        try:
+            if backend != "exact":
+                try:
+                    self._local_index = create_ann_index(backend, ANNIndexConfig(
+                        index_dir=self.config_obj.local_index_dir,
+                        nlist=self.config_obj.ann_nlist,
+                        nprobe=self.config_obj.ann_nprobe,
+                        pq_m=self.config_obj.ann_pq_m,
+                        hnsw_ef_search=self.config_obj.ann_ef_search
+                    ))
+                except ImportError:
+                    logger.warning(f"{backend} backend not installed, using exact local index")
+            if self._local_index is None:
+                self._local_index = LocalVectorIndex(
+                    LocalIndexConfig(index_dir=self.config_obj.local_index_dir)
+                )
+            logger.info(
+                f"Using local vector index at {self.config_obj.local_index_dir} "
+                f"({len(self._local_index)} knowledge units)"
+            )
+        except Exception as e:
+            logger.warning(f"Failed to open local vector index: {e}")
+    
+    def _init_hybrid_search(self):
+        """Initialize the BM25 keyword index and optional cross-encoder reranker
+        
+        KR-05: 混合检索支持 - 关键词检索与重排序
+        """
+        if not self.config_obj.enable_hybrid_search:
+            return
+        
+        try:
+            self._keyword_index = BM25Index(
+                KeywordIndexConfig(index_dir=self.config_obj.keyword_index_dir)
+            )
+            logger.info(
+                f"Using keyword index at {self.config_obj.keyword_index_dir} "
+                f"({len(self._keyword_index)} knowledge units)"
+            )
+        except Exception as e:
+            logger.warning(f"Failed to open keyword index: {e}")
+        
+        if self.config_obj.rerank_model:
+            self._reranker = CrossEncoderReranker(self.config_obj.rerank_model)
+    
+    def _init_capture_queue(self):
+        """Initialize the write-behind knowledge capture queue
+        
+        KR-02: 知识自动沉淀 - 异步批量写入，不阻塞工作流
+        """
+        self._capture_queue: Optional[KnowledgeCaptureQueue] = None
+        
+        if not self.config_obj.enable_capture_queue:
+            return
+        
+        try:
+            self._capture_queue = KnowledgeCaptureQueue(
+                self._write_knowledge_batch,
+                CaptureQueueConfig(
+                    spool_path=self.config_obj.capture_spool_path,
+                    batch_size=self.config_obj.capture_batch_size,
+                    flush_interval_ms=self.config_obj.capture_flush_interval_ms,
+                    max_retries=self.config_obj.capture_max_retries
+                )
+            )
+        except Exception as e:
+            logger.warning(f"Failed to open knowledge capture spool: {e}, capturing inline")
+    
+    async def flush_knowledge(self) -> None:
+        """Write all queued knowledge units before shutdown"""
+        if self._capture_queue is not None:
+            await self._capture_queue.close()
+    
+    async def import_documents(
+        self,
+        paths: List[str],
+        product_line: Optional[str] = None,
+        tags: Optional[List[str]] = None
+    ) -> IngestionStats:
+        """
+        Import existing documents into the knowledge base
+        
+        Files are chunked with overlap in a process pool, deduplicated by
+        chunk hash, then embedded and upserted in batches. Progress is
+        checkpointed, so calling this again with the same paths resumes an
+        interrupted import and only re-imports modified files.
+        
+        FR-22: 文档导入 - 从现有文档构建知识库
+        
+        Args:
+            paths: Files or directories to import
+            product_line: Product line recorded on every chunk
+            tags: Tags recorded on every chunk
+            
+        Returns:
+            Ingestion statistics
+        """
+        await self.ensure_ready()
+        
+        pipeline = IngestionPipeline(
+            IngestionConfig(
+                chunk_size=self.config_obj.ingest_chunk_size,
+                chunk_overlap=self.config_obj.ingest_chunk_overlap,
+                batch_size=self.config_obj.embedding_batch_size,
+                workers=self.config_obj.ingest_workers,
+                checkpoint_path=self.config_obj.ingest_checkpoint_path
+            )
+        )
+        metadata = {
+            "type": "document",
+            "product_line": product_line or "unknown",
+            "tags": tags or [],
+            "imported_at": datetime.utcnow().isoformat()
+        }
+        
+        batches = pipeline.iter_batches(paths, defer_commit=True)
+        while True:
+            # Chunking blocks on the worker pool, so step the generator off the event loop
+            batch = await asyncio.to_thread(next, batches, None)
+            if pipeline.commit_ready:
+                # Persist the indexes holding the earlier batches, then checkpoint
+                # their segments; both on the loop, so index saves never race
+                # the capture queue's writes
+                self._save_indexes()
+                pipeline.commit()
+            if batch is None:
+                break
+            await self._write_knowledge_batch(
+                [self._chunk_to_knowledge_unit(chunk, metadata) for chunk in batch],
+                persist=False
+            )
+        
+        stats = pipeline.stats
+        logger.info(
+            f"Imported {stats.chunks} chunks from {stats.files} files "
+            f"({stats.duplicates} duplicates, {stats.skipped_segments} segments already imported)"
+        )
+        return stats
+    
+    def _chunk_to_knowledge_unit(self, chunk: DocumentChunk, metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a knowledge unit for an imported document chunk"""
+        return {
+            "id": f"doc_{chunk.chunk_id[:24]}",
+            "title": os.path.basename(chunk.source),
+            "content": chunk.text,
+            "metadata": {**metadata, "source": chunk.source, "offset": chunk.offset}
+        }
+    
     async def execute(self, state: AgentState) -> Dict[str, Any]:
         """
         Execute KBAgent logic based on current state and next_action
@@ -144,6 +486,10 @@ class KBAgent(BaseAgent):
         """
         next_action = state.get("next_action", "retrieve")
         
+        # Drain units recovered from the spool once we are on the event loop
+        if self._capture_queue is not None:
+            self._capture_queue.start()
+        
         if next_action == "retrieve":
             return await self._retrieve_knowledge(state)
         elif next_action == "capture":
@@ -223,8 +569,16 @@ class KBAgent(BaseAgent):
             # Extract iteration data from state
             knowledge_unit = self._extract_knowledge_unit(state)
             
-            # Placeholder: Store to knowledge base
-            # In production, this would store to Qdrant + PostgreSQL
+            # Hand off to the write-behind queue so the workflow is not
+            # blocked on embedding and vector store writes
+            if self._capture_queue is not None:
+                if not self._capture_queue.submit(knowledge_unit):
+                    return {
+                        "messages": ["Knowledge capture skipped - identical knowledge already stored"],
+                        "analysis_report": {"knowledge_captured": False, "duplicate": True}
+                    }
+            else:
+                await self._store_knowledge(knowledge_unit)
             
             return {
                 "messages": [f"Knowledge captured: {knowledge_unit.get('title', 'Unknown')}"],
@@ -289,16 +643,46 @@ class KBAgent(BaseAgent):
         Returns:
             List of knowledge units matching the query
         """
+        await self.ensure_ready()
+        
+        max_results = context.get("max_results", self.config_obj.default_max_results)
+        hybrid = self._keyword_index is not None
+        # Over-fetch from each retriever so fusion and reranking have candidates
+        if hybrid or self._reranker is not None:
+            context = {**context, "max_results": max(max_results, self.config_obj.hybrid_candidates)}
+        
+        vector_results: Optional[List[Dict[str, Any]]] = None
+        
         # Use actual vector search if Qdrant is available
         if self._vector_db_client is not None and self._embedding_service:
             try:
-                results = await self._semantic_search(query, context)
-                if results:
-                    return results
+                vector_results = await self._semantic_search(query, context)
+            except Exception as e:
+                logger.warning(f"Qdrant search failed: {e}, falling back to local index")
+        
+        # Use the in-process index if Qdrant is not available
+        if vector_results is None and self._local_index is not None and self._embedder is not None:
+            try:
+                vector_results = await self._local_search(query, context)
             except Exception as e:
-                logger.warning(f"Qdrant search failed: {e}, falling back to placeholder")
+                logger.warning(f"Local index search failed: {e}")
         
-        # Fallback to placeholder if Qdrant is not available
+        keyword_results = []
+        if hybrid:
+            try:
+                keyword_results = self._keyword_search(query, context)
+            except Exception as e:
+                logger.warning(f"Keyword search failed: {e}")
+        
+        if vector_results is not None or keyword_results:
+            results = vector_results or []
+            if keyword_results:
+                results = self._fuse_results(results, keyword_results)
+            if self._reranker is not None:
+                results = await self._rerank(query, results)
+            return results[:max_results]
+        
+        # Fallback to placeholder if no vector store is available
         return [
             {
                 "id": "placeholder_1",
@@ -330,12 +714,12 @@ class KBAgent(BaseAgent):
             List of knowledge units with scores
         """
         # Generate embedding for query
-        query_embedding = self._get_embedding(query)
+        query_embedding = await self._get_embedding(query)
         if query_embedding is None:
             return []
         
         # Build filter conditions from context
-        from qdrant_client.models import Filter, FieldCondition, MatchValue
+        from qdrant_client.models import Filter, FieldCondition, MatchValue, SearchParams
         
         filters = []
         product_line = context.get("product_line")
@@ -353,7 +737,8 @@ class KBAgent(BaseAgent):
             query_vector=query_embedding,
             limit=max_results,
             score_threshold=score_threshold,
-            query_filter=Filter(must=filters) if filters else None
+            query_filter=Filter(must=filters) if filters else None,
+            search_params=SearchParams(hnsw_ef=self.config_obj.ann_ef_search)
         )
         
         # Format results
@@ -361,7 +746,7 @@ class KBAgent(BaseAgent):
         for hit in search_result:
             payload = hit.payload or {}
             results.append({
-                "id": hit.id,
+                "id": payload.get("unit_id", hit.id),
                 "content": payload.get("content", ""),
                 "title": payload.get("title", ""),
                 "confidence": hit.score,
@@ -371,72 +756,208 @@ class KBAgent(BaseAgent):
         logger.info(f"Semantic search returned {len(results)} results for query: {query[:50]}...")
         return results
     
-    def _get_embedding(self, text: str) -> Optional[List[float]]:
+    async def _local_search(
+        self,
+        query: str,
+        context: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
         """
-        Generate embedding vector for text
+        Perform semantic search using the local vector index
         
-        KR-04: Vectorize query using embedding service
+        Args:
+            query: Search query
+            context: Search context with filters
+            
+        Returns:
+            List of knowledge units with scores
+        """
+        query_embedding = await self._get_embedding(query)
+        if query_embedding is None:
+            return []
+        
+        filters = {}
+        product_line = context.get("product_line")
+        if product_line:
+            filters["metadata.product_line"] = product_line
+        
+        max_results = context.get("max_results", self.config_obj.default_max_results)
+        score_threshold = context.get("min_score", self.config_obj.min_confidence_score)
+        
+        hits = self._local_index.search(  # type: ignore[union-attr]
+            query_embedding,
+            limit=max_results,
+            score_threshold=score_threshold,
+            filters=filters or None
+        )
+        
+        results = [
+            {
+                "id": point_id,
+                "content": payload.get("content", ""),
+                "title": payload.get("title", ""),
+                "confidence": score,
+                "metadata": payload.get("metadata", {})
+            }
+            for point_id, score, payload in hits
+        ]
+        
+        logger.info(f"Local index search returned {len(results)} results for query: {query[:50]}...")
+        return results
+    
+    def _keyword_search(
+        self,
+        query: str,
+        context: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        """
+        Perform BM25 keyword search over knowledge unit text
+        
+        KR-05: 混合检索支持 - 错误信息、函数名、寄存器名等词法匹配
         
         Args:
-            text: Text to embed
+            query: Search query
+            context: Search context with filters
             
         Returns:
-            Embedding vector or None if failed
+            List of knowledge units; confidence is the BM25 score relative
+            to a full match of the query (see BM25Index.full_match_score),
+            and hits below the confidence threshold are dropped
         """
-        if self._embedding_service == "local" and self._embedding_model is not None:
-            try:
-                # Generate embedding using local model
-                import numpy as np
-                embedding = self._embedding_model.encode(text)  # type: ignore
-                if hasattr(embedding, 'tolist'):
-                    result = embedding.tolist()  # type: ignore
-                    return list(map(float, result)) if result else None
-                elif isinstance(embedding, np.ndarray):
-                    return embedding.tolist()
-                else:
-                    return [float(x) for x in embedding]  # type: ignore[arg-type]
-            except Exception as e:
-                logger.error(f"Local embedding generation failed: {e}")
-                return None
-        elif self._embedding_service == "api":
-            # Use API-based embedding
-            try:
-                return self._get_api_embedding(text)
-            except Exception as e:
-                logger.error(f"API embedding generation failed: {e}")
-                return None
-        else:
-            return None
+        filters = {}
+        product_line = context.get("product_line")
+        if product_line:
+            filters["metadata.product_line"] = product_line
+        
+        max_results = context.get("max_results", self.config_obj.default_max_results)
+        score_threshold = context.get("min_score", self.config_obj.min_confidence_score)
+        hits = self._keyword_index.search(  # type: ignore[union-attr]
+            query, limit=max_results, filters=filters or None
+        )
+        if not hits:
+            return []
+        
+        full_match = self._keyword_index.full_match_score(query)  # type: ignore[union-attr]
+        results = []
+        for doc_id, score, payload in hits:
+            confidence = min(1.0, score / full_match) if full_match > 0 else 0.0
+            if confidence < score_threshold:
+                continue
+            results.append({
+                "id": doc_id,
+                "content": payload.get("content", ""),
+                "title": payload.get("title", ""),
+                "confidence": confidence,
+                "keyword_score": score,
+                "metadata": payload.get("metadata", {})
+            })
+        return results
+    
+    def _fuse_results(
+        self,
+        vector_results: List[Dict[str, Any]],
+        keyword_results: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Merge vector and keyword results with reciprocal-rank fusion
+        
+        Units found by both retrievers keep their vector confidence.
+        
+        Args:
+            vector_results: Results ordered by vector similarity
+            keyword_results: Results ordered by BM25 score
+            
+        Returns:
+            Merged results ordered by fused score
+        """
+        by_id: Dict[Any, Dict[str, Any]] = {}
+        for result in keyword_results:
+            by_id[result["id"]] = result
+        for result in vector_results:
+            keyword = by_id.get(result["id"])
+            by_id[result["id"]] = {**result, "keyword_score": keyword["keyword_score"]} if keyword else result
+        
+        fused = reciprocal_rank_fusion(
+            [[r["id"] for r in vector_results], [r["id"] for r in keyword_results]],
+            k=self.config_obj.rrf_k
+        )
+        return [{**by_id[doc_id], "fusion_score": score} for doc_id, score in fused]
+    
+    async def _rerank(
+        self,
+        query: str,
+        results: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Reorder the top candidates with the cross-encoder
+        
+        Only the first ``rerank_top_n`` results are scored; the rest keep
+        their fused order after them.
+        
+        Args:
+            query: Search query
+            results: Candidates ordered best first
+            
+        Returns:
+            Reranked results
+        """
+        top_n = self.config_obj.rerank_top_n
+        head, tail = results[:top_n], results[top_n:]
+        if len(head) < 2:
+            return results
+        
+        try:
+            scores = await asyncio.to_thread(
+                self._reranker.score,  # type: ignore[union-attr]
+                query,
+                [self._knowledge_unit_text(r) for r in head]
+            )
+        except Exception as e:
+            logger.warning(f"Rerank failed: {e}, keeping fused order")
+            return results
+        
+        reranked = sorted(
+            ({**r, "rerank_score": score} for r, score in zip(head, scores)),
+            key=lambda r: r["rerank_score"],
+            reverse=True
+        )
+        return reranked + tail
     
-    def _get_api_embedding(self, text: str) -> Optional[List[float]]:
+    async def _get_embedding(self, text: str) -> Optional[np.ndarray]:
         """
-        Generate embedding using API
+        Generate embedding vector for text
+        
+        KR-04: Vectorize query using embedding service
         
         Args:
             text: Text to embed
             
         Returns:
-            Embedding vector
+            float32 embedding vector or None if failed
+        """
+        embeddings = await self._get_embeddings([text])
+        return embeddings[0] if embeddings is not None else None
+    
+    async def _get_embeddings(self, texts: List[str]) -> Optional[np.ndarray]:
         """
-        import httpx
+        Generate embeddings for a batch of texts
         
-        api_endpoint = self.config.get("embedding_api_endpoint", "")
-        api_key = self.config.get("embedding_api_key", "")
+        Does not block on backend initialization: before the embedding model
+        is ready this starts warm-up and returns None. Encoding runs on the
+        embedding service's worker thread, not the event loop.
         
-        if not api_endpoint:
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            float32 array of shape (len(texts), dim) or None if failed
+        """
+        if not self.warm_up().done() or self._embedder is None:
             return None
         
-        headers = {"Authorization": f"Bearer {api_key}"}
-        payload = {"model": self.config_obj.embedding_model, "input": text}
-        
         try:
-            with httpx.Client(timeout=30.0) as client:
-                response = client.post(api_endpoint, headers=headers, json=payload)
-                response.raise_for_status()
-                data = response.json()
-                return data["data"][0]["embedding"]
+            return await self._embedder.aembed(texts)
         except Exception as e:
-            logger.error(f"Embedding API call failed: {e}")
+            logger.error(f"{self._embedding_service} embedding generation failed: {e}")
             return None
     
     def _extract_knowledge_unit(self, state: AgentState) -> Dict[str, Any]:
@@ -465,7 +986,7 @@ class KBAgent(BaseAgent):
             "title": f"Fix iteration - {state.get('task_id', 'unknown')}",
             "content": {
                 "goal": state.get("task_request", {}).get("goal", ""),
-                "patch_summary": state.get("patch_content", "")[:500] if state.get("patch_content") else "",
+                "patch_summary": self.blob_store.preview(state.get("patch_content"), 500),
                 "analysis_summary": analysis_report.get("summary", ""),
                 "test_summary": f"Pass rate: {pass_rate*100:.1f}%"
             },
@@ -484,7 +1005,7 @@ class KBAgent(BaseAgent):
     
     async def _store_knowledge(self, knowledge_unit: Dict[str, Any]) -> bool:
         """
-        Store knowledge unit to knowledge base
+        Store a single knowledge unit to the knowledge base immediately
         
         Args:
             knowledge_unit: Knowledge unit to store
@@ -492,21 +1013,112 @@ class KBAgent(BaseAgent):
         Returns:
             True if successful
         """
-        # Placeholder implementation
-        logger.info(f"Would store knowledge unit: {knowledge_unit.get('id')}")
-        return True
+        try:
+            await self._write_knowledge_batch([knowledge_unit])
+            return True
+        except Exception as e:
+            logger.error(f"Failed to store knowledge unit {knowledge_unit.get('id')}: {e}")
+            return False
     
-    async def _vectorize(self, text: str) -> List[float]:
+    async def _write_knowledge_batch(
+        self,
+        knowledge_units: List[Dict[str, Any]],
+        persist: bool = True
+    ) -> None:
+        """
+        Embed and upsert a batch of knowledge units
+        
+        The batch is embedded in one call and written to every configured
+        store (Qdrant or the local vector index, and the keyword index).
+        Raises on failure so the capture queue can retry the batch.
+        
+        Args:
+            knowledge_units: Knowledge units to store
+            persist: Save local indexes after the batch; bulk imports pass
+                False and call _save_indexes() periodically instead
+        """
+        await self.ensure_ready()
+        
+        has_vector_store = self._vector_db_client is not None or self._local_index is not None
+        if not has_vector_store and self._keyword_index is None:
+            # Placeholder implementation
+            for knowledge_unit in knowledge_units:
+                logger.info(f"Would store knowledge unit: {knowledge_unit.get('id')}")
+            return
+        
+        ids = [ku["id"] for ku in knowledge_units]
+        texts = [self._knowledge_unit_text(ku) for ku in knowledge_units]
+        payloads = [
+            {
+                "title": ku.get("title", ""),
+                "content": ku.get("content", ""),
+                "metadata": ku.get("metadata", {})
+            }
+            for ku in knowledge_units
+        ]
+        
+        if self._keyword_index is not None:
+            self._keyword_index.add(ids, texts, payloads)
+            if persist:
+                self._keyword_index.save()
+        
+        if not has_vector_store or self._embedder is None:
+            return
+        
+        embeddings = await self._embedder.aembed(texts)
+        
+        if self._vector_db_client is not None:
+            from qdrant_client.models import PointStruct
+            
+            # Qdrant point ids must be UUIDs; keep the unit id in the payload
+            points = [
+                PointStruct(
+                    id=str(uuid.uuid5(uuid.NAMESPACE_URL, unit_id)),
+                    vector=vector.tolist(),
+                    payload={**payload, "unit_id": unit_id}
+                )
+                for unit_id, vector, payload in zip(ids, embeddings, payloads)
+            ]
+            await asyncio.to_thread(
+                self._qdrant_client.upsert,
+                collection_name=self.config_obj.collection_name,
+                points=points
+            )
+        
+        if self._local_index is not None:
+            self._local_index.add(ids, embeddings, payloads)
+            if persist:
+                self._local_index.save()
+    
+    def _save_indexes(self) -> None:
+        """Persist the local vector and keyword indexes"""
+        if self._keyword_index is not None:
+            self._keyword_index.save()
+        if self._local_index is not None:
+            self._local_index.save()
+    
+    def _knowledge_unit_text(self, knowledge_unit: Dict[str, Any]) -> str:
+        """Build the text that is embedded and keyword-indexed for a knowledge unit"""
+        content = knowledge_unit.get("content", "")
+        if isinstance(content, dict):
+            content = "\n".join(str(v) for v in content.values() if v)
+        return f"{knowledge_unit.get('title', '')}\n{content}"
+    
+    async def _vectorize(self, text: str) -> Optional[np.ndarray]:
         """
         Vectorize text using embedding service
         
+        Concurrent calls are micro-batched into a single encode call.
+        
         Args:
             text: Text to vectorize
             
         Returns:
-            Vector embedding
+            Vector embedding or None if no embedding service is available
         """
-        # Placeholder: return random vector
-        import random
-        dim = self.config_obj.embedding_dim
-        return [random.random() for _ in range(dim)]
+        await self.ensure_ready()
+        if self._embedder is None:
+            return None
+        
+        embeddings = await self._embedder.aembed([text])
+        return embeddings[0]
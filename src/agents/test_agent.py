@@ -94,6 +94,8 @@ class TestAgent(BaseAgent):
         try:
             # Create TestPlan object from dict
             plan = self._dict_to_test_plan(test_plan)
+            # Build and run the task's checkout unless the plan names another tree
+            plan.source_dir = plan.source_dir or state.get("repo_path") or None
             
             logger.info(f"Executing test plan: {plan.name}")
             
@@ -224,11 +226,12 @@ class TestAgent(BaseAgent):
             environment_type=EnvironmentType(env_type_str),
             environment_config=plan_dict.get("environment_config", {}),
             parallel=plan_dict.get("parallel", False),
-            stop_on_failure=plan_dict.get("stop_on_failure", False)
+            stop_on_failure=plan_dict.get("stop_on_failure", False),
+            source_dir=plan_dict.get("source_dir")
         )
     
     def _test_results_to_dict(self, results) -> List[Dict[str, Any]]:
-        """Convert TestResults to list of dicts for state"""
+        """Convert TestResults to list of dicts for state (large outputs become blob handles)"""
         return [
             {
                 "test_id": r.test_id,
@@ -237,8 +240,8 @@ class TestAgent(BaseAgent):
                 "start_time": r.start_time,
                 "end_time": r.end_time,
                 "duration": r.duration,
-                "output": r.output,
-                "error_message": r.error_message,
+                "output": self.blob_store.offload(r.output),
+                "error_message": self.blob_store.offload(r.error_message),
                 "artifacts": r.artifacts
             }
             for r in results.results
@@ -0,0 +1,80 @@
+"""
+Knowledge Module
+
+Implements the knowledge base layer used by KBAgent:
+- Batched text embedding with memoization
+- In-process vector index (fallback when Qdrant is unavailable)
+- Approximate nearest-neighbour indexes (IVF/IVF-PQ, optional hnswlib)
+- BM25 keyword index and hybrid fusion/rerank for KR-05
+- Write-behind knowledge capture queue with a durable spool
+- Shared embedding model server for multi-process deployments
+- Streaming, resumable document ingestion (FR-22)
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .embedding import EmbeddingService, EmbeddingServiceConfig
+    from .vector_index import LocalVectorIndex, LocalIndexConfig
+    from .ann_index import IVFIndex, HnswlibIndex, ANNIndexConfig, create_ann_index, benchmark_recall
+    from .keyword_index import BM25Index, KeywordIndexConfig
+    from .hybrid import CrossEncoderReranker, reciprocal_rank_fusion
+    from .capture_queue import KnowledgeCaptureQueue, CaptureQueueConfig
+    from .model_server import EmbeddingServer
+    from .ingestion import IngestionPipeline, IngestionConfig, IngestionStats
+
+# Submodules are imported on first access; most pull in NumPy
+_EXPORTS = {
+    "EmbeddingService": ".embedding",
+    "EmbeddingServiceConfig": ".embedding",
+    "LocalVectorIndex": ".vector_index",
+    "LocalIndexConfig": ".vector_index",
+    "IVFIndex": ".ann_index",
+    "HnswlibIndex": ".ann_index",
+    "ANNIndexConfig": ".ann_index",
+    "create_ann_index": ".ann_index",
+    "benchmark_recall": ".ann_index",
+    "BM25Index": ".keyword_index",
+    "KeywordIndexConfig": ".keyword_index",
+    "CrossEncoderReranker": ".hybrid",
+    "reciprocal_rank_fusion": ".hybrid",
+    "KnowledgeCaptureQueue": ".capture_queue",
+    "CaptureQueueConfig": ".capture_queue",
+    "EmbeddingServer": ".model_server",
+    "IngestionPipeline": ".ingestion",
+    "IngestionConfig": ".ingestion",
+    "IngestionStats": ".ingestion",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = [
+    "EmbeddingService",
+    "EmbeddingServiceConfig",
+    "LocalVectorIndex",
+    "LocalIndexConfig",
+    "IVFIndex",
+    "HnswlibIndex",
+    "ANNIndexConfig",
+    "create_ann_index",
+    "benchmark_recall",
+    "BM25Index",
+    "KeywordIndexConfig",
+    "CrossEncoderReranker",
+    "reciprocal_rank_fusion",
+    "KnowledgeCaptureQueue",
+    "CaptureQueueConfig",
+    "EmbeddingServer",
+    "IngestionPipeline",
+    "IngestionConfig",
+    "IngestionStats",
+]
@@ -0,0 +1,935 @@
+"""
+Approximate Nearest-Neighbour Index
+
+ANN indexes for large local knowledge bases, exposing the same interface as
+LocalVectorIndex (add / delete / search / save):
+
+- IVFIndex: inverted-file index with a k-means coarse quantizer and optional
+  product quantization (IVF-PQ), implemented with NumPy
+- HnswlibIndex: HNSW graph index backed by the optional ``hnswlib`` package
+
+Recall/latency is tuned with ``nprobe`` (IVF) or ``hnsw_ef_search`` (HNSW).
+As a starting point for millions of vectors use ``nlist ≈ 4 * sqrt(N)``,
+``nprobe`` 8-32 and ``pq_m = dim / 8``; validate with ``benchmark_recall``.
+
+KR-04: 语义检索能力 - 大规模知识库的近似向量检索
+"""
+
+import io
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from .vector_index import SearchHit, get_payload_field
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ANNIndexConfig:
+    """ANN index configuration"""
+    index_dir: str = "/tmp/firmware_kb_ann"
+    # IVF parameters
+    nlist: int = 1024
+    nprobe: int = 16
+    pq_m: int = 0  # number of PQ sub-quantizers; 0 stores full vectors (IVF-Flat)
+    # With PQ, re-score the best limit * rerank_factor candidates exactly using
+    # full vectors kept in a memory-mapped file (0 disables)
+    rerank_factor: int = 0
+    train_size: int = 20000  # vectors buffered before the quantizers are trained
+    kmeans_iters: int = 20
+    seed: int = 0
+    # HNSW parameters (hnswlib backend)
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 200
+    hnsw_ef_search: int = 64
+    initial_capacity: int = 10000
+    # Payload fields (dotted paths) kept in an inverted index for fast filtering
+    indexed_fields: List[str] = field(default_factory=lambda: ["metadata.product_line"])
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _assign(x: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+    """Nearest centroid (L2) for each row of ``x``."""
+    c_norm = (centroids ** 2).sum(axis=1)
+    out = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), chunk):
+        block = x[start:start + chunk]
+        out[start:start + len(block)] = (c_norm - 2.0 * block @ centroids.T).argmin(axis=1)
+    return out
+
+
+def _kmeans(
+    x: np.ndarray,
+    k: int,
+    iters: int,
+    rng: np.random.Generator,
+    spherical: bool = False
+) -> np.ndarray:
+    """Lloyd's k-means; spherical mode keeps centroids unit-length."""
+    n = len(x)
+    k = min(k, n)
+    centroids = x[rng.choice(n, k, replace=False)].astype(np.float32)
+
+    for _ in range(iters):
+        assign = _assign(x, centroids)
+        counts = np.bincount(assign, minlength=k)
+        nonempty = np.flatnonzero(counts)
+
+        order = np.argsort(assign, kind="stable")
+        starts = np.searchsorted(assign[order], nonempty)
+        sums = np.add.reduceat(x[order], starts, axis=0)
+        centroids[nonempty] = sums / counts[nonempty, None]
+
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = x[rng.choice(n, len(empty), replace=False)]
+        if spherical:
+            centroids = _normalize_rows(centroids)
+
+    return centroids
+
+
+class _InvertedList:
+    """Growable (codes, internal ids) storage for one IVF cell."""
+
+    def __init__(self, width: int, dtype: Any):
+        self.data = np.empty((0, width), dtype=dtype)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.size = 0
+
+    def append(self, rows: np.ndarray, ids: np.ndarray) -> None:
+        needed = self.size + len(rows)
+        if needed > len(self.ids):
+            capacity = max(needed, 2 * len(self.ids), 16)
+            data = np.empty((capacity, self.data.shape[1]), dtype=self.data.dtype)
+            data[:self.size] = self.data[:self.size]
+            new_ids = np.empty(capacity, dtype=np.int64)
+            new_ids[:self.size] = self.ids[:self.size]
+            self.data, self.ids = data, new_ids
+        self.data[self.size:needed] = rows
+        self.ids[self.size:needed] = ids
+        self.size = needed
+
+    def filter(self, keep: np.ndarray, remap: np.ndarray) -> None:
+        """Keep rows where ``keep`` is set and renumber their ids through ``remap``."""
+        self.data = self.data[:self.size][keep]
+        self.ids = remap[self.ids[:self.size][keep]]
+        self.size = len(self.ids)
+
+
+class _PointStore:
+    """External ids, payloads and tombstones shared by the ANN backends."""
+
+    def __init__(self, indexed_fields: List[str]):
+        self.ids: List[Any] = []  # internal id -> external id (None once deleted)
+        self.payloads: List[Optional[Dict[str, Any]]] = []
+        self.internal_of: Dict[Any, int] = {}
+        self.alive = np.zeros(0, dtype=bool)
+        self.field_index: Dict[str, Dict[Any, Set[int]]] = {f: {} for f in indexed_fields}
+
+    def __len__(self) -> int:
+        return len(self.internal_of)
+
+    def insert(self, point_id: Any, payload: Dict[str, Any]) -> Tuple[int, Optional[int]]:
+        """Register a point; returns (new internal id, replaced internal id)."""
+        replaced = self.internal_of.get(point_id)
+        if replaced is not None:
+            self.remove(point_id)
+
+        internal = len(self.ids)
+        self.ids.append(point_id)
+        self.payloads.append(payload)
+        self.internal_of[point_id] = internal
+        if internal >= len(self.alive):
+            alive = np.zeros(max(16, 2 * len(self.alive)), dtype=bool)
+            alive[:len(self.alive)] = self.alive
+            self.alive = alive
+        self.alive[internal] = True
+        self._index(internal)
+        return internal, replaced
+
+    def remove(self, point_id: Any) -> Optional[int]:
+        internal = self.internal_of.pop(point_id, None)
+        if internal is None:
+            return None
+        self._unindex(internal)
+        self.alive[internal] = False
+        self.ids[internal] = None
+        self.payloads[internal] = None
+        return internal
+
+    def allowed(self, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+        """Sorted internal ids matching all filters."""
+        allowed: Optional[Set[int]] = None
+        for path, expected in filters.items():
+            values = self.field_index.get(path)
+            if values is not None and isinstance(expected, (str, int, float, bool)):
+                matches = values.get(expected, set())
+            else:
+                matches = {
+                    i for i, payload in enumerate(self.payloads)
+                    if payload is not None and get_payload_field(payload, path) == expected
+                }
+            allowed = matches if allowed is None else allowed & matches
+        if allowed is None:
+            return None
+        return np.fromiter(sorted(allowed), dtype=np.int64, count=len(allowed))
+
+    def to_meta(self) -> Dict[str, Any]:
+        return {"ids": self.ids, "payloads": self.payloads}
+
+    def compact(self) -> Optional[np.ndarray]:
+        """
+        Drop tombstones and renumber the live points densely.
+
+        Returns:
+            Old internal id -> new internal id (-1 for deleted points), or
+            None when there was nothing to drop.
+        """
+        total = len(self.ids)
+        if len(self.internal_of) == total:
+            return None
+        alive = self.alive[:total]
+        remap = np.full(total, -1, dtype=np.int64)
+        remap[alive] = np.arange(int(alive.sum()), dtype=np.int64)
+        meta = {
+            "ids": [point_id for point_id in self.ids if point_id is not None],
+            "payloads": [payload for point_id, payload in zip(self.ids, self.payloads) if point_id is not None],
+        }
+        self.__init__(list(self.field_index))
+        self.load_meta(meta)
+        return remap
+
+    def load_meta(self, meta: Dict[str, Any]) -> None:
+        self.ids = list(meta.get("ids", []))
+        self.payloads = list(meta.get("payloads", []))
+        self.alive = np.zeros(max(16, len(self.ids)), dtype=bool)
+        for internal, point_id in enumerate(self.ids):
+            if point_id is None:
+                continue
+            self.internal_of[point_id] = internal
+            self.alive[internal] = True
+            self._index(internal)
+
+    def _index(self, internal: int) -> None:
+        payload = self.payloads[internal] or {}
+        for path, values in self.field_index.items():
+            value = get_payload_field(payload, path)
+            try:
+                values.setdefault(value, set()).add(internal)
+            except TypeError:
+                continue
+
+    def _unindex(self, internal: int) -> None:
+        payload = self.payloads[internal] or {}
+        for path, values in self.field_index.items():
+            value = get_payload_field(payload, path)
+            try:
+                members = values.get(value)
+            except TypeError:
+                continue
+            if members is not None:
+                members.discard(internal)
+                if not members:
+                    del values[value]
+
+
+def _select(
+    scores: np.ndarray,
+    internal_ids: np.ndarray,
+    store: _PointStore,
+    limit: int,
+    score_threshold: Optional[float],
+    filters: Optional[Dict[str, Any]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Apply tombstones, filters and threshold; return the best ``limit`` sorted by score."""
+    keep = store.alive[internal_ids]
+    if filters:
+        allowed = store.allowed(filters)
+        if allowed is not None:
+            keep &= np.isin(internal_ids, allowed, assume_unique=False)
+    if score_threshold is not None:
+        keep &= scores >= score_threshold
+    scores, internal_ids = scores[keep], internal_ids[keep]
+    if not len(scores):
+        return scores, internal_ids
+
+    k = min(limit, len(scores))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top], kind="stable")]
+    return scores[top], internal_ids[top]
+
+
+def _to_hits(scores: np.ndarray, internal_ids: np.ndarray, store: _PointStore) -> List[SearchHit]:
+    return [
+        (store.ids[int(i)], float(score), store.payloads[int(i)] or {})
+        for score, i in zip(scores, internal_ids)
+    ]
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index (IVF-Flat or IVF-PQ).
+
+    Vectors are L2-normalized and assigned to the nearest of ``nlist`` coarse
+    centroids. A query scans only the ``nprobe`` closest cells. With
+    ``pq_m > 0`` each vector's residual is compressed to ``pq_m`` one-byte codes
+    and scored by asymmetric distance lookup tables, so memory per vector is
+    ``pq_m`` bytes instead of ``4 * dim``.
+
+    Until ``train_size`` vectors have been added the index searches its staging
+    buffer exactly; the quantizers are then trained once and later inserts are
+    assigned incrementally. Deleted points are tombstoned and compacted away
+    when the index is trained or saved.
+    """
+
+    DATA_FILE = "ivf.npz"
+    META_FILE = "ivf_meta.json"
+    RAW_FILE = "ivf_vectors.f32"
+    # k-means sample size per centroid; more points add training time, not accuracy
+    TRAIN_POINTS_PER_CENTROID = 64
+
+    def __init__(self, config: Optional[ANNIndexConfig] = None):
+        """
+        Open (or create) an index in ``config.index_dir``.
+
+        Args:
+            config: Index configuration.
+        """
+        self.config = config or ANNIndexConfig()
+        self.index_dir = Path(self.config.index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.nprobe = self.config.nprobe
+
+        self._lock = threading.RLock()
+        self._rng = np.random.default_rng(self.config.seed)
+        self.dim: Optional[int] = None
+        self.centroids: Optional[np.ndarray] = None
+        self.codebooks: Optional[np.ndarray] = None  # (pq_m, ksub, dsub)
+        self._lists: List[_InvertedList] = []
+        # Vectors added before training, in an amortized-growth buffer
+        self._staged: Optional[_InvertedList] = None
+        self._store = _PointStore(self.config.indexed_fields)
+        self._raw: Optional[np.memmap] = None  # full vectors by internal id (PQ re-ranking)
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, point_id: Any) -> bool:
+        return point_id in self._store.internal_of
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def get(self, point_id: Any) -> Optional[Dict[str, Any]]:
+        """Return the payload of a point, or None if absent."""
+        internal = self._store.internal_of.get(point_id)
+        return None if internal is None else self._store.payloads[internal]
+
+    def add(
+        self,
+        ids: Sequence[Any],
+        vectors: Any,
+        payloads: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Insert or replace points.
+
+        Args:
+            ids: Point ids (JSON-serializable); existing ids are overwritten.
+            vectors: Array-like of shape (len(ids), dim).
+            payloads: Optional payload dict per point.
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.shape[0] != len(ids):
+            raise ValueError(f"Got {matrix.shape[0]} vectors for {len(ids)} ids")
+        if not len(ids):
+            return
+        matrix = _normalize_rows(matrix)
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Vector dim {matrix.shape[1]} does not match index dim {self.dim}")
+
+            internal_ids = np.empty(len(ids), dtype=np.int64)
+            for row, point_id in enumerate(ids):
+                payload = dict(payloads[row]) if payloads is not None else {}
+                internal_ids[row], _ = self._store.insert(point_id, payload)
+
+            if self.config.pq_m and self.config.rerank_factor:
+                self._write_raw(matrix, internal_ids)
+
+            if self.is_trained:
+                self._insert(matrix, internal_ids)
+            else:
+                if self._staged is None:
+                    self._staged = _InvertedList(self.dim, np.float32)
+                self._staged.append(matrix, internal_ids)
+                if self._staged.size >= self.config.train_size:
+                    self.train()
+
+    def delete(self, ids: Iterable[Any]) -> int:
+        """
+        Delete points by id.
+
+        Args:
+            ids: Point ids to delete.
+
+        Returns:
+            Number of points removed.
+        """
+        with self._lock:
+            return sum(1 for point_id in ids if self._store.remove(point_id) is not None)
+
+    def train(self) -> None:
+        """Train the coarse (and PQ) quantizers on the staged vectors."""
+        with self._lock:
+            if self.is_trained or self._staged is None or not self._staged.size:
+                return
+
+            self.compact()
+            x = self._staged.data[:self._staged.size]
+            if not len(x):
+                return
+            nlist = max(1, min(self.config.nlist, len(x)))
+            coarse_sample = self._sample(x, nlist * self.TRAIN_POINTS_PER_CENTROID)
+            self.centroids = _kmeans(
+                coarse_sample, nlist, self.config.kmeans_iters, self._rng, spherical=True
+            )
+
+            if self.config.pq_m:
+                if self.dim % self.config.pq_m:  # type: ignore[operator]
+                    raise ValueError(f"pq_m={self.config.pq_m} must divide dim={self.dim}")
+                pq_sample = self._sample(x, 256 * self.TRAIN_POINTS_PER_CENTROID)
+                residuals = pq_sample - self.centroids[_assign(pq_sample, self.centroids)]
+                dsub = self.dim // self.config.pq_m  # type: ignore[operator]
+                ksub = min(256, len(pq_sample))
+                self.codebooks = np.stack([
+                    _kmeans(
+                        np.ascontiguousarray(residuals[:, m * dsub:(m + 1) * dsub]),
+                        ksub, self.config.kmeans_iters, self._rng
+                    )
+                    for m in range(self.config.pq_m)
+                ])
+
+            width = self.config.pq_m or self.dim
+            dtype = np.uint8 if self.config.pq_m else np.float32
+            self._lists = [_InvertedList(width, dtype) for _ in range(len(self.centroids))]
+
+            staged_ids = self._staged.ids[:self._staged.size]
+            self._staged = None
+            self._insert(x, staged_ids)
+            logger.info(
+                f"Trained IVF index: nlist={len(self.centroids)}, pq_m={self.config.pq_m}, "
+                f"{len(x)} training vectors"
+            )
+
+    def search(
+        self,
+        query: Any,
+        limit: int = 10,
+        score_threshold: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchHit]:
+        """
+        Find approximately the most similar points to a query vector.
+
+        Args:
+            query: Query vector of shape (dim,).
+            limit: Maximum number of hits.
+            score_threshold: Minimum (approximate) cosine similarity.
+            filters: Exact-match payload filters keyed by dotted path.
+
+        Returns:
+            List of (id, score, payload) sorted by descending score.
+        """
+        with self._lock:
+            if not len(self._store) or limit <= 0:
+                return []
+
+            q = np.asarray(query, dtype=np.float32).reshape(-1)
+            if q.shape[0] != self.dim:
+                raise ValueError(f"Query dim {q.shape[0]} does not match index dim {self.dim}")
+            norm = float(np.linalg.norm(q))
+            if norm == 0:
+                return []
+            q = q / norm
+
+            if not self.is_trained:
+                if self._staged is None:
+                    return []
+                scores = self._staged.data[:self._staged.size] @ q
+                internal_ids = self._staged.ids[:self._staged.size]
+            else:
+                scores, internal_ids = self._scan(q)
+
+            if self._raw is not None and self.codebooks is not None:
+                # Re-score the best PQ candidates with the full-precision vectors
+                scores, internal_ids = _select(
+                    scores, internal_ids, self._store,
+                    limit * self.config.rerank_factor, None, filters
+                )
+                scores = self._raw[internal_ids] @ q
+                filters = None
+
+            return _to_hits(
+                *_select(scores, internal_ids, self._store, limit, score_threshold, filters),
+                self._store
+            )
+
+    def compact(self) -> int:
+        """
+        Remove deleted points from the inverted lists, the staging buffer,
+        the re-ranking vectors and the id space.
+
+        Returns:
+            Number of tombstones dropped.
+        """
+        with self._lock:
+            total = len(self._store.ids)
+            keep = self._store.alive[:total].copy()
+            remap = self._store.compact()
+            if remap is None:
+                return 0
+            for inverted in self._lists + ([self._staged] if self._staged is not None else []):
+                inverted.filter(keep[inverted.ids[:inverted.size]], remap)
+            if self._raw is not None:
+                live = np.asarray(self._raw[:total][keep])
+                self._raw[:len(live)] = live
+            dropped = total - len(self._store)
+            logger.debug(f"Compacted {dropped} deleted points from IVF index")
+            return dropped
+
+    def save(self) -> None:
+        """Compact tombstones, then atomically persist quantizers, inverted lists, ids and payloads."""
+        with self._lock:
+            self.compact()
+            arrays: Dict[str, np.ndarray] = {}
+            if self.centroids is not None:
+                arrays["centroids"] = self.centroids
+                arrays["list_sizes"] = np.asarray([l.size for l in self._lists], dtype=np.int64)
+                arrays["list_data"] = np.concatenate([l.data[:l.size] for l in self._lists])
+                arrays["list_ids"] = np.concatenate([l.ids[:l.size] for l in self._lists])
+            if self.codebooks is not None:
+                arrays["codebooks"] = self.codebooks
+            if self._staged is not None and self._staged.size:
+                arrays["staged_vectors"] = self._staged.data[:self._staged.size]
+                arrays["staged_ids"] = self._staged.ids[:self._staged.size]
+
+            buffer = io.BytesIO()
+            np.savez(buffer, **arrays)
+            self._write_atomic(self.index_dir / self.DATA_FILE, buffer.getvalue())
+
+            if self._raw is not None:
+                self._raw.flush()
+
+            meta = {"dim": self.dim, "pq_m": self.config.pq_m, **self._store.to_meta()}
+            self._write_atomic(self.index_dir / self.META_FILE, json.dumps(meta).encode("utf-8"))
+
+    def _write_raw(self, matrix: np.ndarray, internal_ids: np.ndarray) -> None:
+        needed = len(self._store.ids)
+        capacity = 0 if self._raw is None else len(self._raw)
+        if needed > capacity:
+            capacity = max(needed, 2 * capacity, self.config.initial_capacity)
+            self._open_raw(capacity)
+        self._raw[internal_ids] = matrix  # type: ignore[index]
+
+    def _open_raw(self, capacity: int) -> None:
+        raw_path = self.index_dir / self.RAW_FILE
+        if self._raw is not None:
+            self._raw.flush()
+            self._raw = None
+        mode = "r+b" if raw_path.exists() else "w+b"
+        with open(raw_path, mode) as f:
+            f.truncate(capacity * self.dim * 4)  # type: ignore[operator]
+        self._raw = np.memmap(raw_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+
+    def _sample(self, x: np.ndarray, size: int) -> np.ndarray:
+        if len(x) <= size:
+            return x
+        return x[self._rng.choice(len(x), size, replace=False)]
+
+    def _scan(self, q: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Score every vector in the ``nprobe`` cells closest to ``q``."""
+        centroids = self.centroids
+        nprobe = max(1, min(self.nprobe, len(centroids)))  # type: ignore[arg-type]
+        coarse = centroids @ q  # type: ignore[operator]
+        probe = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+
+        score_parts, id_parts = [], []
+        for cell in probe:
+            inverted = self._lists[cell]
+            if not inverted.size:
+                continue
+            data = inverted.data[:inverted.size]
+            if self.codebooks is not None:
+                m = self.config.pq_m
+                residual = (q - centroids[cell]).reshape(m, 1, -1)  # type: ignore[index]
+                tables = ((residual - self.codebooks) ** 2).sum(axis=2)
+                distances = tables[np.arange(m), data].sum(axis=1)
+                # Unit vectors: ||x - q||^2 = 2 - 2 cos(x, q)
+                score_parts.append(1.0 - distances / 2.0)
+            else:
+                score_parts.append(data @ q)
+            id_parts.append(inverted.ids[:inverted.size])
+
+        if not score_parts:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        return np.concatenate(score_parts), np.concatenate(id_parts)
+
+    def _insert(self, matrix: np.ndarray, internal_ids: np.ndarray) -> None:
+        cells = _assign(matrix, self.centroids)  # type: ignore[arg-type]
+        if self.codebooks is not None:
+            rows = self._encode(matrix - self.centroids[cells])  # type: ignore[index]
+        else:
+            rows = matrix
+        for cell in np.unique(cells):
+            members = cells == cell
+            self._lists[cell].append(rows[members], internal_ids[members])
+
+    def _encode(self, residuals: np.ndarray) -> np.ndarray:
+        m = self.config.pq_m
+        dsub = residuals.shape[1] // m
+        codes = np.empty((len(residuals), m), dtype=np.uint8)
+        for i in range(m):
+            codes[:, i] = _assign(residuals[:, i * dsub:(i + 1) * dsub], self.codebooks[i])  # type: ignore[index]
+        return codes
+
+    def _load(self) -> None:
+        meta_path = self.index_dir / self.META_FILE
+        data_path = self.index_dir / self.DATA_FILE
+        if not meta_path.exists() or not data_path.exists():
+            return
+
+        try:
+            meta = json.loads(meta_path.read_text())
+            with np.load(data_path) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load IVF index: {e}")
+            return
+
+        if meta.get("pq_m", 0) != self.config.pq_m:
+            logger.warning("IVF index on disk uses a different pq_m, starting empty")
+            return
+
+        self.dim = meta.get("dim")
+        self._store.load_meta(meta)
+        if "centroids" in arrays:
+            self.centroids = arrays["centroids"]
+            self.codebooks = arrays["codebooks"] if "codebooks" in arrays else None
+            width = self.config.pq_m or self.dim
+            dtype = np.uint8 if self.config.pq_m else np.float32
+            self._lists = [_InvertedList(width, dtype) for _ in range(len(self.centroids))]
+            offset = 0
+            for cell, size in enumerate(arrays["list_sizes"]):
+                size = int(size)
+                self._lists[cell].append(
+                    arrays["list_data"][offset:offset + size], arrays["list_ids"][offset:offset + size]
+                )
+                offset += size
+        if "staged_ids" in arrays:
+            self._staged = _InvertedList(self.dim, np.float32)
+            self._staged.append(arrays["staged_vectors"], arrays["staged_ids"])
+
+        raw_path = self.index_dir / self.RAW_FILE
+        if self.config.pq_m and self.config.rerank_factor and self.dim:
+            rows = raw_path.stat().st_size // (self.dim * 4) if raw_path.exists() else 0
+            if rows >= len(self._store.ids):
+                self._open_raw(max(rows, 1))
+            else:
+                logger.warning("IVF re-ranking vectors are missing, re-ranking disabled")
+
+        logger.info(f"Loaded IVF index with {len(self._store)} points from {self.index_dir}")
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+
+
+class HnswlibIndex:
+    """
+    HNSW graph index backed by the optional ``hnswlib`` package.
+
+    Raises ImportError on construction if hnswlib is not installed.
+    """
+
+    DATA_FILE = "hnsw.bin"
+    META_FILE = "hnsw_meta.json"
+
+    def __init__(self, config: Optional[ANNIndexConfig] = None):
+        """
+        Open (or create) an index in ``config.index_dir``.
+
+        Args:
+            config: Index configuration.
+        """
+        import hnswlib
+
+        self._hnswlib = hnswlib
+        self.config = config or ANNIndexConfig()
+        self.index_dir = Path(self.config.index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        self.ef_search = self.config.hnsw_ef_search
+
+        self._lock = threading.RLock()
+        self.dim: Optional[int] = None
+        self._index: Any = None
+        self._store = _PointStore(self.config.indexed_fields)
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, point_id: Any) -> bool:
+        return point_id in self._store.internal_of
+
+    def get(self, point_id: Any) -> Optional[Dict[str, Any]]:
+        """Return the payload of a point, or None if absent."""
+        internal = self._store.internal_of.get(point_id)
+        return None if internal is None else self._store.payloads[internal]
+
+    def add(
+        self,
+        ids: Sequence[Any],
+        vectors: Any,
+        payloads: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> None:
+        """Insert or replace points (see IVFIndex.add)."""
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.shape[0] != len(ids):
+            raise ValueError(f"Got {matrix.shape[0]} vectors for {len(ids)} ids")
+        if not len(ids):
+            return
+
+        with self._lock:
+            if self._index is None:
+                self.dim = matrix.shape[1]
+                self._index = self._hnswlib.Index(space="cosine", dim=self.dim)
+                self._index.init_index(
+                    max_elements=self.config.initial_capacity,
+                    ef_construction=self.config.hnsw_ef_construction,
+                    M=self.config.hnsw_m,
+                )
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Vector dim {matrix.shape[1]} does not match index dim {self.dim}")
+
+            labels = np.empty(len(ids), dtype=np.int64)
+            for row, point_id in enumerate(ids):
+                payload = dict(payloads[row]) if payloads is not None else {}
+                labels[row], replaced = self._store.insert(point_id, payload)
+                if replaced is not None:
+                    self._index.mark_deleted(replaced)
+
+            needed = len(self._store.ids)
+            if needed > self._index.get_max_elements():
+                self._index.resize_index(max(needed, 2 * self._index.get_max_elements()))
+            self._index.add_items(matrix, labels)
+
+    def delete(self, ids: Iterable[Any]) -> int:
+        """Delete points by id."""
+        removed = 0
+        with self._lock:
+            for point_id in ids:
+                internal = self._store.remove(point_id)
+                if internal is not None:
+                    self._index.mark_deleted(internal)
+                    removed += 1
+        return removed
+
+    def search(
+        self,
+        query: Any,
+        limit: int = 10,
+        score_threshold: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchHit]:
+        """Find approximately the most similar points (see IVFIndex.search)."""
+        with self._lock:
+            if not len(self._store) or limit <= 0:
+                return []
+
+            k = min(limit, len(self._store))
+            self._index.set_ef(max(self.ef_search, k))
+            query_filter = None
+            if filters:
+                allowed = self._store.allowed(filters)
+                if allowed is not None:
+                    if not len(allowed):
+                        return []
+                    allowed_set = set(allowed.tolist())
+                    k = min(k, len(allowed_set))
+                    query_filter = allowed_set.__contains__
+
+            labels, distances = self._index.knn_query(
+                np.asarray(query, dtype=np.float32).reshape(1, -1), k=k, filter=query_filter
+            )
+            scores = 1.0 - distances[0]
+            return _to_hits(
+                *_select(
+                    scores.astype(np.float32), labels[0].astype(np.int64),
+                    self._store, limit, score_threshold, None
+                ),
+                self._store
+            )
+
+    def save(self) -> None:
+        """Persist the graph, ids and payloads."""
+        with self._lock:
+            if self._index is None:
+                return
+            data_path = self.index_dir / self.DATA_FILE
+            tmp_path = data_path.with_suffix(".tmp")
+            self._index.save_index(str(tmp_path))
+            os.replace(tmp_path, data_path)
+
+            meta = {"dim": self.dim, **self._store.to_meta()}
+            meta_path = self.index_dir / self.META_FILE
+            tmp_meta = meta_path.with_suffix(".tmp")
+            tmp_meta.write_text(json.dumps(meta))
+            os.replace(tmp_meta, meta_path)
+
+    def _load(self) -> None:
+        meta_path = self.index_dir / self.META_FILE
+        data_path = self.index_dir / self.DATA_FILE
+        if not meta_path.exists() or not data_path.exists():
+            return
+
+        try:
+            meta = json.loads(meta_path.read_text())
+            self.dim = meta["dim"]
+            self._index = self._hnswlib.Index(space="cosine", dim=self.dim)
+            self._index.load_index(str(data_path), max_elements=max(
+                self.config.initial_capacity, len(meta.get("ids", []))
+            ))
+        except (OSError, ValueError, KeyError, RuntimeError) as e:
+            logger.warning(f"Failed to load HNSW index: {e}")
+            self.dim, self._index = None, None
+            return
+
+        self._store.load_meta(meta)
+        logger.info(f"Loaded HNSW index with {len(self._store)} points from {self.index_dir}")
+
+
+def create_ann_index(backend: str, config: Optional[ANNIndexConfig] = None):
+    """
+    Create an ANN index by backend name.
+
+    Args:
+        backend: "ivf" or "hnswlib".
+        config: Index configuration.
+
+    Returns:
+        IVFIndex or HnswlibIndex.
+    """
+    if backend == "ivf":
+        return IVFIndex(config)
+    if backend == "hnswlib":
+        return HnswlibIndex(config)
+    raise ValueError(f"Unknown ANN backend: {backend}")
+
+
+def benchmark_recall(index: Any, exact_index: Any, queries: Any, k: int = 10) -> Dict[str, float]:
+    """
+    Measure recall@k and mean latency of an ANN index against exact search.
+
+    Both indexes must contain the same points (e.g. a LocalVectorIndex loaded
+    with the same vectors as the ANN index).
+
+    Args:
+        index: ANN index under test.
+        exact_index: Exact (brute-force) index used as ground truth.
+        queries: Array-like of query vectors, shape (n, dim).
+        k: Number of neighbours compared per query.
+
+    Returns:
+        Dict with recall_at_k, ann_latency_ms and exact_latency_ms.
+    """
+    found = expected = 0
+    ann_seconds = exact_seconds = 0.0
+    queries = np.asarray(queries, dtype=np.float32)
+
+    for q in queries:
+        start = time.perf_counter()
+        approx = index.search(q, limit=k)
+        middle = time.perf_counter()
+        truth = exact_index.search(q, limit=k)
+        exact_seconds += time.perf_counter() - middle
+        ann_seconds += middle - start
+
+        truth_ids = {hit[0] for hit in truth}
+        found += sum(1 for hit in approx if hit[0] in truth_ids)
+        expected += len(truth_ids)
+
+    n = max(1, len(queries))
+    return {
+        "recall_at_k": found / expected if expected else 1.0,
+        "ann_latency_ms": 1000.0 * ann_seconds / n,
+        "exact_latency_ms": 1000.0 * exact_seconds / n,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    from .vector_index import LocalVectorIndex, LocalIndexConfig
+
+    parser = argparse.ArgumentParser(description="Recall@k benchmark of the IVF index vs exact search")
+    parser.add_argument("--num-vectors", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--pq-m", type=int, default=0)
+    parser.add_argument("--rerank-factor", type=int, default=0)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("-k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    # Clustered data approximates real embedding distributions better than uniform noise
+    centers = rng.normal(size=(256, args.dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, 256, args.num_vectors)]
+    vectors += 0.3 * rng.normal(size=vectors.shape).astype(np.float32)
+    ids = list(range(args.num_vectors))
+
+    with tempfile.TemporaryDirectory() as ann_dir, tempfile.TemporaryDirectory() as exact_dir:
+        ann = IVFIndex(ANNIndexConfig(
+            index_dir=ann_dir, nlist=args.nlist, nprobe=args.nprobe,
+            pq_m=args.pq_m, rerank_factor=args.rerank_factor,
+            train_size=min(args.num_vectors, 50 * args.nlist)
+        ))
+        exact = LocalVectorIndex(LocalIndexConfig(index_dir=exact_dir))
+        for start in range(0, args.num_vectors, 50000):
+            ann.add(ids[start:start + 50000], vectors[start:start + 50000])
+            exact.add(ids[start:start + 50000], vectors[start:start + 50000])
+        ann.train()
+
+        queries = vectors[rng.integers(0, args.num_vectors, args.queries)]
+        queries += 0.1 * rng.normal(size=queries.shape).astype(np.float32)
+        print(json.dumps(benchmark_recall(ann, exact, queries, k=args.k), indent=2))
@@ -0,0 +1,242 @@
+"""
+Knowledge Capture Queue
+
+Write-behind queue for knowledge units produced at the end of a task.
+
+Units are appended to a local spool file and acknowledged immediately; a
+background task drains them in batches through a writer coroutine that embeds
+and upserts the whole batch at once. Pending units survive restarts via the
+spool and are drained as soon as the queue runs on an event loop; units whose
+content hash was already written are dropped.
+
+KR-02: 知识自动沉淀 - 异步批量写入
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# Persists a batch of knowledge units; raising marks the batch for retry
+BatchWriter = Callable[[List[Dict[str, Any]]], Awaitable[None]]
+
+
+@dataclass
+class CaptureQueueConfig:
+    """Capture queue configuration"""
+    spool_path: str = "/tmp/firmware_kb_spool.jsonl"
+    batch_size: int = 32
+    # How long to wait for more units before writing a partial batch
+    flush_interval_ms: float = 200.0
+    max_retries: int = 3
+    retry_backoff_s: float = 0.5
+    # fsync the spool on every submit (durable across power loss, slower)
+    fsync: bool = False
+
+
+def content_hash(knowledge_unit: Dict[str, Any]) -> str:
+    """
+    Hash the title and content of a knowledge unit.
+
+    Ids and metadata (timestamps, iteration numbers) are excluded so that
+    repeated identical iterations hash the same.
+    """
+    body = json.dumps(
+        {"title": knowledge_unit.get("title", ""), "content": knowledge_unit.get("content", "")},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class KnowledgeCaptureQueue:
+    """
+    Durable, batched write-behind queue for knowledge units.
+
+    ``submit()`` only appends to the spool file, so callers never wait on
+    embedding or network writes. The spool is rewritten to contain only
+    unwritten units after each successful batch, and hashes of written units
+    are appended to a sidecar file used for deduplication.
+
+    The drain task assumes all callers share a single event loop.
+    """
+
+    def __init__(self, writer: BatchWriter, config: Optional[CaptureQueueConfig] = None):
+        """
+        Initialize the queue and recover units left in the spool.
+
+        Args:
+            writer: Coroutine function persisting a batch of knowledge units.
+            config: Queue configuration.
+        """
+        self._writer = writer
+        self.config = config or CaptureQueueConfig()
+        self.spool_path = Path(self.config.spool_path)
+        self.hashes_path = self.spool_path.with_suffix(".hashes")
+        self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._pending: List[Dict[str, Any]] = []  # spool records: {"hash", "unit"}
+        self._pending_hashes: Set[str] = set()
+        self._written_hashes: Set[str] = set()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        """
+        Start draining units recovered from the spool.
+
+        Called on construction; a queue created outside an event loop must
+        call it again once a loop is running (submit() also starts the drain).
+        """
+        if self._pending:
+            self._ensure_drain_task()
+
+    def submit(self, knowledge_unit: Dict[str, Any]) -> bool:
+        """
+        Enqueue a knowledge unit for writing.
+
+        Args:
+            knowledge_unit: Knowledge unit dict with ``id``, ``title`` and ``content``.
+
+        Returns:
+            False if a unit with identical content is already pending or written.
+        """
+        digest = content_hash(knowledge_unit)
+        if digest in self._written_hashes or digest in self._pending_hashes:
+            logger.info(f"Skipping duplicate knowledge unit {knowledge_unit.get('id')}")
+            return False
+
+        record = {"hash": digest, "unit": knowledge_unit}
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+            if self.config.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        self._pending.append(record)
+        self._pending_hashes.add(digest)
+        self._ensure_drain_task()
+        return True
+
+    async def flush(self) -> None:
+        """Write all pending units now, raising if a batch still fails after retries."""
+        while self._pending:
+            await self._write_next_batch()
+
+    async def close(self) -> None:
+        """Flush pending units and stop the drain task."""
+        try:
+            await self.flush()
+        finally:
+            if self._drain_task is not None:
+                self._drain_task.cancel()
+                try:
+                    await self._drain_task
+                except asyncio.CancelledError:
+                    pass
+                self._drain_task = None
+
+    def _ensure_drain_task(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (synchronous caller): units stay spooled until the next flush
+            return
+
+        if self._drain_task is None or self._drain_task.done() or self._drain_task.get_loop() is not loop:
+            self._wakeup = asyncio.Event()
+            self._write_lock = asyncio.Lock()
+            self._drain_task = loop.create_task(self._drain())
+        self._wakeup.set()  # type: ignore[union-attr]
+
+    async def _drain(self) -> None:
+        """Background loop writing batches as units arrive."""
+        while True:
+            await self._wakeup.wait()  # type: ignore[union-attr]
+            self._wakeup.clear()  # type: ignore[union-attr]
+
+            # Give concurrent submitters a chance to fill the batch
+            if len(self._pending) < self.config.batch_size:
+                await asyncio.sleep(self.config.flush_interval_ms / 1000.0)
+
+            while self._pending:
+                try:
+                    await self._write_next_batch()
+                except Exception as e:
+                    logger.error(f"Knowledge capture batch failed, keeping {len(self._pending)} units spooled: {e}")
+                    break
+
+    async def _write_next_batch(self) -> None:
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+
+        async with self._write_lock:
+            batch = self._pending[:max(1, self.config.batch_size)]
+            if not batch:
+                return
+
+            units = [record["unit"] for record in batch]
+            for attempt in range(self.config.max_retries + 1):
+                try:
+                    await self._writer(units)
+                    break
+                except Exception as e:
+                    if attempt >= self.config.max_retries:
+                        raise
+                    delay = self.config.retry_backoff_s * (2 ** attempt)
+                    logger.warning(f"Knowledge batch write failed ({e}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+
+            written = {record["hash"] for record in batch}
+            self._pending = [r for r in self._pending if r["hash"] not in written]
+            self._pending_hashes -= written
+            self._written_hashes |= written
+            self._commit(written)
+            logger.info(f"Wrote {len(batch)} knowledge units, {len(self._pending)} pending")
+
+    def _commit(self, written: Set[str]) -> None:
+        """Record written hashes and rewrite the spool with the remaining units."""
+        with open(self.hashes_path, "a", encoding="utf-8") as f:
+            f.write("".join(f"{digest}\n" for digest in written))
+
+        tmp_path = self.spool_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in self._pending:
+                f.write(json.dumps(record, default=str) + "\n")
+        os.replace(tmp_path, self.spool_path)
+
+    def _load(self) -> None:
+        if self.hashes_path.exists():
+            self._written_hashes = {
+                line.strip() for line in self.hashes_path.read_text().splitlines() if line.strip()
+            }
+
+        if not self.spool_path.exists():
+            return
+        with open(self.spool_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn final line from an interrupted append
+                digest = record.get("hash")
+                if digest in self._written_hashes or digest in self._pending_hashes:
+                    continue
+                self._pending.append(record)
+                self._pending_hashes.add(digest)
+
+        if self._pending:
+            logger.info(f"Recovered {len(self._pending)} spooled knowledge units from {self.spool_path}")
+            self.start()
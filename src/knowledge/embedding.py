@@ -0,0 +1,250 @@
+"""
+Embedding Service
+
+Batched text embedding for the knowledge base.
+
+KR-04: Vectorize knowledge units and queries for semantic retrieval.
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Maps a batch of texts to an (n, dim) array-like of embeddings
+EncodeFn = Callable[[List[str]], Any]
+
+
+@dataclass
+class EmbeddingServiceConfig:
+    """Embedding service configuration"""
+    batch_size: int = 64
+    # Window for coalescing concurrent aembed() calls into one batch
+    batch_window_ms: float = 5.0
+    cache_size: int = 10000
+
+
+def text_key(text: str) -> str:
+    """Hash used to memoize embeddings by text content."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingService:
+    """
+    Batched embedding service.
+
+    Wraps an encode function (local SentenceTransformer or embedding API) and
+    provides:
+    - List input with float32 (n, dim) NumPy output
+    - An LRU memo of embeddings keyed by text hash
+    - Micro-batching of concurrent async requests over a short window, with
+      encoding executed in a dedicated worker thread
+
+    The async micro-batcher assumes all callers share a single event loop.
+    """
+
+    def __init__(self, encode_fn: EncodeFn, config: Optional[EmbeddingServiceConfig] = None):
+        """
+        Initialize the service.
+
+        Args:
+            encode_fn: Callable encoding a list of texts into an (n, dim) array.
+            config: Service configuration.
+        """
+        self._encode_fn = encode_fn
+        self.config = config or EmbeddingServiceConfig()
+        self.dim: Optional[int] = None
+
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # Encoders (e.g. torch models) are not guaranteed to be thread-safe
+        self._encode_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+
+        self._pending: List[Tuple[List[str], asyncio.Future]] = []
+        self._pending_count = 0
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed a list of texts.
+
+        Args:
+            texts: Texts to embed.
+
+        Returns:
+            float32 array of shape (len(texts), dim).
+        """
+        keys = [text_key(t) for t in texts]
+        rows: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        missing_texts: List[str] = []
+
+        with self._cache_lock:
+            for i, key in enumerate(keys):
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+                    rows[i] = cached
+                elif key in missing:
+                    missing[key].append(i)
+                else:
+                    missing[key] = [i]
+                    missing_texts.append(texts[i])
+
+        if missing_texts:
+            encoded = self._encode(missing_texts)
+            with self._cache_lock:
+                for (key, positions), row in zip(missing.items(), encoded):
+                    # Copy so cached rows do not pin the whole batch matrix
+                    vector = row.copy()
+                    for i in positions:
+                        rows[i] = vector
+                    self._cache[key] = vector
+                    self._cache.move_to_end(key)
+                while len(self._cache) > self.config.cache_size:
+                    self._cache.popitem(last=False)
+
+        if not rows:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.stack(rows)  # type: ignore[arg-type]
+
+    def embed_one(self, text: str) -> np.ndarray:
+        """Embed a single text, returning a float32 vector of shape (dim,)."""
+        return self.embed([text])[0]
+
+    async def aembed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed texts asynchronously.
+
+        Concurrent calls arriving within ``batch_window_ms`` are coalesced into
+        one encode call that runs in the worker thread.
+
+        Args:
+            texts: Texts to embed.
+
+        Returns:
+            float32 array of shape (len(texts), dim).
+        """
+        texts = list(texts)
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future = loop.create_future()
+        self._pending.append((texts, future))
+        self._pending_count += len(texts)
+
+        if self._pending_count >= self.config.batch_size:
+            self._flush(loop)
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(
+                self.config.batch_window_ms / 1000.0, self._flush, loop
+            )
+
+        return await future
+
+    def close(self) -> None:
+        """Release the worker thread."""
+        self._executor.shutdown(wait=False)
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        pending, self._pending = self._pending, []
+        self._pending_count = 0
+        if not pending:
+            return
+
+        texts = [t for group, _ in pending for t in group]
+        task = loop.run_in_executor(self._executor, self.embed, texts)
+
+        def _resolve(done: asyncio.Future) -> None:
+            error = done.exception()
+            matrix = None if error else done.result()
+            offset = 0
+            for group, future in pending:
+                if not future.done():
+                    if error:
+                        future.set_exception(error)
+                    else:
+                        future.set_result(matrix[offset:offset + len(group)])
+                offset += len(group)
+
+        task.add_done_callback(_resolve)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Encode uncached texts in chunks of ``batch_size``."""
+        batch_size = max(1, self.config.batch_size)
+        chunks = []
+        with self._encode_lock:
+            for start in range(0, len(texts), batch_size):
+                batch = texts[start:start + batch_size]
+                encoded = np.asarray(self._encode_fn(batch), dtype=np.float32)
+                if encoded.ndim != 2 or encoded.shape[0] != len(batch):
+                    raise ValueError(
+                        f"Encoder returned shape {encoded.shape} for {len(batch)} texts"
+                    )
+                chunks.append(encoded)
+
+        matrix = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+        self.dim = matrix.shape[1]
+        return matrix
+
+
+def sentence_transformer_encoder(model: Any, batch_size: int = 64) -> EncodeFn:
+    """
+    Build an encode function backed by a SentenceTransformer model.
+
+    Args:
+        model: Loaded SentenceTransformer instance.
+        batch_size: Batch size passed to ``model.encode``.
+
+    Returns:
+        Encode function returning a NumPy array.
+    """
+    def encode(texts: List[str]) -> np.ndarray:
+        return model.encode(
+            texts,
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+    return encode
+
+
+def api_encoder(endpoint: str, api_key: str, model: str, timeout: float = 30.0) -> EncodeFn:
+    """
+    Build an encode function backed by an OpenAI-compatible embedding API.
+
+    All texts of a batch are sent in a single request.
+
+    Args:
+        endpoint: Embedding API endpoint URL.
+        api_key: API authentication key (empty for unauthenticated servers).
+        model: Embedding model name.
+        timeout: Request timeout in seconds.
+
+    Returns:
+        Encode function returning a NumPy array.
+    """
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+    clients: List[Any] = []
+
+    def encode(texts: List[str]) -> np.ndarray:
+        if not clients:
+            import httpx
+            clients.append(httpx.Client(timeout=timeout))
+        response = clients[0].post(endpoint, headers=headers, json={"model": model, "input": texts})
+        response.raise_for_status()
+        data = sorted(response.json()["data"], key=lambda d: d.get("index", 0))
+        return np.asarray([d["embedding"] for d in data], dtype=np.float32)
+
+    return encode
@@ -0,0 +1,94 @@
+"""
+Hybrid Retrieval
+
+Fusion of keyword and vector result lists, plus an optional cross-encoder
+rerank stage applied to the top fused candidates.
+
+KR-05: 混合检索支持 - 向量检索与关键词检索的混合模式
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Sequence[Sequence[Any]],
+    k: int = 60,
+    weights: Optional[Sequence[float]] = None
+) -> List[Tuple[Any, float]]:
+    """
+    Merge ranked id lists with reciprocal-rank fusion.
+
+    Each list contributes ``weight / (k + rank)`` to an id's score, so only
+    ranks matter and BM25 and cosine scores need no calibration.
+
+    Args:
+        ranked_lists: Id lists, each ordered best first.
+        k: Rank damping constant; larger values flatten the contribution curve.
+        weights: Optional per-list weight (defaults to 1.0 each).
+
+    Returns:
+        List of (id, fused_score) sorted by descending score.
+    """
+    if weights is None:
+        weights = [1.0] * len(ranked_lists)
+    if len(weights) != len(ranked_lists):
+        raise ValueError(f"Got {len(weights)} weights for {len(ranked_lists)} result lists")
+
+    scores: Dict[Any, float] = {}
+    for ids, weight in zip(ranked_lists, weights):
+        for rank, doc_id in enumerate(ids, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+
+    # sorted() is stable, so ties keep first-seen order
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class CrossEncoderReranker:
+    """
+    Cross-encoder relevance scorer for (query, document) pairs.
+
+    The sentence-transformers model is loaded on first use so that agents
+    configured with a rerank model do not pay the load cost at startup.
+    """
+
+    def __init__(self, model_name: str, batch_size: int = 32):
+        """
+        Initialize the reranker.
+
+        Args:
+            model_name: sentence-transformers CrossEncoder model name or path.
+            batch_size: Pairs scored per forward pass.
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model: Any = None
+        self._lock = threading.Lock()
+
+    def score(self, query: str, documents: Sequence[str]) -> List[float]:
+        """
+        Score documents against a query.
+
+        Args:
+            query: Query text.
+            documents: Candidate document texts.
+
+        Returns:
+            Relevance score per document (higher is more relevant).
+        """
+        if not documents:
+            return []
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name)
+                logger.info(f"Loaded cross-encoder rerank model {self.model_name}")
+            scores = self._model.predict(
+                [(query, doc) for doc in documents],
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+            )
+        return [float(s) for s in scores]
@@ -0,0 +1,310 @@
+"""
+Document Ingestion
+
+Streaming import of existing documents (datasheets, reference manuals, logs,
+patch sets) into the knowledge base.
+
+Files are split into fixed-size byte segments that are read and chunked in a
+process pool; chunks are deduplicated by content hash and handed to the
+caller in batches for embedding and bulk upsert. Completed segments are
+recorded in a checkpoint file so an interrupted import resumes where it
+stopped. Memory is bounded by the number of segments in flight, not by
+corpus size.
+
+FR-22: 文档导入 - 从现有文档构建知识库
+"""
+
+import hashlib
+import json
+import logging
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (path, start byte, end byte)
+Segment = Tuple[str, int, int]
+
+
+@dataclass
+class IngestionConfig:
+    """Document ingestion configuration"""
+    chunk_size: int = 2000
+    chunk_overlap: int = 200
+    batch_size: int = 64
+    # Bytes read and chunked per worker task
+    segment_bytes: int = 8 * 1024 * 1024
+    # Parser processes; 0 chunks in the calling process
+    workers: int = field(default_factory=lambda: min(8, os.cpu_count() or 1))
+    # Segments submitted ahead of the consumer (bounds memory)
+    max_in_flight: int = 16
+    checkpoint_path: str = "/tmp/firmware_kb_ingest.json"
+    # Batches between checkpoint writes (and before_checkpoint calls)
+    checkpoint_every: int = 20
+    extensions: List[str] = field(
+        default_factory=lambda: [".md", ".txt", ".log", ".patch", ".diff", ".rst"]
+    )
+    # Chunk fingerprints remembered for in-run dedup before the set is reset
+    max_dedup_entries: int = 10_000_000
+
+
+@dataclass
+class DocumentChunk:
+    """A deduplicated chunk of a source document"""
+    chunk_id: str  # content hash
+    text: str
+    source: str
+    offset: int  # approximate byte offset of the chunk in the source
+
+
+@dataclass
+class IngestionStats:
+    """Counters for one ingestion run"""
+    files: int = 0
+    segments: int = 0
+    skipped_segments: int = 0
+    chunks: int = 0
+    duplicates: int = 0
+    bytes: int = 0
+
+
+def chunk_hash(text: str) -> str:
+    """Content hash used as chunk id and dedup key."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def split_text(text: str, chunk_size: int, overlap: int) -> Iterator[Tuple[int, str]]:
+    """
+    Split text into overlapping chunks, preferring to break at newlines.
+
+    Args:
+        text: Text to split.
+        chunk_size: Maximum characters per chunk.
+        overlap: Characters shared by consecutive chunks.
+
+    Yields:
+        (character offset, chunk text)
+    """
+    if chunk_size <= overlap:
+        raise ValueError(f"chunk_size ({chunk_size}) must exceed chunk_overlap ({overlap})")
+
+    start = 0
+    length = len(text)
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            # Break on the last newline in the second half of the window
+            newline = text.rfind("\n", start + chunk_size // 2, end)
+            if newline != -1:
+                end = newline + 1
+        chunk = text[start:end].strip()
+        if chunk:
+            yield start, chunk
+        if end >= length:
+            break
+        start = max(end - overlap, start + 1)
+
+
+def chunk_segment(
+    path: str, start: int, end: int, chunk_size: int, overlap: int
+) -> List[Tuple[int, str]]:
+    """
+    Read and chunk one byte range of a file (runs in a worker process).
+
+    The range is extended backwards by ``overlap`` bytes so chunks overlap
+    across segment boundaries as well.
+
+    Returns:
+        List of (approximate byte offset, chunk text)
+    """
+    read_start = max(0, start - overlap)
+    with open(path, "rb") as f:
+        f.seek(read_start)
+        data = f.read(end - read_start)
+    # Segment edges may split a multi-byte character
+    text = data.decode("utf-8", errors="ignore")
+    return [(read_start + offset, chunk) for offset, chunk in split_text(text, chunk_size, overlap)]
+
+
+class IngestionPipeline:
+    """
+    Resumable, parallel document chunking pipeline.
+
+    ``iter_batches()`` is a generator of chunk batches. A segment counts as
+    stored once the consumer has asked for the batch after the one holding its
+    last chunk. Stored segments are written to the checkpoint every
+    ``checkpoint_every`` batches, after calling ``before_checkpoint`` so the
+    consumer can make its own writes durable first. A consumer stepping the
+    generator from another thread can instead defer checkpoints and call
+    ``commit()`` itself whenever ``commit_ready`` is set.
+    """
+
+    def __init__(
+        self,
+        config: Optional[IngestionConfig] = None,
+        before_checkpoint: Optional[Callable[[], None]] = None
+    ):
+        """
+        Initialize the pipeline and load the checkpoint.
+
+        Args:
+            config: Ingestion configuration.
+            before_checkpoint: Called before each checkpoint write, e.g. to
+                persist indexes the batches were written to.
+        """
+        self.config = config or IngestionConfig()
+        self._before_checkpoint = before_checkpoint
+        self.checkpoint_path = Path(self.config.checkpoint_path)
+        self.stats = IngestionStats()
+        self._seen: Set[int] = set()
+        self._ready: List[Segment] = []  # stored segments awaiting commit()
+        # path -> {"mtime", "size", "segments": [start, ...]}
+        self._checkpoint: Dict[str, Dict[str, Any]] = self._load_checkpoint()
+
+    def iter_files(self, paths: Iterable[str]) -> Iterator[str]:
+        """Expand files and directories into importable file paths."""
+        extensions = {e.lower() for e in self.config.extensions}
+        for raw in paths:
+            path = Path(raw)
+            if path.is_dir():
+                for child in sorted(path.rglob("*")):
+                    if child.is_file() and child.suffix.lower() in extensions:
+                        yield str(child)
+            elif path.is_file():
+                yield str(path)
+            else:
+                logger.warning(f"Skipping missing import path: {raw}")
+
+    def iter_segments(self, paths: Iterable[str]) -> Iterator[Segment]:
+        """Plan byte-range segments, skipping those completed in the checkpoint."""
+        segment_bytes = max(1, self.config.segment_bytes)
+        for path in self.iter_files(paths):
+            stat = os.stat(path)
+            entry = self._checkpoint.get(path)
+            if entry is None or entry.get("mtime") != stat.st_mtime or entry.get("size") != stat.st_size:
+                # New or modified file: re-import all segments
+                entry = {"mtime": stat.st_mtime, "size": stat.st_size, "segments": []}
+                self._checkpoint[path] = entry
+            done = set(entry["segments"])
+
+            self.stats.files += 1
+            for start in range(0, max(stat.st_size, 1), segment_bytes):
+                if start in done:
+                    self.stats.skipped_segments += 1
+                    continue
+                yield path, start, min(start + segment_bytes, stat.st_size)
+
+    @property
+    def commit_ready(self) -> bool:
+        """Whether stored segments are waiting for a deferred commit()."""
+        return bool(self._ready)
+
+    def commit(self) -> None:
+        """Write stored segments to the checkpoint (after ``before_checkpoint``)."""
+        segments, self._ready = self._ready, []
+        self._commit(segments)
+
+    def iter_batches(self, paths: Iterable[str], defer_commit: bool = False) -> Iterator[List[DocumentChunk]]:
+        """
+        Stream deduplicated chunk batches for the given files and directories.
+
+        Args:
+            paths: Files or directories to import.
+            defer_commit: Never write the checkpoint from the generator; the
+                caller calls commit() when ``commit_ready`` is set, once its
+                writes of the earlier batches are durable.
+
+        Yields:
+            Lists of up to ``batch_size`` chunks.
+        """
+        batch: List[DocumentChunk] = []
+        closing: List[Segment] = []  # segments whose last chunk is in ``batch``
+        stored: List[Segment] = []  # segments stored since the last checkpoint
+        batches_since_checkpoint = 0
+
+        for segment, chunks in self._iter_chunked_segments(paths):
+            self.stats.segments += 1
+            self.stats.bytes += segment[2] - segment[1]
+            for offset, text in chunks:
+                digest = chunk_hash(text)
+                fingerprint = int(digest[:16], 16)
+                if fingerprint in self._seen:
+                    self.stats.duplicates += 1
+                    continue
+                if len(self._seen) >= self.config.max_dedup_entries:
+                    self._seen.clear()
+                self._seen.add(fingerprint)
+
+                batch.append(DocumentChunk(chunk_id=digest, text=text, source=segment[0], offset=offset))
+                self.stats.chunks += 1
+                if len(batch) >= self.config.batch_size:
+                    yield batch
+                    stored.extend(closing)
+                    batch, closing = [], []
+                    batches_since_checkpoint += 1
+                    if batches_since_checkpoint >= self.config.checkpoint_every:
+                        self._ready.extend(stored)
+                        if not defer_commit:
+                            self.commit()
+                        stored, batches_since_checkpoint = [], 0
+            closing.append(segment)
+
+        if batch:
+            yield batch
+        self._ready.extend(stored + closing)
+        if not defer_commit:
+            self.commit()
+
+    def reset(self) -> None:
+        """Forget all progress so the next run re-imports everything."""
+        self._checkpoint = {}
+        self._seen.clear()
+        if self.checkpoint_path.exists():
+            self.checkpoint_path.unlink()
+
+    def _iter_chunked_segments(self, paths: Iterable[str]) -> Iterator[Tuple[Segment, List[Tuple[int, str]]]]:
+        """Chunk segments in the worker pool, yielding results in input order."""
+        chunk_size, overlap = self.config.chunk_size, self.config.chunk_overlap
+        segments = self.iter_segments(paths)
+
+        if self.config.workers <= 0:
+            for segment in segments:
+                yield segment, chunk_segment(*segment, chunk_size, overlap)
+            return
+
+        in_flight: Deque[Tuple[Segment, Future]] = deque()
+        with ProcessPoolExecutor(max_workers=self.config.workers) as pool:
+            for segment in segments:
+                in_flight.append((segment, pool.submit(chunk_segment, *segment, chunk_size, overlap)))
+                if len(in_flight) >= max(1, self.config.max_in_flight):
+                    done_segment, future = in_flight.popleft()
+                    yield done_segment, future.result()
+            while in_flight:
+                done_segment, future = in_flight.popleft()
+                yield done_segment, future.result()
+
+    def _commit(self, segments: List[Segment]) -> None:
+        if not segments:
+            return
+        if self._before_checkpoint is not None:
+            self._before_checkpoint()
+        for path, start, _ in segments:
+            self._checkpoint[path]["segments"].append(start)
+
+        self.checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self._checkpoint))
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _load_checkpoint(self) -> Dict[str, Dict[str, Any]]:
+        if not self.checkpoint_path.exists():
+            return {}
+        try:
+            return json.loads(self.checkpoint_path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ingestion checkpoint: {e}")
+            return {}
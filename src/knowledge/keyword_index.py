@@ -0,0 +1,244 @@
+"""
+Keyword Index
+
+Inverted-index BM25 keyword search over knowledge unit text.
+
+Firmware knowledge is highly lexical (error strings, function names, register
+names, hex addresses), so the tokenizer keeps identifiers and hex literals
+intact and additionally indexes the parts of snake_case identifiers.
+
+KR-05: 混合检索支持 - 关键词检索
+"""
+
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .vector_index import SearchHit, get_payload_field
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PATTERN = re.compile(r"0x[0-9a-f]+|[a-z_][a-z0-9_]*|\d+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase search terms.
+
+    ``I2C_CTRL_REG`` yields ``i2c_ctrl_reg``, ``i2c``, ``ctrl`` and ``reg`` so
+    both the full identifier and its parts match.
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if "_" in token.strip("_"):
+            tokens.extend(part for part in token.split("_") if part)
+    return tokens
+
+
+@dataclass
+class KeywordIndexConfig:
+    """Keyword index configuration"""
+    index_dir: str = "/tmp/firmware_kb_keywords"
+    k1: float = 1.2
+    b: float = 0.75
+
+
+class BM25Index:
+    """
+    BM25 ranking over an in-memory inverted index.
+
+    Postings map each term to per-document term frequencies; only documents
+    sharing at least one term with the query are scored. Documents are
+    persisted as term counts in a JSON file and postings are rebuilt on load.
+    """
+
+    DOCS_FILE = "bm25_docs.json"
+
+    def __init__(self, config: Optional[KeywordIndexConfig] = None):
+        """
+        Open (or create) an index in ``config.index_dir``.
+
+        Args:
+            config: Index configuration.
+        """
+        self.config = config or KeywordIndexConfig()
+        self.index_dir = Path(self.config.index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[Any, int]] = {}
+        self._doc_terms: Dict[Any, Dict[str, int]] = {}
+        self._doc_length: Dict[Any, int] = {}
+        self._payloads: Dict[Any, Dict[str, Any]] = {}
+        self._total_length = 0
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    def __contains__(self, doc_id: Any) -> bool:
+        return doc_id in self._doc_terms
+
+    def add(
+        self,
+        ids: Sequence[Any],
+        texts: Sequence[str],
+        payloads: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Index documents, replacing any with the same id.
+
+        Args:
+            ids: Document ids (JSON-serializable).
+            texts: Document text to index.
+            payloads: Optional payload dict per document.
+        """
+        if len(ids) != len(texts):
+            raise ValueError(f"Got {len(texts)} texts for {len(ids)} ids")
+
+        with self._lock:
+            for row, doc_id in enumerate(ids):
+                payload = dict(payloads[row]) if payloads is not None else {}
+                self._insert(doc_id, dict(Counter(tokenize(texts[row]))), payload)
+
+    def delete(self, ids: Iterable[Any]) -> int:
+        """
+        Remove documents by id.
+
+        Args:
+            ids: Document ids to delete.
+
+        Returns:
+            Number of documents removed.
+        """
+        removed = 0
+        with self._lock:
+            for doc_id in ids:
+                if self._remove(doc_id):
+                    removed += 1
+        return removed
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchHit]:
+        """
+        Rank documents against a query with BM25.
+
+        Args:
+            query: Query text.
+            limit: Maximum number of hits.
+            filters: Exact-match payload filters keyed by dotted path.
+
+        Returns:
+            List of (id, score, payload) sorted by descending score.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._doc_terms)
+            if not terms or not n_docs or limit <= 0:
+                return []
+
+            k1, b = self.config.k1, self.config.b
+            avg_length = self._total_length / n_docs
+            scores: Dict[Any, float] = {}
+
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                df = len(postings)
+                idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                for doc_id, tf in postings.items():
+                    norm = k1 * (1.0 - b + b * self._doc_length[doc_id] / avg_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+
+            ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+            hits = []
+            for doc_id, score in ranked:
+                payload = self._payloads.get(doc_id, {})
+                if filters and any(
+                    get_payload_field(payload, path) != expected for path, expected in filters.items()
+                ):
+                    continue
+                hits.append((doc_id, score, payload))
+                if len(hits) >= limit:
+                    break
+            return hits
+
+    def full_match_score(self, query: str) -> float:
+        """
+        BM25 score of an average-length document containing each query term once.
+
+        Dividing a hit's score by this gives an absolute confidence that does
+        not depend on the other hits: about 1.0 when every query term matches,
+        less for partial matches. Query terms absent from the corpus count at
+        the highest IDF.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n_docs = len(self._doc_terms)
+            return sum(
+                math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+                for df in (len(self._postings.get(term, ())) for term in terms)
+            )
+
+    def save(self) -> None:
+        """Atomically write documents to disk."""
+        with self._lock:
+            docs = [
+                {"id": doc_id, "terms": terms, "payload": self._payloads.get(doc_id, {})}
+                for doc_id, terms in self._doc_terms.items()
+            ]
+            path = self.index_dir / self.DOCS_FILE
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(docs))
+            os.replace(tmp_path, path)
+
+    def _insert(self, doc_id: Any, terms: Dict[str, int], payload: Dict[str, Any]) -> None:
+        self._remove(doc_id)
+        self._doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self._doc_length[doc_id] = length
+        self._total_length += length
+        self._payloads[doc_id] = payload
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+
+    def _remove(self, doc_id: Any) -> bool:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+        self._total_length -= self._doc_length.pop(doc_id, 0)
+        self._payloads.pop(doc_id, None)
+        return True
+
+    def _load(self) -> None:
+        path = self.index_dir / self.DOCS_FILE
+        if not path.exists():
+            return
+        try:
+            docs = json.loads(path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load keyword index: {e}")
+            return
+        for doc in docs:
+            self._insert(doc["id"], doc.get("terms", {}), doc.get("payload", {}))
+        logger.info(f"Loaded keyword index with {len(self._doc_terms)} documents from {self.index_dir}")
@@ -0,0 +1,162 @@
+"""
+Embedding Model Server
+
+Serves one loaded embedding model to several agent processes over HTTP.
+
+The endpoint speaks the OpenAI embeddings format (``POST /v1/embeddings``
+with ``{"model": ..., "input": [...]}``), so clients use the same
+``api_encoder`` as for hosted embedding APIs. Requests share the server's
+EmbeddingService, so identical texts from different processes are encoded
+once.
+
+Usage:
+    python -m src.knowledge.model_server --model all-MiniLM-L6-v2 --port 8765
+
+KR-04: Vectorize knowledge units and queries for semantic retrieval.
+"""
+
+import argparse
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+from .embedding import EmbeddingService, EmbeddingServiceConfig, EncodeFn
+
+logger = logging.getLogger(__name__)
+
+EMBEDDINGS_PATH = "/v1/embeddings"
+
+
+class EmbeddingServer:
+    """
+    Threaded HTTP server exposing an EmbeddingService.
+
+    The server is bound on construction; ``start()`` serves from a daemon
+    thread and ``serve_forever()`` blocks the caller.
+    """
+
+    def __init__(
+        self,
+        encode_fn: EncodeFn,
+        host: str = "127.0.0.1",
+        port: int = 8765,
+        config: Optional[EmbeddingServiceConfig] = None
+    ):
+        """
+        Bind the server.
+
+        Args:
+            encode_fn: Encode function of the loaded model.
+            host: Interface to listen on.
+            port: Port to listen on (0 picks a free port).
+            config: Configuration of the shared embedding service.
+        """
+        self.service = EmbeddingService(encode_fn, config)
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._httpd.server_address[:2]  # type: ignore[return-value]
+
+    @property
+    def url(self) -> str:
+        host, port = self.address
+        return f"http://{host}:{port}{EMBEDDINGS_PATH}"
+
+    def start(self) -> "EmbeddingServer":
+        """Serve requests from a background thread."""
+        self._thread = threading.Thread(
+            target=self._httpd.serve_forever, name="embedding-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve requests until interrupted."""
+        logger.info(f"Embedding server listening on {self.url}")
+        self._httpd.serve_forever()
+
+    def stop(self) -> None:
+        """Stop serving and release the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self.service.close()
+
+    def _make_handler(self):
+        service = self.service
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path.rstrip("/") != EMBEDDINGS_PATH:
+                    self._reply(404, {"error": f"Unknown path {self.path}"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    request = json.loads(self.rfile.read(length))
+                    texts = request["input"]
+                    if isinstance(texts, str):
+                        texts = [texts]
+                    matrix = service.embed(texts)
+                except (KeyError, TypeError, ValueError) as e:
+                    self._reply(400, {"error": str(e)})
+                    return
+                except Exception as e:
+                    logger.error(f"Embedding request failed: {e}")
+                    self._reply(500, {"error": str(e)})
+                    return
+
+                self._reply(200, {
+                    "object": "list",
+                    "model": request.get("model", ""),
+                    "data": [
+                        {"object": "embedding", "index": i, "embedding": row.tolist()}
+                        for i, row in enumerate(matrix)
+                    ],
+                })
+
+            def _reply(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        return Handler
+
+
+def main() -> None:
+    from sentence_transformers import SentenceTransformer
+
+    from .embedding import sentence_transformer_encoder
+
+    parser = argparse.ArgumentParser(description="Shared embedding model server")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="SentenceTransformer model name or path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    model = SentenceTransformer(args.model)
+    server = EmbeddingServer(
+        sentence_transformer_encoder(model, args.batch_size),
+        host=args.host,
+        port=args.port,
+        config=EmbeddingServiceConfig(batch_size=args.batch_size),
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
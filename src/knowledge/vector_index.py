@@ -0,0 +1,369 @@
+"""
+Local Vector Index
+
+Embedded, in-process vector index used when Qdrant is unavailable.
+
+KR-04: 语义检索能力 - Vector similarity search without a vector database
+KR-06: TopK与阈值过滤
+"""
+
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SearchHit = Tuple[Any, float, Dict[str, Any]]
+
+
+@dataclass
+class LocalIndexConfig:
+    """Local vector index configuration"""
+    index_dir: str = "/tmp/firmware_kb_index"
+    initial_capacity: int = 1024
+    # Rows scored per matrix-multiply block during search
+    block_size: int = 65536
+    # Payload fields (dotted paths) kept in an inverted index for fast filtering
+    indexed_fields: List[str] = field(default_factory=lambda: ["metadata.product_line"])
+
+
+def get_payload_field(payload: Dict[str, Any], path: str) -> Any:
+    """Resolve a dotted path such as ``metadata.product_line`` in a payload."""
+    value: Any = payload
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+class LocalVectorIndex:
+    """
+    Brute-force cosine similarity index backed by NumPy.
+
+    Vectors are L2-normalized and stored as a float32 matrix in a memory-mapped
+    file, so cosine similarity reduces to a dot product. Search scores rows in
+    blocks and keeps per-block top-k candidates with ``argpartition``. Ids and
+    payloads are kept in memory and persisted to a JSON sidecar by ``save()``.
+
+    Deleted rows are tombstoned and their slots reused by later inserts.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    META_FILE = "meta.json"
+
+    def __init__(self, config: Optional[LocalIndexConfig] = None):
+        """
+        Open (or create) an index in ``config.index_dir``.
+
+        Args:
+            config: Index configuration.
+        """
+        self.config = config or LocalIndexConfig()
+        self.index_dir = Path(self.config.index_dir)
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self.dim: Optional[int] = None
+        self._capacity = 0
+        self._size = 0  # high-water mark of used slots
+        self._vectors: Optional[np.memmap] = None
+        self._valid = np.zeros(0, dtype=bool)
+        self._ids: List[Any] = []
+        self._payloads: List[Optional[Dict[str, Any]]] = []
+        self._slot_of: Dict[Any, int] = {}
+        self._free: List[int] = []
+        self._field_index: Dict[str, Dict[Any, Set[int]]] = {
+            f: {} for f in self.config.indexed_fields
+        }
+
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._slot_of)
+
+    def __contains__(self, point_id: Any) -> bool:
+        return point_id in self._slot_of
+
+    def add(
+        self,
+        ids: Sequence[Any],
+        vectors: Any,
+        payloads: Optional[Sequence[Dict[str, Any]]] = None
+    ) -> None:
+        """
+        Insert or replace points.
+
+        Args:
+            ids: Point ids (JSON-serializable); existing ids are overwritten.
+            vectors: Array-like of shape (len(ids), dim).
+            payloads: Optional payload dict per point.
+        """
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if matrix.shape[0] != len(ids):
+            raise ValueError(f"Got {matrix.shape[0]} vectors for {len(ids)} ids")
+        if payloads is not None and len(payloads) != len(ids):
+            raise ValueError(f"Got {len(payloads)} payloads for {len(ids)} ids")
+        if not len(ids):
+            return
+
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix = matrix / norms
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+            elif matrix.shape[1] != self.dim:
+                raise ValueError(f"Vector dim {matrix.shape[1]} does not match index dim {self.dim}")
+
+            new_count = sum(1 for i in ids if i not in self._slot_of)
+            needed = self._size + max(0, new_count - len(self._free))
+            if needed > self._capacity:
+                self._grow(needed)
+
+            for row, point_id in enumerate(ids):
+                payload = dict(payloads[row]) if payloads is not None else {}
+                slot = self._slot_of.get(point_id)
+                if slot is None:
+                    slot = self._free.pop() if self._free else self._next_slot()
+                    self._slot_of[point_id] = slot
+                    self._ids[slot] = point_id
+                else:
+                    self._unindex_payload(slot)
+
+                self._vectors[slot] = matrix[row]  # type: ignore[index]
+                self._payloads[slot] = payload
+                self._valid[slot] = True
+                self._index_payload(slot)
+
+    def delete(self, ids: Iterable[Any]) -> int:
+        """
+        Delete points by id.
+
+        Args:
+            ids: Point ids to delete.
+
+        Returns:
+            Number of points removed.
+        """
+        removed = 0
+        with self._lock:
+            for point_id in ids:
+                slot = self._slot_of.pop(point_id, None)
+                if slot is None:
+                    continue
+                self._unindex_payload(slot)
+                self._valid[slot] = False
+                self._ids[slot] = None
+                self._payloads[slot] = None
+                self._free.append(slot)
+                removed += 1
+        return removed
+
+    def get(self, point_id: Any) -> Optional[Dict[str, Any]]:
+        """Return the payload of a point, or None if absent."""
+        slot = self._slot_of.get(point_id)
+        return None if slot is None else self._payloads[slot]
+
+    def search(
+        self,
+        query: Any,
+        limit: int = 10,
+        score_threshold: Optional[float] = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchHit]:
+        """
+        Find the points most similar to a query vector.
+
+        Args:
+            query: Query vector of shape (dim,).
+            limit: Maximum number of hits.
+            score_threshold: Minimum cosine similarity.
+            filters: Exact-match payload filters keyed by dotted path,
+                e.g. ``{"metadata.product_line": "soc_a"}``.
+
+        Returns:
+            List of (id, score, payload) sorted by descending score.
+        """
+        with self._lock:
+            if not self._slot_of or limit <= 0 or self._vectors is None:
+                return []
+
+            q = np.asarray(query, dtype=np.float32).reshape(-1)
+            if q.shape[0] != self.dim:
+                raise ValueError(f"Query dim {q.shape[0]} does not match index dim {self.dim}")
+            norm = float(np.linalg.norm(q))
+            if norm == 0:
+                return []
+            q = q / norm
+
+            mask = self._valid[:self._size]
+            if filters:
+                mask = mask & self._filter_mask(filters)
+                if not mask.any():
+                    return []
+
+            candidate_scores = []
+            candidate_slots = []
+            block = max(1, self.config.block_size)
+            for start in range(0, self._size, block):
+                end = min(start + block, self._size)
+                block_mask = mask[start:end]
+                if not block_mask.any():
+                    continue
+                scores = self._vectors[start:end] @ q
+                scores = np.where(block_mask, scores, -np.inf)
+                k = min(limit, end - start)
+                top = np.argpartition(-scores, k - 1)[:k]
+                candidate_scores.append(scores[top])
+                candidate_slots.append(top + start)
+
+            if not candidate_scores:
+                return []
+
+            scores = np.concatenate(candidate_scores)
+            slots = np.concatenate(candidate_slots)
+            keep = np.isfinite(scores)
+            if score_threshold is not None:
+                keep &= scores >= score_threshold
+            scores, slots = scores[keep], slots[keep]
+            order = np.argsort(-scores, kind="stable")[:limit]
+
+            return [
+                (self._ids[int(slots[i])], float(scores[i]), self._payloads[int(slots[i])] or {})
+                for i in order
+            ]
+
+    def save(self) -> None:
+        """Flush vectors and atomically write ids and payloads to disk."""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            meta = {
+                "dim": self.dim,
+                "capacity": self._capacity,
+                "size": self._size,
+                "ids": self._ids[:self._size],
+                "payloads": self._payloads[:self._size],
+            }
+            meta_path = self.index_dir / self.META_FILE
+            tmp_path = meta_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(meta))
+            os.replace(tmp_path, meta_path)
+
+    def _load(self) -> None:
+        meta_path = self.index_dir / self.META_FILE
+        if not meta_path.exists():
+            return
+
+        try:
+            meta = json.loads(meta_path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load local vector index metadata: {e}")
+            return
+
+        self.dim = meta.get("dim")
+        capacity = meta.get("capacity", 0)
+        if not self.dim or not capacity:
+            return
+
+        vectors_path = self.index_dir / self.VECTORS_FILE
+        if not vectors_path.exists() or vectors_path.stat().st_size < capacity * self.dim * 4:
+            logger.warning("Local vector index data file is missing or truncated, starting empty")
+            self.dim = None
+            return
+
+        self._capacity = capacity
+        self._vectors = np.memmap(
+            vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)
+        )
+        self._size = meta.get("size", 0)
+        self._ids = list(meta.get("ids", [])) + [None] * (capacity - self._size)
+        self._payloads = list(meta.get("payloads", [])) + [None] * (capacity - self._size)
+        self._valid = np.zeros(capacity, dtype=bool)
+
+        for slot in range(self._size):
+            point_id = self._ids[slot]
+            if point_id is None:
+                self._free.append(slot)
+                continue
+            self._slot_of[point_id] = slot
+            self._valid[slot] = True
+            self._index_payload(slot)
+
+        logger.info(f"Loaded local vector index with {len(self._slot_of)} points from {self.index_dir}")
+
+    def _grow(self, min_capacity: int) -> None:
+        """Extend the memory-mapped matrix to hold at least ``min_capacity`` rows."""
+        capacity = max(self.config.initial_capacity, self._capacity * 2, min_capacity)
+        vectors_path = self.index_dir / self.VECTORS_FILE
+
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        mode = "r+b" if vectors_path.exists() else "w+b"
+        with open(vectors_path, mode) as f:
+            f.truncate(capacity * self.dim * 4)  # type: ignore[operator]
+
+        self._vectors = np.memmap(
+            vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim)
+        )
+        valid = np.zeros(capacity, dtype=bool)
+        valid[:self._capacity] = self._valid
+        self._valid = valid
+        self._ids.extend([None] * (capacity - self._capacity))
+        self._payloads.extend([None] * (capacity - self._capacity))
+        self._capacity = capacity
+
+    def _next_slot(self) -> int:
+        slot = self._size
+        self._size += 1
+        return slot
+
+    def _index_payload(self, slot: int) -> None:
+        payload = self._payloads[slot] or {}
+        for path, values in self._field_index.items():
+            value = get_payload_field(payload, path)
+            try:
+                values.setdefault(value, set()).add(slot)
+            except TypeError:
+                continue  # unhashable values are matched by scan
+
+    def _unindex_payload(self, slot: int) -> None:
+        payload = self._payloads[slot] or {}
+        for path, values in self._field_index.items():
+            value = get_payload_field(payload, path)
+            try:
+                slots = values.get(value)
+            except TypeError:
+                continue
+            if slots is not None:
+                slots.discard(slot)
+                if not slots:
+                    del values[value]
+
+    def _filter_mask(self, filters: Dict[str, Any]) -> np.ndarray:
+        mask = np.ones(self._size, dtype=bool)
+        for path, expected in filters.items():
+            field_mask = np.zeros(self._size, dtype=bool)
+            values = self._field_index.get(path)
+            if values is not None and isinstance(expected, (str, int, float, bool)):
+                slots = values.get(expected, ())
+                if slots:
+                    field_mask[np.fromiter(slots, dtype=np.int64, count=len(slots))] = True
+            else:
+                for slot in range(self._size):
+                    payload = self._payloads[slot]
+                    if payload is not None and get_payload_field(payload, path) == expected:
+                        field_mask[slot] = True
+            mask &= field_mask
+        return mask
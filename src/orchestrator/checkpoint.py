@@ -0,0 +1,549 @@
+"""
+SQLite Checkpoint Saver
+
+Disk-backed LangGraph checkpointer for long-running workflows.
+
+Checkpoints only record channel versions; channel values are written when a
+channel's version changes, so each checkpoint stores the delta against its
+parent. Values (and pending writes) are serialized, hashed and stored once in
+a content-addressed blob table, so an unchanged patch or test output shared
+by many checkpoints is kept once. Blobs are zstd-compressed, using the
+channel's previous value as a raw-content dictionary so a growing list such
+as ``messages`` costs only its new items (zlib without delta when zstandard
+is not installed). Nothing but a small byte-bounded cache of recently used
+blobs stays in memory, and a crashed workflow can be resumed from its last
+checkpoint.
+"""
+
+import asyncio
+import hashlib
+import logging
+import random
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any, Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    checkpoint BLOB NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS channels (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    blob_hash TEXT,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    blob_hash TEXT NOT NULL,
+    task_path TEXT NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    base TEXT,
+    depth INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+"""
+
+# Values smaller than this are stored uncompressed
+_MIN_COMPRESS_SIZE = 128
+
+# One-byte codec tags of checkpoint and metadata records
+_CODEC_TAGS = {'raw': b'r', 'zlib': b'z', 'zstd': b's'}
+_TAG_CODECS = {tag: codec for codec, tag in _CODEC_TAGS.items()}
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpoint saver backed by a single SQLite file.
+
+    Use ``thread_id`` (the workflow task id) to resume: invoking the compiled
+    graph with ``None`` as input and the same thread continues from the last
+    checkpoint.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        serde: Optional[SerializerProtocol] = None,
+        compression_level: int = 3,
+        max_delta_depth: int = 16,
+        cache_bytes: int = 16 * 1024 * 1024
+    ):
+        """
+        Open (or create) the checkpoint database.
+
+        Args:
+            path: SQLite database path (":memory:" for a throwaway store).
+            serde: LangGraph serializer (defaults to the saver default).
+            compression_level: zstd/zlib compression level.
+            max_delta_depth: Longest chain of delta blobs before a blob is
+                stored self-contained; bounds the cost of reading a value.
+            cache_bytes: Size bound of the in-memory cache of decoded blobs.
+        """
+        super().__init__(serde=serde)
+        self.path = path
+        self.compression_level = compression_level
+        self.max_delta_depth = max_delta_depth
+        self.cache_bytes = cache_bytes
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+        # blob hash -> decoded bytes, least recently used first
+        self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._cache_size = 0
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "SQLiteCheckpointSaver":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    async def __aenter__(self) -> "SQLiteCheckpointSaver":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    # ---- BaseCheckpointSaver API ----
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Get the checkpoint identified by ``config``, or the latest one of the thread."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        with self._lock:
+            if checkpoint_id:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id)
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata FROM checkpoints "
+                    "WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns)
+                ).fetchone()
+            if row is None:
+                return None
+            return self._make_tuple(thread_id, checkpoint_ns, *row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[CheckpointTuple]:
+        """List checkpoints, newest first."""
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, checkpoint, metadata "
+            "FROM checkpoints WHERE 1 = 1"
+        )
+        params: List[Any] = []
+        if config:
+            query += " AND thread_id = ?"
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                query += " AND checkpoint_ns = ?"
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                query += " AND checkpoint_id = ?"
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query += " AND checkpoint_id < ?"
+            params.append(before_id)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        for thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_blob, metadata_blob in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self._loads(metadata_blob)
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                yield self._make_tuple(
+                    thread_id, checkpoint_ns, checkpoint_id, parent_id, checkpoint_blob, metadata_blob
+                )
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        """Store a checkpoint; only channels listed in ``new_versions`` are written."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        copy = checkpoint.copy()
+        values: Dict[str, Any] = copy.pop("channel_values")  # type: ignore[misc]
+
+        with self._lock, self._transaction():
+            for channel, version in new_versions.items():
+                blob_hash = (
+                    self._put_blob(thread_id, checkpoint_ns, channel, self.serde.dumps_typed(values[channel]))
+                    if channel in values else None
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO channels VALUES (?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), blob_hash)
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    self._dumps(copy),
+                    self._dumps(get_checkpoint_metadata(config, metadata))
+                )
+            )
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        """Store pending writes of a task."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+
+        with self._lock, self._transaction():
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                # Regular writes are idempotent; special writes (errors, interrupts) replace
+                verb = "INSERT OR IGNORE" if write_idx >= 0 else "INSERT OR REPLACE"
+                blob_hash = self._put_blob(thread_id, checkpoint_ns, channel, self.serde.dumps_typed(value))
+                self._conn.execute(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, checkpoint_id, task_id, write_idx, channel, blob_hash, task_path)
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Delete all checkpoints and writes of a thread, then unreferenced blobs."""
+        with self._lock, self._transaction():
+            for table in ("checkpoints", "channels", "writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+            self._collect_garbage()
+
+    def get_next_version(self, current: Optional[str], channel: None = None) -> str:
+        """Monotonic string versions, compatible with ``InMemorySaver``."""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = ""
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # ---- Storage statistics ----
+
+    def stats(self) -> Dict[str, int]:
+        """Row counts and stored blob bytes."""
+        with self._lock:
+            counts = {
+                table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("checkpoints", "channels", "writes", "blobs")
+            }
+            counts["blob_bytes"] = self._conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+            ).fetchone()[0]
+        return counts
+
+    # ---- Internals ----
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._conn)
+
+    def _make_tuple(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        checkpoint_id: str,
+        parent_id: Optional[str],
+        checkpoint_blob: bytes,
+        metadata_blob: bytes
+    ) -> CheckpointTuple:
+        checkpoint = self._loads(checkpoint_blob)
+        channel_values: Dict[str, Any] = {}
+        for channel, version in checkpoint["channel_versions"].items():
+            row = self._conn.execute(
+                "SELECT blob_hash FROM channels WHERE thread_id = ? AND checkpoint_ns = ? "
+                "AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version))
+            ).fetchone()
+            if row is not None and row[0] is not None:
+                channel_values[channel] = self.serde.loads_typed(self._get_typed(row[0]))
+
+        rows = self._conn.execute(
+            "SELECT task_id, idx, channel, blob_hash, task_path FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id)
+        ).fetchall()
+        rows.sort(key=lambda r: writes_sort_key(r[4], r[0], r[1]))
+        pending_writes = [
+            (task_id, channel, self.serde.loads_typed(self._get_typed(blob_hash)))
+            for task_id, _, channel, blob_hash, _ in rows
+        ]
+
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={**checkpoint, "channel_values": channel_values},
+            metadata=self._loads(metadata_blob),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id else None
+            ),
+            pending_writes=pending_writes
+        )
+
+    def _dumps(self, value: Any) -> bytes:
+        """Serialize and compress a checkpoint record (no content addressing)."""
+        codec, data = self._compress(_pack(self.serde.dumps_typed(value)))
+        return _CODEC_TAGS[codec] + data
+
+    def _loads(self, data: bytes) -> Any:
+        codec = _TAG_CODECS[data[:1]]
+        return self.serde.loads_typed(_unpack(self._decompress(codec, data[1:])))
+
+    def _put_blob(self, thread_id: str, checkpoint_ns: str, channel: str, typed: Tuple[str, bytes]) -> str:
+        """Store a serialized value by content hash and return the hash."""
+        raw = _pack(typed)
+        blob_hash = hashlib.sha256(raw).hexdigest()
+        if self._conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (blob_hash,)).fetchone():
+            return blob_hash
+
+        codec, data = self._compress(raw)
+        base, depth = None, 0
+        if zstd is not None and len(raw) >= _MIN_COMPRESS_SIZE:
+            previous = self._previous_blob(thread_id, checkpoint_ns, channel)
+            if previous is not None and previous[1] < self.max_delta_depth:
+                base_raw = self._get_raw(previous[0])
+                delta = zstd.ZstdCompressor(
+                    level=self.compression_level,
+                    dict_data=zstd.ZstdCompressionDict(base_raw, dict_type=zstd.DICT_TYPE_RAWCONTENT)
+                ).compress(raw)
+                if len(delta) < len(data):
+                    codec, data, base, depth = 'zstd-delta', delta, previous[0], previous[1] + 1
+
+        self._conn.execute(
+            "INSERT INTO blobs VALUES (?, ?, ?, ?, ?)", (blob_hash, codec, base, depth, data)
+        )
+        self._remember(blob_hash, raw)
+        return blob_hash
+
+    def _previous_blob(self, thread_id: str, checkpoint_ns: str, channel: str) -> Optional[Tuple[str, int]]:
+        """Latest stored blob of a channel (delta base) and its delta depth."""
+        return self._conn.execute(
+            "SELECT b.hash, b.depth FROM channels c JOIN blobs b ON b.hash = c.blob_hash "
+            "WHERE c.thread_id = ? AND c.checkpoint_ns = ? AND c.channel = ? "
+            "ORDER BY c.version DESC LIMIT 1",
+            (thread_id, checkpoint_ns, channel)
+        ).fetchone()
+
+    def _get_typed(self, blob_hash: str) -> Tuple[str, bytes]:
+        return _unpack(self._get_raw(blob_hash))
+
+    def _get_raw(self, blob_hash: str) -> bytes:
+        raw = self._cache.get(blob_hash)
+        if raw is not None:
+            self._cache.move_to_end(blob_hash)
+            return raw
+        codec, base, data = self._conn.execute(
+            "SELECT codec, base, data FROM blobs WHERE hash = ?", (blob_hash,)
+        ).fetchone()
+        if codec == 'zstd-delta':
+            _require_zstd()
+            dictionary = zstd.ZstdCompressionDict(self._get_raw(base), dict_type=zstd.DICT_TYPE_RAWCONTENT)
+            raw = zstd.ZstdDecompressor(dict_data=dictionary).decompress(data)
+        else:
+            raw = self._decompress(codec, data)
+        self._remember(blob_hash, raw)
+        return raw
+
+    def _remember(self, blob_hash: str, raw: bytes) -> None:
+        if len(raw) > self.cache_bytes:
+            return
+        self._cache[blob_hash] = raw
+        self._cache_size += len(raw)
+        while self._cache_size > self.cache_bytes:
+            _, evicted = self._cache.popitem(last=False)
+            self._cache_size -= len(evicted)
+
+    def _compress(self, raw: bytes) -> Tuple[str, bytes]:
+        if len(raw) < _MIN_COMPRESS_SIZE:
+            return 'raw', raw
+        if zstd is not None:
+            return 'zstd', zstd.ZstdCompressor(level=self.compression_level).compress(raw)
+        return 'zlib', zlib.compress(raw, min(self.compression_level * 2, 9))
+
+    @staticmethod
+    def _decompress(codec: str, data: bytes) -> bytes:
+        if codec == 'zstd':
+            _require_zstd()
+            return zstd.ZstdDecompressor().decompress(data)
+        if codec == 'zlib':
+            return zlib.decompress(data)
+        return data
+
+    def _collect_garbage(self) -> None:
+        """Delete blobs no longer referenced by channels, writes or other blobs."""
+        while True:
+            deleted = self._conn.execute(
+                "DELETE FROM blobs WHERE hash NOT IN (SELECT blob_hash FROM channels WHERE blob_hash IS NOT NULL) "
+                "AND hash NOT IN (SELECT blob_hash FROM writes) "
+                "AND hash NOT IN (SELECT base FROM blobs WHERE base IS NOT NULL)"
+            ).rowcount
+            if not deleted:
+                break
+        self._cache.clear()
+        self._cache_size = 0
+
+
+class _Transaction:
+    """BEGIN/COMMIT around a block, ROLLBACK on error."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+
+    def __enter__(self) -> None:
+        self._conn.execute("BEGIN")
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def _require_zstd() -> None:
+    if zstd is None:
+        raise RuntimeError("zstandard is required to read this checkpoint database")
+
+
+def _pack(typed: Tuple[str, bytes]) -> bytes:
+    type_name, data = typed
+    return type_name.encode("utf-8") + b"\0" + data
+
+
+def _unpack(raw: bytes) -> Tuple[str, bytes]:
+    type_name, _, data = raw.partition(b"\0")
+    return type_name.decode("utf-8"), data
@@ -6,21 +6,31 @@ Based on STATE_MACHINE.md design with 17 states and LangGraph API.
 """
 
 import asyncio
+import functools
 import logging
-from typing import TypedDict, List, Dict, Any, Optional
+import uuid
+from typing import TYPE_CHECKING, TypedDict, List, Dict, Any, Optional
 from datetime import datetime
 
-from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
-
 from src.agents.base_agent import AgentState
-from src.agents.code_agent import CodeAgent
-from src.agents.test_agent import TestAgent
-from src.agents.analysis_agent import AnalysisAgent
-from src.agents.kb_agent import KBAgent
+
+# langgraph and the agent engines take most of the cold-import time, so they
+# are imported where the graph is built rather than at module import
+if TYPE_CHECKING:
+    from langgraph.graph import StateGraph
+    from src.agents.code_agent import CodeAgent
+    from src.agents.test_agent import TestAgent
+    from src.agents.analysis_agent import AnalysisAgent
+    from src.agents.kb_agent import KBAgent
+    from src.orchestrator.checkpoint import SQLiteCheckpointSaver
+    from src.orchestrator.scheduler import ResourceLimiter
+    from src.orchestrator.speculative import SpeculativeConfig
 
 logger = logging.getLogger(__name__)
 
+# Default on-disk checkpoint store of run_workflow
+DEFAULT_CHECKPOINT_PATH = "/tmp/workflow_checkpoints.db"
+
 
 class WorkflowState(AgentState):
     """
@@ -33,12 +43,14 @@ class WorkflowState(AgentState):
 
 
 def create_workflow_graph(
-    code_agent: CodeAgent,
-    test_agent: TestAgent,
-    analysis_agent: AnalysisAgent,
-    kb_agent: KBAgent,
-    max_iterations: int = 10
-) -> StateGraph:
+    code_agent: "CodeAgent",
+    test_agent: "TestAgent",
+    analysis_agent: "AnalysisAgent",
+    kb_agent: "KBAgent",
+    max_iterations: int = 10,
+    resources: Optional["ResourceLimiter"] = None,
+    speculative: Optional["SpeculativeConfig"] = None
+) -> "StateGraph":
     """
     Create the LangGraph state machine for firmware testing workflow.
     
@@ -48,28 +60,45 @@ def create_workflow_graph(
         analysis_agent: AnalysisAgent instance
         kb_agent: KBAgent instance
         max_iterations: Maximum number of iterations
+        resources: Shared limiter bounding LLM calls and test environments
+            across concurrently running tasks
+        speculative: Replace the linear patch/build/test segment with
+            parallel evaluation of several candidate patches
     
     Returns:
         Compiled StateGraph
     """
+    from langgraph.graph import StateGraph, END
+    
+    # Near-duplicate LLM prompt lookup reuses the KBAgent embedding pipeline;
+    # the provider is a coroutine, so prompts are encoded off the event loop
+    code_agent.set_embedding_provider(kb_agent._get_embedding)
+
     # Create the state graph
     workflow = StateGraph(WorkflowState)
     
     # Add nodes
     workflow.add_node("initialize", initialize_node)
     workflow.add_node("code_analysis", code_agent)
-    workflow.add_node("patch_generation", code_agent)
-    workflow.add_node("patch_application", code_agent)
-    workflow.add_node("build_setup", test_agent)
-    workflow.add_node("build_run", test_agent)
-    workflow.add_node("test_setup", test_agent)
-    workflow.add_node("test_execution", test_agent)
-    workflow.add_node("result_collection", test_agent)
+    if speculative is None:
+        workflow.add_node("patch_generation", _limited(code_agent, "patch_generation", resources))
+        workflow.add_node("patch_application", code_agent)
+        workflow.add_node("build_setup", test_agent)
+        workflow.add_node("build_run", test_agent)
+        workflow.add_node("test_setup", _limited(test_agent, "test_setup", resources))
+        workflow.add_node("test_execution", _limited(test_agent, "test_execution", resources))
+        workflow.add_node("result_collection", test_agent)
+    else:
+        from src.orchestrator.speculative import SpeculativeExplorer
+        workflow.add_node("patch_exploration", SpeculativeExplorer(
+            code_agent, test_agent, analysis_agent, speculative, resources
+        ))
     workflow.add_node("result_analysis", analysis_agent)
     workflow.add_node("convergence_check", analysis_agent)
     workflow.add_node("knowledge_retrieval", kb_agent)
     workflow.add_node("knowledge_capture", kb_agent)
     workflow.add_node("error_recovery", analysis_agent)
+    workflow.add_node("next_iteration", next_iteration_node)
     workflow.add_node("success", success_node)
     workflow.add_node("failure", failure_node)
     workflow.add_node("escalate", escalate_node)
@@ -79,24 +108,29 @@ def create_workflow_graph(
     
     # Define edges
     workflow.add_edge("initialize", "code_analysis")
-    workflow.add_edge("code_analysis", "patch_generation")
-    workflow.add_edge("patch_generation", "patch_application")
-    workflow.add_edge("patch_application", "build_setup")
-    workflow.add_edge("build_setup", "build_run")
-    workflow.add_edge("build_run", "test_setup")
-    workflow.add_edge("test_setup", "test_execution")
-    workflow.add_edge("test_execution", "result_collection")
-    workflow.add_edge("result_collection", "result_analysis")
+    if speculative is None:
+        workflow.add_edge("code_analysis", "patch_generation")
+        workflow.add_edge("patch_generation", "patch_application")
+        workflow.add_edge("patch_application", "build_setup")
+        workflow.add_edge("build_setup", "build_run")
+        workflow.add_edge("build_run", "test_setup")
+        workflow.add_edge("test_setup", "test_execution")
+        workflow.add_edge("test_execution", "result_collection")
+        workflow.add_edge("result_collection", "result_analysis")
+    else:
+        workflow.add_edge("code_analysis", "patch_exploration")
+        workflow.add_edge("patch_exploration", "result_analysis")
     workflow.add_edge("result_analysis", "convergence_check")
     workflow.add_edge("knowledge_retrieval", "code_analysis")
+    workflow.add_edge("next_iteration", "code_analysis")
     workflow.add_edge("knowledge_capture", "success")
     
     # Conditional edges from convergence_check
     workflow.add_conditional_edges(
         "convergence_check",
-        should_continue,
+        functools.partial(should_continue, max_iterations=max_iterations),
         {
-            "continue": "code_analysis",
+            "continue": "next_iteration",
             "finish": "knowledge_capture",
             "failure": "failure",
             "escalate": "escalate"
@@ -122,6 +156,15 @@ def create_workflow_graph(
     return workflow
 
 
+def _limited(node: Any, name: str, resources: Optional["ResourceLimiter"]) -> Any:
+    """Wrap a node so it holds its resource slot while it runs."""
+    from src.orchestrator.scheduler import NODE_RESOURCES
+
+    if resources is None or name not in NODE_RESOURCES:
+        return node
+    return resources.wrap(node, NODE_RESOURCES[name])
+
+
 def should_continue(state: WorkflowState, max_iterations: int = 10) -> str:
     """
     Determine the next action based on analysis results.
@@ -177,7 +220,7 @@ def should_recover(state: WorkflowState) -> str:
     return "escalate"
 
 
-async def initialize_node(state: WorkflowState) -> WorkflowState:
+async def initialize_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Initialize the workflow state.
     
@@ -185,20 +228,32 @@ async def initialize_node(state: WorkflowState) -> WorkflowState:
         state: Initial state
     
     Returns:
-        Updated state with initialization complete
+        Partial state update with initialization complete
     """
     logger.info(f"Initializing workflow for task: {state.get('task_id', 'unknown')}")
     
     return {
-        **state,
         "iteration": 0,
         "max_iterations": state.get("max_iterations", 10),
-        "messages": state.get("messages", []) + ["Workflow initialized"],
+        "messages": ["Workflow initialized"],
         "next_action": "analyze"
     }
 
 
-async def success_node(state: WorkflowState) -> WorkflowState:
+async def next_iteration_node(state: WorkflowState) -> Dict[str, Any]:
+    """
+    Advance the iteration counter before looping back to code analysis.
+    
+    Args:
+        state: Current workflow state
+    
+    Returns:
+        Partial state update with the next iteration number
+    """
+    return {"iteration": state.get("iteration", 0) + 1}
+
+
+async def success_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Handle successful completion.
     
@@ -206,18 +261,17 @@ async def success_node(state: WorkflowState) -> WorkflowState:
         state: Final state
     
     Returns:
-        Updated state with success status
+        Partial state update with success status
     """
     logger.info(f"Workflow completed successfully: {state.get('task_id')}")
     
     return {
-        **state,
-        "messages": state.get("messages", []) + ["Workflow completed successfully"],
+        "messages": ["Workflow completed successfully"],
         "next_action": "finish"
     }
 
 
-async def failure_node(state: WorkflowState) -> WorkflowState:
+async def failure_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Handle workflow failure.
     
@@ -225,18 +279,17 @@ async def failure_node(state: WorkflowState) -> WorkflowState:
         state: Final state with errors
     
     Returns:
-        Updated state with failure status
+        Partial state update with failure status
     """
     logger.error(f"Workflow failed: {state.get('task_id')}")
     
     return {
-        **state,
-        "messages": state.get("messages", []) + ["Workflow failed"],
+        "messages": ["Workflow failed"],
         "next_action": "failure"
     }
 
 
-async def escalate_node(state: WorkflowState) -> WorkflowState:
+async def escalate_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Handle escalation request.
     
@@ -244,28 +297,34 @@ async def escalate_node(state: WorkflowState) -> WorkflowState:
         state: Current state requiring escalation
     
     Returns:
-        Updated state with escalation status
+        Partial state update with escalation status
     """
     logger.warning(f"Workflow escalated: {state.get('task_id')}")
     
     return {
-        **state,
-        "messages": state.get("messages", []) + ["Workflow escalated for human review"],
+        "messages": ["Workflow escalated for human review"],
         "next_action": "escalate"
     }
 
 
 async def run_workflow(
     initial_state: Dict[str, Any],
-    code_agent: CodeAgent,
-    test_agent: TestAgent,
-    analysis_agent: AnalysisAgent,
-    kb_agent: KBAgent,
-    max_iterations: int = 10
+    code_agent: "CodeAgent",
+    test_agent: "TestAgent",
+    analysis_agent: "AnalysisAgent",
+    kb_agent: "KBAgent",
+    max_iterations: int = 10,
+    checkpoint_path: str = DEFAULT_CHECKPOINT_PATH,
+    resume: bool = False,
+    speculative: Optional["SpeculativeConfig"] = None
 ) -> WorkflowState:
     """
     Run the workflow with the given initial state.
     
+    Checkpoints are written to an on-disk SQLite store under the task id as
+    thread id, so a crashed run can be resumed mid-iteration.
+    Knowledge units queued by the KBAgent are flushed before returning.
+    
     Args:
         initial_state: Initial state dictionary
         code_agent: CodeAgent instance
@@ -273,22 +332,76 @@ async def run_workflow(
         analysis_agent: AnalysisAgent instance
         kb_agent: KBAgent instance
         max_iterations: Maximum iterations
+        checkpoint_path: SQLite checkpoint database path
+        resume: Continue from the task's last checkpoint instead of starting over
+        speculative: Evaluate several candidate patches per iteration in parallel
     
     Returns:
         Final workflow state
     """
     # Create the workflow graph
     workflow = create_workflow_graph(
-        code_agent, test_agent, analysis_agent, kb_agent, max_iterations
+        code_agent, test_agent, analysis_agent, kb_agent, max_iterations, speculative=speculative
     )
     
-    # Create memory saver for checkpointing
-    memory = MemorySaver()
+    from src.orchestrator.checkpoint import SQLiteCheckpointSaver
+    
+    try:
+        with SQLiteCheckpointSaver(checkpoint_path) as checkpointer:
+            # Compile the workflow
+            app = workflow.compile(checkpointer=checkpointer)
+            return await run_compiled_workflow(app, checkpointer, initial_state, max_iterations, resume)
+    finally:
+        # Drain queued knowledge captures before the caller's event loop exits
+        await flush_knowledge(kb_agent)
+
+
+async def flush_knowledge(kb_agent: "KBAgent") -> None:
+    """Write the KBAgent's queued knowledge units, logging (not raising) failures."""
+    try:
+        await kb_agent.flush_knowledge()
+    except Exception as e:
+        logger.error(f"Failed to flush queued knowledge units, they stay spooled: {e}")
+
+
+async def run_compiled_workflow(
+    app: Any,
+    checkpointer: "SQLiteCheckpointSaver",
+    initial_state: Dict[str, Any],
+    max_iterations: int = 10,
+    resume: bool = False
+) -> WorkflowState:
+    """
+    Run one task on an already compiled workflow.
+    
+    The task id is the checkpoint thread id, so tasks sharing one compiled
+    graph and checkpointer keep separate state.
     
-    # Compile the workflow
-    app = workflow.compile(checkpointer=memory)
+    Args:
+        app: Workflow compiled with ``checkpointer``
+        checkpointer: Checkpoint store the workflow was compiled with
+        initial_state: Initial state dictionary
+        max_iterations: Maximum iterations
+        resume: Continue from the task's last checkpoint instead of starting over
     
-    # Convert initial state to WorkflowState
+    Returns:
+        Final workflow state
+    """
+    task_id = initial_state.get("task_id", "")
+    config = {"configurable": {"thread_id": task_id or f"workflow-{uuid.uuid4().hex}"}}
+    
+    if resume and await checkpointer.aget_tuple(config) is not None:
+        logger.info(f"Resuming workflow {task_id} from last checkpoint")
+        final_state = await app.ainvoke(None, config)
+    else:
+        await checkpointer.adelete_thread(config["configurable"]["thread_id"])
+        final_state = await app.ainvoke(_initial_workflow_state(initial_state, max_iterations), config)
+    
+    return WorkflowState(**final_state) if isinstance(final_state, dict) else final_state
+
+
+def _initial_workflow_state(initial_state: Dict[str, Any], max_iterations: int) -> WorkflowState:
+    """Convert the caller's initial state to a full WorkflowState."""
     state: WorkflowState = {
         "task_id": initial_state.get("task_id", ""),
         "iteration": 0,
@@ -304,14 +417,11 @@ async def run_workflow(
         "analysis_report": {},
         "next_action": "initialize",
         "converged": False,
+        "decision_trace": [],
         "messages": [],
         "errors": []
     }
-    
-    # Run the workflow
-    final_state = await app.ainvoke(state)
-    
-    return WorkflowState(**final_state) if isinstance(final_state, dict) else final_state
+    return state
 
 
 # Example usage
@@ -320,6 +430,8 @@ if __name__ == "__main__":
     sys.path.insert(0, 'D:/workspace/dev-agents-v2')
     
     async def main():
+        from src.agents import CodeAgent, TestAgent, AnalysisAgent, KBAgent
+        
         # Create agents
         code_agent = CodeAgent({})
         test_agent = TestAgent({})
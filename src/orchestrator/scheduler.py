@@ -0,0 +1,355 @@
+"""
+Workflow Task Scheduler
+
+Runs many workflow tasks concurrently on one event loop.
+
+The graph is compiled once, with a single SQLite checkpointer, and shared by
+every task; each task runs under its own checkpoint thread (the task id), so
+state never leaks between tasks. Queued tasks are started highest priority
+first (FIFO within a priority) by a fixed number of workers. Nodes that use
+scarce resources (LLM calls, QEMU instances, boards) acquire a slot from a
+global ResourceLimiter; its semaphores wake waiters in FIFO order, so
+concurrent tasks share the agents fairly instead of one task monopolizing
+them. With ``isolate_worktrees`` each task also works in its own pooled git
+worktree, so tasks on the same repository do not serialize on one checkout.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, List, Optional, Union
+
+from src.orchestrator.graph import (
+    DEFAULT_CHECKPOINT_PATH,
+    WorkflowState,
+    create_workflow_graph,
+    flush_knowledge,
+    run_compiled_workflow,
+)
+from src.tools.code_modification.worktree import shared_pool, working_tree_diff
+
+if TYPE_CHECKING:
+    from src.agents.code_agent import CodeAgent
+    from src.agents.test_agent import TestAgent
+    from src.agents.analysis_agent import AnalysisAgent
+    from src.agents.kb_agent import KBAgent
+    from src.orchestrator.checkpoint import SQLiteCheckpointSaver
+    from src.orchestrator.speculative import SpeculativeConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RESOURCE_LIMITS = {"llm": 4, "qemu": 4, "board": 1}
+
+# Test environment type -> resource its nodes hold (other types are unlimited)
+ENVIRONMENT_RESOURCES = {"qemu": "qemu", "board": "board", "bmc": "board"}
+
+
+def environment_resource(state: Dict[str, Any]) -> Optional[str]:
+    """Resource used by the test environment of a task."""
+    environment_type = state.get("test_plan", {}).get("environment_type", "qemu")
+    return ENVIRONMENT_RESOURCES.get(environment_type)
+
+
+ResourceSpec = Union[str, Callable[[Dict[str, Any]], Optional[str]]]
+
+# Workflow node -> resource held while the node runs
+NODE_RESOURCES: Dict[str, ResourceSpec] = {
+    "patch_generation": "llm",
+    "test_setup": environment_resource,
+    "test_execution": environment_resource,
+}
+
+
+class ResourceLimiter:
+    """
+    Global concurrency limits per resource.
+
+    Resources without a configured limit are not limited.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        """
+        Args:
+            limits: Maximum concurrent holders per resource name
+        """
+        self.limits = dict(DEFAULT_RESOURCE_LIMITS if limits is None else limits)
+        self._semaphores = {name: asyncio.Semaphore(limit) for name, limit in self.limits.items()}
+        self.in_use: Dict[str, int] = {name: 0 for name in self.limits}
+        self.peak: Dict[str, int] = {name: 0 for name in self.limits}
+
+    @asynccontextmanager
+    async def acquire(self, resource: Optional[str]) -> AsyncIterator[None]:
+        """Hold one slot of resource for the duration of the block."""
+        semaphore = self._semaphores.get(resource) if resource else None
+        if semaphore is None:
+            yield
+            return
+        async with semaphore:
+            self.in_use[resource] += 1
+            self.peak[resource] = max(self.peak[resource], self.in_use[resource])
+            try:
+                yield
+            finally:
+                self.in_use[resource] -= 1
+
+    def wrap(self, node: Callable, resource: ResourceSpec) -> Callable:
+        """Wrap a graph node so it runs while holding its resource."""
+        async def limited_node(state: Dict[str, Any]) -> Dict[str, Any]:
+            name = resource(state) if callable(resource) else resource
+            async with self.acquire(name):
+                return await node(state)
+
+        return limited_node
+
+
+@dataclass
+class SchedulerConfig:
+    """Task scheduler configuration"""
+    max_concurrent_tasks: int = 8
+    max_iterations: int = 10
+    checkpoint_path: str = DEFAULT_CHECKPOINT_PATH
+    resource_limits: Dict[str, int] = field(default_factory=lambda: dict(DEFAULT_RESOURCE_LIMITS))
+    # Evaluate several candidate patches per iteration (see SpeculativeExplorer)
+    speculative: Optional["SpeculativeConfig"] = None
+    # Run each task in its own pooled worktree of its repository, so tasks on
+    # the same repository do not share (and dirty) one checkout
+    isolate_worktrees: bool = False
+    worktree_pool_size: int = 4
+    worktree_root: str = "/tmp/worktree_pools"
+
+
+@dataclass(eq=False)
+class ScheduledTask:
+    """A submitted workflow task"""
+    task_id: str
+    priority: int
+    initial_state: Dict[str, Any]
+    resume: bool = False
+    status: str = "queued"  # queued / running / completed / failed / cancelled
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: "asyncio.Future[WorkflowState]" = field(default=None, repr=False)
+    _runner: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    def __await__(self):
+        return self.result.__await__()
+
+
+class TaskScheduler:
+    """
+    Schedules workflow tasks over one compiled graph.
+
+    Usage::
+
+        async with TaskScheduler(code, test, analysis, kb, config) as scheduler:
+            handles = [scheduler.submit(state, priority=p) for state, p in queue]
+            results = await asyncio.gather(*handles, return_exceptions=True)
+    """
+
+    def __init__(
+        self,
+        code_agent: "CodeAgent",
+        test_agent: "TestAgent",
+        analysis_agent: "AnalysisAgent",
+        kb_agent: "KBAgent",
+        config: Optional[SchedulerConfig] = None
+    ):
+        self.config = config or SchedulerConfig()
+        self._agents = (code_agent, test_agent, analysis_agent, kb_agent)
+        self.resources: Optional[ResourceLimiter] = None
+        self.tasks: Dict[str, ScheduledTask] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._sequence = itertools.count()
+        self._workers: List[asyncio.Task] = []
+        self._checkpointer: Optional["SQLiteCheckpointSaver"] = None
+        self._app: Any = None
+
+    async def __aenter__(self) -> "TaskScheduler":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Compile the graph and start the workers."""
+        if self._workers:
+            return
+        from src.orchestrator.checkpoint import SQLiteCheckpointSaver
+
+        self.resources = ResourceLimiter(self.config.resource_limits)
+        workflow = create_workflow_graph(
+            *self._agents,
+            max_iterations=self.config.max_iterations,
+            resources=self.resources,
+            speculative=self.config.speculative
+        )
+        self._checkpointer = SQLiteCheckpointSaver(self.config.checkpoint_path)
+        self._app = workflow.compile(checkpointer=self._checkpointer)
+        self._queue = asyncio.PriorityQueue()
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"workflow-worker-{i}")
+            for i in range(self.config.max_concurrent_tasks)
+        ]
+        logger.info(f"TaskScheduler started with {len(self._workers)} workers")
+
+    def submit(
+        self,
+        initial_state: Dict[str, Any],
+        priority: int = 0,
+        resume: bool = False
+    ) -> ScheduledTask:
+        """
+        Queue a task.
+
+        Args:
+            initial_state: Initial workflow state (a task id is generated if missing)
+            priority: Higher values start first
+            resume: Continue from the task's last checkpoint
+
+        Returns:
+            Handle; await it (or its ``result``) for the final state
+        """
+        if self._queue is None:
+            raise RuntimeError("TaskScheduler is not started")
+        if resume and self.config.isolate_worktrees:
+            # The checkpointed repo_path is a worktree that was reset on release
+            raise ValueError("Resuming is not supported with isolate_worktrees")
+
+        task_id = initial_state.get("task_id") or f"task-{uuid.uuid4().hex[:12]}"
+        existing = self.tasks.get(task_id)
+        if existing is not None and existing.status in ("queued", "running"):
+            # Two runs on one checkpoint thread would overwrite each other's state
+            raise ValueError(f"Task {task_id} is already {existing.status}")
+
+        task = ScheduledTask(
+            task_id=task_id,
+            priority=priority,
+            initial_state={**initial_state, "task_id": task_id},
+            resume=resume,
+            result=asyncio.get_running_loop().create_future()
+        )
+        self.tasks[task_id] = task
+        self._queue.put_nowait((-priority, next(self._sequence), task))
+        return task
+
+    def cancel(self, task_id: str) -> bool:
+        """Cancel a queued or running task."""
+        task = self.tasks.get(task_id)
+        if task is None or task.status not in ("queued", "running"):
+            return False
+        if task._runner is not None:
+            task._runner.cancel()
+        else:
+            self._finish(task, "cancelled")
+        return True
+
+    async def join(self) -> None:
+        """Wait until every queued task has finished."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """Cancel outstanding tasks, stop the workers, flush queued knowledge and close the checkpointer."""
+        for task in self.tasks.values():
+            if task.status in ("queued", "running"):
+                self.cancel(task.task_id)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        await flush_knowledge(self._agents[3])
+        if self._checkpointer is not None:
+            self._checkpointer.close()
+            self._checkpointer = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Task counts by status and current/peak resource usage."""
+        counts: Dict[str, int] = {}
+        for task in self.tasks.values():
+            counts[task.status] = counts.get(task.status, 0) + 1
+        return {
+            "tasks": counts,
+            "resources_in_use": dict(self.resources.in_use) if self.resources else {},
+            "resources_peak": dict(self.resources.peak) if self.resources else {},
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, task = await self._queue.get()
+            try:
+                if task.status == "queued":
+                    await self._run(task)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, task: ScheduledTask) -> None:
+        task.status = "running"
+        task.started_at = time.time()
+        task._runner = asyncio.create_task(self._execute(task))
+        try:
+            # wait() leaves the runner alone if this worker is cancelled
+            await asyncio.wait({task._runner})
+        except asyncio.CancelledError:
+            task._runner.cancel()
+            await asyncio.gather(task._runner, return_exceptions=True)
+            self._finish(task, "cancelled")
+            raise
+
+        if task._runner.cancelled():
+            self._finish(task, "cancelled")
+        elif task._runner.exception() is not None:
+            logger.error(f"Workflow task {task.task_id} failed: {task._runner.exception()}")
+            self._finish(task, "failed", error=task._runner.exception())
+        else:
+            self._finish(task, "completed", state=task._runner.result())
+
+    async def _execute(self, task: ScheduledTask) -> WorkflowState:
+        repo_path = task.initial_state.get("repo_path", "")
+        if not (self.config.isolate_worktrees and repo_path):
+            return await run_compiled_workflow(
+                self._app, self._checkpointer, task.initial_state, self.config.max_iterations, task.resume
+            )
+
+        pool = await asyncio.to_thread(
+            shared_pool, repo_path, self.config.worktree_root, self.config.worktree_pool_size
+        )
+        base_commit = await asyncio.to_thread(pool.resolve_commit, "HEAD")
+        async with pool.lease(base_commit) as worktree:
+            state = await run_compiled_workflow(
+                self._app,
+                self._checkpointer,
+                {**task.initial_state, "repo_path": str(worktree)},
+                self.config.max_iterations
+            )
+            # The worktree is reset on release; keep the task's changes in the result
+            diff = await asyncio.to_thread(working_tree_diff, worktree)
+
+        state["repo_path"] = repo_path
+        state["repo_snapshot"] = {"base_commit": base_commit, "diff": diff}
+        return state
+
+    @staticmethod
+    def _finish(
+        task: ScheduledTask,
+        status: str,
+        state: Optional[WorkflowState] = None,
+        error: Optional[BaseException] = None
+    ) -> None:
+        task.status = status
+        task.finished_at = time.time()
+        task._runner = None
+        if task.result.done():
+            return
+        if status == "completed":
+            task.result.set_result(state)
+        elif status == "failed":
+            task.result.set_exception(error)
+        else:
+            task.result.cancel()
@@ -0,0 +1,265 @@
+"""
+Speculative Patch Exploration
+
+Fan-out replacement for the linear generate -> apply -> build -> test
+segment of an iteration.
+
+The CodeAgent proposes K candidate patches (LLM samples at increasing
+temperature). Each candidate is applied in a worktree leased from the
+repository's shared WorktreePool (reset to HEAD plus the checkout's
+uncommitted changes) and tested there, at most ``max_parallel`` at a time. Candidates are ranked by
+pass rate, then by the number of failure signatures not seen in the previous
+iteration. As soon as one candidate converges (full pass rate, no new issues)
+the remaining candidates are cancelled. The winning patch is then applied to
+the task's repository and its test results advance to result analysis.
+"""
+
+import asyncio
+import logging
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from src.orchestrator.scheduler import ResourceLimiter, environment_resource
+from src.tools.code_modification.worktree import WorktreeError, WorktreePool, shared_pool, working_tree_diff
+
+if TYPE_CHECKING:
+    from src.agents.code_agent import CodeAgent
+    from src.agents.test_agent import TestAgent
+    from src.agents.analysis_agent import AnalysisAgent
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SpeculativeConfig:
+    """Speculative exploration configuration"""
+    num_candidates: int = 3
+    max_parallel: int = 2
+    # Root of the shared worktree pools (see WorktreePool)
+    worktree_root: str = "/tmp/worktree_pools"
+    # Candidate i is sampled at base_temperature + i * temperature_step
+    base_temperature: float = 0.3
+    temperature_step: float = 0.2
+    # A candidate reaching this pass rate with no new issues wins immediately
+    converge_pass_rate: float = 1.0
+
+
+@dataclass
+class CandidateResult:
+    """Evaluation of one candidate patch"""
+    index: int
+    patch_content: str
+    test_results: List[Dict[str, Any]] = field(default_factory=list)
+    pass_rate: float = 0.0
+    new_issues: int = 0
+    error: Optional[str] = None
+    evaluated: bool = False
+
+    @property
+    def score(self) -> Tuple[float, int, int]:
+        """Higher is better; ties go to the earlier (lower temperature) candidate."""
+        return (self.pass_rate, -self.new_issues, -self.index)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "index": self.index,
+            "pass_rate": self.pass_rate,
+            "new_issues": self.new_issues,
+            "error": self.error,
+        }
+
+
+class SpeculativeExplorer:
+    """
+    Workflow node evaluating candidate patches in parallel pooled worktrees.
+
+    Returns the same kind of partial update as the linear path (patch_content,
+    patch_applied, current_commit, test_results), so result analysis and the
+    rest of the graph are unchanged.
+    """
+
+    def __init__(
+        self,
+        code_agent: "CodeAgent",
+        test_agent: "TestAgent",
+        analysis_agent: "AnalysisAgent",
+        config: Optional[SpeculativeConfig] = None,
+        resources: Optional[ResourceLimiter] = None
+    ):
+        self.code_agent = code_agent
+        self.test_agent = test_agent
+        self.analysis_agent = analysis_agent
+        self.config = config or SpeculativeConfig()
+        self.resources = resources
+
+    async def __call__(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        repo_path = state.get("repo_path", "")
+        if not repo_path:
+            return {"errors": ["No repository path specified"], "next_action": "error"}
+
+        candidates = await self._propose(state)
+        if not candidates:
+            return {
+                "patch_content": "",
+                "test_results": [],
+                "messages": ["No candidate patches proposed"],
+                "next_action": "analyze"
+            }
+
+        try:
+            pool = shared_pool(repo_path, self.config.worktree_root, size=self.config.max_parallel)
+            # Candidates are built on top of the patches already applied to the checkout
+            overlay = await asyncio.to_thread(working_tree_diff, repo_path)
+        except WorktreeError as e:
+            return {
+                "patch_applied": False,
+                "errors": [f"Cannot isolate candidates: {e}"],
+                "next_action": "modify"
+            }
+
+        results = await self._evaluate_all(state, candidates, pool, overlay)
+        evaluated = [r for r in results if r.evaluated]
+        trace = {
+            "agent": self.__class__.__name__,
+            "iteration": state.get("iteration", 0),
+            "candidates": [r.summary() for r in results],
+        }
+
+        if not evaluated:
+            errors = [f"Candidate {r.index}: {r.error}" for r in results if r.error]
+            return {
+                "patch_applied": False,
+                "errors": errors or ["No candidate patch could be evaluated"],
+                "decision_trace": [{**trace, "next_action": "modify"}],
+                "next_action": "modify"
+            }
+
+        winner = max(evaluated, key=lambda r: r.score)
+        trace["winner"] = winner.index
+
+        applied = await self.code_agent.execute({
+            **state, "patch_content": winner.patch_content, "next_action": "apply_patch"
+        })
+        if not applied.get("patch_applied"):
+            return {
+                "patch_applied": False,
+                "errors": applied.get("errors", []) + [f"Winning candidate {winner.index} failed to apply to {repo_path}"],
+                "decision_trace": [{**trace, "next_action": "modify"}],
+                "next_action": "modify"
+            }
+
+        return {
+            "patch_content": self.code_agent.blob_store.offload(winner.patch_content),
+            "patch_applied": True,
+            "current_commit": applied.get("current_commit", ""),
+            "test_results": winner.test_results,
+            "messages": [
+                f"Speculative exploration: candidate {winner.index} of {len(results)} won "
+                f"(pass rate {winner.pass_rate * 100:.1f}%, {winner.new_issues} new issues)"
+            ],
+            "decision_trace": [{**trace, "next_action": "analyze"}],
+            "next_action": "analyze"
+        }
+
+    async def _propose(self, state: Dict[str, Any]) -> List[CandidateResult]:
+        """Sample K patches concurrently (one LLM slot each) and drop duplicates."""
+        async def propose(index: int) -> str:
+            temperature = min(1.0, self.config.base_temperature + index * self.config.temperature_step)
+            async with self._acquire("llm"):
+                return await self.code_agent.propose_patch(state, temperature)
+
+        patches = await asyncio.gather(
+            *(propose(i) for i in range(self.config.num_candidates)), return_exceptions=True
+        )
+
+        candidates: List[CandidateResult] = []
+        seen = set()
+        for patch in patches:
+            if isinstance(patch, BaseException):
+                logger.warning(f"Candidate patch generation failed: {patch}")
+                continue
+            if patch and patch not in seen:
+                seen.add(patch)
+                candidates.append(CandidateResult(index=len(candidates), patch_content=patch))
+        return candidates
+
+    async def _evaluate_all(
+        self,
+        state: Dict[str, Any],
+        candidates: List[CandidateResult],
+        pool: WorktreePool,
+        overlay: str
+    ) -> List[CandidateResult]:
+        semaphore = asyncio.Semaphore(self.config.max_parallel)
+
+        async def run(candidate: CandidateResult) -> CandidateResult:
+            async with semaphore:
+                await self._evaluate(state, candidate, pool, overlay)
+            return candidate
+
+        tasks = [asyncio.create_task(run(candidate)) for candidate in candidates]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                candidate = await finished
+                if self._converged(candidate):
+                    logger.info(f"Candidate {candidate.index} converged, cancelling the rest")
+                    break
+        finally:
+            for task, candidate in zip(tasks, candidates):
+                if not task.done():
+                    task.cancel()
+                    candidate.error = candidate.error or "cancelled"
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return candidates
+
+    async def _evaluate(
+        self,
+        state: Dict[str, Any],
+        candidate: CandidateResult,
+        pool: WorktreePool,
+        overlay: str
+    ) -> None:
+        """Apply and test one candidate in a pooled worktree."""
+        try:
+            async with pool.lease(overlay=overlay) as worktree:
+                candidate_state = {
+                    **state,
+                    "repo_path": str(worktree),
+                    "patch_content": candidate.patch_content,
+                    "next_action": "apply_patch"
+                }
+                applied = await self.code_agent.execute(candidate_state)
+                if not applied.get("patch_applied"):
+                    candidate.error = "; ".join(applied.get("errors", [])) or "patch not applied"
+                    return
+
+                # Tests build and run the candidate's sources, not the main checkout
+                test_plan = {**state.get("test_plan", {}), "source_dir": str(worktree)}
+                async with self._acquire(environment_resource(state)):
+                    tested = await self.test_agent.execute({
+                        **candidate_state, "test_plan": test_plan, "next_action": "execute"
+                    })
+        except WorktreeError as e:
+            candidate.error = str(e)
+            return
+
+        candidate.test_results = tested.get("test_results", [])
+        if not candidate.test_results and tested.get("errors"):
+            candidate.error = "; ".join(tested["errors"])
+            return
+
+        score = self.analysis_agent.score_candidate(state, candidate.test_results)
+        candidate.pass_rate = score["pass_rate"]
+        candidate.new_issues = score["new_issues"]
+        candidate.evaluated = True
+
+    def _converged(self, candidate: CandidateResult) -> bool:
+        return (
+            candidate.evaluated
+            and candidate.pass_rate >= self.config.converge_pass_rate
+            and candidate.new_issues == 0
+        )
+
+    def _acquire(self, resource: Optional[str]):
+        return self.resources.acquire(resource) if self.resources is not None else nullcontext()
@@ -1,12 +1,30 @@
 import os
-from typing import List, Dict, Any, Optional
-from tree_sitter import Language, Parser, Tree, Node, Query
-import tree_sitter_c as tsc
-import tree_sitter_cpp as tscpp
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 from src.models.code import FunctionNode, Location
 
+if TYPE_CHECKING:
+    from tree_sitter import Language, Parser, Tree, Node
+
+
+@lru_cache(maxsize=None)
+def _load_language(lang_name: str) -> "Language":
+    """Load a tree-sitter grammar once per process, on first use."""
+    from tree_sitter import Language
+
+    if lang_name == "c":
+        import tree_sitter_c as grammar
+    else:
+        import tree_sitter_cpp as grammar
+    return Language(grammar.language(), lang_name)
+
+
 class TreeSitterParser:
-    """Tree-sitter parser wrapper for C/C++"""
+    """Tree-sitter parser wrapper for C/C++
+
+    The grammar and parser are created on first parse so that constructing a
+    parser (e.g. in CodeAnalyzer) does not import tree-sitter.
+    """
 
     LANGUAGE_MAP = {
         "c": "c",
@@ -42,19 +60,29 @@ class TreeSitterParser:
             language: "c" or "cpp"
         """
         self.lang_name = self.LANGUAGE_MAP.get(language.lower())
-
-        if self.lang_name == "c":
-            self.language = Language(tsc.language(), "c")
-            self.parser = Parser()
-            self.parser.set_language(self.language)
-        elif self.lang_name == "cpp":
-            self.language = Language(tscpp.language(), "cpp")
-            self.parser = Parser()
-            self.parser.set_language(self.language)
-        else:
+        if self.lang_name is None:
             raise ValueError(f"Unsupported language: {language}")
 
-    def parse(self, code: str) -> Tree:
+        self._parser: Optional["Parser"] = None
+        self._queries: Dict[str, Any] = {}
+
+    @property
+    def language(self) -> "Language":
+        """Tree-sitter grammar, loaded on first access"""
+        return _load_language(self.lang_name)
+
+    @property
+    def parser(self) -> "Parser":
+        """Tree-sitter parser, created on first access"""
+        if self._parser is None:
+            from tree_sitter import Parser
+
+            parser = Parser()
+            parser.set_language(self.language)
+            self._parser = parser
+        return self._parser
+
+    def parse(self, code: str) -> "Tree":
         """
         Parse source code into an AST.
 
@@ -66,7 +94,7 @@ class TreeSitterParser:
         """
         return self.parser.parse(bytes(code, "utf8"))
 
-    def query(self, tree: Tree, pattern: str) -> Dict[str, List[Node]]:
+    def query(self, tree: "Tree", pattern: str) -> Dict[str, List["Node"]]:
         """
         Execute a query pattern on the AST.
 
@@ -77,7 +105,10 @@ class TreeSitterParser:
         Returns:
             Dict mapping capture names to lists of Nodes
         """
-        query = self.language.query(pattern)
+        query = self._queries.get(pattern)
+        if query is None:
+            query = self.language.query(pattern)
+            self._queries[pattern] = query
         # Use query.matches() instead of deprecated query.captures()
         matches = query.matches(tree.root_node)
 
@@ -132,7 +163,7 @@ class TreeSitterParser:
                 return val
 
             # Helper to get text from node
-            def get_text(node: Node) -> str:
+            def get_text(node: "Node") -> str:
                 return code[node.start_byte:node.end_byte]
 
             name_node = get_node('name')
@@ -6,12 +6,27 @@ This module provides tools for modifying source code, including:
 - Generating patches (unified diffs)
 - Applying patches to the codebase
 - Reverting patches
+- Applying unified diffs in process (PatchApplier), without spawning git
+- Pooled git worktrees for applying patches in isolation and in parallel
 """
 
 from .modifier import CodeModifier
+from .patch_applier import PatchApplier, PatchConflict, PatchParseError, PatchResult, parse_patch
 from .patch_generator import PatchGenerator
+from .worktree import WorktreeError, WorktreePool, add_worktree, head_commit, remove_worktree, shared_pool
 
 __all__ = [
     "CodeModifier",
+    "PatchApplier",
+    "PatchConflict",
     "PatchGenerator",
+    "PatchParseError",
+    "PatchResult",
+    "WorktreeError",
+    "WorktreePool",
+    "add_worktree",
+    "head_commit",
+    "parse_patch",
+    "remove_worktree",
+    "shared_pool",
 ]
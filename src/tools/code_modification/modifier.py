@@ -3,6 +3,8 @@ import logging
 from pathlib import Path
 from typing import Optional, Union
 
+from .patch_applier import PatchApplier, PatchConflict, PatchResult
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -10,19 +12,29 @@ class CodeModifier:
     """
     Applies and reverts code modifications using patch files.
 
-    This class relies on the 'git' command line tool to apply patches safely,
-    supporting conflict detection and reversion.
+    Two backends are available: "git" runs the 'git apply' command line tool,
+    "native" applies patches in process with PatchApplier (no subprocess, with
+    offset search, fuzz and per-hunk conflict reports).
     """
 
-    def __init__(self, git_path: str = "git"):
+    BACKENDS = ("git", "native")
+
+    def __init__(self, git_path: str = "git", backend: str = "git", fuzz: int = 2):
         """
         Initialize the CodeModifier.
 
         Args:
             git_path: Path to the git executable. Defaults to "git".
+            backend: "git" or "native". Defaults to "git".
+            fuzz: Context lines the native backend may ignore per hunk end.
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown patch backend '{backend}', expected one of {self.BACKENDS}")
         self.git_path = git_path
-        self._verify_git_availability()
+        self.backend = backend
+        self.applier = PatchApplier(fuzz=fuzz)
+        if backend == "git":
+            self._verify_git_availability()
 
     def _verify_git_availability(self):
         """Verify that git is available in the environment."""
@@ -54,6 +66,9 @@ class CodeModifier:
             logger.warning("Empty patch content provided.")
             return False
 
+        if self.backend == "native":
+            return self.apply_checked(patch_content, target_path).applied
+
         try:
             # git apply reads from stdin
             process = subprocess.run(
@@ -91,6 +106,12 @@ class CodeModifier:
             logger.warning("Empty patch content provided.")
             return False
 
+        if self.backend == "native":
+            result = self.applier.apply(patch_content, target_path, reverse=True)
+            if not result.applied:
+                logger.error(f"Failed to revert patch: {'; '.join(map(str, result.conflicts))}")
+            return result.applied
+
         try:
             # git apply --reverse reads from stdin
             process = subprocess.run(
@@ -128,6 +149,12 @@ class CodeModifier:
             logger.warning("Empty patch content provided.")
             return False
 
+        if self.backend == "native":
+            result = self.applier.check(patch_content, target_path)
+            if result.conflicts:
+                logger.info(f"Patch conflict detected: {'; '.join(map(str, result.conflicts))}")
+            return result.ok
+
         try:
             # git apply --check reads from stdin and doesn't apply changes
             process = subprocess.run(
@@ -147,3 +174,51 @@ class CodeModifier:
         except Exception as e:
             logger.error(f"Unexpected error checking patch: {str(e)}")
             return False
+
+    def apply_checked(self, patch_content: str, target_dir: Union[str, Path]) -> PatchResult:
+        """
+        Check and apply a patch in a single pass.
+
+        Replaces check_conflicts() followed by apply_patch(): both backends are
+        all-or-nothing, so a failed application is the conflict report and
+        nothing is written.
+
+        Args:
+            patch_content: The content of the unified diff patch.
+            target_dir: The directory where the patch should be applied.
+
+        Returns:
+            PatchResult with applied=True on success, otherwise the conflicts.
+        """
+        target_path = Path(target_dir).resolve()
+
+        if not patch_content.strip():
+            logger.warning("Empty patch content provided.")
+            return PatchResult(conflicts=[PatchConflict("", 0, 0, "Empty patch content")])
+
+        if self.backend == "native":
+            result = self.applier.apply(patch_content, target_path)
+            if result.conflicts:
+                logger.info(f"Patch conflict detected: {'; '.join(map(str, result.conflicts))}")
+            for note in result.notes:
+                logger.debug(note)
+            return result
+
+        try:
+            subprocess.run(
+                [self.git_path, "apply", "--verbose"],
+                input=patch_content.encode('utf-8'),
+                cwd=str(target_path),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                check=True
+            )
+            logger.info(f"Patch applied successfully in {target_path}")
+            return PatchResult(applied=True)
+        except subprocess.CalledProcessError as e:
+            error_msg = e.stderr.decode('utf-8').strip() if e.stderr else str(e)
+            logger.info(f"Patch conflict detected: {error_msg}")
+            return PatchResult(conflicts=[PatchConflict("", 0, 0, error_msg)])
+        except Exception as e:
+            logger.error(f"Unexpected error applying patch: {str(e)}")
+            return PatchResult(conflicts=[PatchConflict("", 0, 0, str(e))])
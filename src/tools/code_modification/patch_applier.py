@@ -0,0 +1,577 @@
+import logging
+import os
+import re
+import stat
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_HUNK_HEADER = re.compile(r'^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+_DIFF_GIT = re.compile(r'^diff --git (?:"?a/)?(.+?)"? (?:"?b/)?(.+?)"?$')
+
+
+class PatchParseError(ValueError):
+    """Raised when patch text is not a valid unified diff."""
+
+
+@dataclass
+class Hunk:
+    """One @@ section of a file patch."""
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+    header: str
+    # Lines prefixed with ' ', '-' or '+'
+    lines: List[str] = field(default_factory=list)
+    # False when a "\ No newline at end of file" marker follows the last old/new line
+    old_eof_newline: bool = True
+    new_eof_newline: bool = True
+
+    @property
+    def old_lines(self) -> List[str]:
+        return [line[1:] for line in self.lines if line[0] != '+']
+
+    @property
+    def new_lines(self) -> List[str]:
+        return [line[1:] for line in self.lines if line[0] != '-']
+
+    def context(self) -> Tuple[int, int]:
+        """Number of leading and trailing context lines."""
+        leading = 0
+        while leading < len(self.lines) and self.lines[leading][0] == ' ':
+            leading += 1
+        trailing = 0
+        while trailing < len(self.lines) - leading and self.lines[-1 - trailing][0] == ' ':
+            trailing += 1
+        return leading, trailing
+
+    def reversed(self) -> "Hunk":
+        swap = {'+': '-', '-': '+', ' ': ' '}
+        return Hunk(
+            old_start=self.new_start,
+            old_count=self.new_count,
+            new_start=self.old_start,
+            new_count=self.old_count,
+            header=f"@@ -{self.new_start},{self.new_count} +{self.old_start},{self.old_count} @@",
+            lines=[swap[line[0]] + line[1:] for line in self.lines],
+            old_eof_newline=self.new_eof_newline,
+            new_eof_newline=self.old_eof_newline
+        )
+
+
+@dataclass
+class FilePatch:
+    """Changes to one file; a None path stands for /dev/null."""
+    old_path: Optional[str]
+    new_path: Optional[str]
+    hunks: List[Hunk] = field(default_factory=list)
+    # Permission bits from git mode headers (e.g. 0o755 for "new mode 100755")
+    old_mode: Optional[int] = None
+    new_mode: Optional[int] = None
+
+    @property
+    def path(self) -> str:
+        return self.new_path or self.old_path or ""
+
+    @property
+    def is_new(self) -> bool:
+        return self.old_path is None
+
+    @property
+    def is_delete(self) -> bool:
+        return self.new_path is None
+
+    def reversed(self) -> "FilePatch":
+        return FilePatch(
+            self.new_path, self.old_path, [hunk.reversed() for hunk in self.hunks],
+            old_mode=self.new_mode, new_mode=self.old_mode
+        )
+
+
+@dataclass
+class PatchConflict:
+    """A hunk (or file) that does not apply."""
+    path: str
+    hunk: int  # 1-based hunk number, 0 for whole-file problems
+    line: int  # 1-based line the hunk was expected at
+    reason: str
+
+    def __str__(self) -> str:
+        where = f"hunk #{self.hunk} at line {self.line}" if self.hunk else "file"
+        return f"{self.path}: {where}: {self.reason}"
+
+
+@dataclass
+class PatchResult:
+    """Outcome of checking or applying a patch."""
+    applied: bool = False
+    conflicts: List[PatchConflict] = field(default_factory=list)
+    # New content per path; None for deleted files
+    files: Dict[str, Optional[str]] = field(default_factory=dict)
+    # Hunks applied at an offset or with fuzz
+    notes: List[str] = field(default_factory=list)
+    # Permission bits per written path
+    modes: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return not self.conflicts
+
+
+def _strip_path(raw: str) -> Optional[str]:
+    # Drop the optional timestamp after a tab and surrounding quotes
+    path = raw.split('\t', 1)[0].strip().strip('"')
+    if path == "/dev/null":
+        return None
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    return path
+
+
+def _parse_mode(value: str) -> int:
+    try:
+        mode = int(value.strip(), 8)
+    except ValueError:
+        raise PatchParseError(f"Malformed file mode: {value!r}")
+    if not stat.S_ISREG(mode):
+        raise PatchParseError(f"Only regular files are supported, got mode {value.strip()}")
+    return stat.S_IMODE(mode)
+
+
+def _read_umask_once() -> int:
+    # os.umask can only read the mask by setting it, which would race with
+    # processes spawned from other threads; only done once, at import
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+_IMPORT_UMASK = _read_umask_once()
+
+
+def _umask() -> int:
+    """Current umask, read without changing it (Linux); else the mask at import."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    return _IMPORT_UMASK
+
+
+def parse_patch(patch_content: str) -> List[FilePatch]:
+    """
+    Parse a unified diff (plain or git format) into file patches.
+
+    Raises:
+        PatchParseError: On malformed hunks or binary patches.
+    """
+    lines = patch_content.split('\n')
+    if lines and lines[-1] == "":
+        lines.pop()
+    lines = [line[:-1] if line.endswith('\r') else line for line in lines]
+
+    patches: List[FilePatch] = []
+    # Extended header of the current git section; rename- and mode-only
+    # sections have no ---/+++ header
+    section: Optional[FilePatch] = None
+
+    def flush_section() -> None:
+        if section is None or not section.path:
+            return
+        # Empty created/deleted files, renames and mode changes
+        if section.old_path != section.new_path or section.old_mode != section.new_mode:
+            patches.append(section)
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith("diff --git "):
+            flush_section()
+            match = _DIFF_GIT.match(line)
+            path = match.group(2) if match else None
+            section = FilePatch(path, path)
+        elif section is not None and line.startswith("rename from "):
+            section.old_path = line[len("rename from "):]
+        elif section is not None and line.startswith("rename to "):
+            section.new_path = line[len("rename to "):]
+        elif section is not None and line.startswith("old mode "):
+            section.old_mode = _parse_mode(line[len("old mode "):])
+        elif section is not None and line.startswith("new mode "):
+            section.new_mode = _parse_mode(line[len("new mode "):])
+        elif section is not None and line.startswith("new file mode "):
+            section.old_path, section.new_mode = None, _parse_mode(line[len("new file mode "):])
+        elif section is not None and line.startswith("deleted file mode "):
+            section.new_path, section.old_mode = None, _parse_mode(line[len("deleted file mode "):])
+        elif line.startswith("GIT binary patch") or (line.startswith("Binary files ") and line.endswith(" differ")):
+            raise PatchParseError("Binary patches are not supported")
+        elif line.startswith("--- ") and i + 1 < len(lines) and lines[i + 1].startswith("+++ "):
+            file_patch = FilePatch(_strip_path(line[4:]), _strip_path(lines[i + 1][4:]))
+            if section is not None:
+                file_patch.old_mode, file_patch.new_mode = section.old_mode, section.new_mode
+            i += 2
+            while i < len(lines) and lines[i].startswith("@@"):
+                hunk, i = _parse_hunk(lines, i)
+                file_patch.hunks.append(hunk)
+            patches.append(file_patch)
+            section = None
+            continue
+        i += 1
+
+    flush_section()
+    return patches
+
+
+def _parse_hunk(lines: List[str], i: int) -> Tuple[Hunk, int]:
+    match = _HUNK_HEADER.match(lines[i])
+    if match is None:
+        raise PatchParseError(f"Malformed hunk header: {lines[i]!r}")
+    old_start, old_count, new_start, new_count = match.groups()
+    hunk = Hunk(
+        old_start=int(old_start),
+        old_count=1 if old_count is None else int(old_count),
+        new_start=int(new_start),
+        new_count=1 if new_count is None else int(new_count),
+        header=match.group(0)
+    )
+    old_left, new_left = hunk.old_count, hunk.new_count
+    i += 1
+    while old_left > 0 or new_left > 0 or (i < len(lines) and lines[i].startswith('\\')):
+        if i >= len(lines):
+            raise PatchParseError(f"Truncated hunk {hunk.header}")
+        line = lines[i]
+        i += 1
+        if line.startswith('\\'):
+            # "\ No newline at end of file" refers to the previous line
+            tag = hunk.lines[-1][0] if hunk.lines else ' '
+            if tag != '+':
+                hunk.old_eof_newline = False
+            if tag != '-':
+                hunk.new_eof_newline = False
+            continue
+        # Some tools strip the space of empty context lines
+        tag = line[0] if line else ' '
+        if tag == ' ':
+            old_left -= 1
+            new_left -= 1
+        elif tag == '-':
+            old_left -= 1
+        elif tag == '+':
+            new_left -= 1
+        else:
+            raise PatchParseError(f"Unexpected line in hunk {hunk.header}: {line!r}")
+        if old_left < 0 or new_left < 0:
+            raise PatchParseError(f"Hunk {hunk.header} has more lines than its header declares")
+        hunk.lines.append(tag + line[1:])
+    return hunk, i
+
+
+class _Text:
+    """File content split into lines, keeping each line's own ending."""
+
+    def __init__(self, content: str):
+        crlf = content.count("\r\n")
+        # Ending for lines that have no neighbour to copy it from
+        self.newline = "\r\n" if crlf > content.count("\n") - crlf else "\n"
+        self.final_newline = content.endswith("\n") or not content
+        lines = content.split("\n")
+        if lines[-1] == "":
+            lines.pop()
+        self.lines: List[str] = []
+        self.endings: List[str] = []
+        for line in lines:
+            if line.endswith("\r"):
+                self.lines.append(line[:-1])
+                self.endings.append("\r\n")
+            else:
+                self.lines.append(line)
+                self.endings.append("\n")
+        if self.lines and not self.final_newline:
+            # The last line has no ending; it gets one if lines are added after it
+            self.endings[-1] = self.endings[-2] if len(self.endings) > 1 else self.newline
+
+    def join(self, lines: List[str], endings: List[str], final_newline: bool) -> str:
+        if not lines:
+            return ""
+        text = "".join(line + ending for line, ending in zip(lines, endings))
+        return text if final_newline else text[:-len(endings[-1])]
+
+
+class PatchApplier:
+    """
+    Applies unified diffs in process, without spawning git or patch.
+
+    Each hunk is looked up at its expected position (shifted by the offset of
+    the previous hunks), then at increasing distances from it, and finally
+    with up to ``fuzz`` context lines ignored at either end, like GNU patch.
+    All files are patched in memory first; only when every hunk of every file
+    applies are the results written, each through a temporary file and an
+    atomic rename. A failed patch never leaves the tree half-patched.
+    """
+
+    def __init__(self, fuzz: int = 2):
+        """
+        Args:
+            fuzz: Maximum number of context lines ignored at each end of a hunk.
+        """
+        self.fuzz = fuzz
+
+    def check(self, patch_content: str, target_dir: Union[str, Path], reverse: bool = False) -> PatchResult:
+        """Dry run: report conflicts without writing anything."""
+        return self.apply(patch_content, target_dir, reverse=reverse, dry_run=True)
+
+    def apply(
+        self,
+        patch_content: str,
+        target_dir: Union[str, Path],
+        reverse: bool = False,
+        dry_run: bool = False
+    ) -> PatchResult:
+        """
+        Check and apply a patch in one pass.
+
+        Args:
+            patch_content: Unified diff.
+            target_dir: Directory the patch paths are relative to.
+            reverse: Undo the patch instead of applying it.
+            dry_run: Only compute the result.
+
+        Returns:
+            PatchResult; ``applied`` is True once the files were written.
+        """
+        result = PatchResult()
+        try:
+            file_patches = parse_patch(patch_content)
+        except PatchParseError as e:
+            result.conflicts.append(PatchConflict("", 0, 0, str(e)))
+            return result
+        if not file_patches:
+            result.conflicts.append(PatchConflict("", 0, 0, "No file changes found in patch"))
+            return result
+        if reverse:
+            file_patches = [file_patch.reversed() for file_patch in file_patches]
+
+        target = Path(target_dir).resolve()
+        # Content as patched so far, so several sections may touch one file
+        contents: Dict[str, Optional[str]] = {}
+        for file_patch in file_patches:
+            self._apply_file(target, file_patch, contents, result)
+
+        if result.conflicts or dry_run:
+            return result
+
+        self._write(target, result.files, result.modes)
+        result.applied = True
+        logger.info(f"Patch applied to {len(result.files)} files in {target}")
+        return result
+
+    def _apply_file(
+        self,
+        target: Path,
+        file_patch: FilePatch,
+        contents: Dict[str, Optional[str]],
+        result: PatchResult
+    ) -> None:
+        for rel in (file_patch.old_path, file_patch.new_path):
+            if rel is not None and not self._inside(target, rel):
+                result.conflicts.append(PatchConflict(rel, 0, 0, "path outside target directory"))
+                return
+
+        old_path, new_path = file_patch.old_path, file_patch.new_path
+        original = None if old_path is None else self._read(target, old_path, contents)
+        if old_path is not None and original is None:
+            result.conflicts.append(PatchConflict(old_path, 0, 0, "file does not exist"))
+            return
+        if file_patch.is_new and self._read(target, new_path, contents):
+            result.conflicts.append(PatchConflict(new_path, 0, 0, "file already exists"))
+            return
+
+        text = _Text(original or "")
+        lines, endings, final_newline = self._apply_hunks(file_patch, text, result)
+        if lines is None:
+            return
+
+        if new_path is None:
+            if lines:
+                result.conflicts.append(PatchConflict(old_path, 0, 0, "file to delete does not match the patch"))
+                return
+        else:
+            contents[new_path] = result.files[new_path] = text.join(lines, endings, final_newline)
+            result.modes[new_path] = self._mode(target, file_patch, result)
+        if old_path is not None and old_path != new_path:
+            # Deleted or renamed away
+            contents[old_path] = result.files[old_path] = None
+
+    def _apply_hunks(
+        self,
+        file_patch: FilePatch,
+        text: _Text,
+        result: PatchResult
+    ) -> Tuple[Optional[List[str]], List[str], bool]:
+        """Patched lines, their endings and whether the file ends with a newline."""
+        src, src_endings = text.lines, text.endings
+        out: List[str] = []
+        endings: List[str] = []
+        final_newline = text.final_newline
+        position = 0
+        offset = 0
+        failed = False
+        for number, hunk in enumerate(file_patch.hunks, 1):
+            expected = (hunk.old_start - 1 if hunk.old_count else hunk.old_start) + offset
+            found = self._locate(src, hunk, expected, position)
+            if found is None:
+                failed = True
+                result.conflicts.append(self._describe(file_patch.path, number, hunk, src, expected))
+                continue
+
+            start, fuzz, head, tail = found
+            out.extend(src[position:start])
+            endings.extend(src_endings[position:start])
+            # Context keeps its own ending; added lines copy the line before
+            # them, or the next one at the start of the file
+            index = start
+            for line in hunk.lines[head:len(hunk.lines) - tail]:
+                if line[0] == '+':
+                    out.append(line[1:])
+                    if endings:
+                        endings.append(endings[-1])
+                    else:
+                        endings.append(src_endings[index] if index < len(src) else text.newline)
+                    continue
+                if line[0] == ' ':
+                    out.append(src[index])
+                    endings.append(src_endings[index])
+                index += 1
+            position = index
+            offset = start - head - (hunk.old_start - 1 if hunk.old_count else hunk.old_start)
+            if position == len(src) and tail == 0:
+                final_newline = hunk.new_eof_newline
+            if offset or fuzz:
+                result.notes.append(
+                    f"{file_patch.path}: hunk #{number} applied at line {start - head + 1}"
+                    + (f" (offset {offset:+d})" if offset else "")
+                    + (f" with fuzz {fuzz}" if fuzz else "")
+                )
+
+        if failed:
+            return None, [], final_newline
+        out.extend(src[position:])
+        endings.extend(src_endings[position:])
+        return out, endings, final_newline
+
+    def _locate(
+        self,
+        src: List[str],
+        hunk: Hunk,
+        expected: int,
+        lower: int
+    ) -> Optional[Tuple[int, int, int, int]]:
+        """(start, fuzz, trimmed leading, trimmed trailing) of the best match, or None."""
+        old = hunk.old_lines
+        leading, trailing = hunk.context()
+        tried = set()
+        for fuzz in range(self.fuzz + 1):
+            head, tail = min(fuzz, leading), min(fuzz, trailing)
+            if (head, tail) in tried:
+                continue
+            tried.add((head, tail))
+            pattern = old[head:len(old) - tail]
+            start = self._search(src, pattern, expected + head, lower)
+            if start is not None:
+                return start, fuzz, head, tail
+        return None
+
+    @staticmethod
+    def _search(src: List[str], pattern: List[str], expected: int, lower: int) -> Optional[int]:
+        """Match position closest to expected, not before lower."""
+        upper = len(src) - len(pattern)
+        if upper < lower:
+            return None
+        if not pattern:
+            return min(max(expected, lower), upper)
+        first = pattern[0]
+        size = len(pattern)
+        expected = min(max(expected, lower), upper)
+        for distance in range(max(expected - lower, upper - expected) + 1):
+            for start in (expected - distance, expected + distance) if distance else (expected,):
+                if lower <= start <= upper and src[start] == first and src[start:start + size] == pattern:
+                    return start
+        return None
+
+    @staticmethod
+    def _describe(path: str, number: int, hunk: Hunk, src: List[str], expected: int) -> PatchConflict:
+        """Explain why a hunk does not match at its expected position."""
+        line = max(expected, 0)
+        for index, wanted in enumerate(hunk.old_lines):
+            if line + index >= len(src):
+                return PatchConflict(path, number, line + 1, f"file ends at line {len(src)}, expected {wanted!r}")
+            if src[line + index] != wanted:
+                return PatchConflict(
+                    path, number, line + 1,
+                    f"line {line + index + 1}: expected {wanted!r}, found {src[line + index]!r}"
+                )
+        return PatchConflict(path, number, line + 1, "overlaps the previous hunk")
+
+    @staticmethod
+    def _inside(target: Path, rel: str) -> bool:
+        return not Path(rel).is_absolute() and (target / rel).resolve().is_relative_to(target)
+
+    @staticmethod
+    def _read(target: Path, rel: str, contents: Dict[str, Optional[str]]) -> Optional[str]:
+        if rel in contents:
+            return contents[rel]
+        try:
+            # surrogateescape keeps non-UTF-8 bytes intact on write
+            return (target / rel).read_bytes().decode("utf-8", errors="surrogateescape")
+        except (FileNotFoundError, IsADirectoryError):
+            return None
+
+    @staticmethod
+    def _mode(target: Path, file_patch: FilePatch, result: PatchResult) -> int:
+        """Permission bits of a patched file, following git apply."""
+        if file_patch.new_mode is not None:
+            return (0o777 if file_patch.new_mode & 0o111 else 0o666) & ~_umask()
+        old_path = file_patch.old_path
+        if old_path is not None:
+            if old_path in result.modes:
+                return result.modes[old_path]
+            try:
+                return stat.S_IMODE((target / old_path).stat().st_mode)
+            except OSError:
+                pass
+        return 0o666 & ~_umask()
+
+    @staticmethod
+    def _write(target: Path, files: Dict[str, Optional[str]], modes: Dict[str, int]) -> None:
+        staged: List[Tuple[str, Path]] = []
+        try:
+            for rel, content in files.items():
+                if content is None:
+                    continue
+                path = target / rel
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+                staged.append((tmp, path))
+                with os.fdopen(fd, "wb") as f:
+                    f.write(content.encode("utf-8", errors="surrogateescape"))
+                os.chmod(tmp, modes[rel])
+        except BaseException:
+            for tmp, _ in staged:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+            raise
+
+        for tmp, path in staged:
+            os.replace(tmp, path)
+        for rel, content in files.items():
+            if content is None:
+                (target / rel).unlink(missing_ok=True)
@@ -0,0 +1,433 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple, Union
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class WorktreeError(RuntimeError):
+    """Raised when a git worktree operation fails."""
+
+
+def _git(
+    git_path: str,
+    repo_path: Union[str, Path],
+    *args: str,
+    input: Optional[bytes] = None,
+    env: Optional[Dict[str, str]] = None
+) -> str:
+    try:
+        process = subprocess.run(
+            [git_path, "-C", str(repo_path), *args],
+            input=input,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+            check=True
+        )
+    except subprocess.CalledProcessError as e:
+        error_msg = e.stderr.decode('utf-8').strip() if e.stderr else str(e)
+        raise WorktreeError(f"git {' '.join(args)} failed: {error_msg}") from e
+    except FileNotFoundError as e:
+        raise WorktreeError(f"Git executable not found at '{git_path}'") from e
+    return process.stdout.decode('utf-8', errors='replace').strip()
+
+
+def add_worktree(
+    repo_path: Union[str, Path],
+    worktree_path: Union[str, Path],
+    commit: str = "HEAD",
+    git_path: str = "git"
+) -> Path:
+    """
+    Create a detached git worktree of repo_path at commit.
+
+    The worktree shares the object store of the repository, so creating one
+    only checks out the files and does not copy history.
+
+    Args:
+        repo_path: Repository the worktree belongs to.
+        worktree_path: Directory of the new worktree (must not exist).
+        commit: Commit to check out.
+        git_path: Path to the git executable.
+
+    Returns:
+        Resolved path of the worktree.
+
+    Raises:
+        WorktreeError: If git fails.
+    """
+    path = Path(worktree_path).resolve()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _git(git_path, repo_path, "worktree", "add", "--detach", str(path), commit)
+    logger.info(f"Created worktree {path} at {commit}")
+    return path
+
+
+def remove_worktree(
+    repo_path: Union[str, Path],
+    worktree_path: Union[str, Path],
+    git_path: str = "git"
+) -> None:
+    """
+    Remove a worktree created by add_worktree, discarding its changes.
+
+    Errors are logged rather than raised so cleanup never masks the original
+    failure.
+    """
+    try:
+        _git(git_path, repo_path, "worktree", "remove", "--force", str(worktree_path))
+    except WorktreeError as e:
+        logger.warning(f"Failed to remove worktree {worktree_path}: {e}")
+
+
+def working_tree_diff(repo_path: Union[str, Path], git_path: str = "git") -> str:
+    """
+    Uncommitted changes of a checkout, including untracked files, as a binary-safe diff.
+
+    Everything except ignored files is staged into a throwaway copy of the
+    index, so the checkout's own index is left untouched.
+    """
+    index = Path(repo_path) / _git(git_path, repo_path, "rev-parse", "--git-path", "index")
+    fd, tmp_index = tempfile.mkstemp(prefix="worktree-index-")
+    os.close(fd)
+    try:
+        if index.is_file():
+            # Keeps the stat cache, so unchanged files are not re-hashed
+            shutil.copyfile(index, tmp_index)
+        else:
+            os.unlink(tmp_index)
+        env = {**os.environ, "GIT_INDEX_FILE": tmp_index}
+        _git(git_path, repo_path, "add", "--all", env=env)
+        diff = _git(git_path, repo_path, "diff", "--cached", "HEAD", "--binary", env=env)
+    finally:
+        try:
+            os.unlink(tmp_index)
+        except FileNotFoundError:
+            pass
+    return diff + "\n" if diff else ""
+
+
+def head_commit(repo_path: Union[str, Path], git_path: str = "git") -> str:
+    """
+    Commit checked out in repo_path, or "" if it has none.
+
+    Reads HEAD, loose refs and packed-refs from the git directory directly (a
+    linked worktree's ``.git`` file is followed), so no process is spawned;
+    ``git rev-parse`` is only the fallback, e.g. for a subdirectory of a
+    checkout.
+    """
+    try:
+        git_dir = Path(repo_path) / ".git"
+        if git_dir.is_file():
+            git_dir = Path(repo_path) / git_dir.read_text().split(":", 1)[1].strip()
+        head = (git_dir / "HEAD").read_text().strip()
+        if not head.startswith("ref: "):
+            return head
+        ref = head[len("ref: "):]
+        common_dir = git_dir
+        if (git_dir / "commondir").is_file():
+            common_dir = git_dir / (git_dir / "commondir").read_text().strip()
+        for base in (git_dir, common_dir):
+            if (base / ref).is_file():
+                return (base / ref).read_text().strip()
+        if (common_dir / "packed-refs").is_file():
+            for line in (common_dir / "packed-refs").read_text().splitlines():
+                sha, _, name = line.partition(" ")
+                if name == ref:
+                    return sha
+        # Unborn branch
+        return ""
+    except (OSError, IndexError):
+        pass
+
+    try:
+        return _git(git_path, repo_path, "rev-parse", "HEAD")
+    except WorktreeError:
+        return ""
+
+
+class WorktreePool:
+    """
+    Pool of reusable detached worktrees of one repository.
+
+    Worktrees are created on demand (or up front with prepare()) up to
+    ``size`` and are never re-cloned: returning a lease resets the worktree
+    with ``git checkout -f`` and ``git clean``, and the next lease takes the
+    least recently returned one. Worktrees left in the pool directory by a
+    previous process are adopted and reset instead of recreated, so a crash
+    never leaves the main checkout dirty.
+
+    The pool is thread-safe; ``lease()`` is the asyncio entry point.
+    """
+
+    def __init__(
+        self,
+        repo_path: Union[str, Path],
+        pool_dir: Union[str, Path],
+        size: int = 4,
+        git_path: str = "git",
+        clean_ignored: bool = False
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            repo_path: Repository the worktrees belong to.
+            pool_dir: Directory holding the worktrees.
+            size: Maximum number of worktrees.
+            git_path: Path to the git executable.
+            clean_ignored: Also delete ignored files (build outputs) on reset;
+                by default they are kept so builds stay incremental.
+        """
+        if size < 1:
+            raise ValueError(f"size must be positive: {size}")
+        self.repo_path = Path(repo_path).resolve()
+        self.pool_dir = Path(pool_dir).resolve()
+        self.size = size
+        self.git_path = git_path
+        self.clean_ignored = clean_ignored
+        # Idle worktree -> commit it is checked out at, least recently returned first
+        self._idle: "OrderedDict[Path, str]" = OrderedDict()
+        # Leased worktree -> commit it was checked out at
+        self._leased: Dict[Path, str] = {}
+        self._count = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        # git worktree add/remove read every registered worktree and fail on
+        # one that another process is still creating
+        self._admin_lock = threading.Lock()
+        # lease() blocks here, never in the default executor: waiters must not
+        # take the threads holders need to release their worktrees
+        self._waiters = ThreadPoolExecutor(max_workers=size, thread_name_prefix="worktree-lease")
+        self._adopt()
+
+    @property
+    def leased(self) -> int:
+        return len(self._leased)
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def resolve_commit(self, commit: str = "HEAD") -> str:
+        return _git(self.git_path, self.repo_path, "rev-parse", "--verify", f"{commit}^{{commit}}")
+
+    def prepare(self, count: Optional[int] = None, commit: str = "HEAD") -> None:
+        """Pre-create worktrees at commit until the pool holds count (default size)."""
+        target = min(self.size, count if count is not None else self.size)
+        commit = self.resolve_commit(commit)
+        while True:
+            with self._cond:
+                if self._count >= target:
+                    return
+                self._count += 1
+            try:
+                path = self._create(commit)
+            except WorktreeError:
+                self._discard(None)
+                raise
+            with self._cond:
+                self._idle[path] = commit
+                self._cond.notify()
+
+    def acquire(
+        self,
+        commit: str = "HEAD",
+        timeout: Optional[float] = None,
+        cancel: Optional[threading.Event] = None
+    ) -> Path:
+        """
+        Take a clean worktree checked out at commit.
+
+        Blocks while all ``size`` worktrees are leased.
+
+        Raises:
+            WorktreeError: On git failure, timeout, cancellation or a closed pool.
+        """
+        commit = self.resolve_commit(commit)
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise WorktreeError("Worktree pool is closed")
+                if cancel is not None and cancel.is_set():
+                    raise WorktreeError("Worktree lease cancelled")
+                if self._idle:
+                    path, current = self._idle.popitem(last=False)
+                    break
+                if self._count < self.size:
+                    self._count += 1
+                    path, current = None, commit
+                    break
+                if not self._cond.wait(timeout) and timeout is not None:
+                    raise WorktreeError(f"No worktree available within {timeout}s")
+
+        try:
+            if path is None:
+                path = self._create(commit)
+            elif current != commit:
+                self._reset(path, commit)
+        except WorktreeError:
+            self._discard(path)
+            raise
+
+        with self._cond:
+            self._leased[path] = commit
+        return path
+
+    def release(self, path: Path) -> None:
+        """Return a leased worktree, discarding every change made in it."""
+        with self._cond:
+            commit = self._leased.pop(path)
+            closed = self._closed
+        if closed:
+            self._discard(path)
+            return
+
+        try:
+            self._reset(path, commit)
+        except WorktreeError as e:
+            logger.warning(f"Dropping worktree {path} that could not be reset: {e}")
+            self._discard(path)
+            return
+
+        with self._cond:
+            self._idle[path] = commit
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def lease(self, commit: str = "HEAD", overlay: str = "") -> AsyncIterator[Path]:
+        """
+        Lease a worktree for the duration of the block.
+
+        Args:
+            commit: Commit to check out.
+            overlay: Diff applied on top of the commit (e.g. the uncommitted
+                changes of the main checkout).
+        """
+        cancel = threading.Event()
+        try:
+            acquiring = self._waiters.submit(self.acquire, commit, None, cancel)
+        except RuntimeError:
+            raise WorktreeError("Worktree pool is closed") from None
+        waiting = asyncio.wrap_future(acquiring)
+        try:
+            path = await asyncio.shield(waiting)
+        except asyncio.CancelledError:
+            if acquiring.cancel():
+                raise
+            # The waiting thread cannot be interrupted; make it give up, and
+            # return the worktree if it had already got one
+            cancel.set()
+            with self._cond:
+                self._cond.notify_all()
+            try:
+                path = await waiting
+            except WorktreeError:
+                raise asyncio.CancelledError from None
+            await asyncio.to_thread(self.release, path)
+            raise
+
+        try:
+            if overlay:
+                await asyncio.to_thread(
+                    _git, self.git_path, path, "apply", "--binary", "--whitespace=nowarn", input=overlay.encode('utf-8')
+                )
+            yield path
+        finally:
+            await asyncio.shield(asyncio.to_thread(self.release, path))
+
+    def close(self) -> None:
+        """Remove idle worktrees now and leased ones when they are returned."""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        self._waiters.shutdown(wait=False)
+        for path in idle:
+            self._discard(path)
+
+    def _create(self, commit: str) -> Path:
+        with self._admin_lock:
+            return add_worktree(self.repo_path, self.pool_dir / f"wt-{uuid.uuid4().hex[:8]}", commit, self.git_path)
+
+    def _reset(self, path: Path, commit: str) -> None:
+        _git(self.git_path, path, "checkout", "-f", "--detach", commit)
+        _git(self.git_path, path, "clean", "-fdx" if self.clean_ignored else "-fd")
+
+    def _discard(self, path: Optional[Path]) -> None:
+        if path is not None:
+            with self._admin_lock:
+                remove_worktree(self.repo_path, path, self.git_path)
+        with self._cond:
+            self._count -= 1
+            self._cond.notify()
+
+    def _adopt(self) -> None:
+        """Take over worktrees left in pool_dir by an earlier process."""
+        try:
+            _git(self.git_path, self.repo_path, "worktree", "prune")
+            listing = _git(self.git_path, self.repo_path, "worktree", "list", "--porcelain")
+        except WorktreeError as e:
+            raise WorktreeError(f"{self.repo_path} is not a usable git repository: {e}") from e
+
+        for line in listing.splitlines():
+            if not line.startswith("worktree "):
+                continue
+            path = Path(line[len("worktree "):])
+            if path.parent != self.pool_dir:
+                continue
+            if self._count >= self.size:
+                remove_worktree(self.repo_path, path, self.git_path)
+                continue
+            # Unknown state: reset to its own HEAD on first use
+            self._idle[path] = ""
+            self._count += 1
+        if self._idle:
+            logger.info(f"Adopted {len(self._idle)} worktrees in {self.pool_dir}")
+
+
+_pools: Dict[Tuple[str, str], WorktreePool] = {}
+_pools_lock = threading.Lock()
+
+
+def shared_pool(
+    repo_path: Union[str, Path],
+    root_dir: Union[str, Path] = "/tmp/worktree_pools",
+    size: int = 4,
+    git_path: str = "git"
+) -> WorktreePool:
+    """
+    Process-wide worktree pool for a repository.
+
+    Callers working on the same repository share one pool; the pool grows to
+    the largest size requested.
+    """
+    repo = Path(repo_path).resolve()
+    safe = re.sub(r'[^\w.-]', '_', repo.name) or "repo"
+    pool_dir = Path(root_dir) / f"{safe}-{hashlib.sha1(str(repo).encode('utf-8')).hexdigest()[:8]}"
+    key = (str(repo), str(pool_dir.resolve()))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = WorktreePool(repo, pool_dir, size, git_path)
+            _pools[key] = pool
+        elif size > pool.size:
+            with pool._cond:
+                pool.size = size
+                pool._cond.notify_all()
+        return pool
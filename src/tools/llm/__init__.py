@@ -0,0 +1,13 @@
+"""
+LLM Module
+
+Provides shared infrastructure for LLM API calls:
+- Disk-backed response caching (exact and near-duplicate prompts)
+"""
+
+from .response_cache import LLMResponseCache, ResponseCacheConfig
+
+__all__ = [
+    "LLMResponseCache",
+    "ResponseCacheConfig",
+]
@@ -0,0 +1,361 @@
+"""
+LLM Response Cache
+
+Disk-backed cache placed in front of LLM API calls. Responses are keyed by
+the hash of endpoint + model + max_tokens + temperature + prompt, with an
+optional near-duplicate lookup driven by an embedding function (e.g. the
+KBAgent embedding pipeline, which may be a coroutine function so encoding
+stays off the event loop). Only deterministic (temperature 0) requests are
+cached by default: replaying a sampled response would defeat retries that
+rely on getting a different answer.
+"""
+
+import hashlib
+import inspect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+EmbeddingFn = Callable[
+    [str], Union[Optional[Sequence[float]], Awaitable[Optional[Sequence[float]]]]
+]
+
+
+@dataclass
+class ResponseCacheConfig:
+    """Response cache configuration"""
+    cache_dir: str = "/tmp/llm_cache"
+    ttl_seconds: int = 7 * 24 * 3600
+    max_entries: int = 1000
+    max_bytes: int = 256 * 1024 * 1024
+    # Requests sampled above this temperature are never cached; the default
+    # only caches greedy (temperature 0) decoding
+    max_cacheable_temperature: float = 0.0
+    # Near-duplicate lookup (requires an embedding function)
+    semantic_lookup: bool = False
+    similarity_threshold: float = 0.97
+
+
+class LLMResponseCache:
+    """
+    Caches LLM responses on local disk.
+
+    Each entry is stored as a single JSON file named after its key. The cache
+    keeps an in-memory LRU index of entry sizes so eviction does not require
+    rescanning the directory, and expired entries are dropped lazily on read.
+    """
+
+    def __init__(
+        self,
+        config: Optional[ResponseCacheConfig] = None,
+        embedding_fn: Optional[EmbeddingFn] = None
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            config: Cache configuration (defaults are used if omitted).
+            embedding_fn: Callable (or coroutine function) returning an
+                embedding vector for a prompt, used for near-duplicate
+                lookup. It may return None while its backend is not ready.
+        """
+        self.config = config or ResponseCacheConfig()
+        self.embedding_fn = embedding_fn
+        self.cache_dir = Path(self.config.cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # key -> entry size in bytes, ordered from least to most recently used
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        # key -> (request scope, unit vector); loaded on first semantic lookup
+        self._vectors: Optional[Dict[str, Tuple[str, List[float]]]] = None
+        self._logged_not_ready = False
+
+        self._load_index()
+
+    @staticmethod
+    def make_scope(model: str, temperature: float, max_tokens: int = 0, endpoint: str = "") -> str:
+        """Request parameters other than the prompt that a cached response depends on."""
+        return f"{endpoint}\0{model}\0{max_tokens}\0{temperature:.4f}"
+
+    @classmethod
+    def make_key(
+        cls,
+        model: str,
+        prompt: str,
+        temperature: float,
+        max_tokens: int = 0,
+        endpoint: str = ""
+    ) -> str:
+        """
+        Build the exact-match cache key.
+
+        Args:
+            model: Model name.
+            prompt: Prompt text.
+            temperature: Sampling temperature.
+            max_tokens: Response token budget (a response truncated by a
+                smaller budget must not serve a larger one).
+            endpoint: API endpoint or base URL.
+
+        Returns:
+            Hex SHA-256 digest identifying the request.
+        """
+        digest = hashlib.sha256()
+        digest.update(cls.make_scope(model, temperature, max_tokens, endpoint).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        return digest.hexdigest()
+
+    def is_cacheable(self, temperature: float) -> bool:
+        """Return True if a request with this temperature may be cached."""
+        return temperature <= self.config.max_cacheable_temperature
+
+    async def get(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float,
+        max_tokens: int = 0,
+        endpoint: str = ""
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached response.
+
+        Tries an exact match first, then (if enabled) the most similar cached
+        prompt with the same model, endpoint, token budget and temperature.
+
+        Args:
+            model: Model name.
+            prompt: Prompt text.
+            temperature: Sampling temperature.
+            max_tokens: Response token budget.
+            endpoint: API endpoint or base URL.
+
+        Returns:
+            The cached API response, or None on a miss.
+        """
+        if not self.is_cacheable(temperature):
+            return None
+
+        key = self.make_key(model, prompt, temperature, max_tokens, endpoint)
+        response = self._read_entry(key)
+        if response is not None:
+            logger.debug(f"LLM cache hit: {key[:12]}")
+            return response
+
+        if self.config.semantic_lookup and self.embedding_fn is not None:
+            similar_key = await self._find_similar(self.make_scope(model, temperature, max_tokens, endpoint), prompt)
+            if similar_key:
+                response = self._read_entry(similar_key)
+                if response is not None:
+                    logger.debug(f"LLM cache near-duplicate hit: {similar_key[:12]}")
+                    return response
+
+        return None
+
+    async def put(
+        self,
+        model: str,
+        prompt: str,
+        temperature: float,
+        response: Dict[str, Any],
+        max_tokens: int = 0,
+        endpoint: str = ""
+    ) -> bool:
+        """
+        Store a response.
+
+        Args:
+            model: Model name.
+            prompt: Prompt text.
+            temperature: Sampling temperature.
+            response: API response to cache.
+            max_tokens: Response token budget.
+            endpoint: API endpoint or base URL.
+
+        Returns:
+            True if the response was written to the cache.
+        """
+        if not self.is_cacheable(temperature):
+            return False
+
+        key = self.make_key(model, prompt, temperature, max_tokens, endpoint)
+        scope = self.make_scope(model, temperature, max_tokens, endpoint)
+        embedding = None
+        if self.config.semantic_lookup and self.embedding_fn is not None:
+            embedding = await self._embed(prompt)
+
+        entry = {
+            "key": key,
+            "model": model,
+            "temperature": temperature,
+            "scope": scope,
+            "created_at": time.time(),
+            "embedding": embedding,
+            "response": response,
+        }
+
+        try:
+            data = json.dumps(entry).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            logger.warning(f"LLM response is not serializable, skipping cache: {e}")
+            return False
+
+        if len(data) > self.config.max_bytes:
+            return False
+
+        path = self._entry_path(key)
+        tmp_path = path.with_suffix(".tmp")
+        with self._lock:
+            try:
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Failed to write LLM cache entry: {e}")
+                return False
+
+            self._total_bytes -= self._index.pop(key, 0)
+            self._index[key] = len(data)
+            self._total_bytes += len(data)
+            if self._vectors is not None and embedding:
+                self._vectors[key] = (scope, embedding)
+            self._evict()
+
+        return True
+
+    def clear(self) -> None:
+        """Remove all cached entries."""
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+            self._total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _load_index(self) -> None:
+        """Build the LRU index from existing entries, oldest access first."""
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, path.stem, stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+
+        with self._lock:
+            self._evict()
+
+    def _read_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if key not in self._index:
+                return None
+            path = self._entry_path(key)
+            try:
+                entry = json.loads(path.read_bytes())
+            except (OSError, ValueError):
+                self._remove(key)
+                return None
+
+            if time.time() - entry.get("created_at", 0) > self.config.ttl_seconds:
+                self._remove(key)
+                return None
+
+            # Mark as recently used (mtime also orders the index across restarts)
+            self._index.move_to_end(key)
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return entry.get("response")
+
+    def _remove(self, key: str) -> None:
+        self._total_bytes -= self._index.pop(key, 0)
+        if self._vectors is not None:
+            self._vectors.pop(key, None)
+        try:
+            self._entry_path(key).unlink()
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until within size bounds."""
+        while self._index and (
+            len(self._index) > self.config.max_entries
+            or self._total_bytes > self.config.max_bytes
+        ):
+            oldest = next(iter(self._index))
+            self._remove(oldest)
+
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        try:
+            vector = self.embedding_fn(text) if self.embedding_fn else None
+            if inspect.isawaitable(vector):
+                vector = await vector
+        except Exception as e:
+            logger.warning(f"Prompt embedding failed: {e}")
+            return None
+        if vector is None:
+            if not self._logged_not_ready:
+                self._logged_not_ready = True
+                logger.debug("Embedding provider not ready, skipping near-duplicate cache lookup")
+            return None
+        return _normalize([float(x) for x in vector])
+
+    def _load_vectors(self) -> Dict[str, Tuple[str, List[float]]]:
+        vectors: Dict[str, Tuple[str, List[float]]] = {}
+        for key in list(self._index):
+            try:
+                entry = json.loads(self._entry_path(key).read_bytes())
+            except (OSError, ValueError):
+                continue
+            if entry.get("embedding") and entry.get("scope"):
+                vectors[key] = (entry["scope"], entry["embedding"])
+        return vectors
+
+    async def _find_similar(self, scope: str, prompt: str) -> Optional[str]:
+        query = await self._embed(prompt)
+        if not query:
+            return None
+
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = self._load_vectors()
+            candidates = list(self._vectors.items())
+
+        best_key, best_score = None, self.config.similarity_threshold
+        for key, (entry_scope, vector) in candidates:
+            if entry_scope != scope:
+                continue
+            if len(vector) != len(query):
+                continue
+            score = sum(a * b for a, b in zip(query, vector))
+            if score >= best_score:
+                best_key, best_score = key, score
+
+        return best_key
+
+
+def _normalize(vector: List[float]) -> Optional[List[float]]:
+    norm = math.sqrt(sum(x * x for x in vector))
+    if norm == 0:
+        return None
+    return [x / norm for x in vector]
@@ -4,33 +4,74 @@ Result Analysis Module
 Provides test result analysis and decision-making capabilities:
 - Multi-format log parsing
 - Error pattern matching
+- Failure signature clustering
+- Backtrace symbolization
 - Root cause analysis
 - Decision recommendation
-- Convergence detection
+- Convergence detection (bounded MetricsHistory)
+- Persisted per-task iteration history
+- Columnar log storage (LogTable, loaded on first access)
 """
 
+import importlib
+from typing import TYPE_CHECKING
+
 from .analyzer import ResultAnalyzer
+from .clustering import FailureClusterer
+from .metrics_history import MetricsHistory
+from .history_store import IterationHistoryStore
+from .symbolizer import Symbolizer, extract_backtrace
 from .models import (
     FailureCategory,
     ActionType,
     ResultAnalyzerConfig,
     LogEntry,
     Failure,
+    FailureCluster,
+    StackFrame,
     RootCauseReport,
     Decision,
     ConvergenceStatus,
+    IterationMetrics,
     AnalysisReport,
 )
 
+if TYPE_CHECKING:
+    from .log_table import LogTable
+
+# NumPy-backed exports are imported on first access
+_EXPORTS = {
+    "LogTable": ".log_table",
+}
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
 __all__ = [
     "ResultAnalyzer",
+    "FailureClusterer",
+    "MetricsHistory",
+    "IterationHistoryStore",
+    "Symbolizer",
+    "extract_backtrace",
     "FailureCategory",
     "ActionType",
     "ResultAnalyzerConfig",
     "LogEntry",
     "Failure",
+    "FailureCluster",
+    "StackFrame",
     "RootCauseReport",
     "Decision",
     "ConvergenceStatus",
+    "IterationMetrics",
     "AnalysisReport",
+    "LogTable",
 ]
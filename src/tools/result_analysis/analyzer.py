@@ -4,6 +4,7 @@ Result Analyzer
 Main analyzer for test results, providing:
 - Multi-format log parsing
 - Error pattern matching
+- Backtrace symbolization
 - Root cause analysis
 - Decision recommendation
 - Convergence detection
@@ -11,7 +12,8 @@ Main analyzer for test results, providing:
 
 import logging
 import re
-from typing import List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Dict, Any, Optional, Set, Tuple, Union
 from pathlib import Path
 
 from .models import (
@@ -20,19 +22,102 @@ from .models import (
     ResultAnalyzerConfig,
     LogEntry,
     Failure,
+    StackFrame,
     RootCauseReport,
     Decision,
     ConvergenceStatus,
     AnalysisReport,
 )
 from .log_parser import LogParser
+from .clustering import FailureClusterer, failure_signature
+from .metrics_history import MetricsHistory
+from .history_store import IterationHistoryStore, patch_hash
+from .symbolizer import Symbolizer
 from .decision_engine import DecisionEngine
 
+if TYPE_CHECKING:
+    from .log_table import LogTable
+
 logger = logging.getLogger(__name__)
 
 
+# 数值转义在转义字母之后固定跟随的字符数
+_ESCAPE_ARG_LENGTHS = {"x": 2, "u": 4, "U": 8}
+
+
+def _required_literal(pattern: str) -> str:
+    """
+    提取正则中任何匹配都必须包含的最长字面量片段（小写）
+
+    含分组、交替或字符集的模式返回空字符串，表示无法用字面量预筛选。
+    """
+    if any(ch in pattern for ch in "|()[]") and not _only_escaped(pattern, "|()[]"):
+        return ""
+
+    runs: List[str] = []
+    current = ""
+    last_literal = False
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\" and i + 1 < len(pattern):
+            nxt = pattern[i + 1]
+            i += 2
+            if nxt.isalnum():
+                # \s, \d, \w, \b 等为字符类或断言；\xNN、\uNNNN、\N{...}、
+                # 八进制和反向引用的参数不是字面量，一并跳过
+                runs.append(current)
+                current, last_literal = "", False
+                if nxt in _ESCAPE_ARG_LENGTHS:
+                    i += _ESCAPE_ARG_LENGTHS[nxt]
+                elif nxt == "N" and pattern.startswith("{", i):
+                    close = pattern.find("}", i)
+                    i = close + 1 if close != -1 else len(pattern)
+                elif nxt.isdigit():
+                    while i < len(pattern) and pattern[i].isdigit():
+                        i += 1
+            else:
+                current += nxt
+                last_literal = True
+            continue
+        if ch in "*?{":
+            if last_literal:
+                current = current[:-1]  # 前一个字符可以不出现
+            runs.append(current)
+            current, last_literal = "", False
+            if ch == "{":
+                close = pattern.find("}", i)
+                i = close + 1 if close != -1 else len(pattern)
+                continue
+        elif ch in "+.^$":
+            runs.append(current)
+            current, last_literal = "", False
+        else:
+            current += ch
+            last_literal = True
+        i += 1
+    runs.append(current)
+    return max(runs, key=len).lower()
+
+
+def _only_escaped(pattern: str, chars: str) -> bool:
+    """模式中出现的 chars 是否都被反斜杠转义"""
+    i = 0
+    while i < len(pattern):
+        if pattern[i] == "\\":
+            i += 2
+            continue
+        if pattern[i] in chars:
+            return False
+        i += 1
+    return True
+
+
 class PatternMatcher:
-    """错误模式匹配器"""
+    """错误模式匹配器
+
+    模式在构造时预编译，单次扫描即可对消息完成所有类别的分类。
+    """
 
     # 内置错误模式库
     BUILTIN_PATTERNS = {
@@ -86,9 +171,10 @@ class PatternMatcher:
     }
 
     def __init__(self, pattern_db_path: Optional[str] = None):
-        self.patterns = self.BUILTIN_PATTERNS.copy()
+        self.patterns = {cat: list(patterns) for cat, patterns in self.BUILTIN_PATTERNS.items()}
         if pattern_db_path:
             self._load_custom_patterns(pattern_db_path)
+        self.compile()
 
     def _load_custom_patterns(self, pattern_db_path: str):
         """加载自定义模式"""
@@ -108,6 +194,47 @@ class PatternMatcher:
         except Exception as e:
             logger.error(f"Failed to load custom patterns: {e}")
 
+    def compile(self):
+        """
+        预编译模式库（修改 self.patterns 后需重新调用）
+
+        每个模式提取一个必需的字面量片段，所有片段合并为一个交替正则，
+        对消息扫描一次即可得到候选模式集合；仅对候选模式执行完整正则匹配。
+        无法提取字面量的模式始终作为候选。
+        """
+        self._compiled: List[Tuple[FailureCategory, str, "re.Pattern[str]"]] = []
+        literal_index: Dict[str, List[int]] = {}
+        self._always: List[int] = []
+
+        for category, patterns in self.patterns.items():
+            for pattern in patterns:
+                try:
+                    regex = re.compile(pattern, re.IGNORECASE)
+                except re.error as e:
+                    logger.warning(f"Skipping invalid failure pattern {pattern!r}: {e}")
+                    continue
+                idx = len(self._compiled)
+                self._compiled.append((category, pattern, regex))
+                literal = _required_literal(pattern)
+                if literal:
+                    literal_index.setdefault(literal, []).append(idx)
+                else:
+                    self._always.append(idx)
+
+        # 同一位置只报告最长的字面量，被包含的字面量通过闭包补回
+        literals = sorted(literal_index, key=len, reverse=True)
+        self._literal_patterns: Dict[str, List[int]] = {}
+        for literal in literals:
+            implied = [other for other in literals if other in literal]
+            self._literal_patterns[literal] = sorted({
+                idx for other in implied for idx in literal_index[other]
+            })
+        # 字面量均为小写，ASCII 消息可用大小写敏感扫描（快得多）；
+        # 非 ASCII 消息保留忽略大小写语义（如 'ſ' 与 's'）
+        alternation = "|".join(re.escape(lit) for lit in literals)
+        self._prefilter = re.compile(alternation) if literals else None
+        self._prefilter_nocase = re.compile(alternation, re.IGNORECASE) if literals else None
+
     def classify(self, message: str) -> Tuple[FailureCategory, float]:
         """
         对错误信息进行分类
@@ -121,20 +248,47 @@ class PatternMatcher:
         if not message:
             return (FailureCategory.UNKNOWN, 0.0)
 
-        best_match = (FailureCategory.UNKNOWN, 0.0)
         message_lower = message.lower()
+        candidates = set(self._always)
+        if self._prefilter is not None:
+            prefilter = self._prefilter if message_lower.isascii() else self._prefilter_nocase
+            # 每次命中后从下一个字符继续，不遗漏与已命中片段重叠的字面量；
+            # 无错误的行只需一次扫描
+            pos = 0
+            while True:
+                match = prefilter.search(message_lower, pos)
+                if match is None:
+                    break
+                candidates.update(self._literal_patterns[self._literal_for(match.group())])
+                pos = match.start() + 1
+        if not candidates:
+            return (FailureCategory.UNKNOWN, 0.0)
 
-        for category, patterns in self.patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, message_lower, re.IGNORECASE):
-                    # 计算匹配分数
-                    score = len(pattern) / len(message) if message else 0
-                    # 对更长的模式给予更高分数
-                    score = min(score * 1.5, 1.0)
-                    if score > best_match[1]:
-                        best_match = (category, score)
+        # 分数只取决于模式长度（对更长的模式给予更高分数），按分数从高到低、
+        # 同分按模式库顺序尝试，首个命中即为最佳匹配
+        def score(idx: int) -> float:
+            return min(len(self._compiled[idx][1]) / len(message) * 1.5, 1.0)
 
-        return best_match
+        for idx in sorted(candidates, key=lambda i: (-score(i), i)):
+            category, _, regex = self._compiled[idx]
+            if regex.search(message_lower):
+                return (category, score(idx))
+
+        return (FailureCategory.UNKNOWN, 0.0)
+
+    def _literal_for(self, text: str) -> str:
+        """将预筛选命中的文本映射回字面量"""
+        if text in self._literal_patterns:
+            return text
+        # 忽略大小写命中的非 ASCII 文本（如 'ſegfault'）
+        for literal in self._literal_patterns:
+            if len(literal) == len(text) and re.fullmatch(re.escape(literal), text, re.IGNORECASE):
+                return literal
+        raise KeyError(text)
+
+    def classify_many(self, messages: List[str]) -> List[Tuple[FailureCategory, float]]:
+        """批量分类错误信息"""
+        return [self.classify(message) for message in messages]
 
     def find_similar(self, message: str, limit: int = 5) -> List[Dict[str, Any]]:
         """查找相似失败模式"""
@@ -190,8 +344,9 @@ class RootCauseAnalyzer:
         }
     }
 
-    def __init__(self, config: ResultAnalyzerConfig):
+    def __init__(self, config: ResultAnalyzerConfig, pattern_matcher: Optional[PatternMatcher] = None):
         self.config = config
+        self.pattern_matcher = pattern_matcher or PatternMatcher(config.pattern_db_path)
 
     def analyze(
         self,
@@ -241,12 +396,12 @@ class RootCauseAnalyzer:
 
     def _analyze_category(self, failure: Failure) -> Tuple[FailureCategory, float]:
         """分析失败类别"""
-        matcher = PatternMatcher()
-        return matcher.classify(failure.message)
+        return self.pattern_matcher.classify(failure.message)
 
     def _analyze_memory_issue(self, failure: Failure) -> Tuple[List[str], str]:
         """分析内存相关问题"""
         evidence = ["Memory error detected in test output"]
+        evidence.extend(_crash_site_evidence(failure))
         causes = self.ROOT_CAUSE_PATTERNS.get('null_pointer', {}).get('causes', [])
 
         if 'segfault' in failure.message.lower():
@@ -292,6 +447,7 @@ class RootCauseAnalyzer:
     def _analyze_crash_issue(self, failure: Failure) -> Tuple[List[str], str]:
         """分析崩溃问题"""
         evidence = ["System/application crashed"]
+        evidence.extend(_crash_site_evidence(failure))
         msg = failure.message.lower()
 
         if 'kernel panic' in msg:
@@ -315,6 +471,25 @@ class RootCauseAnalyzer:
         return f"Root cause analysis based on {len(evidence)} evidence points: {'; '.join(key_points)}"
 
 
+def _frame_location(frames: List[StackFrame]) -> Optional[str]:
+    """第一个有源文件信息的栈帧位置（file:line）"""
+    for frame in frames:
+        if frame.file_path:
+            return f"{frame.file_path}:{frame.line}" if frame.line else frame.file_path
+    return None
+
+
+def _crash_site_evidence(failure: Failure) -> List[str]:
+    """由符号化回溯得出的崩溃点证据"""
+    if not failure.frames:
+        return []
+    evidence = [f"Crash site: {failure.frames[0].format()}"]
+    callers = [frame.function for frame in failure.frames[1:4] if frame.function]
+    if callers:
+        evidence.append(f"Called from: {' <- '.join(callers)}")
+    return evidence
+
+
 class ResultAnalyzer:
     """
     结果分析引擎主类
@@ -322,11 +497,16 @@ class ResultAnalyzer:
     负责分析测试结果并生成决策，支持：
     - 多格式日志解析
     - 错误模式识别
+    - 失败聚类去重（每种故障模式只做一次根因分析）
     - AI辅助根因分析
     - 决策建议生成
     - 收敛性判断
+    - 按任务的迭代历史（可持久化）
     """
 
+    # 内存中保留滑动窗口指标的任务数
+    MAX_CACHED_TASKS = 32
+
     def __init__(self, config: Optional[ResultAnalyzerConfig] = None):
         """
         初始化分析器
@@ -337,8 +517,15 @@ class ResultAnalyzer:
         self.config = config or ResultAnalyzerConfig()
         self.log_parser = LogParser()
         self.pattern_matcher = PatternMatcher(self.config.pattern_db_path)
-        self.root_cause_analyzer = RootCauseAnalyzer(self.config)
+        self.root_cause_analyzer = RootCauseAnalyzer(self.config, self.pattern_matcher)
+        self.failure_clusterer = FailureClusterer()
+        self.symbolizer = Symbolizer(self.config.symbol_files)
         self.decision_engine = DecisionEngine(self.config)
+        self.history_store = (
+            IterationHistoryStore(self.config.history_dir) if self.config.history_dir else None
+        )
+        # task_id -> 滑动窗口指标（LRU，最多 MAX_CACHED_TASKS 个任务）
+        self._task_histories: "OrderedDict[str, MetricsHistory]" = OrderedDict()
 
         logger.info(f"ResultAnalyzer initialized with config: {self.config}")
 
@@ -351,7 +538,7 @@ class ResultAnalyzer:
         skipped: int,
         test_outputs: Optional[Dict[str, str]] = None,
         iteration: int = 0,
-        history: Optional[List[AnalysisReport]] = None
+        history: Optional[Union[List[AnalysisReport], MetricsHistory]] = None
     ) -> AnalysisReport:
         """
         分析测试结果
@@ -364,18 +551,34 @@ class ResultAnalyzer:
             skipped: 跳过数
             test_outputs: 测试输出字典 {test_id: output}
             iteration: 当前迭代次数
-            history: 历史分析报告
+            history: 历史分析报告，或 MetricsHistory（分析后会追加本次迭代的指标）
 
         Returns:
             AnalysisReport: 分析报告
         """
+        if history is None:
+            history = []
+
         # 解析测试输出，识别失败
         failures = self._identify_failures(test_outputs, failed)
 
-        # 生成根因报告
+        # 按失败签名聚类，并与历史报告对照
+        clusters = self.failure_clusterer.cluster(failures)
+        resolved_signatures = self.failure_clusterer.track(clusters, history)
+
+        # 生成根因报告：每个聚类只分析一次
         root_cause_reports = []
-        for failure in failures:
-            report = self.root_cause_analyzer.analyze(failure)
+        for cluster in clusters:
+            report = self.root_cause_analyzer.analyze(cluster.representative)
+            if len(cluster.failures) > 1:
+                report.evidence.append(
+                    f"Same failure signature in {len(cluster.failures)} failures: "
+                    f"{', '.join(cluster.test_ids[:5])}"
+                    + (" ..." if len(cluster.failures) > 5 else "")
+                )
+            if not cluster.is_new:
+                report.evidence.append(f"Recurring for {cluster.streak} consecutive iterations")
+            cluster.root_cause = report
             root_cause_reports.append(report)
 
         # 创建分析报告
@@ -386,24 +589,85 @@ class ResultAnalyzer:
             failed=failed,
             skipped=skipped,
             failures=failures,
-            root_cause_reports=root_cause_reports
+            root_cause_reports=root_cause_reports,
+            clusters=clusters,
+            resolved_signatures=resolved_signatures
         )
         report.summary = report.generate_summary()
 
-        # 生成决策
-        history = history or []
-        decision = self.decision_engine.evaluate(report, history, iteration)
+        # 生成决策并检查收敛性
+        decision, convergence = self.decision_engine.assess(report, history, iteration)
         report.decision = decision
-
-        # 检查收敛性
-        convergence = self.decision_engine._check_convergence(report, history, iteration)
         report.convergence = convergence
+        if isinstance(history, MetricsHistory):
+            history.record(report, iteration)
 
         # 添加建议
         report.recommendations = self._generate_recommendations(report, decision)
 
         return report
 
+    def failure_signatures(self, test_outputs: Optional[Dict[str, str]], failed: int) -> Set[str]:
+        """
+        测试输出中的失败签名（只识别失败，不做根因分析和决策）
+
+        Args:
+            test_outputs: 测试输出字典 {test_id: output}
+            failed: 失败数
+
+        Returns:
+            Set[str]: 失败签名集合
+        """
+        return {failure_signature(failure) for failure in self._identify_failures(test_outputs, failed)}
+
+    def analyze_iteration(
+        self,
+        task_id: str,
+        total_tests: int,
+        passed: int,
+        failed: int,
+        skipped: int,
+        test_outputs: Optional[Dict[str, str]] = None,
+        iteration: int = 0,
+        patch_content: str = ""
+    ) -> AnalysisReport:
+        """
+        分析任务的一次迭代，并记录到该任务的迭代历史
+
+        Args:
+            task_id: 任务ID
+            patch_content: 本次迭代所测的补丁内容（只记录哈希）
+
+        Returns:
+            AnalysisReport: 分析报告
+        """
+        history = self.task_history(task_id)
+        report = self.analyze_results(
+            task_id, total_tests, passed, failed, skipped, test_outputs, iteration, history
+        )
+        metrics = history.last
+        metrics.patch_hash = patch_hash(patch_content)
+        if self.history_store is not None:
+            self.history_store.append(task_id, metrics)
+        return report
+
+    def task_history(self, task_id: str) -> MetricsHistory:
+        """任务的滑动窗口指标（首次访问时从历史存储加载）"""
+        history = self._task_histories.get(task_id)
+        if history is not None:
+            self._task_histories.move_to_end(task_id)
+            return history
+
+        depth = self.config.max_history_depth
+        if self.history_store is not None:
+            history = self.history_store.load(task_id, depth)
+        else:
+            history = MetricsHistory(depth)
+        self._task_histories[task_id] = history
+        if len(self._task_histories) > self.MAX_CACHED_TASKS:
+            self._task_histories.popitem(last=False)
+        return history
+
     def parse_logs(self, log_paths: List[str]) -> List[LogEntry]:
         """
         解析日志文件
@@ -414,41 +678,103 @@ class ResultAnalyzer:
         Returns:
             List[LogEntry]: 解析后的日志条目
         """
-        all_entries = []
+        return list(self.iter_logs(log_paths))
+
+    def load_log_table(self, log_paths: List[str], levels: Optional[Iterable[str]] = None) -> "LogTable":
+        """
+        解析日志文件为列式日志表
+
+        适用于长时间 soak 测试等大规模日志：条目按列存储，
+        过滤、分组和时间窗口查询均为向量化操作。
+
+        Args:
+            log_paths: 日志文件路径列表
+            levels: 只保留这些级别的条目
+
+        Returns:
+            LogTable: 列式日志表
+        """
+        from .log_table import LogTable
+
+        return LogTable.from_entries(self.iter_logs(log_paths, levels))
+
+    def iter_logs(
+        self,
+        log_paths: List[str],
+        levels: Optional[Iterable[str]] = None
+    ) -> Iterator[LogEntry]:
+        """
+        流式解析日志文件，逐条产出日志条目
 
+        与 identify_failures_from_logs 组合使用时只保留错误条目，
+        内存占用与日志大小无关。配置 log_parse_workers 时在进程池中
+        并行解析，条目顺序不变。
+
+        Args:
+            log_paths: 日志文件路径列表
+            levels: 只产出这些级别的条目
+
+        Yields:
+            LogEntry: 日志条目
+        """
+        if self.config.log_parse_workers > 0:
+            existing = [path for path in log_paths if Path(path).exists()]
+            # 单个文件失败只跳过该文件，与顺序解析一致
+            yield from self.log_parser.iter_parse_files(
+                existing,
+                workers=self.config.log_parse_workers,
+                range_bytes=self.config.log_range_bytes,
+                levels=levels,
+                on_error=lambda path, e: logger.error(f"Failed to parse log {path}: {e}")
+            )
+            return
+
+        level_set = {level.upper() for level in levels} if levels is not None else None
         for path in log_paths:
             try:
-                p = Path(path)
-                if p.exists():
-                    content = p.read_text()
-                    entries = self.log_parser.parse(content)
-                    all_entries.extend(entries)
-                    logger.info(f"Parsed {len(entries)} entries from {path}")
+                if Path(path).exists():
+                    count = 0
+                    for entry in self.log_parser.iter_parse_file(path):
+                        count += 1
+                        if level_set is None or entry.level.upper() in level_set:
+                            yield entry
+                    logger.info(f"Parsed {count} entries from {path}")
             except Exception as e:
                 logger.error(f"Failed to parse log {path}: {e}")
 
-        return all_entries
+    def identify_failures_from_log_files(
+        self,
+        log_paths: List[str],
+        test_mapping: Optional[Dict[str, str]] = None
+    ) -> List[Failure]:
+        """从日志文件识别失败（只解析出错误条目，并行模式下在工作进程中过滤）"""
+        return self.identify_failures_from_logs(
+            self.iter_logs(log_paths, levels=self.log_parser.ERROR_LEVELS), test_mapping
+        )
 
     def identify_failures_from_logs(
         self,
-        logs: List[LogEntry],
+        logs: Iterable[LogEntry],
         test_mapping: Optional[Dict[str, str]] = None
     ) -> List[Failure]:
         """从日志识别失败"""
         failures = []
-        error_entries = self.log_parser.extract_errors(logs)
+        error_entries = self.log_parser.iter_errors(logs)
 
         for entry in error_entries:
             category, confidence = self.pattern_matcher.classify(entry.message)
 
+            stack_trace = entry.context.get('stack_trace')
             failure = Failure(
                 test_id=test_mapping.get(entry.source, entry.source) if test_mapping else entry.source,
                 category=category,
                 message=entry.message,
-                stack_trace=entry.context.get('stack_trace'),
+                stack_trace=stack_trace,
                 location=entry.context.get('location'),
                 related_logs=[entry]
             )
+            if stack_trace:
+                self._attach_frames(failure, f"{entry.message}\n{stack_trace}")
             failures.append(failure)
 
         return failures
@@ -484,14 +810,27 @@ class ResultAnalyzer:
             category, confidence = self.pattern_matcher.classify(output)
 
             if category != FailureCategory.UNKNOWN or 'fail' in output.lower():
-                failures.append(Failure(
+                failure = Failure(
                     test_id=test_id,
                     category=category,
                     message=output[:500] if len(output) > 500 else output
-                ))
+                )
+                self._attach_frames(failure, output)
+                failures.append(failure)
 
         return failures
 
+    def _attach_frames(self, failure: Failure, text: str) -> None:
+        """提取并符号化回溯，补全 frames、stack_trace 和 location"""
+        frames = self.symbolizer.symbolize_text(text)
+        if not frames:
+            return
+        failure.frames = frames
+        if not failure.stack_trace:
+            failure.stack_trace = "\n".join(frame.format() for frame in frames)
+        if not failure.location:
+            failure.location = _frame_location(frames)
+
     def _generate_recommendations(
         self,
         report: AnalysisReport,
@@ -0,0 +1,135 @@
+"""
+Failure Clustering
+
+Deduplicates failures by normalized signature so that root-cause analysis
+(and any LLM call behind it) runs once per distinct failure mode instead of
+once per failing test, and tracks each failure mode across iterations.
+"""
+
+import hashlib
+import re
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Iterable, List, Set, Union
+
+from .models import AnalysisReport, Failure, FailureCluster
+
+if TYPE_CHECKING:
+    from .metrics_history import MetricsHistory
+
+# 按顺序应用的归一化规则：易变的部分替换为占位符
+_NORMALIZE_RULES = [
+    # ISO 8601 / syslog / dmesg 时间戳
+    (re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?'), '<ts>'),
+    (re.compile(r'\b[A-Z][a-z]{2}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2}\b'), '<ts>'),
+    (re.compile(r'\[\s*\d+\.\d+\]'), '<ts>'),
+    (re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.IGNORECASE), '<uuid>'),
+    # 地址、指针、哈希
+    (re.compile(r'\b0x[0-9a-f]+\b', re.IGNORECASE), '<addr>'),
+    (re.compile(r'\b(?=[0-9a-f]*\d)[0-9a-f]{8,}\b', re.IGNORECASE), '<hex>'),
+    # 进程/线程号
+    (re.compile(r'\b(pid|tid|process|thread|task)([\s:=#]*)\d+', re.IGNORECASE), r'\1\2<pid>'),
+    # 临时目录
+    (re.compile(r'/tmp/\S+'), '<tmp>'),
+    (re.compile(r'\d+'), '<n>'),
+    (re.compile(r'\s+'), ' '),
+]
+
+# 参与签名的栈顶帧行数
+_SIGNATURE_FRAMES = 5
+
+
+def normalize_message(message: str) -> str:
+    """去除消息中的地址、时间戳、PID、数字等易变部分"""
+    for pattern, replacement in _NORMALIZE_RULES:
+        message = pattern.sub(replacement, message)
+    return message.strip().lower()
+
+
+def failure_signature(failure: Failure) -> str:
+    """计算失败签名（类别 + 归一化消息 + 归一化栈顶帧）"""
+    parts = [failure.category.value, normalize_message(failure.message)]
+    if failure.stack_trace:
+        frames = [line for line in failure.stack_trace.splitlines() if line.strip()]
+        parts.extend(normalize_message(line) for line in frames[:_SIGNATURE_FRAMES])
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class FailureClusterer:
+    """失败聚类与跨迭代跟踪"""
+
+    # 缓存签名的历史报告数
+    MAX_CACHED_REPORTS = 64
+
+    def __init__(self):
+        # report_id -> 该报告的失败签名
+        self._report_signatures: "OrderedDict[str, Set[str]]" = OrderedDict()
+
+    def cluster(self, failures: Iterable[Failure]) -> List[FailureCluster]:
+        """
+        按签名聚类失败
+
+        Args:
+            failures: 失败列表
+
+        Returns:
+            List[FailureCluster]: 按首次出现顺序排列的聚类
+        """
+        clusters: Dict[str, FailureCluster] = {}
+        for failure in failures:
+            signature = failure_signature(failure)
+            cluster = clusters.get(signature)
+            if cluster is None:
+                cluster = FailureCluster(
+                    signature=signature,
+                    category=failure.category,
+                    normalized_message=normalize_message(failure.message)
+                )
+                clusters[signature] = cluster
+            cluster.failures.append(failure)
+        return list(clusters.values())
+
+    def track(
+        self,
+        clusters: List[FailureCluster],
+        history: Union[List[AnalysisReport], "MetricsHistory"]
+    ) -> List[str]:
+        """
+        根据历史标注聚类的出现次数与连续迭代数
+
+        Args:
+            clusters: 本次的聚类
+            history: 历史报告（按时间顺序）或 MetricsHistory（只统计窗口内的迭代）
+
+        Returns:
+            List[str]: 上一次报告中存在、本次已消失的签名
+        """
+        if isinstance(history, list):
+            past = [self.report_signatures(report) for report in history]
+        else:
+            past = history.signature_sets()
+        for cluster in clusters:
+            cluster.history_occurrences = sum(cluster.signature in signatures for signatures in past)
+            streak = 1
+            for signatures in reversed(past):
+                if cluster.signature not in signatures:
+                    break
+                streak += 1
+            cluster.streak = streak
+
+        if not past:
+            return []
+        current = {cluster.signature for cluster in clusters}
+        return sorted(past[-1] - current)
+
+    def report_signatures(self, report: AnalysisReport) -> Set[str]:
+        """报告中的失败签名（优先使用报告自带的聚类）"""
+        if report.clusters:
+            return {cluster.signature for cluster in report.clusters}
+
+        signatures = self._report_signatures.get(report.report_id)
+        if signatures is None:
+            signatures = {failure_signature(failure) for failure in report.failures}
+            self._report_signatures[report.report_id] = signatures
+            if len(self._report_signatures) > self.MAX_CACHED_REPORTS:
+                self._report_signatures.popitem(last=False)
+        return signatures
@@ -2,10 +2,13 @@
 Decision Engine
 
 Analyzes test results and generates decision recommendations.
+
+Trend and convergence checks read a bounded MetricsHistory, so a decision
+costs O(1) however many iterations the task has run.
 """
 
 import logging
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Union
 from dataclasses import dataclass
 
 from .models import (
@@ -17,9 +20,13 @@ from .models import (
     Failure,
     ResultAnalyzerConfig,
 )
+from .metrics_history import MetricsHistory
 
 logger = logging.getLogger(__name__)
 
+# 历史可以是完整报告列表，也可以是精简的滑动窗口指标
+History = Union[List[AnalysisReport], MetricsHistory]
+
 
 class DecisionEngine:
     """决策引擎"""
@@ -35,7 +42,7 @@ class DecisionEngine:
     def evaluate(
         self,
         current_report: AnalysisReport,
-        history: List[AnalysisReport],
+        history: History,
         iteration: int
     ) -> Decision:
         """
@@ -43,36 +50,60 @@ class DecisionEngine:
 
         Args:
             current_report: 当前分析报告
-            history: 历史报告列表
+            history: 历史报告列表或 MetricsHistory
             iteration: 当前迭代次数
 
         Returns:
             Decision: 决策结果
         """
+        decision, _ = self.assess(current_report, history, iteration)
+        return decision
+
+    def assess(
+        self,
+        current_report: AnalysisReport,
+        history: History,
+        iteration: int
+    ) -> Tuple[Decision, ConvergenceStatus]:
+        """
+        评估当前状态，同时返回决策与收敛状态（收敛性只计算一次）
+
+        Returns:
+            Tuple[Decision, ConvergenceStatus]: 决策结果与收敛状态
+        """
+        metrics = self.as_metrics(history)
+
         # 检查收敛性
-        convergence = self._check_convergence(current_report, history, iteration)
+        convergence = self._check_convergence(current_report, metrics, iteration)
 
         if convergence.converged:
-            return Decision(
+            decision = Decision(
                 action=ActionType.FINISH,
                 confidence=1.0,
                 rationale=f"Converged after {iteration} iterations. {convergence.summary}",
                 suggested_changes=[],
                 additional_tests=[]
             )
+            return decision, convergence
 
         # 分析失败模式
-        decision = self._analyze_and_decide(current_report, history, iteration)
+        decision = self._analyze_and_decide(current_report, metrics, iteration)
 
         # 添加收敛信息
         decision.confidence = min(decision.confidence, convergence.pass_rate)
 
-        return decision
+        return decision, convergence
+
+    def as_metrics(self, history: History) -> MetricsHistory:
+        """将历史报告列表转换为滑动窗口指标（只读取最近 max_history_depth 份报告）"""
+        if isinstance(history, MetricsHistory):
+            return history
+        return MetricsHistory.from_reports(history[-self.config.max_history_depth:], self.config.max_history_depth)
 
     def _analyze_and_decide(
         self,
         current_report: AnalysisReport,
-        history: List[AnalysisReport],
+        history: MetricsHistory,
         iteration: int
     ) -> Decision:
         """分析失败并决定下一步行动"""
@@ -188,34 +219,37 @@ class DecisionEngine:
 
         return analysis
 
-    def _get_trend(self, history: List[AnalysisReport]) -> str:
-        """获取通过率趋势"""
-        if len(history) < 2:
-            return 'stable'
+    def _get_trend(self, history: History) -> str:
+        """获取通过率趋势（窗口内拟合的通过率变化量）"""
+        return self.as_metrics(history).trend(self.MIN_PASS_RATE_IMPROVEMENT)
 
-        rates = [r.pass_rate for r in history[-5:]]  # 最近5次
-
-        if len(rates) < 2:
-            return 'stable'
-
-        # 计算趋势
-        recent_avg = sum(rates[-2:]) / 2
-        older_avg = sum(rates[:-2]) / len(rates[:-2]) if len(rates) > 2 else rates[0]
-
-        if recent_avg - older_avg > self.MIN_PASS_RATE_IMPROVEMENT:
-            return 'improving'
-        elif older_avg - recent_avg > self.MIN_PASS_RATE_IMPROVEMENT:
-            return 'degrading'
-        else:
-            return 'stable'
+    def _is_stalled(self, history: MetricsHistory) -> bool:
+        """最近3次通过率无变化且失败聚类数没有减少"""
+        recent_rates = history.recent_pass_rates(3)
+        if len(recent_rates) < 3 or max(recent_rates) - min(recent_rates) >= 0.01:
+            return False
+        recent_clusters = history.recent_cluster_counts(3)
+        return recent_clusters[-1] >= recent_clusters[0]
 
     def _check_convergence(
         self,
         current_report: AnalysisReport,
-        history: List[AnalysisReport],
+        history: History,
         iteration: int
     ) -> ConvergenceStatus:
         """检查收敛状态"""
+        history = self.as_metrics(history)
+        status = self._convergence_status(current_report, history, iteration)
+        status.ewma_pass_rate = history.ewma if history.ewma is not None else status.pass_rate
+        status.slope = history.slope
+        return status
+
+    def _convergence_status(
+        self,
+        current_report: AnalysisReport,
+        history: MetricsHistory,
+        iteration: int
+    ) -> ConvergenceStatus:
         pass_rate = current_report.pass_rate
 
         # 检查是否所有测试通过
@@ -241,17 +275,15 @@ class DecisionEngine:
             )
 
         # 检查是否连续无改进
-        if len(history) >= 3:
-            recent_rates = [r.pass_rate for r in history[-3:]]
-            if max(recent_rates) - min(recent_rates) < 0.01:
-                return ConvergenceStatus(
-                    converged=False,
-                    iteration=iteration,
-                    pass_rate=pass_rate,
-                    trend='stable',
-                    remaining_failures=current_report.failed,
-                    summary=f"No improvement in last 3 iterations. Consider changing strategy."
-                )
+        if self._is_stalled(history):
+            return ConvergenceStatus(
+                converged=False,
+                iteration=iteration,
+                pass_rate=pass_rate,
+                trend='stable',
+                remaining_failures=current_report.failed,
+                summary=f"No improvement in last 3 iterations. Consider changing strategy."
+            )
 
         # 默认：未收敛
         return ConvergenceStatus(
@@ -267,7 +299,7 @@ class DecisionEngine:
         self,
         decision: Decision,
         report: AnalysisReport,
-        history: List[AnalysisReport]
+        history: History
     ) -> float:
         """计算决策置信度"""
         base_confidence = decision.confidence
@@ -278,7 +310,7 @@ class DecisionEngine:
 
         # 根据历史一致性调整
         if len(history) >= 2:
-            last_rate = history[-1].pass_rate if history else 0
+            last_rate = self.as_metrics(history).last.pass_rate
             current_rate = report.pass_rate
             rate_change = abs(current_rate - last_rate)
 
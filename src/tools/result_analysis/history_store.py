@@ -0,0 +1,153 @@
+"""
+Iteration History Store
+
+Append-only on-disk iteration history keyed by task_id.
+
+Each task has one JSON Lines file; every iteration appends one short record
+(pass rate, failure/cluster counts, failure signatures, patch hash). Reading
+the last K iterations seeks backwards from the end of the file, so the cost
+does not depend on how many iterations the task has run, and nothing beyond
+the bounded MetricsHistory window is held in memory.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from .metrics_history import MetricsHistory
+from .models import IterationMetrics
+
+logger = logging.getLogger(__name__)
+
+# 反向读取文件尾部时的块大小
+_TAIL_BLOCK_SIZE = 8192
+
+
+def patch_hash(patch_content: str) -> str:
+    """补丁内容的短哈希（空补丁返回空串）"""
+    if not patch_content:
+        return ""
+    return hashlib.sha1(patch_content.encode("utf-8")).hexdigest()[:16]
+
+
+class IterationHistoryStore:
+    """
+    按 task_id 存储的追加式迭代历史
+
+    记录为紧凑的单行 JSON；写入不完整的行（进程中途退出）在读取时被跳过。
+    """
+
+    def __init__(self, history_dir: str):
+        """
+        Args:
+            history_dir: 历史文件目录
+        """
+        self.history_dir = Path(history_dir)
+        self.history_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def path_for(self, task_id: str) -> Path:
+        """task_id 对应的历史文件"""
+        safe = re.sub(r'[^\w.-]', '_', task_id) or "_"
+        if safe != task_id:
+            # 避免不同 task_id 清洗后同名
+            safe += "-" + hashlib.sha1(task_id.encode("utf-8")).hexdigest()[:8]
+        return self.history_dir / f"{safe}.jsonl"
+
+    def append(self, task_id: str, metrics: IterationMetrics) -> None:
+        """追加一次迭代"""
+        record = {
+            "i": metrics.iteration,
+            "p": round(metrics.pass_rate, 6),
+            "f": metrics.failed,
+            "c": metrics.cluster_count,
+            "s": sorted(metrics.signatures),
+        }
+        if metrics.patch_hash:
+            record["h"] = metrics.patch_hash
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path_for(task_id), "a", encoding="utf-8") as f:
+                f.write(line)
+
+    def last(self, task_id: str, k: int) -> List[IterationMetrics]:
+        """
+        最近 k 次迭代（按时间顺序）
+
+        从文件末尾向前按块读取，只解析需要的行。
+        """
+        path = self.path_for(task_id)
+        if k <= 0 or not path.exists():
+            return []
+
+        records: List[IterationMetrics] = []
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            remainder = b""
+            while position > 0 and len(records) < k:
+                size = min(_TAIL_BLOCK_SIZE, position)
+                position -= size
+                f.seek(position)
+                lines = (f.read(size) + remainder).split(b"\n")
+                # 第一段可能是被块边界截断的行，留到下一块拼接
+                remainder = lines.pop(0) if position > 0 else b""
+                for line in reversed(lines):
+                    metrics = self._decode(line)
+                    if metrics is not None:
+                        records.append(metrics)
+                        if len(records) == k:
+                            break
+        records.reverse()
+        return records
+
+    def iter_history(self, task_id: str) -> Iterator[IterationMetrics]:
+        """按时间顺序流式读取全部迭代"""
+        path = self.path_for(task_id)
+        if not path.exists():
+            return
+        with open(path, "rb") as f:
+            for line in f:
+                metrics = self._decode(line)
+                if metrics is not None:
+                    yield metrics
+
+    def load(self, task_id: str, max_depth: int = 10) -> MetricsHistory:
+        """
+        加载最近 max_depth 次迭代为 MetricsHistory
+
+        EWMA 只从加载的迭代开始计算。
+        """
+        history = MetricsHistory(max_depth)
+        for metrics in self.last(task_id, max_depth):
+            history.append(metrics)
+        return history
+
+    def clear(self, task_id: str) -> None:
+        """删除任务的历史"""
+        with self._lock:
+            self.path_for(task_id).unlink(missing_ok=True)
+
+    @staticmethod
+    def _decode(line: bytes) -> Optional[IterationMetrics]:
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            record = json.loads(line)
+            return IterationMetrics(
+                iteration=record["i"],
+                pass_rate=record["p"],
+                failed=record["f"],
+                cluster_count=record["c"],
+                signatures=frozenset(record["s"]),
+                patch_hash=record.get("h", "")
+            )
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Skipping malformed history record: {line[:80]!r}")
+            return None
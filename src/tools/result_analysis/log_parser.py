@@ -2,15 +2,57 @@
 Log Parser
 
 Multi-format log parser for test output and system logs.
+
+Logs are parsed as a stream: input is read in fixed-size chunks and entries
+are yielded one at a time, so memory stays constant regardless of log size.
+Multi-line entries (kernel oops blocks, stack traces, pytest tracebacks) are
+folded into the entry that starts them.
+
+Large or numerous log files can be parsed in a process pool: files are split
+into byte ranges at entry boundaries and the per-range results are merged
+back in order.
 """
 
+import codecs
+import io
+import itertools
+import os
 import re
 import json
-from typing import List, Optional, Dict, Any
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import IO, Callable, Deque, Iterable, Iterator, List, Optional, Dict, Any, Set, Tuple, Type, Union
 from datetime import datetime
 
 from .models import LogEntry
 
+# str.splitlines() 识别的换行符
+_LINE_BREAKS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+_TRACEBACK_HEAD = 'Traceback (most recent call last):'
+
+# 上一条目的后续行：缩进行、pytest 失败源码/断言行（">   ..." / "E   ..."）、
+# Python traceback 起始行，以及内核 oops/panic 块中缩进的栈帧或寄存器/调用栈标记
+_CONTINUATION_RE = re.compile(
+    r'[ \t]|[>E] {2,}|' + re.escape(_TRACEBACK_HEAD) + r'|'
+    r'\[\s*[\d.]+\]\s(?:\s|#PF:|CPU:|Hardware name:|Workqueue:|RIP:|RSP:|RAX:|RDX:|RBP:|'
+    r'R1[03]:|FS:|CS:|CR2:|DR[03]:|PKRU:|Code:|Call [Tt]race:|</?TASK>|</?IRQ>|'
+    r'Modules linked in:|---\[ end|pc :|lr :|sp :|x\d+\s*:)'
+)
+_CONTINUATION_FIRST_CHARS = frozenset(' \t>ET[')
+
+# 格式检测
+_KERNEL_PREFIX_RE = re.compile(r'\[\s*[\d.]+\]')
+_GCC_PREFIX_RE = re.compile(r'\S+:\d+:\d+:')
+_DATE_PREFIX_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# 行内时间戳：ISO 8601、syslog（"Jan  5 10:00:00"）、内核（"[  12.345]"）
+_TIMESTAMP_RE = re.compile(
+    r'(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)'
+    r'|\b([A-Z][a-z]{2}\s+\d{1,2}\s+\d{2}:\d{2}:\d{2})'
+    r'|^\[\s*(\d+\.\d+)\]'
+)
+
 
 class LogParser:
     """多格式日志解析器"""
@@ -21,7 +63,7 @@ class LogParser:
         'json': None,  # JSON直接解析
         'kernel': r'\[\s*(?P<timestamp>[\d.]+)\]\s+(?P<message>.*)',
         'gcc': r'(?P<file>[^:]+):(?P<line>\d+):(?P<col>\d+):\s+(?P<level>\w+):\s+(?P<message>.*)',
-        'pytest': r'(?P<timestamp>[\d\-:.\s]+)\s+(?P<level>\w+)\s+\[(?P<source>[^\]]+)\]\s+(?P<message>.*)',
+        'pytest': r'(?P<timestamp>[\d\-:.,\s]+)\s+(?P<level>\w+)\s+\[(?P<source>[^\]]+)\]\s+(?P<message>.*)',
     }
 
     # 日志级别映射
@@ -37,8 +79,26 @@ class LogParser:
         'PANIC': 'FATAL',
     }
 
+    # 错误级别
+    ERROR_LEVELS = frozenset({'ERROR', 'FATAL', 'CRITICAL', 'PANIC'})
+
+    # 流式读取的块大小（字符或字节）
+    CHUNK_SIZE = 64 * 1024
+    # 超过此长度仍无换行的内容按一行处理，避免单行无限增长
+    MAX_LINE_LENGTH = 1024 * 1024
+    # 多行条目保留的最多后续行数
+    MAX_BLOCK_LINES = 1000
+
+    # 流格式检测的采样行数
+    DETECT_SAMPLE_LINES = 50
+    # 并行解析时每个字节区间的目标大小
+    RANGE_BYTES = 16 * 1024 * 1024
+
     def __init__(self):
-        self._compiled_patterns: Dict[str, re.Pattern] = {}
+        self._compiled_patterns: Dict[str, Optional[re.Pattern]] = {
+            name: re.compile(pattern) if pattern else None
+            for name, pattern in self.PATTERNS.items()
+        }
 
     def parse(
         self,
@@ -58,71 +118,380 @@ class LogParser:
         if not content or not content.strip():
             return []
 
-        entries = []
-        lines = content.splitlines()
+        return list(self._iter_entries(content.splitlines(), format_hint))
+
+    def iter_parse(
+        self,
+        stream: Union[IO[str], IO[bytes]],
+        format_hint: Optional[str] = None,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[LogEntry]:
+        """
+        流式解析日志（文件、管道、串口输出等）
+
+        按块读取输入并逐条产出日志条目，内存占用与日志大小无关。
+
+        Args:
+            stream: 文本或二进制流（二进制按 UTF-8 解码，非法字节被替换）
+            format_hint: 格式提示 (json, syslog, kernel, gcc, pytest)
+            chunk_size: 每次读取的大小，默认 CHUNK_SIZE
+
+        Yields:
+            LogEntry: 日志条目；多行条目的后续行在 context['stack_trace'] 中
+        """
+        lines = self._iter_lines(stream, chunk_size or self.CHUNK_SIZE)
+        return self._iter_entries(lines, format_hint)
+
+    def iter_parse_file(self, path: str, format_hint: Optional[str] = None) -> Iterator[LogEntry]:
+        """流式解析日志文件"""
+        with open(path, 'rb') as f:
+            yield from self.iter_parse(f, format_hint)
+
+    def iter_parse_files(
+        self,
+        paths: Iterable[str],
+        format_hint: Optional[str] = None,
+        workers: int = 0,
+        range_bytes: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        levels: Optional[Iterable[str]] = None,
+        on_error: Optional[Callable[[str, Exception], None]] = None
+    ) -> Iterator[LogEntry]:
+        """
+        并行解析多个日志文件，按文件和行的原始顺序产出条目
+
+        每个文件在条目边界处切分为字节区间（多行条目不会跨区间），
+        各区间在进程池中解析，结果按顺序合并。
+
+        Args:
+            paths: 日志文件路径
+            format_hint: 格式提示
+            workers: 进程数，0 表示在当前进程中逐个文件流式解析
+            range_bytes: 每个区间的目标大小，默认 RANGE_BYTES
+            max_in_flight: 同时提交的区间数上限（限制内存），默认 workers * 2
+            levels: 只产出这些级别的条目（如 ERROR_LEVELS）；在工作进程中过滤，
+                减少进程间传输
+            on_error: 单个文件解析失败时调用 on_error(path, error) 并跳过该文件
+                的剩余部分，继续解析其他文件；为 None 时抛出异常
+
+        Yields:
+            LogEntry: 日志条目
+        """
+        level_set = frozenset(level.upper() for level in levels) if levels is not None else None
+        failed: Set[str] = set()
+
+        def fail(path: str, error: Exception) -> None:
+            if on_error is None:
+                raise error
+            if path not in failed:
+                failed.add(path)
+                on_error(path, error)
+
+        if workers <= 0:
+            for path in paths:
+                try:
+                    for entry in self.iter_parse_file(path, format_hint):
+                        if level_set is None or entry.level.upper() in level_set:
+                            yield entry
+                except Exception as e:
+                    fail(path, e)
+            return
+
+        range_bytes = range_bytes or self.RANGE_BYTES
+        max_in_flight = max(1, max_in_flight or workers * 2)
+        start_timestamp = self._get_timestamp()
+        # (path, range index within file, future)
+        in_flight: Deque[Tuple[str, int, Future]] = deque()
+        last_timestamp = start_timestamp
+
+        def merge(index: int, rows: List[Tuple[Any, ...]]) -> Iterator[LogEntry]:
+            # 区间开头无时间戳的条目沿用上一区间最后一条的时间戳
+            nonlocal last_timestamp
+            inherit = index > 0
+            for row in rows:
+                entry = LogEntry(*row)
+                if inherit and entry.timestamp == start_timestamp:
+                    entry.timestamp = last_timestamp
+                else:
+                    inherit = False
+                yield entry
+            if rows:
+                last_timestamp = entry.timestamp
+
+        def collect() -> Iterator[LogEntry]:
+            # 已失败文件的剩余区间直接丢弃
+            path, index, future = in_flight.popleft()
+            if path in failed:
+                future.cancel()
+                return
+            try:
+                rows = future.result()
+            except Exception as e:
+                fail(path, e)
+                return
+            yield from merge(index, rows)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for path in paths:
+                try:
+                    stream_format = format_hint
+                    if stream_format is None:
+                        with open(path, 'rb') as f:
+                            sample = itertools.islice(self._iter_lines(f, self.CHUNK_SIZE), self.DETECT_SAMPLE_LINES)
+                            stream_format = self._detect_stream_format(list(sample)) or ''
+                    ranges = self.plan_ranges(path, range_bytes)
+                except Exception as e:
+                    fail(path, e)
+                    continue
+                for index, (start, end) in enumerate(ranges):
+                    future = pool.submit(
+                        parse_log_range, type(self), path, start, end,
+                        format_hint, stream_format, start_timestamp, level_set
+                    )
+                    in_flight.append((path, index, future))
+                    if len(in_flight) >= max_in_flight:
+                        yield from collect()
+            while in_flight:
+                yield from collect()
+
+    def plan_ranges(self, path: str, range_bytes: int) -> List[Tuple[int, int]]:
+        """
+        将文件切分为字节区间，每个区间从新条目的首行开始
+
+        切分点选在满足以下条件的行首：该行不是后续行，且前一个非空行
+        没有缩进、不是 traceback 起始行。此时顺序解析在该行必然开始新条目，
+        因此各区间独立解析的结果与整体解析一致。
+        """
+        size = os.path.getsize(path)
+        bounds = [0]
+        with open(path, 'rb') as f:
+            target = range_bytes
+            while target < size:
+                boundary = self._find_boundary(f, target)
+                if boundary is None or boundary >= size:
+                    break
+                bounds.append(boundary)
+                target = boundary + range_bytes
+        bounds.append(size)
+        return list(zip(bounds, bounds[1:]))
+
+    def _find_boundary(self, f: IO[bytes], offset: int) -> Optional[int]:
+        """从 offset 向后查找第一个可安全切分的行首"""
+        f.seek(offset)
+        f.readline()  # 跳过不完整的行
+        previous = f.readline()
+        position = f.tell()
+        while previous:
+            line = f.readline()
+            if not line:
+                return None
+            text = line.decode('utf-8', errors='replace').rstrip(_LINE_BREAKS)
+            if text and not text.isspace():
+                prev_text = previous.decode('utf-8', errors='replace')
+                if (
+                    not prev_text[0].isspace()
+                    and _TRACEBACK_HEAD not in prev_text
+                    and not self._is_continuation(text)
+                ):
+                    return position
+                previous = line
+            position = f.tell()
+        return None
+
+    def _iter_lines(self, stream: Union[IO[str], IO[bytes]], chunk_size: int) -> Iterator[str]:
+        """按块读取流并切分为行（不含换行符）"""
+        decoder = None
+        pending = ''
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            if isinstance(chunk, bytes):
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+                chunk = decoder.decode(chunk)
+            pending += chunk
+
+            lines = pending.splitlines(keepends=True)
+            pending = ''
+            if lines and lines[-1][-1] not in _LINE_BREAKS:
+                pending = lines.pop()
+                if len(pending) > self.MAX_LINE_LENGTH:
+                    lines.append(pending)
+                    pending = ''
+            for line in lines:
+                yield line.rstrip(_LINE_BREAKS)
+
+        if decoder is not None:
+            pending += decoder.decode(b'', final=True)
+        if pending:
+            yield from pending.splitlines()
+
+    def _iter_entries(
+        self,
+        lines: Iterable[str],
+        format_hint: Optional[str],
+        stream_format: Optional[str] = None,
+        start_timestamp: Optional[str] = None
+    ) -> Iterator[LogEntry]:
+        """
+        将行序列解析为条目，并把后续行合并到所属的多行条目
+
+        未提供格式提示时，根据前 DETECT_SAMPLE_LINES 行检测一次流格式，
+        之后每行直接按该格式解析，不匹配的行再回退到逐行检测。
+        行内没有时间戳的条目沿用上一条目的时间戳。
+
+        Args:
+            lines: 行序列
+            format_hint: 格式提示
+            stream_format: 已检测的流格式（'' 表示逐行检测），None 时从采样行检测
+            start_timestamp: 首个条目之前的回退时间戳
+        """
+        lines = iter(lines)
+        if format_hint is not None:
+            stream_format = None
+        elif stream_format is None:
+            sample = list(itertools.islice(lines, self.DETECT_SAMPLE_LINES))
+            stream_format = self._detect_stream_format(sample)
+            lines = itertools.chain(sample, lines)
+        stream_format = stream_format or None
+
+        current: Optional[LogEntry] = None
+        block: List[str] = []
+        in_traceback = False
+        last_timestamp = start_timestamp or self._get_timestamp()
 
         for line in lines:
-            if not line.strip():
+            if not line or line.isspace():
                 continue
 
-            entry = self._parse_line(line, format_hint)
-            if entry:
-                entries.append(entry)
+            if current is not None and (in_traceback or self._is_continuation(line)):
+                if len(block) < self.MAX_BLOCK_LINES:
+                    block.append(line)
+                else:
+                    current.context['truncated'] = True
+                if line.startswith(_TRACEBACK_HEAD):
+                    # 日志记录后紧跟的 traceback（logging 的 exc_info 输出）
+                    in_traceback = True
+                elif in_traceback and not line[0].isspace():
+                    # Python traceback 以首个非缩进行（异常信息）结束
+                    in_traceback = False
+                continue
+
+            if current is not None:
+                yield self._finish_entry(current, block) if block else current
+                block = []
+
+            if stream_format is not None:
+                current = self._parse_stream_line(line, stream_format, last_timestamp)
+            else:
+                current = self._parse_line(line, format_hint, last_timestamp)
+            if current is not None:
+                last_timestamp = current.timestamp
+            in_traceback = current is not None and _TRACEBACK_HEAD in line
+
+        if current is not None:
+            yield self._finish_entry(current, block)
+
+    def _is_continuation(self, line: str) -> bool:
+        """判断是否为上一条目的后续行"""
+        return line[0] in _CONTINUATION_FIRST_CHARS and _CONTINUATION_RE.match(line) is not None
 
-        return entries
+    def _finish_entry(self, entry: LogEntry, block: List[str]) -> LogEntry:
+        """附加多行条目的后续行"""
+        if block:
+            entry.context['stack_trace'] = '\n'.join(block)
+        return entry
 
     def _parse_line(
         self,
         line: str,
-        format_hint: Optional[str] = None
+        format_hint: Optional[str] = None,
+        fallback_timestamp: Optional[str] = None
     ) -> Optional[LogEntry]:
-        """解析单行日志"""
+        """
+        解析单行日志
+
+        Args:
+            line: 日志行
+            format_hint: 格式提示，未提供时逐行检测
+            fallback_timestamp: 行内无时间戳时使用的时间戳
+        """
         try:
             # 检测格式
             format_type = format_hint or self._detect_format(line)
 
             if format_type == 'json':
-                return self._parse_json_line(line)
+                return self._parse_json_line(line, fallback_timestamp)
             elif format_type == 'gcc':
-                return self._parse_gcc_line(line)
+                return self._parse_gcc_line(line, fallback_timestamp)
             else:
-                return self._parse_with_regex(line, format_type)
+                return self._parse_with_regex(line, format_type, fallback_timestamp)
 
         except Exception as e:
             # 解析失败时返回通用条目
             return LogEntry(
-                timestamp=self._get_timestamp(),
+                timestamp=self._line_timestamp(line, fallback_timestamp),
                 level='INFO',
                 source='unknown',
                 message=line
             )
 
+    def _parse_stream_line(
+        self,
+        line: str,
+        stream_format: str,
+        fallback_timestamp: str
+    ) -> Optional[LogEntry]:
+        """按流的缓存格式解析，不匹配时回退到逐行检测"""
+        try:
+            if stream_format == 'json':
+                entry = self._parse_json_line(line, fallback_timestamp) if line.lstrip().startswith('{') else None
+            else:
+                entry = self._match_line(line, stream_format, fallback_timestamp)
+        except Exception:
+            entry = None
+        if entry is not None:
+            return entry
+        return self._parse_line(line, None, fallback_timestamp)
+
     def _detect_format(self, line: str) -> str:
         """自动检测日志格式"""
         # 检查JSON
-        if line.strip().startswith('{'):
+        if line.lstrip().startswith('{'):
             return 'json'
 
         # 检查kernel dmesg格式
-        if re.match(r'\[\s*[\d.]+\]', line):
+        if _KERNEL_PREFIX_RE.match(line):
             return 'kernel'
 
         # 检查GCC输出格式
-        if re.match(r'\S+:\d+:\d+:', line):
+        if _GCC_PREFIX_RE.match(line):
             return 'gcc'
 
         # 检查pytest格式
-        if re.match(r'\d{4}-\d{2}-\d{2}', line) or '::' in line:
+        if _DATE_PREFIX_RE.match(line) or '::' in line:
             return 'pytest'
 
         return 'syslog'
 
-    def _parse_json_line(self, line: str) -> Optional[LogEntry]:
+    def _detect_stream_format(self, sample: List[str]) -> Optional[str]:
+        """根据采样行检测整个流的格式（取出现最多的格式）"""
+        counts: Dict[str, int] = {}
+        for line in sample:
+            if line.strip() and not _CONTINUATION_RE.match(line):
+                format_type = self._detect_format(line)
+                counts[format_type] = counts.get(format_type, 0) + 1
+        if not counts:
+            return None
+        return max(counts, key=counts.__getitem__)
+
+    def _parse_json_line(self, line: str, fallback_timestamp: Optional[str] = None) -> Optional[LogEntry]:
         """解析JSON格式日志"""
         try:
             data = json.loads(line.strip())
             return LogEntry(
-                timestamp=data.get('timestamp', self._get_timestamp()),
+                timestamp=data.get('timestamp') or fallback_timestamp or self._get_timestamp(),
                 level=data.get('level', 'INFO'),
                 source=data.get('source', data.get('logger', 'json')),
                 message=data.get('message', data.get('msg', str(data))),
@@ -131,67 +500,93 @@ class LogParser:
         except json.JSONDecodeError:
             return None
 
-    def _parse_gcc_line(self, line: str) -> Optional[LogEntry]:
+    def _parse_gcc_line(self, line: str, fallback_timestamp: Optional[str] = None) -> Optional[LogEntry]:
         """解析GCC编译错误格式"""
-        match = re.match(
-            r'(?P<file>[^:]+):(?P<line>\d+):(?P<col>\d+):\s+(?P<level>\w+):\s+(?P<message>.*)',
-            line
-        )
-        if match:
-            groups = match.groupdict()
-            return LogEntry(
-                timestamp=self._get_timestamp(),
-                level=self._normalize_level(groups.get('level', 'ERROR')),
-                source=groups.get('file', 'gcc'),
-                message=groups.get('message', ''),
-                context={
-                    'line': groups.get('line'),
-                    'column': groups.get('col'),
-                    'file': groups.get('file')
-                }
-            )
-        return None
+        return self._match_line(line, 'gcc', fallback_timestamp)
 
-    def _parse_with_regex(self, line: str, format_type: str) -> Optional[LogEntry]:
+    def _parse_with_regex(
+        self,
+        line: str,
+        format_type: str,
+        fallback_timestamp: Optional[str] = None
+    ) -> Optional[LogEntry]:
         """使用正则表达式解析"""
-        pattern = self.PATTERNS.get(format_type, self.PATTERNS['syslog'])
-        if not pattern:
+        pattern_name = format_type if format_type in self._compiled_patterns else 'syslog'
+        if self._compiled_patterns[pattern_name] is None:
             return LogEntry(
-                timestamp=self._get_timestamp(),
+                timestamp=self._line_timestamp(line, fallback_timestamp),
                 level='INFO',
                 source='unknown',
                 message=line
             )
 
-        match = re.match(pattern, line)
-        if match:
-            groups = match.groupdict()
-            return LogEntry(
-                timestamp=groups.get('timestamp', self._get_timestamp()),
-                level=self._normalize_level(groups.get('level', 'INFO')),
-                source=groups.get('source', groups.get('host', format_type)),
-                message=groups.get('message', line)
-            )
+        entry = self._match_line(line, pattern_name, fallback_timestamp, source=format_type)
+        if entry is not None:
+            return entry
 
         return LogEntry(
-            timestamp=self._get_timestamp(),
+            timestamp=self._line_timestamp(line, fallback_timestamp),
             level='INFO',
             source=format_type,
             message=line
         )
 
+    def _match_line(
+        self,
+        line: str,
+        format_type: str,
+        fallback_timestamp: Optional[str] = None,
+        source: Optional[str] = None
+    ) -> Optional[LogEntry]:
+        """用预编译的格式正则解析，不匹配时返回 None"""
+        pattern = self._compiled_patterns.get(format_type)
+        match = pattern.match(line) if pattern is not None else None
+        if not match:
+            return None
+
+        groups = match.groupdict()
+        if format_type == 'gcc':
+            # 编译器诊断行不带时间戳
+            return LogEntry(
+                timestamp=fallback_timestamp or self._get_timestamp(),
+                level=self._normalize_level(groups.get('level', 'ERROR')),
+                source=groups.get('file', 'gcc'),
+                message=groups.get('message', ''),
+                context={
+                    'line': groups.get('line'),
+                    'column': groups.get('col'),
+                    'file': groups.get('file')
+                }
+            )
+        return LogEntry(
+            timestamp=groups.get('timestamp') or self._line_timestamp(line, fallback_timestamp),
+            level=self._normalize_level(groups.get('level') or 'INFO'),
+            source=groups.get('source') or groups.get('host') or source or format_type,
+            message=groups.get('message', line)
+        )
+
     def _normalize_level(self, level: str) -> str:
         """规范化日志级别"""
         return self.LEVEL_MAP.get(level.upper(), 'INFO')
 
+    def _line_timestamp(self, line: str, fallback_timestamp: Optional[str] = None) -> str:
+        """从行内提取时间戳，没有时使用回退时间戳"""
+        match = _TIMESTAMP_RE.search(line)
+        if match:
+            return match.group(1) or match.group(2) or match.group(3)
+        return fallback_timestamp or self._get_timestamp()
+
     def _get_timestamp(self) -> str:
         """获取当前时间戳"""
         return datetime.now().isoformat()
 
-    def extract_errors(self, entries: List[LogEntry]) -> List[LogEntry]:
-        """提取错误日志"""
-        error_levels = {'ERROR', 'FATAL', 'CRITICAL', 'PANIC'}
-        return [e for e in entries if e.level.upper() in error_levels]
+    def extract_errors(self, entries: Iterable[LogEntry]) -> List[LogEntry]:
+        """提取错误日志（可直接传入 iter_parse 的结果，边解析边过滤）"""
+        return list(self.iter_errors(entries))
+
+    def iter_errors(self, entries: Iterable[LogEntry]) -> Iterator[LogEntry]:
+        """流式提取错误日志"""
+        return (e for e in entries if e.level.upper() in self.ERROR_LEVELS)
 
     def extract_warnings(self, entries: List[LogEntry]) -> List[LogEntry]:
         """提取警告日志"""
@@ -211,3 +606,32 @@ class LogParser:
                 groups[level] = []
             groups[level].append(entry)
         return groups
+
+
+def parse_log_range(
+    parser_cls: Type[LogParser],
+    path: str,
+    start: int,
+    end: int,
+    format_hint: Optional[str],
+    stream_format: Optional[str],
+    start_timestamp: str,
+    levels: Optional[frozenset] = None
+) -> List[Tuple[Any, ...]]:
+    """
+    解析文件的一个字节区间（在工作进程中运行）
+
+    Returns:
+        条目字段元组 (timestamp, level, source, message, context) 列表；
+        元组的序列化开销远小于 dataclass 实例
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    parser = parser_cls()
+    lines = parser._iter_lines(io.BytesIO(data), parser.CHUNK_SIZE)
+    return [
+        (e.timestamp, e.level, e.source, e.message, e.context)
+        for e in parser._iter_entries(lines, format_hint, stream_format, start_timestamp)
+        if levels is None or e.level.upper() in levels
+    ]
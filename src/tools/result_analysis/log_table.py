@@ -0,0 +1,300 @@
+"""
+Log Table
+
+Columnar storage for large log sets.
+
+Entries are stored column-wise in NumPy arrays: interned level and source
+codes, timestamps parsed to int64 nanoseconds, and offsets into one shared
+UTF-8 buffer holding the raw timestamp and message text. Filtering, grouping
+and time-window queries are vectorized and return views that share the
+buffer. ``LogEntry`` objects are only built on access.
+"""
+
+import array
+import functools
+import re
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .models import LogEntry
+
+# 无法解析的时间戳
+NAT = np.iinfo(np.int64).min
+
+_MONTHS = {m: i for i, m in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], 1
+)}
+_SYSLOG_TS_RE = re.compile(r'([A-Z][a-z]{2})\s+(\d{1,2})\s+(\d{2}):(\d{2}):(\d{2})$')
+_KERNEL_TS_RE = re.compile(r'\d+\.\d+$')
+
+TimeValue = Union[int, float, str, datetime]
+
+
+def parse_timestamp(text: str, year: Optional[int] = None) -> int:
+    """
+    将日志时间戳解析为 int64 纳秒
+
+    ISO 8601 与 syslog 时间戳为 UTC 纪元纳秒（无时区按 UTC，syslog 无年份时
+    使用 year，默认当前年份）；dmesg 的 "[  12.345678]" 为开机后的纳秒数。
+
+    Returns:
+        int: 纳秒时间戳，无法解析时返回 NAT
+    """
+    text = text.strip()
+    if not text:
+        return NAT
+    if _KERNEL_TS_RE.match(text):
+        seconds, _, fraction = text.partition('.')
+        return int(seconds) * 1_000_000_000 + int(fraction[:9].ljust(9, '0'))
+    if text[0].isalpha():
+        match = _SYSLOG_TS_RE.match(text)
+        if not match or match.group(1) not in _MONTHS:
+            return NAT
+        value = datetime(
+            year or datetime.now().year, _MONTHS[match.group(1)], int(match.group(2)),
+            int(match.group(3)), int(match.group(4)), int(match.group(5))
+        )
+    else:
+        try:
+            value = datetime.fromisoformat(text.replace(',', '.').replace('Z', '+00:00'))
+        except ValueError:
+            return NAT
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1_000
+
+
+def _to_ns(value: TimeValue) -> int:
+    """时间窗口边界转换为纳秒"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    if isinstance(value, str):
+        ns = parse_timestamp(value)
+        if ns == NAT:
+            raise ValueError(f"Unparseable timestamp: {value!r}")
+        return ns
+    return int(value)
+
+
+class LogTable:
+    """
+    列式日志表
+
+    每行约 40 字节加上时间戳与消息文本本身，是 LogEntry 实例的数分之一。
+    所有查询返回共享文本缓冲区的新表；索引或迭代时按需构造 LogEntry。
+    """
+
+    def __init__(
+        self,
+        buffer: Union[bytes, bytearray],
+        text_start: np.ndarray,
+        message_start: np.ndarray,
+        message_end: np.ndarray,
+        timestamps: np.ndarray,
+        level_codes: np.ndarray,
+        source_codes: np.ndarray,
+        context_ids: np.ndarray,
+        levels: List[str],
+        sources: List[str],
+        contexts: List[Dict[str, Any]]
+    ):
+        self._buffer = buffer
+        # 缓冲区中 [text_start, message_start) 为原始时间戳，[message_start, message_end) 为消息
+        self._text_start = text_start
+        self._message_start = message_start
+        self._message_end = message_end
+        self.timestamps = timestamps
+        self.level_codes = level_codes
+        self.source_codes = source_codes
+        # 非空 context 在 contexts 中的下标，-1 表示无
+        self._context_ids = context_ids
+        self.levels = levels
+        self.sources = sources
+        self._contexts = contexts
+
+    @classmethod
+    def from_entries(cls, entries: Iterable[LogEntry], year: Optional[int] = None) -> "LogTable":
+        """
+        从日志条目构建表（流式读取，可直接传入 LogParser.iter_parse 的结果）
+
+        Args:
+            entries: 日志条目
+            year: syslog 时间戳缺省年份
+        """
+        buffer = bytearray()
+        text_start = array.array('q')
+        message_start = array.array('q')
+        message_end = array.array('q')
+        timestamps = array.array('q')
+        level_codes = array.array('B')
+        source_codes = array.array('i')
+        context_ids = array.array('i')
+        # 相邻条目的时间戳常常相同（秒级精度的 syslog 等）
+        parse = functools.lru_cache(maxsize=4096)(
+            functools.partial(parse_timestamp, year=year or datetime.now().year)
+        )
+        level_index: Dict[str, int] = {}
+        source_index: Dict[str, int] = {}
+        contexts: List[Dict[str, Any]] = []
+
+        for entry in entries:
+            timestamp = entry.timestamp if isinstance(entry.timestamp, str) else str(entry.timestamp)
+            text_start.append(len(buffer))
+            buffer += timestamp.encode('utf-8')
+            message_start.append(len(buffer))
+            buffer += entry.message.encode('utf-8', errors='surrogatepass')
+            message_end.append(len(buffer))
+            timestamps.append(parse(timestamp))
+            level_codes.append(level_index.setdefault(entry.level, len(level_index)))
+            source_codes.append(source_index.setdefault(entry.source, len(source_index)))
+            if entry.context:
+                context_ids.append(len(contexts))
+                contexts.append(entry.context)
+            else:
+                context_ids.append(-1)
+
+        if len(level_index) > 255:
+            raise ValueError(f"Too many distinct log levels: {len(level_index)}")
+
+        return cls(
+            buffer,
+            np.frombuffer(text_start, dtype=np.int64),
+            np.frombuffer(message_start, dtype=np.int64),
+            np.frombuffer(message_end, dtype=np.int64),
+            np.frombuffer(timestamps, dtype=np.int64),
+            np.frombuffer(level_codes, dtype=np.uint8),
+            np.frombuffer(source_codes, dtype=np.int32),
+            np.frombuffer(context_ids, dtype=np.int32),
+            list(level_index),
+            list(source_index),
+            contexts
+        )
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __getitem__(self, index: int) -> LogEntry:
+        """构造第 index 行的 LogEntry"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        context_id = int(self._context_ids[index])
+        return LogEntry(
+            timestamp=self._text(self._text_start[index], self._message_start[index]),
+            level=self.levels[self.level_codes[index]],
+            source=self.sources[self.source_codes[index]],
+            message=self.message(index),
+            context=self._contexts[context_id] if context_id >= 0 else {}
+        )
+
+    def __iter__(self) -> Iterator[LogEntry]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def message(self, index: int) -> str:
+        """第 index 行的消息文本"""
+        return self._text(self._message_start[index], self._message_end[index])
+
+    def messages(self) -> List[str]:
+        """全部消息文本"""
+        return [self.message(i) for i in range(len(self))]
+
+    @property
+    def nbytes(self) -> int:
+        """列与文本缓冲区占用的字节数（不含 context）"""
+        columns = (
+            self._text_start, self._message_start, self._message_end, self.timestamps,
+            self.level_codes, self.source_codes, self._context_ids
+        )
+        return len(self._buffer) + sum(c.nbytes for c in columns)
+
+    # ---- 向量化查询 ----
+
+    def take(self, indices: Union[np.ndarray, Sequence[int]]) -> "LogTable":
+        """按行号或布尔掩码选取行（共享文本缓冲区）"""
+        indices = np.asarray(indices)
+        if indices.dtype != np.bool_:
+            indices = indices.astype(np.intp)
+        return LogTable(
+            self._buffer,
+            self._text_start[indices],
+            self._message_start[indices],
+            self._message_end[indices],
+            self.timestamps[indices],
+            self.level_codes[indices],
+            self.source_codes[indices],
+            self._context_ids[indices],
+            self.levels,
+            self.sources,
+            self._contexts
+        )
+
+    def level_mask(self, levels: Iterable[str]) -> np.ndarray:
+        """级别属于 levels 的行（不区分大小写）"""
+        wanted = {level.upper() for level in levels}
+        codes = [code for code, level in enumerate(self.levels) if level.upper() in wanted]
+        return np.isin(self.level_codes, codes)
+
+    def source_mask(self, source: str) -> np.ndarray:
+        """来源包含 source 的行（不区分大小写）"""
+        needle = source.lower()
+        codes = [code for code, name in enumerate(self.sources) if needle in name.lower()]
+        return np.isin(self.source_codes, codes)
+
+    def time_mask(self, start: Optional[TimeValue] = None, end: Optional[TimeValue] = None) -> np.ndarray:
+        """时间戳位于 [start, end) 的行；无法解析时间戳的行不匹配"""
+        mask = self.timestamps != NAT
+        if start is not None:
+            mask &= self.timestamps >= _to_ns(start)
+        if end is not None:
+            mask &= self.timestamps < _to_ns(end)
+        return mask
+
+    def filter_by_level(self, levels: Iterable[str]) -> "LogTable":
+        """按级别过滤"""
+        return self.take(self.level_mask(levels))
+
+    def filter_by_source(self, source: str) -> "LogTable":
+        """按来源过滤"""
+        return self.take(self.source_mask(source))
+
+    def between(self, start: Optional[TimeValue] = None, end: Optional[TimeValue] = None) -> "LogTable":
+        """时间窗口查询"""
+        return self.take(self.time_mask(start, end))
+
+    def errors(self) -> "LogTable":
+        """错误日志"""
+        return self.filter_by_level({'ERROR', 'FATAL', 'CRITICAL', 'PANIC'})
+
+    def warnings(self) -> "LogTable":
+        """警告日志"""
+        return self.filter_by_level({'WARNING', 'WARN'})
+
+    def level_counts(self) -> Dict[str, int]:
+        """各级别条目数"""
+        counts = np.bincount(self.level_codes, minlength=len(self.levels))
+        result: Dict[str, int] = {}
+        for code, count in enumerate(counts):
+            if count:
+                level = self.levels[code].upper()
+                result[level] = result.get(level, 0) + int(count)
+        return result
+
+    def group_by_level(self) -> Dict[str, "LogTable"]:
+        """按级别分组（与 LogParser.group_by_level 一致，键为大写级别）"""
+        groups: Dict[str, List[int]] = {}
+        for code, level in enumerate(self.levels):
+            groups.setdefault(level.upper(), []).append(code)
+        result = {}
+        for level, codes in groups.items():
+            mask = np.isin(self.level_codes, codes)
+            if mask.any():
+                result[level] = self.take(mask)
+        return result
+
+    def _text(self, start: int, end: int) -> str:
+        return self._buffer[start:end].decode('utf-8', errors='surrogatepass')
@@ -0,0 +1,142 @@
+"""
+Metrics History
+
+Compact, bounded per-task iteration history for the decision engine.
+
+Only pass rate, failure count, cluster count and failure signatures are kept
+per iteration, in deques bounded by ``max_history_depth``. The EWMA of the
+pass rate and the least-squares slope over the window are maintained
+incrementally, so each decision costs O(1) regardless of how long the task
+has been running.
+"""
+
+from collections import deque
+from typing import Deque, FrozenSet, Iterable, List, Optional
+
+from .clustering import failure_signature
+from .models import AnalysisReport, IterationMetrics
+
+
+class MetricsHistory:
+    """
+    滑动窗口迭代指标
+
+    窗口外的迭代只体现在 EWMA 中；斜率、停滞检测和失败签名跟踪只看窗口内的迭代。
+    """
+
+    # EWMA 平滑系数
+    DEFAULT_ALPHA = 0.5
+
+    def __init__(self, max_depth: int = 10, alpha: float = DEFAULT_ALPHA):
+        """
+        Args:
+            max_depth: 窗口大小（迭代数）
+            alpha: EWMA 平滑系数，越大越偏重最近的迭代
+        """
+        if max_depth < 1:
+            raise ValueError(f"max_depth must be positive: {max_depth}")
+        self.max_depth = max_depth
+        self.alpha = alpha
+        self.entries: Deque[IterationMetrics] = deque(maxlen=max_depth)
+        self.pass_rates: Deque[float] = deque(maxlen=max_depth)
+        self.cluster_counts: Deque[int] = deque(maxlen=max_depth)
+        self.ewma: Optional[float] = None
+        # 记录过的迭代总数；第 n 次记录的横坐标为 n
+        self.count = 0
+        # 窗口内 sum(y) 与 sum(x*y)，用于增量最小二乘斜率
+        self._sum_y = 0.0
+        self._sum_xy = 0.0
+
+    @classmethod
+    def from_reports(
+        cls,
+        reports: Iterable[AnalysisReport],
+        max_depth: int = 10,
+        alpha: float = DEFAULT_ALPHA
+    ) -> "MetricsHistory":
+        """由历史报告构建（只保留指标）"""
+        history = cls(max_depth, alpha)
+        for iteration, report in enumerate(reports):
+            history.record(report, iteration)
+        return history
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def record(self, report: AnalysisReport, iteration: Optional[int] = None) -> IterationMetrics:
+        """记录一次迭代的报告"""
+        if report.clusters:
+            signatures = frozenset(cluster.signature for cluster in report.clusters)
+        else:
+            signatures = frozenset(failure_signature(failure) for failure in report.failures)
+        metrics = IterationMetrics(
+            iteration=self.count if iteration is None else iteration,
+            pass_rate=report.pass_rate,
+            failed=report.failed,
+            cluster_count=len(signatures),
+            signatures=signatures
+        )
+        self.append(metrics)
+        return metrics
+
+    def append(self, metrics: IterationMetrics) -> None:
+        """追加一次迭代的指标，窗口满时淘汰最旧的一次"""
+        if len(self.pass_rates) == self.max_depth:
+            evicted_x = self.count - self.max_depth
+            evicted_y = self.pass_rates[0]
+            self._sum_y -= evicted_y
+            self._sum_xy -= evicted_x * evicted_y
+
+        y = metrics.pass_rate
+        self.entries.append(metrics)
+        self.pass_rates.append(y)
+        self.cluster_counts.append(metrics.cluster_count)
+        self._sum_y += y
+        self._sum_xy += self.count * y
+        self.count += 1
+        self.ewma = y if self.ewma is None else self.alpha * y + (1 - self.alpha) * self.ewma
+
+    @property
+    def last(self) -> Optional[IterationMetrics]:
+        return self.entries[-1] if self.entries else None
+
+    @property
+    def slope(self) -> float:
+        """窗口内通过率对迭代序号的最小二乘斜率"""
+        n = len(self.pass_rates)
+        if n < 2:
+            return 0.0
+        # 横坐标为连续整数 first..first+n-1
+        first = self.count - n
+        sum_x = n * first + n * (n - 1) / 2
+        sum_xx = n * first * first + first * n * (n - 1) + (n - 1) * n * (2 * n - 1) / 6
+        denominator = n * sum_xx - sum_x * sum_x
+        return (n * self._sum_xy - sum_x * self._sum_y) / denominator
+
+    def trend(self, threshold: float) -> str:
+        """按窗口内拟合的通过率变化量判断趋势"""
+        if len(self.pass_rates) < 2:
+            return 'stable'
+        change = self.slope * (len(self.pass_rates) - 1)
+        if change > threshold:
+            return 'improving'
+        if change < -threshold:
+            return 'degrading'
+        return 'stable'
+
+    def recent_pass_rates(self, k: int) -> List[float]:
+        """最近 k 次的通过率"""
+        k = min(k, len(self.pass_rates))
+        return [self.pass_rates[-i] for i in range(k, 0, -1)]
+
+    def recent_cluster_counts(self, k: int) -> List[int]:
+        """最近 k 次的失败聚类数"""
+        k = min(k, len(self.cluster_counts))
+        return [self.cluster_counts[-i] for i in range(k, 0, -1)]
+
+    def signature_sets(self) -> List[FrozenSet[str]]:
+        """窗口内各次迭代的失败签名（按时间顺序）"""
+        return [entry.signatures for entry in self.entries]
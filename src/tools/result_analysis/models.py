@@ -5,7 +5,7 @@ Defines all data classes for test result analysis and decision-making.
 """
 
 from dataclasses import dataclass, field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, FrozenSet, Optional
 from enum import Enum
 from datetime import datetime
 import uuid
@@ -40,6 +40,14 @@ class ResultAnalyzerConfig:
     max_history_depth: int = 10
     enable_ai_analysis: bool = True
     pattern_db_path: Optional[str] = None
+    # 日志并行解析进程数，0 表示在当前进程中顺序解析
+    log_parse_workers: int = 0
+    # 并行解析时每个字节区间的目标大小
+    log_range_bytes: int = 16 * 1024 * 1024
+    # 按 task_id 持久化迭代历史的目录（None 时只在内存中保留滑动窗口）
+    history_dir: Optional[str] = None
+    # 用于崩溃回溯符号化的 ELF 文件（固件镜像、vmlinux、测试程序等）
+    symbol_files: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -52,6 +60,34 @@ class LogEntry:
     context: Dict[str, Any] = field(default_factory=dict)
 
 
+@dataclass
+class StackFrame:
+    """回溯栈帧"""
+    index: int = 0
+    address: Optional[int] = None
+    function: Optional[str] = None
+    offset: Optional[int] = None
+    module: Optional[str] = None
+    file_path: Optional[str] = None
+    line: Optional[int] = None
+    raw: str = ""
+
+    def format(self) -> str:
+        """格式化为单行：#0 func+0x10 (file.c:42) [module]"""
+        text = f"#{self.index} "
+        if self.function:
+            text += self.function + (f"+{self.offset:#x}" if self.offset else "")
+        elif self.address is not None:
+            text += f"{self.address:#x}"
+        else:
+            text += "??"
+        if self.file_path:
+            text += f" ({self.file_path}" + (f":{self.line}" if self.line else "") + ")"
+        if self.module:
+            text += f" [{self.module}]"
+        return text
+
+
 @dataclass
 class Failure:
     """失败信息"""
@@ -62,6 +98,8 @@ class Failure:
     stack_trace: Optional[str] = None
     location: Optional[str] = None
     related_logs: List[LogEntry] = field(default_factory=list)
+    # 符号化后的回溯（栈顶在前）
+    frames: List[StackFrame] = field(default_factory=list)
 
     def __post_init__(self):
         if not self.failure_id:
@@ -79,6 +117,37 @@ class RootCauseReport:
     related_knowledge: List[str] = field(default_factory=list)
 
 
+@dataclass
+class FailureCluster:
+    """
+    同一失败签名的失败集合
+
+    签名由失败类别和去除地址、时间戳、PID、数字后的消息与栈顶帧计算，
+    同一故障模式在不同测试、不同迭代中得到相同签名。
+    """
+    signature: str = ""
+    category: FailureCategory = FailureCategory.UNKNOWN
+    normalized_message: str = ""
+    failures: List[Failure] = field(default_factory=list)
+    root_cause: Optional[RootCauseReport] = None
+    # 历史报告中出现该签名的次数
+    history_occurrences: int = 0
+    # 截至本次连续出现的迭代数（含本次）
+    streak: int = 1
+
+    @property
+    def representative(self) -> Failure:
+        return self.failures[0]
+
+    @property
+    def test_ids(self) -> List[str]:
+        return [f.test_id for f in self.failures]
+
+    @property
+    def is_new(self) -> bool:
+        return self.history_occurrences == 0
+
+
 @dataclass
 class Decision:
     """决策结果"""
@@ -98,6 +167,21 @@ class ConvergenceStatus:
     trend: str = "stable"  # "improving", "stable", "degrading"
     remaining_failures: int = 0
     summary: str = ""
+    # 通过率的指数加权平均与每次迭代的线性趋势斜率
+    ewma_pass_rate: float = 0.0
+    slope: float = 0.0
+
+
+@dataclass
+class IterationMetrics:
+    """单次迭代的精简指标（不保留失败详情与日志）"""
+    iteration: int = 0
+    pass_rate: float = 0.0
+    failed: int = 0
+    cluster_count: int = 0
+    signatures: FrozenSet[str] = frozenset()
+    # 本次迭代所测补丁的短哈希
+    patch_hash: str = ""
 
 
 @dataclass
@@ -112,6 +196,9 @@ class AnalysisReport:
     skipped: int = 0
     failures: List[Failure] = field(default_factory=list)
     root_cause_reports: List[RootCauseReport] = field(default_factory=list)
+    clusters: List[FailureCluster] = field(default_factory=list)
+    # 上一次报告中存在、本次已消失的失败签名
+    resolved_signatures: List[str] = field(default_factory=list)
     decision: Optional[Decision] = None
     convergence: Optional[ConvergenceStatus] = None
     summary: str = ""
@@ -135,4 +222,5 @@ class AnalysisReport:
             f"Failed: {self.failed} | Skipped: {self.skipped}\n"
             f"Pass Rate: {rate:.1f}%\n"
             f"Failures: {len(self.failures)} identified"
+            + (f" ({len(self.clusters)} distinct)" if self.clusters else "")
         )
@@ -0,0 +1,330 @@
+"""
+Symbolizer
+
+Extracts backtraces from crash output (kernel oops, AddressSanitizer, gdb,
+bare-metal fault dumps) and resolves raw addresses against ELF symbol tables.
+
+ELF symbol tables are parsed once per file (keyed by path, size and mtime),
+cached, and indexed by a sorted address array searched with bisect, so
+symbolizing thousands of frames per failing test is cheap. Resolved frames
+are mapped back to ``FunctionNode`` source locations from the code index.
+"""
+
+import bisect
+import logging
+import os
+import re
+import struct
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.models.code import FunctionNode
+
+from .models import StackFrame
+
+logger = logging.getLogger(__name__)
+
+# 单个回溯最多保留的栈帧数
+MAX_FRAMES = 64
+
+# 内核 oops / arm64：RIP: 0010:foo+0x12/0x40 [mod]、pc : foo+0x10/0x20、[<ffff...>] foo+0x1/0x2
+_KERNEL_FRAME_RE = re.compile(
+    r'(?:RIP:\s*\w{4}:|\b(?:pc|lr)\s*:\s*|\[<(?P<addr>[0-9a-f]+)>\]\s*)?'
+    r'(?P<unreliable>\?\s+)?(?P<func>[A-Za-z_.$][\w.$]*)\+0x(?P<off>[0-9a-f]+)/0x[0-9a-f]+'
+    r'(?:\s+\[(?P<module>[\w-]+)\])?'
+)
+# ASan：#0 0x4f5a2b in spi_xfer /src/spi.c:42:7、#2 0x7f3a (/lib/libc.so.6+0x29d8f)
+_ASAN_FRAME_RE = re.compile(
+    r'#(?P<idx>\d+)\s+0x(?P<addr>[0-9a-f]+)\s+(?:in\s+(?P<func>\S+)\s*)?'
+    r'(?:\((?P<module>[^()\s]+)\+0x(?P<modoff>[0-9a-f]+)\)|(?P<file>\S+?):(?P<line>\d+)(?::\d+)?)?\s*$'
+)
+# gdb：#0  0x0000555555555149 in spi_xfer (dev=0x0) at drivers/spi.c:42
+_GDB_FRAME_RE = re.compile(
+    r'#(?P<idx>\d+)\s+(?:0x(?P<addr>[0-9a-f]+)\s+in\s+)?(?P<func>[^\s(]+)\s*\(.*\)'
+    r'(?:\s+at\s+(?P<file>\S+):(?P<line>\d+))?(?:\s+from\s+(?P<module>\S+))?\s*$'
+)
+# 裸机故障转储：PC: 0x08001234、LR = 0x0800abcd
+_REGISTER_FRAME_RE = re.compile(r'\b(?:PC|LR|pc|lr|ra|epc|mepc)\s*[:=]\s*0x(?P<addr>[0-9a-fA-F]{4,})\b')
+
+# ELF 常量
+_SHT_SYMTAB = 2
+_SHT_DYNSYM = 11
+_STT_FUNC = 2
+_STT_GNU_IFUNC = 10
+_EM_ARM = 40
+
+
+class ElfSymbolTable:
+    """
+    ELF 函数符号表
+
+    符号按地址排序存放在并行数组中，地址查询为一次 bisect。
+    """
+
+    def __init__(self, path: str, symbols: List[Tuple[int, int, str]]):
+        """
+        Args:
+            path: ELF 文件路径
+            symbols: (地址, 大小, 名称) 列表
+        """
+        self.path = path
+        self.name = os.path.basename(path)
+        # 同一地址的别名保留尺寸最大的一个
+        symbols.sort(key=lambda s: (s[0], -s[1], s[2]))
+        self.addresses: List[int] = []
+        self.sizes: List[int] = []
+        self.names: List[str] = []
+        for address, size, name in symbols:
+            if self.addresses and self.addresses[-1] == address:
+                continue
+            self.addresses.append(address)
+            self.sizes.append(size)
+            self.names.append(name)
+
+    def __len__(self) -> int:
+        return len(self.addresses)
+
+    def resolve(self, address: int) -> Optional[Tuple[str, int]]:
+        """
+        将地址解析为 (函数名, 函数内偏移)
+
+        有尺寸的符号只匹配其范围内的地址；尺寸为 0 的符号延伸到下一个符号。
+        """
+        i = bisect.bisect_right(self.addresses, address) - 1
+        if i < 0:
+            return None
+        start, size = self.addresses[i], self.sizes[i]
+        if size and address >= start + size:
+            return None
+        return self.names[i], address - start
+
+    def address_of(self, name: str) -> Optional[int]:
+        """函数名对应的地址"""
+        try:
+            return self.addresses[self.names.index(name)]
+        except ValueError:
+            return None
+
+    @classmethod
+    def from_file(cls, path: str) -> "ElfSymbolTable":
+        """解析 ELF 文件的 .symtab/.dynsym 中的函数符号"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != b'\x7fELF':
+            raise ValueError(f"Not an ELF file: {path}")
+
+        is_64 = data[4] == 2
+        endian = '<' if data[5] == 1 else '>'
+        if is_64:
+            header = struct.unpack_from(endian + 'HHIQQQIHHHHHH', data, 16)
+            section_format, symbol_format = endian + 'IIQQQQIIQQ', endian + 'IBBHQQ'
+        else:
+            header = struct.unpack_from(endian + 'HHIIIIIHHHHHH', data, 16)
+            section_format, symbol_format = endian + 'IIIIIIIIII', endian + 'IIIBBH'
+        machine, shoff, shentsize, shnum = header[1], header[5], header[10], header[11]
+
+        sections = [
+            struct.unpack_from(section_format, data, shoff + i * shentsize)
+            for i in range(shnum)
+        ]
+        symbol_size = struct.calcsize(symbol_format)
+        # Thumb 函数地址最低位为 1
+        address_mask = ~1 if machine == _EM_ARM else ~0
+
+        symbols: List[Tuple[int, int, str]] = []
+        for section in sections:
+            sh_type, sh_offset, sh_size, sh_link = section[1], section[4], section[5], section[6]
+            if sh_type not in (_SHT_SYMTAB, _SHT_DYNSYM):
+                continue
+            strtab_section = sections[sh_link]
+            strtab = data[strtab_section[4]:strtab_section[4] + strtab_section[5]]
+            table = data[sh_offset:sh_offset + sh_size - sh_size % symbol_size]
+            for entry in struct.iter_unpack(symbol_format, table):
+                if is_64:
+                    st_name, st_info, _, st_shndx, st_value, st_size = entry
+                else:
+                    st_name, st_value, st_size, st_info, _, st_shndx = entry
+                if st_info & 0xf not in (_STT_FUNC, _STT_GNU_IFUNC) or st_shndx == 0 or not st_value:
+                    continue
+                name = strtab[st_name:strtab.find(b'\0', st_name)].decode('utf-8', errors='replace')
+                symbols.append((st_value & address_mask, st_size, name))
+
+        return cls(path, symbols)
+
+
+_table_cache: Dict[Tuple[str, int, int], ElfSymbolTable] = {}
+_table_cache_lock = threading.Lock()
+
+
+def load_symbol_table(path: str) -> ElfSymbolTable:
+    """加载 ELF 符号表（按路径、大小和修改时间缓存）"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _table_cache_lock:
+        table = _table_cache.get(key)
+    if table is None:
+        table = ElfSymbolTable.from_file(path)
+        with _table_cache_lock:
+            _table_cache[key] = table
+    return table
+
+
+def extract_backtrace(text: str) -> List[StackFrame]:
+    """
+    从崩溃输出中提取第一个回溯
+
+    支持内核 oops（RIP 与 Call Trace）、ASan、gdb 以及裸机 PC/LR 寄存器转储。
+    内核中标记为 "?" 的不可靠栈帧被忽略。
+
+    Returns:
+        List[StackFrame]: 栈帧（栈顶在前）
+    """
+    frames: List[StackFrame] = []
+    for line in text.splitlines():
+        line = line.strip()
+        # 除 gdb 栈帧外，所有栈帧格式都含有十六进制地址或偏移
+        if not line.startswith('#') and '0x' not in line:
+            continue
+        frame = _parse_frame(line)
+        if frame is None:
+            continue
+        if frame.index == 0 and frames and _EXPLICIT_INDEX_RE.match(line):
+            # 新的回溯开始（如 ASan 的 "freed by thread" 段）
+            break
+        if frame.index < 0:
+            frame.index = len(frames)
+        frames.append(frame)
+        if len(frames) >= MAX_FRAMES:
+            break
+    return frames
+
+
+_EXPLICIT_INDEX_RE = re.compile(r'#\d+\s')
+
+
+def _parse_frame(line: str) -> Optional[StackFrame]:
+    """解析单行栈帧；没有显式序号时 index 为 -1"""
+    if line.startswith('#'):
+        match = _ASAN_FRAME_RE.match(line)
+        if match:
+            module = match.group('module')
+            return StackFrame(
+                index=int(match.group('idx')),
+                # 模块内偏移可直接在该模块的符号表中查询
+                address=int(match.group('modoff') or match.group('addr'), 16),
+                function=_known(match.group('func')),
+                module=module,
+                file_path=match.group('file'),
+                line=int(match.group('line')) if match.group('line') else None,
+                raw=line
+            )
+        match = _GDB_FRAME_RE.match(line)
+        if match:
+            return StackFrame(
+                index=int(match.group('idx')),
+                address=int(match.group('addr'), 16) if match.group('addr') else None,
+                function=_known(match.group('func')),
+                module=match.group('module'),
+                file_path=match.group('file'),
+                line=int(match.group('line')) if match.group('line') else None,
+                raw=line
+            )
+        return None
+
+    match = _KERNEL_FRAME_RE.search(line)
+    if match:
+        if match.group('unreliable'):
+            return None
+        return StackFrame(
+            index=-1,
+            address=int(match.group('addr'), 16) if match.group('addr') else None,
+            function=match.group('func'),
+            offset=int(match.group('off'), 16),
+            module=match.group('module'),
+            raw=line
+        )
+
+    match = _REGISTER_FRAME_RE.search(line)
+    if match:
+        return StackFrame(index=-1, address=int(match.group('addr'), 16), raw=line)
+    return None
+
+
+def _known(function: Optional[str]) -> Optional[str]:
+    return None if function in (None, '??') else function
+
+
+class Symbolizer:
+    """
+    回溯符号化
+
+    对缺少函数名的栈帧用 ELF 符号表解析地址，再通过代码索引
+    （FunctionNode）补全源文件位置。
+    """
+
+    def __init__(
+        self,
+        symbol_files: Optional[Iterable[str]] = None,
+        functions: Optional[Iterable[FunctionNode]] = None
+    ):
+        """
+        Args:
+            symbol_files: ELF 文件路径
+            functions: 代码索引中的函数节点
+        """
+        self.tables: List[ElfSymbolTable] = []
+        self._tables_by_module: Dict[str, ElfSymbolTable] = {}
+        self._functions: Dict[str, FunctionNode] = {}
+        for path in symbol_files or []:
+            self.add_symbol_file(path)
+        if functions:
+            self.add_functions(functions)
+
+    def add_symbol_file(self, path: str) -> None:
+        """加载 ELF 符号表；无法解析的文件记录警告后忽略"""
+        try:
+            table = load_symbol_table(path)
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"Cannot load symbols from {path}: {e}")
+            return
+        self.tables.append(table)
+        self._tables_by_module[_module_key(path)] = table
+
+    def add_functions(self, functions: Iterable[FunctionNode]) -> None:
+        """登记代码索引中的函数（同名函数保留先登记的）"""
+        for function in functions:
+            self._functions.setdefault(function.name, function)
+
+    def symbolize(self, frames: List[StackFrame]) -> List[StackFrame]:
+        """原地补全栈帧的函数名、偏移和源文件位置"""
+        for frame in frames:
+            if frame.function is None and frame.address is not None:
+                resolved = self._resolve(frame.address, frame.module)
+                if resolved is not None:
+                    frame.function, frame.offset = resolved
+            if frame.file_path is None and frame.function is not None:
+                node = self._functions.get(frame.function)
+                if node is not None:
+                    frame.file_path = node.location.file_path
+                    frame.line = node.location.line
+        return frames
+
+    def symbolize_text(self, text: str) -> List[StackFrame]:
+        """从文本提取并符号化回溯"""
+        return self.symbolize(extract_backtrace(text))
+
+    def _resolve(self, address: int, module: Optional[str]) -> Optional[Tuple[str, int]]:
+        if module is not None:
+            table = self._tables_by_module.get(_module_key(module))
+            return table.resolve(address) if table is not None else None
+        for table in self.tables:
+            resolved = table.resolve(address)
+            if resolved is not None:
+                return resolved
+        return None
+
+
+def _module_key(path: str) -> str:
+    """模块匹配键：去掉目录和 .ko/.so/.elf 等后缀"""
+    name = os.path.basename(path)
+    return re.sub(r'(\.(ko|so(\.\d+)*|elf|debug|axf))+$', '', name)
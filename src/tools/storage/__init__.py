@@ -0,0 +1,14 @@
+"""
+Storage Module
+
+Provides shared local storage for workflow artifacts:
+- Content-addressed blob store; workflow state holds small handles
+"""
+
+from .blob_store import BlobStore, LazyTextMapping, is_blob_ref
+
+__all__ = [
+    "BlobStore",
+    "LazyTextMapping",
+    "is_blob_ref",
+]
@@ -0,0 +1,231 @@
+"""
+Blob Store
+
+Content-addressed local storage for large workflow artifacts (test output,
+logs, call/dependency graphs, patches).
+
+A payload is written once under its SHA-256 digest and the workflow state
+carries only a small handle::
+
+    {"blob": "<sha256>", "size": 123456, "media_type": "text/plain",
+     "preview": "<first characters>"}
+
+Identical payloads produced by different iterations or agents share one file,
+and checkpointing the state costs the size of the handle rather than the size
+of the log. Readers resolve handles on demand, either fully (``read_text``),
+as a stream (``open``) or through a read-only memory map (``mmap``).
+"""
+
+import hashlib
+import json
+import logging
+import mmap as _mmap
+import os
+import tempfile
+from collections.abc import Mapping
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+BlobRef = Dict[str, Any]
+
+# Handle key holding the digest
+BLOB_KEY = "blob"
+
+
+def is_blob_ref(value: Any) -> bool:
+    """Whether value is a blob handle produced by BlobStore."""
+    return isinstance(value, dict) and isinstance(value.get(BLOB_KEY), str) and "size" in value
+
+
+class BlobStore:
+    """
+    Content-addressed blob store on local disk.
+
+    Blobs live at ``<root>/<digest[:2]>/<digest[2:]>`` and are written through
+    a temporary file plus ``os.replace``, so a reader never sees a partially
+    written blob and concurrent writers of the same content are harmless.
+    """
+
+    # Payloads up to this many bytes stay inline in the state
+    DEFAULT_INLINE_LIMIT = 4096
+    # Characters of text kept in the handle for summaries and logging
+    PREVIEW_CHARS = 512
+
+    def __init__(
+        self,
+        root_dir: str = "/tmp/blob_store",
+        inline_limit: int = DEFAULT_INLINE_LIMIT
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            root_dir: Directory holding the blobs.
+            inline_limit: Size in bytes above which ``offload`` writes a blob
+                instead of returning the value unchanged.
+        """
+        self.root_dir = Path(root_dir)
+        self.root_dir.mkdir(parents=True, exist_ok=True)
+        self.inline_limit = inline_limit
+
+    def path_for(self, digest: str) -> Path:
+        """Path of the blob with the given digest."""
+        return self.root_dir / digest[:2] / digest[2:]
+
+    def put(self, data: Union[str, bytes], media_type: Optional[str] = None) -> BlobRef:
+        """
+        Store a payload and return its handle.
+
+        Args:
+            data: Text (stored as UTF-8) or bytes.
+            media_type: Defaults to text/plain for str and
+                application/octet-stream for bytes.
+
+        Returns:
+            Blob handle
+        """
+        if isinstance(data, str):
+            payload = data.encode("utf-8")
+            media_type = media_type or "text/plain"
+            preview = data[:self.PREVIEW_CHARS]
+        else:
+            payload = bytes(data)
+            media_type = media_type or "application/octet-stream"
+            preview = ""
+
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self.path_for(digest)
+        if not path.exists():
+            self._write_atomic(path, payload)
+
+        return {
+            BLOB_KEY: digest,
+            "size": len(payload),
+            "media_type": media_type,
+            "preview": preview,
+        }
+
+    def put_json(self, obj: Any) -> BlobRef:
+        """Store a JSON-serializable object."""
+        text = json.dumps(obj, separators=(",", ":"), default=str)
+        return self.put(text, media_type="application/json")
+
+    def offload(self, value: Any) -> Any:
+        """
+        Replace a large text/bytes value with a handle.
+
+        Values within ``inline_limit``, non-string values and existing handles
+        are returned unchanged.
+        """
+        if isinstance(value, str):
+            # UTF-8 is at most 4 bytes per character; skip encoding short strings
+            if len(value) * 4 <= self.inline_limit or len(value.encode("utf-8")) <= self.inline_limit:
+                return value
+            return self.put(value)
+        if isinstance(value, (bytes, bytearray)):
+            return value if len(value) <= self.inline_limit else self.put(value)
+        return value
+
+    def offload_json(self, obj: Any) -> Any:
+        """Replace a large JSON-serializable object with a handle."""
+        if obj is None or is_blob_ref(obj):
+            return obj
+        text = json.dumps(obj, separators=(",", ":"), default=str)
+        if len(text.encode("utf-8")) <= self.inline_limit:
+            return obj
+        return self.put(text, media_type="application/json")
+
+    def exists(self, ref: BlobRef) -> bool:
+        return self.path_for(ref[BLOB_KEY]).exists()
+
+    def open(self, ref: BlobRef) -> BinaryIO:
+        """Open a blob for streaming reads."""
+        return open(self.path_for(ref[BLOB_KEY]), "rb")
+
+    @contextmanager
+    def mmap(self, ref: BlobRef) -> Iterator[Union[_mmap.mmap, bytes]]:
+        """
+        Map a blob read-only into memory.
+
+        Pages are loaded on access, so regex scans over large logs do not copy
+        the whole file onto the Python heap. Empty blobs yield ``b""`` (mmap
+        rejects zero-length files).
+        """
+        with self.open(ref) as f:
+            if ref.get("size", 0) == 0:
+                yield b""
+                return
+            mapped = _mmap.mmap(f.fileno(), 0, access=_mmap.ACCESS_READ)
+            try:
+                yield mapped
+            finally:
+                mapped.close()
+
+    def read_bytes(self, ref: BlobRef) -> bytes:
+        with self.open(ref) as f:
+            return f.read()
+
+    def read_text(self, ref: BlobRef) -> str:
+        return self.read_bytes(ref).decode("utf-8", errors="replace")
+
+    def resolve(self, value: Any) -> Any:
+        """Text of a handle; any other value is returned unchanged."""
+        if is_blob_ref(value):
+            return self.read_text(value)
+        return value
+
+    def resolve_json(self, value: Any) -> Any:
+        """Object stored by ``put_json``/``offload_json``; inline values pass through."""
+        if is_blob_ref(value):
+            return json.loads(self.read_bytes(value))
+        return value
+
+    def preview(self, value: Any, limit: int = PREVIEW_CHARS) -> str:
+        """Leading text of a value or handle without reading the blob."""
+        if is_blob_ref(value):
+            return value.get("preview", "")[:limit]
+        return value[:limit] if isinstance(value, str) else ""
+
+    def lazy_texts(self, values: Mapping) -> "LazyTextMapping":
+        """Read-only view resolving each handle only when its item is accessed."""
+        return LazyTextMapping(self, values)
+
+    def _write_atomic(self, path: Path, payload: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        logger.debug(f"Stored blob {path.parent.name}{path.name} ({len(payload)} bytes)")
+
+
+class LazyTextMapping(Mapping):
+    """
+    Mapping of key -> text whose values may be blob handles.
+
+    Each handle is read when its value is accessed and is not cached, so
+    iterating over the items holds at most one resolved output at a time.
+    """
+
+    def __init__(self, store: BlobStore, values: Mapping):
+        self._store = store
+        self._values = values
+
+    def __getitem__(self, key):
+        return self._store.resolve(self._values[key])
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
@@ -2,7 +2,7 @@
 Test Orchestration Module
 
 Provides test execution orchestration for firmware testing:
-- Environment management (QEMU, Board, BMC)
+- Environment management (QEMU, Board, BMC, local host)
 - Test execution and scheduling
 - Artifact collection
 - Resource pooling
@@ -24,6 +24,7 @@ from .models import (
     QEMUConfig,
     BoardConfig,
     BMCConfig,
+    LocalConfig,
 )
 
 __all__ = [
@@ -42,4 +43,5 @@ __all__ = [
     "QEMUConfig",
     "BoardConfig",
     "BMCConfig",
+    "LocalConfig",
 ]
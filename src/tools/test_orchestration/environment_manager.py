@@ -1,7 +1,7 @@
 """
 Environment Manager
 
-Manages test execution environments (QEMU, Board, BMC) with adapters.
+Manages test execution environments (QEMU, Board, BMC, local host) with adapters.
 """
 
 import asyncio
@@ -19,6 +19,7 @@ from .models import (
     QEMUConfig,
     BoardConfig,
     BMCConfig,
+    LocalConfig,
 )
 
 logger = logging.getLogger(__name__)
@@ -96,10 +97,12 @@ class QEMUAdapter(EnvironmentAdapter):
             # Start QEMU process with timeout guard
             start_time = asyncio.get_event_loop().time()
             
+            # Relative image paths resolve inside the source tree under test
             self._process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
+                cwd=self._env.work_dir,
             )
 
             # Wait for process to start with timeout
@@ -377,6 +380,65 @@ class BMCAdapter(EnvironmentAdapter):
         return {}
 
 
+class LocalAdapter(EnvironmentAdapter):
+    """本地主机环境适配器（命令在环境工作目录中执行）"""
+
+    def __init__(self, env: Environment, config: LocalConfig):
+        self._env = env
+        self._config = config
+        self._started = False
+
+    @property
+    def env_id(self) -> str:
+        return self._env.env_id
+
+    async def start(self) -> bool:
+        """检查工作目录"""
+        if self._env.work_dir and not Path(self._env.work_dir).is_dir():
+            logger.error(f"Work directory not found: {self._env.work_dir}")
+            self._env.status = EnvironmentStatus.ERROR
+            return False
+
+        self._started = True
+        self._env.status = EnvironmentStatus.RUNNING
+        logger.info(f"Local environment {self._env.name} ready in {self._env.work_dir or os.getcwd()}")
+        return True
+
+    async def stop(self) -> bool:
+        """停止环境"""
+        self._started = False
+        self._env.status = EnvironmentStatus.STOPPED
+        return True
+
+    async def execute(self, command: str, timeout: int = 60) -> tuple:
+        """在工作目录中执行shell命令"""
+        if not self._started:
+            return (-1, "", "Not started")
+
+        process = await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self._env.work_dir,
+            env={**os.environ, **self._config.env},
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise
+        return (
+            process.returncode,
+            stdout.decode("utf-8", errors="replace"),
+            stderr.decode("utf-8", errors="replace"),
+        )
+
+    async def get_status(self) -> EnvironmentStatus:
+        """获取状态"""
+        return EnvironmentStatus.RUNNING if self._started else EnvironmentStatus.STOPPED
+
+
 class EnvironmentManager:
     """环境管理器"""
 
@@ -389,15 +451,24 @@ class EnvironmentManager:
         self,
         name: str,
         env_type: EnvironmentType,
-        config: Dict[str, Any]
+        config: Dict[str, Any],
+        work_dir: Optional[str] = None
     ) -> Environment:
-        """创建测试环境"""
+        """创建测试环境
+
+        Args:
+            name: 环境名称
+            env_type: 环境类型
+            config: 环境配置
+            work_dir: 被测源码目录（本地命令与QEMU进程的工作目录）
+        """
         env = Environment(
             env_id="",
             env_type=env_type,
             status=EnvironmentStatus.IDLE,
             name=name,
-            config=config
+            config=config,
+            work_dir=work_dir
         )
 
         # Create appropriate adapter
@@ -410,6 +481,9 @@ class EnvironmentManager:
         elif env_type == EnvironmentType.BMC:
             bmc_config = BMCConfig(**config)
             adapter = BMCAdapter(env, bmc_config)
+        elif env_type == EnvironmentType.LINUX:
+            local_config = LocalConfig(**config)
+            adapter = LocalAdapter(env, local_config)
         else:
             raise ValueError(f"Unsupported environment type: {env_type}")
 
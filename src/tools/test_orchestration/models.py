@@ -99,6 +99,12 @@ class BMCConfig:
     interface: str = "lanplus"
 
 
+@dataclass
+class LocalConfig:
+    """本地主机环境配置"""
+    env: Dict[str, str] = field(default_factory=dict)  # 附加的环境变量
+
+
 @dataclass
 class TestCase:
     """测试用例"""
@@ -130,6 +136,7 @@ class TestPlan:
     parallel: bool = False
     stop_on_failure: bool = False
     description: str = ""
+    source_dir: Optional[str] = None  # 被测源码目录（环境的工作目录）
 
     def __post_init__(self):
         if not self.plan_id:
@@ -212,6 +219,7 @@ class Environment:
     status: EnvironmentStatus = EnvironmentStatus.IDLE
     name: str = ""
     config: Dict[str, Any] = field(default_factory=dict)
+    work_dir: Optional[str] = None
     created_at: str = ""
     last_used: str = ""
     resource_usage: Dict[str, Any] = field(default_factory=dict)
@@ -212,10 +212,11 @@ class TestOrchestrator:
         self,
         name: str,
         env_type: EnvironmentType,
-        config: Dict[str, Any]
+        config: Dict[str, Any],
+        work_dir: Optional[str] = None
     ) -> Environment:
         """设置测试环境"""
-        return await self._env_manager.create_environment(name, env_type, config)
+        return await self._env_manager.create_environment(name, env_type, config, work_dir)
 
     async def run_test_plan(self, plan: TestPlan) -> TestResults:
         """
@@ -234,7 +235,8 @@ class TestOrchestrator:
         env = await self.setup_environment(
             plan.name,
             plan.environment_type,
-            plan.environment_config
+            plan.environment_config,
+            plan.source_dir
         )
 
         try:
@@ -0,0 +1,26 @@
+import pytest
+
+from src import agents
+
+
+@pytest.fixture
+def agent_config(tmp_path):
+    """Agent config keeping every on-disk store under the test's tmp_path."""
+    return {
+        "blob_dir": str(tmp_path / "blobs"),
+        "llm_cache_dir": str(tmp_path / "llm_cache"),
+        "workspace_dir": str(tmp_path / "workspace"),
+        "artifact_dir": str(tmp_path / "artifacts"),
+        "local_index_dir": str(tmp_path / "kb_index"),
+        "keyword_index_dir": str(tmp_path / "kb_keywords"),
+        "capture_spool_path": str(tmp_path / "kb_spool.jsonl"),
+    }
+
+
+@pytest.fixture
+def workflow_agents(agent_config):
+    """Code, test, analysis and KB agents isolated from shared /tmp state."""
+    return (
+        agents.CodeAgent(agent_config), agents.TestAgent(agent_config),
+        agents.AnalysisAgent(agent_config), agents.KBAgent(agent_config),
+    )
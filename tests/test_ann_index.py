@@ -0,0 +1,139 @@
+import numpy as np
+import pytest
+
+from src.knowledge.ann_index import ANNIndexConfig, IVFIndex, benchmark_recall, create_ann_index
+from src.knowledge.vector_index import LocalIndexConfig, LocalVectorIndex
+
+
+def _clustered(n, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(32, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, 32, n)] + 0.3 * rng.normal(size=(n, dim)).astype(np.float32)
+    queries = vectors[rng.integers(0, n, 20)] + 0.1 * rng.normal(size=(20, dim)).astype(np.float32)
+    return vectors, queries
+
+
+@pytest.fixture
+def data():
+    return _clustered(3000, 32)
+
+
+def _build(tmp_path, vectors, **kwargs):
+    config = ANNIndexConfig(index_dir=str(tmp_path / "ann"), nlist=32, train_size=1000, **kwargs)
+    index = IVFIndex(config)
+    index.add(list(range(len(vectors))), vectors)
+    return index, config
+
+
+def _exact(tmp_path, vectors):
+    exact = LocalVectorIndex(LocalIndexConfig(index_dir=str(tmp_path / "exact")))
+    exact.add(list(range(len(vectors))), vectors)
+    return exact
+
+
+class TestIVFIndex:
+    def test_exact_before_training(self, tmp_path):
+        index = IVFIndex(ANNIndexConfig(index_dir=str(tmp_path), train_size=100))
+        index.add(["a", "b"], [[1, 0], [0, 1]])
+
+        assert not index.is_trained
+        assert index.search([1, 0.1], limit=1)[0][0] == "a"
+
+    def test_trains_incrementally_and_keeps_recall(self, tmp_path, data):
+        vectors, queries = data
+        index, _ = _build(tmp_path, vectors, nprobe=8)
+
+        assert index.is_trained
+        result = benchmark_recall(index, _exact(tmp_path, vectors), queries, k=10)
+        assert result["recall_at_k"] >= 0.9
+
+    def test_nprobe_trades_recall(self, tmp_path, data):
+        vectors, queries = data
+        index, _ = _build(tmp_path, vectors, nprobe=1)
+        exact = _exact(tmp_path, vectors)
+        low = benchmark_recall(index, exact, queries)["recall_at_k"]
+
+        index.nprobe = 32
+        assert benchmark_recall(index, exact, queries)["recall_at_k"] == pytest.approx(1.0)
+        assert low <= 1.0
+
+    def test_pq_with_rerank(self, tmp_path, data):
+        vectors, queries = data
+        index, _ = _build(tmp_path, vectors, nprobe=8, pq_m=8, rerank_factor=8)
+
+        result = benchmark_recall(index, _exact(tmp_path, vectors), queries, k=10)
+        assert result["recall_at_k"] >= 0.85
+
+    def test_filters_delete_and_upsert(self, tmp_path, data):
+        vectors, _ = data
+        config = ANNIndexConfig(index_dir=str(tmp_path), nlist=8, nprobe=8, train_size=100)
+        index = IVFIndex(config)
+        payloads = [{"metadata": {"product_line": "a" if i % 2 else "b"}} for i in range(200)]
+        index.add(list(range(200)), vectors[:200], payloads)
+
+        hits = index.search(vectors[1], limit=5, filters={"metadata.product_line": "a"})
+        assert hits and all(h[0] % 2 for h in hits)
+
+        index.delete([1])
+        assert 1 not in [h[0] for h in index.search(vectors[1], limit=5)]
+
+        index.add([2], [vectors[1]], [{"metadata": {"product_line": "a"}}])
+        assert len(index) == 199
+        assert index.search(vectors[1], limit=1)[0][0] == 2
+
+    def test_persistence(self, tmp_path, data):
+        vectors, queries = data
+        index, config = _build(tmp_path, vectors, nprobe=8, pq_m=8, rerank_factor=4)
+        index.delete([0])
+        expected = [h[0] for h in index.search(queries[0], limit=5)]
+        index.save()
+
+        reopened = IVFIndex(config)
+
+        assert reopened.is_trained
+        assert len(reopened) == len(vectors) - 1
+        assert [h[0] for h in reopened.search(queries[0], limit=5)] == expected
+        reopened.add(["new"], [queries[0]])
+        assert reopened.search(queries[0], limit=1)[0][0] == "new"
+
+    def test_compaction_drops_tombstones(self, tmp_path, data):
+        vectors, queries = data
+        index, config = _build(tmp_path, vectors, nprobe=32, pq_m=8, rerank_factor=4)
+        index.delete(range(0, len(vectors), 2))
+        expected = [h[0] for h in index.search(queries[0], limit=5)]
+
+        assert index.compact() == len(vectors) // 2
+        assert len(index._store.ids) == len(index) == len(vectors) // 2
+        assert sum(l.size for l in index._lists) == len(index)
+        assert [h[0] for h in index.search(queries[0], limit=5)] == expected
+        assert index.compact() == 0
+
+        index.save()
+        assert [h[0] for h in IVFIndex(config).search(queries[0], limit=5)] == expected
+
+    def test_staged_vectors_compacted_before_training(self, tmp_path, data):
+        vectors, _ = data
+        index = IVFIndex(ANNIndexConfig(index_dir=str(tmp_path), nlist=8, nprobe=8, train_size=100))
+        for i in range(60):
+            index.add([i], vectors[i:i + 1])
+        index.delete(range(30))
+        assert index._staged.size == 60
+        index.save()
+        assert index._staged.size == 30
+        index.add(list(range(60, 130)), vectors[60:130])
+        assert index.is_trained and len(index) == 100
+        assert sum(l.size for l in index._lists) == 100
+
+
+def test_unknown_backend(tmp_path):
+    with pytest.raises(ValueError):
+        create_ann_index("faiss", ANNIndexConfig(index_dir=str(tmp_path)))
+
+
+def test_hnswlib_backend(tmp_path, data):
+    pytest.importorskip("hnswlib")
+    vectors, queries = data
+    index = create_ann_index("hnswlib", ANNIndexConfig(index_dir=str(tmp_path / "hnsw"), initial_capacity=100))
+    index.add(list(range(len(vectors))), vectors)
+
+    assert benchmark_recall(index, _exact(tmp_path, vectors), queries)["recall_at_k"] >= 0.9
@@ -0,0 +1,101 @@
+import asyncio
+from types import SimpleNamespace
+
+from src.agents.analysis_agent import AnalysisAgent
+from src.agents.code_agent import CodeAgent
+from src.agents.test_agent import TestAgent as _TestAgent
+from src.tools.storage import BlobStore, is_blob_ref
+from src.models.code import AnalysisReport, DependencyGraph
+from src.tools.test_orchestration import models as orchestration_models
+
+
+BIG_LOG = "".join(f"[{i:6d}] spi0: transfer ok\n" for i in range(5000)) + "Kernel panic - not syncing: Fatal exception\n"
+
+
+class TestBlobStore:
+    def test_put_is_content_addressed(self, tmp_path):
+        store = BlobStore(str(tmp_path))
+        ref = store.put(BIG_LOG)
+        assert is_blob_ref(ref)
+        assert ref["size"] == len(BIG_LOG.encode())
+        assert ref["preview"] == BIG_LOG[:BlobStore.PREVIEW_CHARS]
+        assert store.put(BIG_LOG) == ref
+        assert sum(1 for p in tmp_path.rglob("*") if p.is_file()) == 1
+        assert store.read_text(ref) == BIG_LOG
+
+    def test_offload_keeps_small_values_inline(self, tmp_path):
+        store = BlobStore(str(tmp_path), inline_limit=64)
+        assert store.offload("short") == "short"
+        assert store.offload(None) is None
+        ref = store.offload("x" * 65)
+        assert is_blob_ref(ref) and store.offload(ref) is ref
+        assert store.resolve(ref) == "x" * 65 and store.resolve("short") == "short"
+
+        graph = {f"f{i}": [f"g{i}"] for i in range(20)}
+        graph_ref = store.offload_json(graph)
+        assert graph_ref["media_type"] == "application/json"
+        assert store.resolve_json(graph_ref) == graph
+        assert store.offload_json({"a": 1}) == {"a": 1}
+
+    def test_mmap_and_lazy_mapping(self, tmp_path):
+        store = BlobStore(str(tmp_path))
+        ref = store.put(BIG_LOG)
+        with store.mmap(ref) as view:
+            assert view.find(b"Kernel panic") > 0
+        with store.mmap(store.put("")) as view:
+            assert view == b""
+
+        outputs = store.lazy_texts({"t1": ref, "t2": "inline"})
+        assert dict(outputs.items()) == {"t1": BIG_LOG, "t2": "inline"}
+        assert len(outputs) == 2
+
+
+class TestAgentHandles:
+    def test_outputs_flow_through_state_as_handles(self, tmp_path):
+        config = {"blob_dir": str(tmp_path / "blobs"), "history_dir": str(tmp_path / "history"), "enable_ai": False}
+        test_agent = _TestAgent(config)
+        results = SimpleNamespace(results=[
+            SimpleNamespace(test_id="t_spi", test_name="spi", status=orchestration_models.TestStatus.FAILED, start_time=0.0,
+                            end_time=1.0, duration=1.0, output=BIG_LOG, error_message="", artifacts=[]),
+            SimpleNamespace(test_id="t_i2c", test_name="i2c", status=orchestration_models.TestStatus.PASSED, start_time=0.0,
+                            end_time=1.0, duration=1.0, output="ok", error_message="", artifacts=[]),
+        ])
+        test_results = test_agent._test_results_to_dict(results)
+        assert is_blob_ref(test_results[0]["output"])
+        assert test_results[1]["output"] == "ok"
+
+        update = asyncio.run(AnalysisAgent(config).execute({
+            "task_id": "blob-task", "iteration": 0, "test_results": test_results, "next_action": "analyze"
+        }))
+        report = update["analysis_report"]
+        assert report["failed"] == 1
+        assert report["failures"][0]["category"] == "crash"
+
+    def test_graphs_resolve_to_dicts(self, tmp_path):
+        config = {"blob_dir": str(tmp_path / "blobs"), "llm_cache_dir": str(tmp_path / "llm"), "blob_inline_limit": 256}
+        code_agent = CodeAgent(config)
+        nodes = [f"drivers/spi{i}.c" for i in range(50)]
+        graph = DependencyGraph(
+            nodes=nodes, edges=[{"from": n, "to": "spi.h", "type": "include"} for n in nodes], include_map={}
+        )
+        call_graph = {f"spi{i}_probe": ["spi_register"] for i in range(50)}
+
+        async def analyze_files(files, analysis_type):
+            return AnalysisReport(task_id="t", timestamp="now", files_analyzed=files,
+                                  dependency_graph=graph, call_graph=call_graph)
+
+        code_agent.analyzer.analyze_files = analyze_files
+        state = {"repo_path": str(tmp_path), "target_files": ["spi0.c"]}
+        report = asyncio.run(code_agent._analyze_code(state))["analysis_report"]
+        assert is_blob_ref(report["dependency_graph"]) and is_blob_ref(report["call_graph"])
+        assert code_agent.blob_store.resolve_json(report["dependency_graph"]) == {
+            "nodes": nodes, "edges": graph.edges, "include_map": {}
+        }
+        assert code_agent.blob_store.resolve_json(report["call_graph"]) == call_graph
+
+        # Small graphs stay inline but are plain dicts as well
+        graph.nodes, graph.edges = nodes[:1], graph.edges[:1]
+        report = asyncio.run(code_agent._analyze_code(state))["analysis_report"]
+        assert code_agent.blob_store.resolve_json(report["dependency_graph"]) == {
+            "nodes": nodes[:1], "edges": graph.edges, "include_map": {}
+        }
@@ -0,0 +1,147 @@
+import asyncio
+
+import pytest
+
+from src.agents.kb_agent import KBAgent
+from src.knowledge.capture_queue import CaptureQueueConfig, KnowledgeCaptureQueue, content_hash
+
+
+def make_unit(n, content="fixed i2c timeout"):
+    return {"id": f"ku_{n}", "title": "Fix iteration - task_1", "content": {"patch_summary": content},
+            "metadata": {"iteration": n}}
+
+
+class RecordingWriter:
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+
+    async def __call__(self, units):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("vector store unavailable")
+        self.batches.append([u["id"] for u in units])
+
+
+@pytest.fixture
+def config(tmp_path):
+    return CaptureQueueConfig(
+        spool_path=str(tmp_path / "spool.jsonl"), batch_size=4, flush_interval_ms=1, retry_backoff_s=0
+    )
+
+
+class TestKnowledgeCaptureQueue:
+    def test_content_hash_ignores_id_and_metadata(self):
+        assert content_hash(make_unit(1)) == content_hash(make_unit(2))
+        assert content_hash(make_unit(1)) != content_hash(make_unit(1, "fixed uart overrun"))
+
+    @pytest.mark.asyncio
+    async def test_batches_in_background(self, config):
+        writer = RecordingWriter()
+        queue = KnowledgeCaptureQueue(writer, config)
+        for n in range(6):
+            assert queue.submit(make_unit(n, f"fix {n}"))
+        assert writer.batches == []  # submit never waits on the writer
+
+        await queue.close()
+        assert writer.batches == [["ku_0", "ku_1", "ku_2", "ku_3"], ["ku_4", "ku_5"]]
+        assert len(queue) == 0
+
+    @pytest.mark.asyncio
+    async def test_dedup_by_content(self, config):
+        writer = RecordingWriter()
+        queue = KnowledgeCaptureQueue(writer, config)
+        assert queue.submit(make_unit(1))
+        assert not queue.submit(make_unit(2))  # pending duplicate
+        await queue.flush()
+        assert not queue.submit(make_unit(3))  # already written
+        assert not KnowledgeCaptureQueue(writer, config).submit(make_unit(4))  # across restarts
+        await queue.close()
+        assert writer.batches == [["ku_1"]]
+
+    @pytest.mark.asyncio
+    async def test_retries_failed_batch(self, config):
+        writer = RecordingWriter(failures=2)
+        queue = KnowledgeCaptureQueue(writer, config)
+        queue.submit(make_unit(1))
+        await queue.close()
+        assert writer.batches == [["ku_1"]]
+
+    @pytest.mark.asyncio
+    async def test_spool_recovered_after_failure(self, config):
+        config.max_retries = 0
+        queue = KnowledgeCaptureQueue(RecordingWriter(failures=1), config)
+        queue.submit(make_unit(1))
+        with pytest.raises(ConnectionError):
+            await queue.flush()
+
+        writer = RecordingWriter()
+        recovered = KnowledgeCaptureQueue(writer, config)
+        assert len(recovered) == 1
+        await recovered.flush()
+        assert writer.batches == [["ku_1"]]
+        assert len(KnowledgeCaptureQueue(writer, config)) == 0
+
+    @pytest.mark.asyncio
+    async def test_recovered_units_drain_without_submit(self, config):
+        config.max_retries = 0
+        queue = KnowledgeCaptureQueue(RecordingWriter(failures=1), config)
+        queue.submit(make_unit(1))
+        with pytest.raises(ConnectionError):
+            await queue.flush()
+
+        writer = RecordingWriter()
+        recovered = KnowledgeCaptureQueue(writer, config)
+        for _ in range(100):
+            if writer.batches:
+                break
+            await asyncio.sleep(0.01)
+        assert writer.batches == [["ku_1"]] and len(recovered) == 0
+        await recovered.close()
+
+
+class TestKBAgentCapture:
+    @pytest.mark.asyncio
+    async def test_capture_is_queued_and_searchable_after_flush(self, tmp_path):
+        agent = KBAgent({
+            "enable_local_index": False,
+            "keyword_index_dir": str(tmp_path / "keywords"),
+            "capture_spool_path": str(tmp_path / "spool.jsonl"),
+            "capture_flush_interval_ms": 1,
+            "embedding_model": "missing-model",
+        })
+        state = {"task_id": "task_7", "next_action": "finish", "patch_content": "fix spi_flash_erase timeout"}
+
+        result = await agent._capture_knowledge(state)
+        assert result["analysis_report"]["knowledge_captured"]
+        duplicate = await agent._capture_knowledge(state)
+        assert duplicate["analysis_report"]["duplicate"]
+
+        await agent.flush_knowledge()
+        hits = await agent._placeholder_search("spi_flash_erase", {})
+        assert hits[0]["id"] == result["analysis_report"]["unit_id"]
+
+    @pytest.mark.asyncio
+    async def test_run_workflow_flushes_queue(self, tmp_path):
+        from src.agents import AnalysisAgent, CodeAgent, TestAgent
+        from src.orchestrator.graph import run_workflow
+
+        kb_agent = KBAgent({
+            "enable_local_index": False,
+            "keyword_index_dir": str(tmp_path / "keywords"),
+            "capture_spool_path": str(tmp_path / "spool.jsonl"),
+            # Longer than the workflow: only the final flush can write the unit
+            "capture_flush_interval_ms": 60000,
+            "embedding_model": "missing-model",
+        })
+        kb_agent._capture_queue.submit(make_unit(1))
+
+        await run_workflow(
+            {"task_id": "flush", "test_plan": {"name": "t", "test_cases": []}},
+            CodeAgent({"llm_cache_dir": str(tmp_path / "llm"), "blob_dir": str(tmp_path / "blobs")}),
+            TestAgent({"blob_dir": str(tmp_path / "blobs")}),
+            AnalysisAgent({"blob_dir": str(tmp_path / "blobs")}),
+            kb_agent, max_iterations=1, checkpoint_path=str(tmp_path / "cp.db")
+        )
+        assert len(kb_agent._capture_queue) == 0
+        assert "ku_1" in kb_agent._keyword_index
@@ -0,0 +1,104 @@
+import operator
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langgraph.graph import END, StateGraph
+
+from src.orchestrator.checkpoint import SQLiteCheckpointSaver
+
+
+class State(TypedDict):
+    output: str
+    messages: Annotated[List[str], operator.add]
+    step: int
+
+
+BIG_OUTPUT = "".join(f"[{i:05d}] spi_xfer ok len={i % 64}\n" for i in range(4000))
+
+
+def build_graph(fail_at=None, calls=None):
+    calls = calls if calls is not None else []
+
+    def make_node(i):
+        def node(state):
+            calls.append(i)
+            if i == fail_at:
+                raise RuntimeError("board lost power")
+            return {"messages": [f"step {i} " + "x" * 200], "step": i, "output": BIG_OUTPUT}
+        return node
+
+    graph = StateGraph(State)
+    for i in range(6):
+        graph.add_node(f"n{i}", make_node(i))
+        if i:
+            graph.add_edge(f"n{i - 1}", f"n{i}")
+    graph.set_entry_point("n0")
+    graph.add_edge("n5", END)
+    return graph
+
+
+CONFIG = {"configurable": {"thread_id": "task-1"}}
+
+
+class TestSQLiteCheckpointSaver:
+    def test_round_trip_and_history(self, tmp_path):
+        with SQLiteCheckpointSaver(str(tmp_path / "cp.db")) as saver:
+            app = build_graph().compile(checkpointer=saver)
+            result = app.invoke({"output": "", "messages": [], "step": 0}, CONFIG)
+
+            assert result["step"] == 5 and len(result["messages"]) == 6
+            snapshot = app.get_state(CONFIG)
+            assert snapshot.values == result
+            history = list(app.get_state_history(CONFIG))
+            assert len(history) == 8
+            assert history[-2].values["messages"] == []
+            assert len(list(saver.list(CONFIG, limit=3))) == 3
+
+    def test_blobs_deduplicated_and_delta_compressed(self, tmp_path):
+        with SQLiteCheckpointSaver(str(tmp_path / "cp.db")) as saver:
+            app = build_graph().compile(checkpointer=saver)
+            app.invoke({"output": "", "messages": [], "step": 0}, CONFIG)
+            stats = saver.stats()
+
+        # the identical test output written by six nodes is stored once, and the
+        # growing message list is stored as deltas
+        assert stats["blob_bytes"] < len(BIG_OUTPUT) / 4
+        assert stats["blobs"] < stats["channels"] + stats["writes"]
+
+    def test_resume_after_crash(self, tmp_path):
+        path = str(tmp_path / "cp.db")
+        calls = []
+        with SQLiteCheckpointSaver(path) as saver:
+            app = build_graph(fail_at=3, calls=calls).compile(checkpointer=saver)
+            with pytest.raises(RuntimeError):
+                app.invoke({"output": "", "messages": [], "step": 0}, CONFIG)
+
+        with SQLiteCheckpointSaver(path) as saver:
+            app = build_graph(calls=calls).compile(checkpointer=saver)
+            result = app.invoke(None, CONFIG)
+
+        assert calls == [0, 1, 2, 3, 3, 4, 5]
+        assert result["step"] == 5 and len(result["messages"]) == 6
+
+    def test_delete_thread_collects_blobs(self, tmp_path):
+        with SQLiteCheckpointSaver(str(tmp_path / "cp.db")) as saver:
+            app = build_graph().compile(checkpointer=saver)
+            app.invoke({"output": "", "messages": [], "step": 0}, CONFIG)
+            app.invoke({"output": "", "messages": [], "step": 0}, {"configurable": {"thread_id": "task-2"}})
+            shared = saver.stats()["blobs"]
+
+            saver.delete_thread("task-1")
+            assert saver.get_tuple(CONFIG) is None
+            assert 0 < saver.stats()["blobs"] <= shared
+            assert app.get_state({"configurable": {"thread_id": "task-2"}}).values["step"] == 5
+
+            saver.delete_thread("task-2")
+            assert saver.stats()["blobs"] == 0
+
+    @pytest.mark.asyncio
+    async def test_async_api(self, tmp_path):
+        with SQLiteCheckpointSaver(str(tmp_path / "cp.db")) as saver:
+            app = build_graph().compile(checkpointer=saver)
+            result = await app.ainvoke({"output": "", "messages": [], "step": 0}, CONFIG)
+            assert (await app.aget_state(CONFIG)).values == result
+            assert len([c async for c in saver.alist(CONFIG)]) == 8
@@ -0,0 +1,76 @@
+from unittest.mock import patch
+
+from src.tools.result_analysis import FailureClusterer, ResultAnalyzer
+from src.tools.result_analysis.clustering import failure_signature, normalize_message
+from src.tools.result_analysis.models import AnalysisReport, Failure, FailureCategory
+
+
+def segfault(test_id, pid, address):
+    return (
+        f"[ {pid}.123456] {test_id}[{pid}]: segfault at {address:#x} ip 00007f3a9c2b4e10 "
+        f"sp 00007ffd5e8c1a40 error 4 in libspi.so\n"
+        f"Segmentation fault (core dumped) pid {pid}"
+    )
+
+
+class TestNormalization:
+    def test_strips_volatile_tokens(self):
+        a = normalize_message("2024-01-01 10:00:00,123 pid=4242 fault at 0xdeadbeef in /tmp/run_8f3a/fw.bin")
+        b = normalize_message("2024-03-09 23:59:59,999 pid=17 fault at 0x10 in /tmp/run_0000/fw.bin")
+        assert a == b == "<ts> pid=<pid> fault at <addr> in <tmp>"
+
+    def test_signature_distinguishes_category_and_frames(self):
+        base = Failure(test_id="t", category=FailureCategory.CRASH, message="Segmentation fault")
+        assert failure_signature(base) == failure_signature(Failure(
+            test_id="u", category=FailureCategory.CRASH, message="Segmentation  fault"
+        ))
+        assert failure_signature(base) != failure_signature(Failure(
+            test_id="t", category=FailureCategory.TIMEOUT, message="Segmentation fault"
+        ))
+        assert failure_signature(base) != failure_signature(Failure(
+            test_id="t", category=FailureCategory.CRASH, message="Segmentation fault",
+            stack_trace="#0 spi_xfer+0x10\n#1 main"
+        ))
+
+
+class TestFailureClusterer:
+    def test_tracks_clusters_across_history(self):
+        clusterer = FailureClusterer()
+        crash = Failure(test_id="a", category=FailureCategory.CRASH, message="Segfault at 0x1")
+        timeout = Failure(test_id="b", category=FailureCategory.TIMEOUT, message="watchdog 3 expired")
+        history = [
+            AnalysisReport(failures=[crash, timeout]),
+            AnalysisReport(failures=[Failure(test_id="a", category=FailureCategory.CRASH, message="Segfault at 0x2")]),
+        ]
+
+        clusters = clusterer.cluster([Failure(test_id="c", category=FailureCategory.CRASH, message="Segfault at 0x3")])
+        resolved = clusterer.track(clusters, history)
+
+        assert clusters[0].history_occurrences == 2 and clusters[0].streak == 3
+        assert not clusters[0].is_new
+        assert resolved == []
+
+        fresh = clusterer.cluster([timeout])
+        assert clusterer.track(fresh, history) == [clusters[0].signature]
+        assert fresh[0].history_occurrences == 1 and fresh[0].streak == 1
+
+
+class TestResultAnalyzerClustering:
+    def test_root_cause_runs_once_per_cluster(self):
+        analyzer = ResultAnalyzer()
+        outputs = {f"test_spi_{i}": segfault(f"test_spi_{i}", 1000 + i, 0x1000 * i) for i in range(300)}
+        outputs["test_i2c"] = "watchdog 0 expired, system hung"
+
+        with patch.object(analyzer.root_cause_analyzer, "analyze", wraps=analyzer.root_cause_analyzer.analyze) as spy:
+            report = analyzer.analyze_results("run", 301, 0, 301, 0, outputs)
+
+        assert spy.call_count == 2
+        assert len(report.failures) == 301
+        assert [len(c.failures) for c in report.clusters] == [300, 1]
+        assert len(report.root_cause_reports) == 2
+        assert "300 failures" in report.root_cause_reports[0].evidence[-1]
+        assert "(2 distinct)" in report.summary
+
+        next_report = analyzer.analyze_results("run", 301, 300, 1, 0, {"test_spi_0": outputs["test_spi_0"]}, 1, [report])
+        assert next_report.clusters[0].streak == 2
+        assert next_report.resolved_signatures == [report.clusters[1].signature]
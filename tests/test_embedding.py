@@ -0,0 +1,86 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.knowledge.embedding import EmbeddingService, EmbeddingServiceConfig
+
+
+class CountingEncoder:
+    """Deterministic fake encoder that records each batch it receives."""
+
+    def __init__(self, dim: int = 4):
+        self.dim = dim
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t)), float(i), 1.0, 0.5][:self.dim] for i, t in enumerate(texts)]
+
+
+class TestEmbeddingService:
+    def test_embed_returns_float32_matrix(self):
+        service = EmbeddingService(CountingEncoder())
+        result = service.embed(["a", "bb", "ccc"])
+
+        assert isinstance(result, np.ndarray)
+        assert result.dtype == np.float32
+        assert result.shape == (3, 4)
+        assert result[2, 0] == 3.0
+
+    def test_memoizes_by_text(self):
+        encoder = CountingEncoder()
+        service = EmbeddingService(encoder)
+        first = service.embed(["alpha", "beta"])
+        second = service.embed(["beta", "alpha", "gamma", "gamma"])
+
+        assert encoder.batches == [["alpha", "beta"], ["gamma"]]
+        np.testing.assert_array_equal(second[0], first[1])
+        np.testing.assert_array_equal(second[2], second[3])
+
+    def test_lru_bound(self):
+        encoder = CountingEncoder()
+        service = EmbeddingService(encoder, EmbeddingServiceConfig(cache_size=1))
+        service.embed(["a"])
+        service.embed(["b"])
+        service.embed(["a"])
+
+        assert encoder.batches == [["a"], ["b"], ["a"]]
+
+    def test_batch_size_chunks_encode_calls(self):
+        encoder = CountingEncoder()
+        service = EmbeddingService(encoder, EmbeddingServiceConfig(batch_size=2))
+        result = service.embed(["a", "b", "c", "d", "e"])
+
+        assert [len(b) for b in encoder.batches] == [2, 2, 1]
+        assert result.shape == (5, 4)
+
+    def test_embed_one(self):
+        service = EmbeddingService(CountingEncoder())
+        assert service.embed_one("abc").shape == (4,)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_micro_batched(self):
+        encoder = CountingEncoder()
+        service = EmbeddingService(encoder, EmbeddingServiceConfig(batch_window_ms=20))
+
+        results = await asyncio.gather(
+            service.aembed(["one"]),
+            service.aembed(["two", "three"]),
+            service.aembed(["four"]),
+        )
+
+        assert encoder.batches == [["one", "two", "three", "four"]]
+        assert [r.shape[0] for r in results] == [1, 2, 1]
+        assert results[1][1, 0] == 5.0
+        service.close()
+
+    @pytest.mark.asyncio
+    async def test_encoder_error_propagates(self):
+        def failing(texts):
+            raise RuntimeError("model unavailable")
+
+        service = EmbeddingService(failing, EmbeddingServiceConfig(batch_window_ms=1))
+        with pytest.raises(RuntimeError):
+            await service.aembed(["x"])
+        service.close()
@@ -0,0 +1,53 @@
+import pytest
+
+from src.agents.base_agent import BaseAgent
+from src.orchestrator.graph import run_workflow
+
+
+class EchoAgent(BaseAgent):
+    def _initialize_engine(self):
+        pass
+
+    async def execute(self, state):
+        if state.get("next_action") == "explode":
+            raise RuntimeError("board offline")
+        return {"next_action": "finish", "messages": ["echo"]}
+
+
+class TestBaseAgentUpdates:
+    @pytest.mark.asyncio
+    async def test_returns_only_delta(self):
+        messages = ["old"] * 1000
+        state = {"task_id": "t", "iteration": 2, "messages": messages, "test_results": [{"output": "x" * 10}]}
+
+        update = await EchoAgent()(state)
+
+        assert update == {
+            "next_action": "finish",
+            "messages": ["echo", "EchoAgent: 执行完成"],
+            "decision_trace": [{"agent": "EchoAgent", "iteration": 2, "next_action": "finish"}],
+        }
+        assert messages == ["old"] * 1000
+
+    @pytest.mark.asyncio
+    async def test_error_update(self):
+        update = await EchoAgent()({"task_id": "t", "next_action": "explode", "errors": ["earlier"]})
+        assert update == {"next_action": "escalate", "converged": False, "errors": ["EchoAgent错误: board offline"]}
+
+
+class TestWorkflowReducers:
+    @pytest.mark.asyncio
+    async def test_append_channels_accumulate_once(self, tmp_path, workflow_agents):
+        result = await run_workflow(
+            {"task_id": "reducers", "test_plan": {"name": "t", "test_cases": []}},
+            *workflow_agents,
+            max_iterations=2,
+            checkpoint_path=str(tmp_path / "cp.db")
+        )
+
+        messages = result["messages"]
+        assert messages[0] == "Workflow initialized"
+        assert messages[-1] in {"Workflow escalated for human review", "Workflow completed successfully"}
+        assert messages.count("Workflow initialized") == 1
+        assert len(result["decision_trace"]) >= 3
+        assert all(entry["agent"] for entry in result["decision_trace"])
@@ -0,0 +1,83 @@
+import tracemalloc
+
+from src.tools.result_analysis import IterationHistoryStore, ResultAnalyzer
+from src.tools.result_analysis.history_store import patch_hash
+from src.tools.result_analysis.models import IterationMetrics, ResultAnalyzerConfig
+
+
+def metrics(i):
+    return IterationMetrics(
+        iteration=i, pass_rate=i / 1000, failed=1000 - i, cluster_count=2,
+        signatures=frozenset({f"{i:016x}", "deadbeefdeadbeef"}), patch_hash=f"{i:016x}"
+    )
+
+
+class TestIterationHistoryStore:
+    def test_last_k_across_blocks(self, tmp_path):
+        store = IterationHistoryStore(str(tmp_path))
+        for i in range(500):
+            store.append("task-1", metrics(i))
+        store.append("task-2", metrics(7))
+
+        assert store.last("task-1", 3) == [metrics(497), metrics(498), metrics(499)]
+        assert [m.iteration for m in store.last("task-1", 200)] == list(range(300, 500))
+        assert store.last("task-2", 10) == [metrics(7)]
+        assert store.last("missing", 5) == []
+        assert sum(1 for _ in store.iter_history("task-1")) == 500
+
+    def test_skips_torn_write_and_sanitizes_ids(self, tmp_path):
+        store = IterationHistoryStore(str(tmp_path))
+        store.append("fw/spi fix", metrics(1))
+        with open(store.path_for("fw/spi fix"), "a") as f:
+            f.write('{"i":2,"p":0.5')
+        assert store.path_for("fw/spi fix").parent == tmp_path
+        assert store.path_for("fw/spi fix") != store.path_for("fw_spi_fix")
+        assert store.last("fw/spi fix", 5) == [metrics(1)]
+
+        store.clear("fw/spi fix")
+        assert store.last("fw/spi fix", 5) == []
+
+    def test_load_bounded_window(self, tmp_path):
+        store = IterationHistoryStore(str(tmp_path))
+        for i in range(50):
+            store.append("t", metrics(i))
+        history = store.load("t", max_depth=4)
+        assert len(history) == 4 and history.last == metrics(49)
+
+
+class TestResultAnalyzerTaskHistory:
+    def test_history_survives_restart(self, tmp_path):
+        config = ResultAnalyzerConfig(history_dir=str(tmp_path), max_history_depth=5)
+        outputs = {"test_spi": "Assertion failed: len == 4"}
+
+        analyzer = ResultAnalyzer(config)
+        for iteration in range(3):
+            analyzer.analyze_iteration("task", 10, 9, 1, 0, outputs, iteration, f"patch {iteration}")
+
+        restarted = ResultAnalyzer(config)
+        report = restarted.analyze_iteration("task", 10, 9, 1, 0, outputs, 3, "patch 3")
+
+        assert report.clusters[0].streak == 4
+        assert "No improvement" in report.convergence.summary
+        stored = restarted.history_store.last("task", 10)
+        assert [m.patch_hash for m in stored] == [patch_hash(f"patch {i}") for i in range(4)]
+
+    def test_long_campaign_memory_is_bounded(self, tmp_path):
+        analyzer = ResultAnalyzer(ResultAnalyzerConfig(history_dir=str(tmp_path), max_history_depth=5))
+        outputs = {f"test_{i}": f"Assertion failed: case {i}" for i in range(20)}
+
+        def run(iterations):
+            for iteration in iterations:
+                analyzer.analyze_iteration("soak", 40, 20, 20, 0, outputs, iteration, str(iteration))
+
+        run(range(50))
+        tracemalloc.start()
+        run(range(50, 100))
+        after_first, _ = tracemalloc.get_traced_memory()
+        run(range(100, 300))
+        after_second, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert after_second - after_first < 64 * 1024
+        assert len(analyzer.task_history("soak")) == 5
+        assert analyzer.history_store.last("soak", 1)[0].iteration == 299
@@ -0,0 +1,63 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Cold import budget for the orchestrator entry point, in microseconds.
+# Currently ~70 ms; langgraph alone costs close to a second.
+IMPORT_BUDGET_US = 500_000
+
+HEAVY_MODULES = [
+    "langgraph",
+    "tree_sitter",
+    "httpx",
+    "qdrant_client",
+    "sentence_transformers",
+    "torch",
+]
+
+
+def run_python(*args):
+    result = subprocess.run(
+        [sys.executable, *args], cwd=REPO_ROOT, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+    return result
+
+
+def cumulative_import_us(stderr, module):
+    """Cumulative time of ``module`` from ``python -X importtime`` output"""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() == module and cumulative.strip().isdigit():
+            return int(cumulative)
+    raise AssertionError(f"{module} not found in importtime output")
+
+
+class TestImportTime:
+    def test_orchestrator_import_within_budget(self):
+        # Best of three to absorb scheduler noise on shared CI hosts
+        timings = [
+            cumulative_import_us(
+                run_python("-X", "importtime", "-c", "import src.orchestrator.graph").stderr,
+                "src.orchestrator.graph",
+            )
+            for _ in range(3)
+        ]
+        assert min(timings) < IMPORT_BUDGET_US, f"cold import took {min(timings) / 1000:.0f} ms"
+
+    @pytest.mark.parametrize("statement", [
+        "import src.orchestrator.graph",
+        "from src.agents import CodeAgent, TestAgent, AnalysisAgent, KBAgent;"
+        "CodeAgent({}); TestAgent({}); AnalysisAgent({}); KBAgent({})",
+    ])
+    def test_heavy_dependencies_not_loaded(self, statement):
+        result = run_python("-c", f"import sys; {statement}; print(' '.join(sys.modules))")
+        loaded = set(result.stdout.split())
+        assert [m for m in HEAVY_MODULES if m in loaded] == []
@@ -0,0 +1,161 @@
+import json
+import threading
+
+import pytest
+
+from src.agents.kb_agent import KBAgent
+from src.knowledge.ingestion import IngestionConfig, IngestionPipeline, chunk_segment, split_text
+
+
+def write_manual(path, sections):
+    path.write_text("".join(f"## Register {i}\n{'CTRL bit field. ' * 20}\nreg_{i}_value\n" for i in range(sections)))
+    return path
+
+
+@pytest.fixture
+def config(tmp_path):
+    return IngestionConfig(
+        chunk_size=300, chunk_overlap=50, batch_size=4, segment_bytes=2048, workers=0,
+        checkpoint_path=str(tmp_path / "checkpoint.json"), checkpoint_every=1
+    )
+
+
+def collect(pipeline, paths):
+    return [chunk for batch in pipeline.iter_batches(paths) for chunk in batch]
+
+
+class TestSplitText:
+    def test_chunks_overlap_and_cover_text(self):
+        text = "".join(f"line {i}\n" for i in range(200))
+        chunks = list(split_text(text, 100, 20))
+        assert all(len(c) <= 100 for _, c in chunks)
+        assert chunks[-1][1].endswith("line 199")
+        for (offset, chunk), (next_offset, _) in zip(chunks, chunks[1:]):
+            assert next_offset < offset + len(chunk)  # consecutive chunks overlap
+
+    def test_prefers_newline_breaks(self):
+        chunks = [c for _, c in split_text("a" * 60 + "\n" + "b" * 60, 100, 10)]
+        assert chunks[0] == "a" * 60
+
+    def test_overlap_must_be_smaller_than_chunk(self):
+        with pytest.raises(ValueError):
+            list(split_text("text", 10, 10))
+
+    def test_segment_reads_overlap_before_start(self, tmp_path):
+        path = tmp_path / "log.txt"
+        path.write_text("x" * 100 + "y" * 100)
+        chunks = chunk_segment(str(path), 100, 200, 500, 20)
+        assert chunks == [(80, "x" * 20 + "y" * 100)]
+
+
+class TestIngestionPipeline:
+    def test_batches_and_dedup(self, tmp_path, config):
+        docs = tmp_path / "docs"
+        docs.mkdir()
+        write_manual(docs / "soc_a.md", 20)
+        write_manual(docs / "soc_a_copy.md", 20)
+        (docs / "image.bin").write_bytes(b"\x00" * 10)
+
+        pipeline = IngestionPipeline(config)
+        batches = list(pipeline.iter_batches([str(docs)]))
+        chunks = [c for b in batches for c in b]
+
+        assert all(len(b) <= 4 for b in batches)
+        assert len({c.chunk_id for c in chunks}) == len(chunks)
+        assert {c.source for c in chunks} == {str(docs / "soc_a.md")}
+        assert pipeline.stats.files == 2
+        assert pipeline.stats.duplicates == len(chunks)
+
+    def test_resume_skips_completed_segments(self, tmp_path, config):
+        path = write_manual(tmp_path / "manual.md", 40)
+
+        first = IngestionPipeline(config)
+        batches = first.iter_batches([str(path)])
+        seen = [next(batches) for _ in range(4)]  # interrupted mid-import
+        del batches
+
+        checkpoint = json.loads((tmp_path / "checkpoint.json").read_text())
+        assert checkpoint[str(path)]["segments"]
+
+        resumed = IngestionPipeline(config)
+        rest = collect(resumed, [str(path)])
+        assert resumed.stats.skipped_segments == len(checkpoint[str(path)]["segments"])
+        all_ids = {c.chunk_id for b in seen for c in b} | {c.chunk_id for c in rest}
+        assert all_ids == {c.chunk_id for c in collect(IngestionPipeline(IngestionConfig(
+            chunk_size=300, chunk_overlap=50, segment_bytes=2048, workers=0,
+            checkpoint_path=str(tmp_path / "fresh.json")
+        )), [str(path)])}
+
+        assert collect(IngestionPipeline(config), [str(path)]) == []
+
+    def test_modified_file_is_reimported(self, tmp_path, config):
+        path = write_manual(tmp_path / "manual.md", 5)
+        collect(IngestionPipeline(config), [str(path)])
+        write_manual(path, 6)
+        assert collect(IngestionPipeline(config), [str(path)])
+
+    def test_deferred_commit(self, tmp_path, config):
+        path = write_manual(tmp_path / "manual.md", 40)
+        pipeline = IngestionPipeline(config)
+        batches = pipeline.iter_batches([str(path)], defer_commit=True)
+        for _ in range(4):
+            next(batches)
+        assert pipeline.commit_ready and not (tmp_path / "checkpoint.json").exists()
+
+        pipeline.commit()
+        assert not pipeline.commit_ready
+        assert json.loads((tmp_path / "checkpoint.json").read_text())[str(path)]["segments"]
+
+    def test_process_pool_matches_inline(self, tmp_path, config):
+        path = write_manual(tmp_path / "manual.md", 30)
+        inline = collect(IngestionPipeline(config), [str(path)])
+
+        config.workers = 2
+        config.checkpoint_path = str(tmp_path / "pool.json")
+        pooled = collect(IngestionPipeline(config), [str(path)])
+        assert [c.chunk_id for c in pooled] == [c.chunk_id for c in inline]
+
+
+class TestKBAgentImport:
+    @pytest.mark.asyncio
+    async def test_import_documents_is_searchable(self, tmp_path):
+        agent = KBAgent({
+            "enable_local_index": False,
+            "keyword_index_dir": str(tmp_path / "keywords"),
+            "capture_spool_path": str(tmp_path / "spool.jsonl"),
+            "ingest_checkpoint_path": str(tmp_path / "ingest.json"),
+            "ingest_workers": 0,
+            "embedding_model": "missing-model",
+        })
+        (tmp_path / "errata.md").write_text("SPI_FLASH_WIP stuck after erase on rev B silicon")
+
+        stats = await agent.import_documents([str(tmp_path / "errata.md")], product_line="soc_b")
+        assert stats.chunks == 1
+
+        results = await agent._placeholder_search("SPI_FLASH_WIP", {"product_line": "soc_b"})
+        assert results[0]["title"] == "errata.md"
+        assert results[0]["metadata"]["type"] == "document"
+
+    @pytest.mark.asyncio
+    async def test_indexes_saved_on_loop_and_checkpoint_per_kb(self, tmp_path):
+        def make_agent(name):
+            return KBAgent({
+                "local_index_dir": str(tmp_path / name / "index"),
+                "keyword_index_dir": str(tmp_path / name / "keywords"),
+                "capture_spool_path": str(tmp_path / name / "spool.jsonl"),
+                "ingest_workers": 0,
+                "embedding_model": "missing-model",
+            })
+
+        first, second = make_agent("a"), make_agent("b")
+        assert first.config_obj.ingest_checkpoint_path == str(tmp_path / "a" / "index" / "ingest_firmware_knowledge.json")
+
+        save_threads = []
+        save_indexes = first._save_indexes
+        first._save_indexes = lambda: (save_threads.append(threading.current_thread()), save_indexes())
+        write_manual(tmp_path / "manual.md", 5)
+
+        assert (await first.import_documents([str(tmp_path / "manual.md")])).chunks
+        assert save_threads and all(t is threading.main_thread() for t in save_threads)
+        # A second KB does not inherit the first one's import progress
+        assert (await second.import_documents([str(tmp_path / "manual.md")])).chunks
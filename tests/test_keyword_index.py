@@ -0,0 +1,122 @@
+import pytest
+
+from src.agents.kb_agent import KBAgent
+from src.knowledge.hybrid import reciprocal_rank_fusion
+from src.knowledge.keyword_index import BM25Index, KeywordIndexConfig, tokenize
+
+
+DOCS = {
+    "ku_i2c": "I2C timeout in i2c_master_xfer: I2C_CTRL_REG busy bit stuck",
+    "ku_uart": "UART overrun in uart_rx_isr, FIFO at 0x4000C000 full",
+    "ku_dma": "DMA transfer timeout, channel 3 never completes",
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = BM25Index(KeywordIndexConfig(index_dir=str(tmp_path)))
+    ids = list(DOCS)
+    index.add(ids, [DOCS[i] for i in ids], [{"metadata": {"product_line": i[3:]}} for i in ids])
+    return index
+
+
+class TestTokenize:
+    def test_identifiers_and_hex_kept_whole(self):
+        tokens = tokenize("Fault in I2C_CTRL_REG at 0x4000C000")
+        assert "i2c_ctrl_reg" in tokens
+        assert {"i2c", "ctrl", "reg"} <= set(tokens)
+        assert "0x4000c000" in tokens
+
+
+class TestBM25Index:
+    def test_lexical_match_ranks_first(self, index):
+        hits = index.search("uart_rx_isr overrun", limit=3)
+        assert hits[0][0] == "ku_uart"
+        assert all(score > 0 for _, score, _ in hits)
+
+    def test_rare_term_outweighs_common_term(self, index):
+        # "timeout" appears in two documents, "dma" in one
+        assert index.search("dma timeout", limit=1)[0][0] == "ku_dma"
+
+    def test_no_match(self, index):
+        assert index.search("watchdog") == []
+
+    def test_filter(self, index):
+        hits = index.search("timeout", filters={"metadata.product_line": "dma"})
+        assert [h[0] for h in hits] == ["ku_dma"]
+
+    def test_delete_and_replace(self, index):
+        assert index.delete(["ku_uart", "missing"]) == 1
+        assert index.search("uart") == []
+
+        index.add(["ku_dma"], ["watchdog reset"])
+        assert index.search("dma") == []
+        assert index.search("watchdog")[0][0] == "ku_dma"
+
+    def test_full_match_score(self, index):
+        score = index.search("dma transfer", limit=1)[0][1]
+        assert index.full_match_score("dma transfer") == pytest.approx(score, rel=0.3)
+        assert index.full_match_score("dma transfer watchdog") > index.full_match_score("dma transfer")
+
+    def test_persistence(self, index, tmp_path):
+        index.save()
+        reopened = BM25Index(KeywordIndexConfig(index_dir=str(tmp_path)))
+        assert len(reopened) == 3
+        assert reopened.search("i2c_master_xfer") == index.search("i2c_master_xfer")
+
+
+class TestReciprocalRankFusion:
+    def test_agreement_ranks_first(self):
+        fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "d"]], k=60)
+        assert [doc_id for doc_id, _ in fused] == ["b", "a", "d", "c"]
+
+    def test_weights_length_checked(self):
+        with pytest.raises(ValueError):
+            reciprocal_rank_fusion([["a"], ["b"]], weights=[1.0])
+
+
+class TestKBAgentHybridSearch:
+    @pytest.fixture
+    def agent(self, tmp_path):
+        return KBAgent({
+            "enable_local_index": False,
+            "keyword_index_dir": str(tmp_path / "keywords"),
+            "capture_spool_path": str(tmp_path / "spool.jsonl"),
+            "embedding_model": "missing-model",
+        })
+
+    @pytest.mark.asyncio
+    async def test_keyword_only_search(self, agent):
+        for ku_id, text in DOCS.items():
+            assert await agent._store_knowledge({"id": ku_id, "title": ku_id, "content": text})
+
+        results = await agent._placeholder_search("i2c_master_xfer timeout", {"max_results": 2})
+        assert results[0]["id"] == "ku_i2c"
+        assert results[0]["confidence"] == 1.0
+        # ku_dma only matches "timeout": below min_confidence_score
+        assert len(results) == 1
+
+        results = await agent._placeholder_search("timeout", {"max_results": 3})
+        assert {r["id"] for r in results} == {"ku_i2c", "ku_dma"}
+
+    @pytest.mark.asyncio
+    async def test_weak_best_keyword_hit_is_filtered(self, agent):
+        for ku_id, text in DOCS.items():
+            assert await agent._store_knowledge({"id": ku_id, "title": ku_id, "content": text})
+
+        # The best (and only) BM25 hit matches one of four query terms
+        assert agent._keyword_index.search("watchdog reset brownout uart")
+        results = await agent._placeholder_search("watchdog reset brownout uart", {})
+        assert results[0]["id"] == "placeholder_1"
+        results = await agent._placeholder_search("watchdog reset brownout uart", {"min_score": 0.1})
+        assert results[0]["id"] == "ku_uart" and results[0]["confidence"] < 0.5
+
+    def test_fuse_results_keeps_vector_confidence(self, agent):
+        vector = [{"id": "a", "confidence": 0.9}, {"id": "b", "confidence": 0.8}]
+        keyword = [{"id": "b", "confidence": 1.0, "keyword_score": 4.2}, {"id": "c", "confidence": 0.5, "keyword_score": 2.1}]
+
+        fused = agent._fuse_results(vector, keyword)
+        assert [r["id"] for r in fused] == ["b", "a", "c"]
+        assert fused[0]["confidence"] == 0.8
+        assert fused[0]["keyword_score"] == 4.2
+        assert fused[0]["fusion_score"] > fused[1]["fusion_score"]
@@ -0,0 +1,202 @@
+import io
+import tracemalloc
+
+import pytest
+
+from src.tools.result_analysis.analyzer import ResultAnalyzer
+from src.tools.result_analysis.log_parser import LogParser
+from src.tools.result_analysis.models import ResultAnalyzerConfig
+
+
+KERNEL_OOPS = """\
+[    1.000000] usb 1-1: new high-speed USB device
+[   12.345678] BUG: kernel NULL pointer dereference, address: 0000000000000000
+[   12.345680] #PF: supervisor read access in kernel mode
+[   12.345690] RIP: 0010:foo_probe+0x12/0x40 [foo]
+[   12.345700] Call Trace:
+[   12.345701]  <TASK>
+[   12.345702]  really_probe+0x1/0x2
+[   12.345703]  </TASK>
+[   12.345704] ---[ end trace 0000000000000000 ]---
+[   13.000000] foo: probe deferred
+"""
+
+LOGGING_TRACEBACK = """\
+2024-01-01 10:00:00 ERROR [runner] test crashed
+Traceback (most recent call last):
+  File "runner.py", line 1, in <module>
+    flash()
+ValueError: bad image
+2024-01-01 10:00:01 INFO [runner] done
+"""
+
+
+class RepeatingStream:
+    """Binary stream producing ``count`` copies of ``block`` without holding them"""
+
+    def __init__(self, block, count):
+        self.block = block.encode()
+        self.remaining = count
+        self.buffer = b""
+
+    def read(self, size):
+        while len(self.buffer) < size and self.remaining:
+            self.buffer += self.block
+            self.remaining -= 1
+        chunk, self.buffer = self.buffer[:size], self.buffer[size:]
+        return chunk
+
+
+class TestIterParse:
+    def test_kernel_oops_is_one_entry(self):
+        entries = list(LogParser().iter_parse(io.StringIO(KERNEL_OOPS)))
+        assert [e.message for e in entries] == [
+            "usb 1-1: new high-speed USB device",
+            "BUG: kernel NULL pointer dereference, address: 0000000000000000",
+            "foo: probe deferred",
+        ]
+        trace = entries[1].context["stack_trace"].splitlines()
+        assert len(trace) == 7 and "really_probe" in trace[4]
+
+    def test_traceback_attaches_to_log_record(self):
+        entries = list(LogParser().iter_parse(io.StringIO(LOGGING_TRACEBACK)))
+        assert [e.level for e in entries] == ["ERROR", "INFO"]
+        assert entries[0].context["stack_trace"].endswith("ValueError: bad image")
+
+    def test_small_chunks_and_split_utf8(self):
+        text = "[    1.0] température élevée\r\n[    2.0] ok\n"
+        whole = LogParser().parse(text)
+        streamed = list(LogParser().iter_parse(io.BytesIO(text.encode()), chunk_size=3))
+        assert [e.message for e in streamed] == [e.message for e in whole] == ["température élevée", "ok"]
+
+    def test_parse_matches_iter_parse(self):
+        text = KERNEL_OOPS + LOGGING_TRACEBACK
+        parser = LogParser()
+        assert [e.message for e in parser.parse(text)] == [
+            e.message for e in parser.iter_parse(io.StringIO(text))
+        ]
+
+    def test_block_lines_are_bounded(self):
+        parser = LogParser()
+        parser.MAX_BLOCK_LINES = 3
+        text = "head\n" + "  frame\n" * 10 + "tail\n"
+        head, tail = parser.parse(text)
+        assert head.context["stack_trace"].count("frame") == 3
+        assert head.context["truncated"] and tail.message == "tail"
+
+    def test_memory_is_constant(self):
+        parser = LogParser()
+        line = "2024-01-01 10:00:00 INFO [soak] heartbeat ok\n"
+        error = "2024-01-01 10:00:00 ERROR [soak] watchdog expired\n"
+
+        tracemalloc.start()
+        errors = parser.extract_errors(parser.iter_parse(RepeatingStream(line * 99 + error, 500)))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert len(errors) == 500
+        # ~2 MB of log; peak is dominated by the retained error entries
+        assert peak < 1024 * 1024
+
+
+class TestResultAnalyzerStreaming:
+    def test_failures_from_streamed_logs(self, tmp_path):
+        log = tmp_path / "serial.log"
+        log.write_text(LOGGING_TRACEBACK)
+        analyzer = ResultAnalyzer()
+
+        failures = analyzer.identify_failures_from_logs(analyzer.iter_logs([str(log)]))
+        assert len(failures) == 1
+        assert "ValueError: bad image" in failures[0].stack_trace
+        assert len(analyzer.parse_logs([str(log), str(tmp_path / "missing.log")])) == 2
+
+
+class TestFormatDetection:
+    def test_format_detected_once_per_stream(self, monkeypatch):
+        parser = LogParser()
+        calls = []
+        detect = parser._detect_format
+        monkeypatch.setattr(parser, "_detect_format", lambda line: calls.append(line) or detect(line))
+
+        text = "".join(f"[{i:5d}.000000] tick {i}\n" for i in range(500))
+        entries = list(parser.iter_parse(io.StringIO(text)))
+        assert len(entries) == 500 and entries[-1].source == "kernel"
+        assert len(calls) == parser.DETECT_SAMPLE_LINES
+
+    def test_mismatched_line_falls_back_to_detection(self):
+        text = "[    1.000000] boot\n" * 10 + "drivers/spi/spi.c:12:5: error: 'x' undeclared\n"
+        entry = LogParser().parse(text)[-1]
+        assert (entry.level, entry.source, entry.context["line"]) == ("ERROR", "drivers/spi/spi.c", "12")
+
+    def test_timestamps_come_from_lines(self):
+        text = (
+            "2024-01-01 10:00:00,123 WARNING [flash] slow erase\n"
+            "U-Boot 2023.01 banner\n"
+            "board ready at 2024-01-01T10:00:05Z\n"
+        )
+        entries = LogParser().parse(text)
+        assert entries[0].timestamp.strip() == "2024-01-01 10:00:00,123"
+        assert entries[0].level == "WARNING"
+        assert entries[1].timestamp == entries[0].timestamp  # inherited
+        assert entries[2].timestamp == "2024-01-01T10:00:05Z"
+
+
+def key(entry):
+    return (entry.timestamp, entry.level, entry.source, entry.message, entry.context.get("stack_trace"))
+
+
+class TestParallelParsing:
+    @pytest.fixture
+    def logs(self, tmp_path):
+        serial = tmp_path / "serial.log"
+        # Untimestamped banner lines inherit the previous entry's timestamp,
+        # also across range boundaries
+        serial.write_text((KERNEL_OOPS + "U-Boot banner\n") * 40 + (LOGGING_TRACEBACK * 40))
+        console = tmp_path / "console.log"
+        console.write_text((LOGGING_TRACEBACK + "U-Boot banner\n") * 30)
+        return [str(serial), str(console)]
+
+    def test_ranges_start_at_entry_boundaries(self, logs):
+        parser = LogParser()
+        ranges = parser.plan_ranges(logs[0], 256)
+        assert len(ranges) > 10
+        data = open(logs[0], "rb").read()
+        for start, end in ranges[1:]:
+            head = data[start:end].decode().splitlines()[0]
+            assert not parser._is_continuation(head)
+            assert not data[:start].decode().splitlines()[-1].startswith(("Traceback", " "))
+
+    def test_matches_sequential_parse(self, logs):
+        parser = LogParser()
+        sequential = list(parser.iter_parse_files(logs))
+        parallel = list(parser.iter_parse_files(logs, workers=2, range_bytes=256))
+        assert [key(e) for e in parallel] == [key(e) for e in sequential]
+
+    def test_level_filter_runs_in_workers(self, logs):
+        parser = LogParser()
+        errors = list(parser.iter_parse_files(logs, workers=2, range_bytes=512, levels=parser.ERROR_LEVELS))
+        assert len(errors) == 70
+        assert all(e.context["stack_trace"].endswith("ValueError: bad image") for e in errors)
+
+    def test_result_analyzer_parallel_failures(self, logs):
+        analyzer = ResultAnalyzer(ResultAnalyzerConfig(log_parse_workers=2, log_range_bytes=512))
+        failures = analyzer.identify_failures_from_log_files(logs + ["/nonexistent.log"])
+        assert len(failures) == 70
+
+    def test_unreadable_file_skips_only_that_file(self, logs, tmp_path):
+        unreadable = tmp_path / "artifact.log"
+        unreadable.mkdir()  # exists() but cannot be opened
+        for workers in (0, 2):
+            analyzer = ResultAnalyzer(ResultAnalyzerConfig(log_parse_workers=workers, log_range_bytes=512))
+            failures = analyzer.identify_failures_from_log_files([str(unreadable)] + logs)
+            assert len(failures) == 70
+
+        errors = []
+        entries = list(LogParser().iter_parse_files(
+            [logs[0], str(unreadable), logs[1]], workers=2, range_bytes=256,
+            on_error=lambda path, e: errors.append(path)
+        ))
+        assert errors == [str(unreadable)]
+        assert [key(e) for e in entries] == [key(e) for e in LogParser().iter_parse_files([logs[0], logs[1]])]
+        with pytest.raises(IsADirectoryError):
+            list(LogParser().iter_parse_files([str(unreadable)], workers=2))
@@ -0,0 +1,86 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from src.tools.result_analysis import LogTable
+from src.tools.result_analysis.analyzer import ResultAnalyzer
+from src.tools.result_analysis.log_parser import LogParser
+from src.tools.result_analysis.log_table import NAT, parse_timestamp
+from src.tools.result_analysis.models import LogEntry
+
+
+ENTRIES = [
+    LogEntry("2024-01-01 10:00:00,000", "INFO", "runner", "boot"),
+    LogEntry("2024-01-01 10:00:05,500", "ERROR", "runner", "flash failed", {"stack_trace": "  at erase()"}),
+    LogEntry("2024-01-01T10:00:10Z", "WARNING", "board7", "température élevée"),
+    LogEntry("Jan  1 10:00:20", "error", "board7", "watchdog expired"),
+    LogEntry("12.500000", "INFO", "kernel", "usb 1-1: new device"),
+    LogEntry("not a time", "FATAL", "runner", "panic"),
+]
+
+
+@pytest.fixture
+def table():
+    return LogTable.from_entries(ENTRIES, year=2024)
+
+
+class TestParseTimestamp:
+    @pytest.mark.parametrize("text, expected", [
+        ("2024-01-01 10:00:00,123", datetime(2024, 1, 1, 10, 0, 0, 123000, tzinfo=timezone.utc)),
+        ("2024-01-01T10:00:00+02:00", datetime(2024, 1, 1, 8, tzinfo=timezone.utc)),
+        ("Mar  5 06:07:08", datetime(2024, 3, 5, 6, 7, 8, tzinfo=timezone.utc)),
+    ])
+    def test_absolute(self, text, expected):
+        assert parse_timestamp(text, year=2024) == int(expected.timestamp()) * 10**9 + expected.microsecond * 1000
+
+    def test_kernel_and_invalid(self):
+        assert parse_timestamp("   12.000001") == 12_000_001_000
+        assert parse_timestamp("") == parse_timestamp("soon") == NAT
+
+
+class TestLogTable:
+    def test_entries_round_trip(self, table):
+        assert list(table) == ENTRIES
+        assert table[-1].message == "panic"
+        with pytest.raises(IndexError):
+            table[len(ENTRIES)]
+
+    def test_filters_share_buffer(self, table):
+        errors = table.errors()
+        assert errors.messages() == ["flash failed", "watchdog expired", "panic"]
+        assert errors[0].context == {"stack_trace": "  at erase()"}
+        assert errors._buffer is table._buffer
+        assert [e.message for e in table.filter_by_source("BOARD")] == ["température élevée", "watchdog expired"]
+        assert len(table.take([])) == 0
+
+    def test_group_by_level_matches_parser(self, table):
+        expected = LogParser().group_by_level(ENTRIES)
+        groups = table.group_by_level()
+        assert {level: list(group) for level, group in groups.items()} == expected
+        assert table.level_counts() == {level: len(entries) for level, entries in expected.items()}
+
+    def test_time_window(self, table):
+        window = table.between("2024-01-01T10:00:05", datetime(2024, 1, 1, 10, 0, 20, tzinfo=timezone.utc))
+        assert window.messages() == ["flash failed", "température élevée"]
+        assert table.time_mask(end=13 * 10**9).tolist() == [False] * 4 + [True, False]
+        with pytest.raises(ValueError):
+            table.between("later")
+
+    def test_compact_columns(self):
+        entries = (LogEntry("2024-01-01 10:00:00", "INFO", "soak", f"heartbeat {i}") for i in range(50_000))
+        table = LogTable.from_entries(entries)
+        assert table.level_codes.dtype == np.uint8
+        # ~33 bytes of text plus 41 bytes of columns per row; a LogEntry with its
+        # context dict and strings is several hundred bytes
+        assert table.nbytes < 50_000 * 80
+
+
+class TestResultAnalyzerTable:
+    def test_load_log_table(self, tmp_path):
+        log = tmp_path / "soak.log"
+        log.write_text("2024-01-01 10:00:00 INFO [soak] ok\n2024-01-01 10:00:01 ERROR [soak] hang\n")
+        table = ResultAnalyzer().load_log_table([str(log)])
+        assert len(table) == 2 and table.errors().messages() == ["hang"]
+        failures = ResultAnalyzer().identify_failures_from_logs(table.errors())
+        assert [f.message for f in failures] == ["hang"]
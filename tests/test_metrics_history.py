@@ -0,0 +1,102 @@
+import pytest
+
+from src.tools.result_analysis import MetricsHistory, ResultAnalyzer
+from src.tools.result_analysis.decision_engine import DecisionEngine
+from src.tools.result_analysis.models import (
+    ActionType,
+    AnalysisReport,
+    Failure,
+    IterationMetrics,
+    ResultAnalyzerConfig,
+)
+
+
+def report(passed, total=100):
+    return AnalysisReport(total_tests=total, passed=passed, failed=total - passed)
+
+
+def least_squares_slope(values):
+    n = len(values)
+    mean_x, mean_y = (n - 1) / 2, sum(values) / n
+    return sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values)) / sum((x - mean_x) ** 2 for x in range(n))
+
+
+class TestMetricsHistory:
+    def test_window_statistics_match_recomputation(self):
+        history = MetricsHistory(max_depth=4, alpha=0.5)
+        rates = [0.1, 0.3, 0.2, 0.6, 0.5, 0.9, 0.4]
+        ewma = None
+        for rate in rates:
+            history.append(IterationMetrics(pass_rate=rate))
+            ewma = rate if ewma is None else 0.5 * rate + 0.5 * ewma
+
+        assert len(history) == 4 and history.count == 7
+        assert list(history.pass_rates) == rates[-4:]
+        assert history.slope == pytest.approx(least_squares_slope(rates[-4:]))
+        assert history.ewma == pytest.approx(ewma)
+        assert history.recent_pass_rates(2) == [0.9, 0.4]
+
+    def test_trend(self):
+        history = MetricsHistory(max_depth=5)
+        assert history.trend(0.05) == 'stable'
+        for passed in (50, 60, 70):
+            history.record(report(passed))
+        assert history.trend(0.05) == 'improving'
+        for passed in (40, 30, 20):
+            history.record(report(passed))
+        assert history.trend(0.05) == 'degrading'
+
+    def test_rejects_empty_window(self):
+        with pytest.raises(ValueError):
+            MetricsHistory(max_depth=0)
+
+
+class TestDecisionEngineHistory:
+    def test_list_and_metrics_history_agree(self):
+        engine = DecisionEngine(ResultAnalyzerConfig(max_history_depth=5))
+        reports = [report(p) for p in (40, 50, 55, 70, 80, 85)]
+        # 报告列表只读取最近 max_history_depth 份
+        metrics = MetricsHistory.from_reports(reports[-5:], max_depth=5)
+
+        from_list = engine._check_convergence(report(90), reports, 3)
+        from_metrics = engine._check_convergence(report(90), metrics, 3)
+
+        assert from_list == from_metrics
+        assert from_metrics.trend == 'improving' and from_metrics.slope > 0
+
+    def test_stall_requires_flat_cluster_count(self):
+        engine = DecisionEngine(ResultAnalyzerConfig())
+        history = MetricsHistory()
+        for count in (3, 2, 1):
+            history.append(IterationMetrics(pass_rate=0.5, cluster_count=count))
+        assert "No improvement" not in engine._check_convergence(report(50), history, 1).summary
+
+        history.append(IterationMetrics(pass_rate=0.5, cluster_count=1))
+        history.append(IterationMetrics(pass_rate=0.5, cluster_count=1))
+        assert "No improvement" in engine._check_convergence(report(50), history, 1).summary
+
+
+class TestResultAnalyzerHistory:
+    def test_records_into_metrics_history(self):
+        analyzer = ResultAnalyzer()
+        history = MetricsHistory(max_depth=3)
+        outputs = {"test_spi": "Assertion failed: len == 4"}
+
+        for iteration in range(5):
+            result = analyzer.analyze_results("run", 10, 9, 1, 0, outputs, iteration, history)
+
+        assert len(history) == 3 and history.count == 5
+        assert result.clusters[0].streak == 4
+        assert history.last.signatures == {result.clusters[0].signature}
+        assert result.convergence.ewma_pass_rate == pytest.approx(0.9)
+
+    def test_convergence_computed_once(self):
+        analyzer = ResultAnalyzer()
+        calls = []
+        original = analyzer.decision_engine._check_convergence
+        analyzer.decision_engine._check_convergence = lambda *args: calls.append(args) or original(*args)
+
+        result = analyzer.analyze_results("run", 10, 10, 0, 0, {}, 0, [])
+
+        assert len(calls) == 1
+        assert result.decision.action == ActionType.FINISH and result.convergence.converged
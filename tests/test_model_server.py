@@ -0,0 +1,102 @@
+import threading
+
+import numpy as np
+import pytest
+
+from src.agents.kb_agent import KBAgent
+from src.knowledge.embedding import api_encoder
+from src.knowledge.model_server import EmbeddingServer
+
+
+class CountingEncoder:
+    def __init__(self, dim=8):
+        self.dim = dim
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.stack([np.full(self.dim, len(t), dtype=np.float32) for t in texts])
+
+
+@pytest.fixture
+def server():
+    encoder = CountingEncoder()
+    server = EmbeddingServer(encoder, port=0).start()
+    yield server, encoder
+    server.stop()
+
+
+class TestEmbeddingServer:
+    def test_serves_openai_format(self, server):
+        server, _ = server
+        matrix = api_encoder(server.url, "", "shared")(["ab", "abcd"])
+        assert matrix.shape == (2, 8)
+        assert matrix[1][0] == 4.0
+
+    def test_clients_share_model_cache(self, server):
+        server, encoder = server
+        api_encoder(server.url, "", "shared")(["uart overrun"])
+        api_encoder(server.url, "", "shared")(["uart overrun"])
+        assert encoder.calls == [["uart overrun"]]
+
+    def test_bad_request(self, server):
+        import httpx
+
+        server, _ = server
+        assert httpx.post(server.url, json={"model": "shared"}).status_code == 400
+
+
+class TestKBAgentLazyStartup:
+    @pytest.mark.asyncio
+    async def test_backends_connect_on_first_use(self, server, tmp_path):
+        server, _ = server
+        agent = KBAgent({
+            "embedding_server_url": server.url,
+            "qdrant_port": 1,
+            "local_index_dir": str(tmp_path / "index"),
+            "keyword_index_dir": str(tmp_path / "keywords"),
+            "capture_spool_path": str(tmp_path / "spool.jsonl"),
+        })
+        assert not agent.is_ready
+
+        vector = await agent._vectorize("i2c timeout")
+        assert agent.is_ready
+        assert agent._embedding_service == "server"
+        assert vector.shape == (8,)
+
+    @pytest.mark.asyncio
+    async def test_query_embedding_runs_off_the_loop(self, server, tmp_path):
+        server, _ = server
+        agent = KBAgent({
+            "embedding_server_url": server.url,
+            "qdrant_port": 1,
+            "local_index_dir": str(tmp_path / "index"),
+            "keyword_index_dir": str(tmp_path / "keywords"),
+            "capture_spool_path": str(tmp_path / "spool.jsonl"),
+        })
+        await agent.ensure_ready()
+
+        threads = []
+        embed = agent._embedder.embed
+        agent._embedder.embed = lambda texts: (threads.append(threading.current_thread()), embed(texts))[1]
+        assert (await agent._get_embedding("i2c timeout")).shape == (8,)
+        assert threads and threading.main_thread() not in threads
+
+    @pytest.mark.asyncio
+    async def test_local_search_embeds_off_the_loop(self, server, tmp_path):
+        server, _ = server
+        agent = KBAgent({
+            "embedding_server_url": server.url,
+            "qdrant_port": 1,
+            "local_index_dir": str(tmp_path / "index"),
+            "keyword_index_dir": str(tmp_path / "keywords"),
+            "capture_spool_path": str(tmp_path / "spool.jsonl"),
+        })
+        assert await agent._store_knowledge({"id": "ku-1", "title": "i2c", "content": "i2c timeout on probe"})
+
+        threads = []
+        embed = agent._embedder.embed
+        agent._embedder.embed = lambda texts: (threads.append(threading.current_thread()), embed(texts))[1]
+        results = await agent._local_search("i2c timeout", {"min_score": 0.0})
+        assert [r["id"] for r in results] == ["ku-1"]
+        assert threads and threading.main_thread() not in threads
@@ -0,0 +1,221 @@
+import os
+import subprocess
+import time
+
+import pytest
+
+from src.tools.code_modification.modifier import CodeModifier
+from src.tools.code_modification.patch_applier import PatchApplier, PatchParseError, parse_patch
+from src.tools.code_modification.worktree import head_commit
+
+BASE = "".join(f"line {i}\n" for i in range(1, 21))
+
+PATCH = """--- a/f.c
++++ b/f.c
+@@ -4,3 +4,3 @@
+ line 4
+-line 5
++line five
+ line 6
+@@ -14,3 +14,4 @@
+ line 14
+ line 15
++inserted
+ line 16
+"""
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "f.c").write_text(BASE)
+    return tmp_path
+
+
+def expected(text=BASE):
+    return text.replace("line 5\n", "line five\n").replace("line 15\n", "line 15\ninserted\n")
+
+
+class TestParsePatch:
+    def test_git_format(self):
+        patch = (
+            "diff --git a/new.c b/new.c\nnew file mode 100644\nindex 0000000..e69de29\n"
+            "--- /dev/null\n+++ b/new.c\n@@ -0,0 +1,2 @@\n+a\n+b\n\\ No newline at end of file\n"
+            "diff --git a/old.c b/renamed.c\nsimilarity index 100%\nrename from old.c\nrename to renamed.c\n"
+        )
+        created, renamed = parse_patch(patch)
+        assert created.is_new and created.path == "new.c" and created.new_mode == 0o644
+        assert created.hunks[0].new_lines == ["a", "b"] and not created.hunks[0].new_eof_newline
+        assert (renamed.old_path, renamed.new_path, renamed.hunks) == ("old.c", "renamed.c", [])
+
+    def test_mode_headers(self):
+        patch = (
+            "diff --git a/run.sh b/run.sh\nold mode 100644\nnew mode 100755\n"
+            "diff --git a/empty b/empty\nnew file mode 100755\nindex 0000000..e69de29\n"
+            "diff --git a/link b/link\nindex 1234567..89abcde 100644\n"
+        )
+        chmod, empty = parse_patch(patch)
+        assert (chmod.old_path, chmod.new_path, chmod.old_mode, chmod.new_mode) == ("run.sh", "run.sh", 0o644, 0o755)
+        assert empty.is_new and empty.new_mode == 0o755 and empty.reversed().is_delete
+        with pytest.raises(PatchParseError):
+            parse_patch("diff --git a/l b/l\nnew file mode 120000\n")
+
+    def test_malformed(self):
+        with pytest.raises(PatchParseError):
+            parse_patch("--- a/f\n+++ b/f\n@@ -1,2 +1,2 @@\n-x\n")
+        with pytest.raises(PatchParseError):
+            parse_patch("diff --git a/x b/x\nBinary files a/x and b/x differ\n")
+
+
+class TestPatchApplier:
+    def test_apply_and_reverse(self, tree):
+        applier = PatchApplier()
+        result = applier.apply(PATCH, tree)
+        assert result.applied and not result.notes
+        assert (tree / "f.c").read_text() == expected()
+
+        assert applier.apply(PATCH, tree, reverse=True).applied
+        assert (tree / "f.c").read_text() == BASE
+
+    def test_offset(self, tree):
+        shifted = "header 1\nheader 2\n" + BASE
+        (tree / "f.c").write_text(shifted)
+        result = PatchApplier().apply(PATCH, tree)
+        assert result.applied
+        assert (tree / "f.c").read_text() == expected(shifted)
+        assert "offset +2" in result.notes[0]
+
+    def test_fuzz(self, tree):
+        (tree / "f.c").write_text(BASE.replace("line 4\n", "line four\n"))
+        assert not PatchApplier(fuzz=0).check(PATCH, tree).ok
+        result = PatchApplier(fuzz=1).apply(PATCH, tree)
+        assert result.applied and "fuzz 1" in result.notes[0]
+        assert "line four\nline five\n" in (tree / "f.c").read_text()
+
+    def test_conflict_is_exact_and_writes_nothing(self, tree):
+        (tree / "g.c").write_text("keep\n")
+        patch = PATCH.replace("-line 5", "-line 55").replace(" line 4", " line 44") + (
+            "--- a/g.c\n+++ b/g.c\n@@ -1 +1 @@\n-keep\n+changed\n"
+        )
+        result = PatchApplier(fuzz=0).apply(patch, tree)
+        assert not result.applied
+        conflict, = result.conflicts
+        assert (conflict.path, conflict.hunk, conflict.line) == ("f.c", 1, 4)
+        assert "expected 'line 44', found 'line 4'" in str(conflict)
+        # All-or-nothing: the file that would apply is untouched
+        assert (tree / "g.c").read_text() == "keep\n"
+        assert (tree / "f.c").read_text() == BASE
+        assert sorted(os.listdir(tree)) == ["f.c", "g.c"]
+
+    def test_create_delete_and_no_newline(self, tree):
+        create = "--- /dev/null\n+++ b/sub/new.c\n@@ -0,0 +1,2 @@\n+one\n+two\n\\ No newline at end of file\n"
+        assert PatchApplier().apply(create, tree).applied
+        assert (tree / "sub/new.c").read_text() == "one\ntwo"
+        assert not PatchApplier().check(create, tree).ok
+
+        delete = "--- a/sub/new.c\n+++ /dev/null\n@@ -1,2 +0,0 @@\n-one\n-two\n\\ No newline at end of file\n"
+        assert PatchApplier().apply(delete, tree).applied
+        assert not (tree / "sub/new.c").exists()
+
+    def test_preserves_crlf_and_mode(self, tree):
+        (tree / "f.c").write_bytes(BASE.replace("\n", "\r\n").encode())
+        os.chmod(tree / "f.c", 0o755)
+        assert PatchApplier().apply(PATCH, tree).applied
+        assert (tree / "f.c").read_bytes() == expected().replace("\n", "\r\n").encode()
+        assert (tree / "f.c").stat().st_mode & 0o777 == 0o755
+
+    def test_new_file_modes_follow_umask(self, tree, monkeypatch):
+        create = "--- /dev/null\n+++ b/new.c\n@@ -0,0 +1 @@\n+one\n"
+        script = (
+            "diff --git a/run.sh b/run.sh\nnew file mode 100755\n"
+            "--- /dev/null\n+++ b/run.sh\n@@ -0,0 +1 @@\n+#!/bin/sh\n"
+        )
+        old_umask = os.umask(0o027)
+        try:
+            with monkeypatch.context() as m:
+                # Setting the umask would race with processes spawned from other threads
+                m.setattr(os, "umask", lambda mask: pytest.fail("umask changed while applying"))
+                assert PatchApplier().apply(create + script, tree).applied
+        finally:
+            os.umask(old_umask)
+        assert (tree / "new.c").stat().st_mode & 0o777 == 0o640
+        assert (tree / "run.sh").stat().st_mode & 0o777 == 0o750
+
+    def test_mode_change_and_rename_keep_git_semantics(self, tree):
+        os.chmod(tree / "f.c", 0o600)
+        chmod = "diff --git a/f.c b/f.c\nold mode 100644\nnew mode 100755\n"
+        old_umask = os.umask(0o022)
+        try:
+            assert PatchApplier().apply(chmod + PATCH, tree).applied
+            assert (tree / "f.c").stat().st_mode & 0o777 == 0o755
+            assert (tree / "f.c").read_text() == expected()
+
+            assert PatchApplier().apply(chmod, tree, reverse=True).applied
+            assert (tree / "f.c").stat().st_mode & 0o777 == 0o644
+        finally:
+            os.umask(old_umask)
+
+        os.chmod(tree / "f.c", 0o700)
+        rename = "diff --git a/f.c b/g.c\nsimilarity index 100%\nrename from f.c\nrename to g.c\n"
+        assert PatchApplier().apply(rename, tree).applied
+        assert (tree / "g.c").stat().st_mode & 0o777 == 0o700
+
+    def test_keeps_mixed_line_endings(self, tree):
+        lines = BASE.splitlines(keepends=True)
+        # CRLF only around the first hunk, LF elsewhere
+        mixed = "".join(line.replace("\n", "\r\n") if 3 <= i <= 6 else line for i, line in enumerate(lines))
+        (tree / "f.c").write_bytes(mixed.encode())
+        assert PatchApplier().apply(PATCH, tree).applied
+        want = mixed.replace("line 5\r\n", "line five\r\n").replace("line 15\n", "line 15\ninserted\n")
+        assert (tree / "f.c").read_bytes() == want.encode()
+
+        prepend = "--- a/f.c\n+++ b/f.c\n@@ -1,2 +1,3 @@\n+header\n line 1\n line 2\n"
+        (tree / "f.c").write_bytes(b"line 1\r\nline 2\nline 3")
+        assert PatchApplier().apply(prepend, tree).applied
+        assert (tree / "f.c").read_bytes() == b"header\r\nline 1\r\nline 2\nline 3"
+
+    def test_rejects_paths_outside_target(self, tree):
+        result = PatchApplier().check("--- a/../f.c\n+++ b/../f.c\n@@ -1 +1 @@\n-x\n+y\n", tree)
+        assert "outside" in result.conflicts[0].reason
+
+    def test_matches_git_apply(self, tree):
+        subprocess.run(["git", "apply", "--check", "-"], input=PATCH.encode(), cwd=tree, check=True)
+        subprocess.run(["git", "apply", "-"], input=PATCH.encode(), cwd=tree, check=True)
+        by_git = (tree / "f.c").read_text()
+        (tree / "f.c").write_text(BASE)
+        assert PatchApplier().apply(PATCH, tree).applied
+        assert (tree / "f.c").read_text() == by_git
+
+    def test_dry_run_is_fast(self, tree):
+        applier = PatchApplier()
+        start = time.perf_counter()
+        for _ in range(200):
+            assert applier.check(PATCH, tree).ok
+        assert (time.perf_counter() - start) / 200 < 0.005
+
+
+class TestNativeBackend:
+    def test_code_modifier(self, tree):
+        modifier = CodeModifier(backend="native")
+        assert modifier.check_conflicts(PATCH, tree)
+        result = modifier.apply_checked(PATCH, tree)
+        assert result.applied and (tree / "f.c").read_text() == expected()
+        assert not modifier.apply_checked(PATCH, tree).applied
+        assert modifier.revert_patch(PATCH, tree)
+        assert not modifier.apply_patch("", tree)
+        with pytest.raises(ValueError):
+            CodeModifier(backend="svn")
+
+    def test_head_commit(self, tree):
+        def git(*args, cwd=tree):
+            return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+        git("init", "-q")
+        assert head_commit(tree) == ""
+        git("add", ".")
+        git("-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "base")
+        sha = git("rev-parse", "HEAD")
+        assert head_commit(tree) == sha
+        git("pack-refs", "--all")
+        assert head_commit(tree) == sha
+        git("worktree", "add", "-q", "--detach", str(tree / "wt"))
+        assert head_commit(tree / "wt") == sha
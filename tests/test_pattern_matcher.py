@@ -0,0 +1,83 @@
+import json
+import random
+import re
+
+import pytest
+
+from src.tools.result_analysis.analyzer import (
+    PatternMatcher, ResultAnalyzer, RootCauseAnalyzer, _required_literal
+)
+from src.tools.result_analysis.models import FailureCategory, ResultAnalyzerConfig
+
+
+def reference_classify(patterns, message):
+    """Classifier before precompilation: every pattern, best score wins"""
+    if not message:
+        return (FailureCategory.UNKNOWN, 0.0)
+    best = (FailureCategory.UNKNOWN, 0.0)
+    for category, category_patterns in patterns.items():
+        for pattern in category_patterns:
+            if re.search(pattern, message.lower(), re.IGNORECASE):
+                score = min(len(pattern) / len(message) * 1.5, 1.0)
+                if score > best[1]:
+                    best = (category, score)
+    return best
+
+
+FRAGMENTS = [
+    "segmentation fault", "Segfault at 0x0", "double free", "assert(x == 1) failed",
+    "ASSERT_EQ failed", "Test foo FAILED", "error: 'x' undeclared", "fatal error: foo.h",
+    "watchdog 0 expired", "Kernel panic - not syncing", "Oops: 0000", "BUG: unable",
+    "core dumped", "runtime error: shift", "timed out", "execution timed out",
+    "cannot find -lfoo", "assertion failed", "usb 1-1: new device", "ſegfault", "  ",
+]
+
+
+class TestRequiredLiteral:
+    @pytest.mark.parametrize("pattern, literal", [
+        (r"segmentation fault", "segmentation fault"),
+        (r"fatal error:", "fatal error:"),
+        (r"assert\w*\s*\(", "assert"),
+        (r"Test.*FAILED", "failed"),
+        (r"timed?\s*out", "time"),
+        (r"(segfault|crash)", ""),
+        (r"[0-9]+ errors", ""),
+        (r"\x41bort", "bort"),
+        (r"err\u00e9ur", "err"),
+        (r"nul\0l", "nul"),
+        (r"\N{BULLET} item", " item"),
+    ])
+    def test_extracts_required_substring(self, pattern, literal):
+        assert _required_literal(pattern) == literal
+
+
+class TestPatternMatcher:
+    def test_matches_reference_classifier(self):
+        matcher = PatternMatcher()
+        rng = random.Random(7)
+        for _ in range(5000):
+            message = " ".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 4)))
+            assert matcher.classify(message) == reference_classify(PatternMatcher.BUILTIN_PATTERNS, message)
+
+    def test_clean_line_is_unknown(self):
+        assert PatternMatcher().classify("usb 1-1: new high-speed USB device") == (FailureCategory.UNKNOWN, 0.0)
+
+    def test_classify_many(self):
+        messages = ["Segmentation fault (core dumped)", "", "watchdog expired"]
+        matcher = PatternMatcher()
+        assert matcher.classify_many(messages) == [matcher.classify(m) for m in messages]
+
+    def test_custom_patterns_do_not_leak_into_builtins(self, tmp_path):
+        db = tmp_path / "patterns.json"
+        db.write_text(json.dumps({"timeout": [r"i2c_\w+ nak"], "crash": ["(unbalanced"]}))
+        builtin_timeout = list(PatternMatcher.BUILTIN_PATTERNS[FailureCategory.TIMEOUT])
+
+        matcher = PatternMatcher(str(db))
+        assert matcher.classify("i2c_xfer nak")[0] == FailureCategory.TIMEOUT
+        assert PatternMatcher.BUILTIN_PATTERNS[FailureCategory.TIMEOUT] == builtin_timeout
+        assert PatternMatcher().classify("i2c_xfer nak")[0] == FailureCategory.UNKNOWN
+
+    def test_root_cause_analyzer_shares_matcher(self):
+        analyzer = ResultAnalyzer(ResultAnalyzerConfig())
+        assert analyzer.root_cause_analyzer.pattern_matcher is analyzer.pattern_matcher
+        assert isinstance(RootCauseAnalyzer(ResultAnalyzerConfig()).pattern_matcher, PatternMatcher)
@@ -0,0 +1,99 @@
+import time
+
+import pytest
+
+from src.tools.llm.response_cache import LLMResponseCache, ResponseCacheConfig
+
+
+RESPONSE = {"choices": [{"message": {"content": "```diff\n--- a/x.c\n+++ b/x.c\n```"}}]}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(ResponseCacheConfig(cache_dir=str(tmp_path)))
+
+
+class TestLLMResponseCache:
+    @pytest.mark.asyncio
+    async def test_exact_hit(self, cache):
+        assert await cache.get("gpt-4", "fix it", 0.0) is None
+        assert await cache.put("gpt-4", "fix it", 0.0, RESPONSE)
+        assert await cache.get("gpt-4", "fix it", 0.0) == RESPONSE
+
+    @pytest.mark.asyncio
+    async def test_key_includes_request_parameters(self, tmp_path):
+        cache = LLMResponseCache(ResponseCacheConfig(cache_dir=str(tmp_path), max_cacheable_temperature=0.5))
+        await cache.put("gpt-4", "fix it", 0.3, RESPONSE, max_tokens=100, endpoint="https://a")
+        assert await cache.get("gpt-4", "fix it", 0.3, max_tokens=100, endpoint="https://a") == RESPONSE
+        assert await cache.get("gpt-3.5", "fix it", 0.3, max_tokens=100, endpoint="https://a") is None
+        assert await cache.get("gpt-4", "fix it", 0.2, max_tokens=100, endpoint="https://a") is None
+        # A response truncated at 100 tokens must not answer a 2000-token request
+        assert await cache.get("gpt-4", "fix it", 0.3, max_tokens=2000, endpoint="https://a") is None
+        assert await cache.get("gpt-4", "fix it", 0.3, max_tokens=100, endpoint="https://b") is None
+
+    @pytest.mark.asyncio
+    async def test_sampled_requests_not_cached_by_default(self, cache):
+        assert not await cache.put("gpt-4", "fix it", 0.3, RESPONSE)
+        assert await cache.get("gpt-4", "fix it", 0.3) is None
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_persists_across_instances(self, tmp_path):
+        config = ResponseCacheConfig(cache_dir=str(tmp_path))
+        await LLMResponseCache(config).put("gpt-4", "fix it", 0.0, RESPONSE)
+        assert await LLMResponseCache(config).get("gpt-4", "fix it", 0.0) == RESPONSE
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self, tmp_path):
+        cache = LLMResponseCache(ResponseCacheConfig(cache_dir=str(tmp_path), ttl_seconds=0))
+        await cache.put("gpt-4", "fix it", 0.0, RESPONSE)
+        time.sleep(0.01)
+        assert await cache.get("gpt-4", "fix it", 0.0) is None
+        assert len(cache) == 0
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self, tmp_path):
+        cache = LLMResponseCache(ResponseCacheConfig(cache_dir=str(tmp_path), max_entries=2))
+        await cache.put("gpt-4", "a", 0.0, RESPONSE)
+        await cache.put("gpt-4", "b", 0.0, RESPONSE)
+        await cache.get("gpt-4", "a", 0.0)
+        await cache.put("gpt-4", "c", 0.0, RESPONSE)
+
+        assert len(cache) == 2
+        assert await cache.get("gpt-4", "a", 0.0) is not None
+        assert await cache.get("gpt-4", "b", 0.0) is None
+        assert len(list(tmp_path.glob("*.json"))) == 2
+
+    @pytest.mark.asyncio
+    async def test_near_duplicate_lookup(self, tmp_path):
+        def embed(text):
+            # Bag-of-letters embedding: anagram-like prompts are near-identical
+            return [text.count(c) for c in "abcdefghijklmnopqrstuvwxyz"]
+
+        config = ResponseCacheConfig(
+            cache_dir=str(tmp_path), semantic_lookup=True, similarity_threshold=0.99
+        )
+        cache = LLMResponseCache(config, embedding_fn=embed)
+        await cache.put("gpt-4", "fix the null pointer", 0.0, RESPONSE, max_tokens=100)
+
+        assert await cache.get("gpt-4", "fix the null pointer ", 0.0, max_tokens=100) == RESPONSE
+        assert await cache.get("gpt-4", "fix the null pointer ", 0.0, max_tokens=2000) is None
+        assert await cache.get("gpt-4", "zzz", 0.0, max_tokens=100) is None
+
+    @pytest.mark.asyncio
+    async def test_async_provider_not_ready(self, tmp_path, caplog):
+        ready = False
+
+        async def embed(text):
+            return [text.count(c) for c in "abcdefghijklmnopqrstuvwxyz"] if ready else None
+
+        config = ResponseCacheConfig(cache_dir=str(tmp_path), semantic_lookup=True, similarity_threshold=0.99)
+        cache = LLMResponseCache(config, embedding_fn=embed)
+        with caplog.at_level("DEBUG", logger="src.tools.llm.response_cache"):
+            await cache.put("gpt-4", "fix the null pointer", 0.0, RESPONSE)
+            assert await cache.get("gpt-4", "fix the null pointer ", 0.0) is None
+        assert sum("not ready" in r.getMessage() for r in caplog.records) == 1
+
+        ready = True
+        await cache.put("gpt-4", "fix the null pointer", 0.0, RESPONSE)
+        assert await cache.get("gpt-4", "fix the null pointer ", 0.0) == RESPONSE
@@ -0,0 +1,131 @@
+import asyncio
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from src import agents
+from src.orchestrator.scheduler import ResourceLimiter, SchedulerConfig, TaskScheduler, environment_resource
+
+
+def task_state(task_id, environment_type="qemu"):
+    return {"task_id": task_id, "test_plan": {"name": "t", "test_cases": [], "environment_type": environment_type}}
+
+
+class TestResourceLimiter:
+    @pytest.mark.asyncio
+    async def test_limits_concurrent_holders(self):
+        limiter = ResourceLimiter({"qemu": 2})
+        running = []
+
+        async def node(state):
+            running.append(state["i"])
+            await asyncio.sleep(0.01)
+            return {}
+
+        limited = limiter.wrap(node, environment_resource)
+        await asyncio.gather(*(limited({"i": i, "test_plan": {"environment_type": "qemu"}}) for i in range(10)))
+
+        assert limiter.peak["qemu"] == 2 and limiter.in_use["qemu"] == 0
+        # FIFO wake-up keeps arrival order
+        assert running == list(range(10))
+
+    @pytest.mark.asyncio
+    async def test_unlimited_resource(self):
+        limiter = ResourceLimiter({"llm": 1})
+        async with limiter.acquire("linux"), limiter.acquire(None):
+            pass
+        assert environment_resource({"test_plan": {"environment_type": "linux"}}) is None
+
+
+class TestTaskScheduler:
+    @pytest.mark.asyncio
+    async def test_runs_tasks_concurrently_on_one_graph(self, tmp_path, workflow_agents):
+        config = SchedulerConfig(
+            max_concurrent_tasks=3, max_iterations=2,
+            checkpoint_path=str(tmp_path / "cp.db"), resource_limits={"llm": 1, "qemu": 2, "board": 1}
+        )
+        async with TaskScheduler(*workflow_agents, config) as scheduler:
+            handles = [scheduler.submit(task_state(f"task-{i}", "board" if i % 2 else "qemu")) for i in range(6)]
+            results = await asyncio.gather(*handles)
+            stats = scheduler.stats()
+
+        assert [r["task_id"] for r in results] == [f"task-{i}" for i in range(6)]
+        for result in results:
+            assert result["messages"].count("Workflow initialized") == 1
+        assert stats["tasks"] == {"completed": 6}
+        assert stats["resources_peak"]["board"] <= 1 and stats["resources_peak"]["qemu"] <= 2
+
+    @pytest.mark.asyncio
+    async def test_priority_order_and_cancel(self, tmp_path, workflow_agents):
+        config = SchedulerConfig(max_concurrent_tasks=1, max_iterations=1, checkpoint_path=str(tmp_path / "cp.db"))
+        async with TaskScheduler(*workflow_agents, config) as scheduler:
+            low = scheduler.submit(task_state("low"), priority=0)
+            high = scheduler.submit(task_state("high"), priority=5)
+            dropped = scheduler.submit(task_state("dropped"), priority=1)
+            assert scheduler.cancel("dropped")
+            with pytest.raises(ValueError):
+                scheduler.submit(task_state("low"))
+
+            await scheduler.join()
+
+        assert high.started_at <= low.started_at
+        assert (low.status, high.status, dropped.status) == ("completed", "completed", "cancelled")
+        assert dropped.result.cancelled() and dropped.started_at is None
+
+    @pytest.mark.asyncio
+    async def test_isolated_worktrees(self, tmp_path, workflow_agents):
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        (repo / "main.c").write_text("int main(void) { return 0; }\n")
+        for args in (["init", "-q"], ["add", "."],
+                     ["-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "base"]):
+            subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+        config = SchedulerConfig(
+            max_concurrent_tasks=2, max_iterations=1, checkpoint_path=str(tmp_path / "cp.db"),
+            isolate_worktrees=True, worktree_pool_size=2, worktree_root=str(tmp_path / "pools")
+        )
+        async with TaskScheduler(*workflow_agents, config) as scheduler:
+            states = [{**task_state(f"iso-{i}"), "repo_path": str(repo)} for i in range(2)]
+            results = await asyncio.gather(*(scheduler.submit(state) for state in states))
+            with pytest.raises(ValueError):
+                scheduler.submit(task_state("iso-0"), resume=True)
+
+        for result in results:
+            assert result["repo_path"] == str(repo)
+            assert set(result["repo_snapshot"]) == {"base_commit", "diff"}
+        assert len(list((tmp_path / "pools").glob("*/wt-*"))) == 2
+
+    @pytest.mark.asyncio
+    async def test_snapshot_keeps_files_created_by_task(self, tmp_path, agent_config, workflow_agents):
+        class CreatingCodeAgent(agents.CodeAgent):
+            async def execute(self, state):
+                (Path(state["repo_path"]) / "drivers").mkdir(exist_ok=True)
+                (Path(state["repo_path"]) / "drivers" / "i2c.c").write_text("int i2c;\n")
+                return await super().execute(state)
+
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        (repo / "main.c").write_text("int main(void) { return 0; }\n")
+        for args in (["init", "-q"], ["add", "."],
+                     ["-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "base"]):
+            subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True)
+
+        config = SchedulerConfig(
+            max_iterations=1, checkpoint_path=str(tmp_path / "cp.db"),
+            isolate_worktrees=True, worktree_pool_size=1, worktree_root=str(tmp_path / "pools")
+        )
+        async with TaskScheduler(CreatingCodeAgent(agent_config), *workflow_agents[1:], config) as scheduler:
+            result = await scheduler.submit({**task_state("creates"), "repo_path": str(repo)})
+
+        # The worktree was cleaned on release; the snapshot still carries the new file
+        worktree, = (tmp_path / "pools").glob("*/wt-*")
+        assert not (worktree / "drivers").exists()
+        subprocess.run(["git", "-C", str(repo), "apply"], input=result["repo_snapshot"]["diff"].encode(), check=True)
+        assert (repo / "drivers" / "i2c.c").read_text() == "int i2c;\n"
+
+    @pytest.mark.asyncio
+    async def test_submit_requires_start(self, workflow_agents):
+        with pytest.raises(RuntimeError):
+            TaskScheduler(*workflow_agents).submit(task_state("t"))
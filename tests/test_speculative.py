@@ -0,0 +1,191 @@
+import asyncio
+import subprocess
+
+import pytest
+
+from src import agents
+from src.agents.base_agent import BaseAgent
+from src.orchestrator.graph import create_workflow_graph
+from src.orchestrator.scheduler import ResourceLimiter
+from src.orchestrator.speculative import SpeculativeConfig, SpeculativeExplorer
+from src.tools.code_modification.worktree import shared_pool
+
+ORIGINAL = "int spi_ok = 0;\n"
+
+
+def git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True, text=True).stdout
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = tmp_path / "repo"
+    path.mkdir()
+    git(path, "init", "-q")
+    (path / "spi.c").write_text(ORIGINAL)
+    git(path, "add", "spi.c")
+    git(path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "base")
+    return path
+
+
+class CandidateCodeAgent(agents.CodeAgent):
+    """Candidate i sets spi_ok to VALUES[i]."""
+    VALUES = [2, 1, 3]
+
+    async def propose_patch(self, state, temperature=0.3):
+        index = round((temperature - 0.3) / 0.2)
+        return f"--- a/spi.c\n+++ b/spi.c\n@@ -1 +1 @@\n-{ORIGINAL}+int spi_ok = {self.VALUES[index]};\n"
+
+
+class FileTestAgent(BaseAgent):
+    """Passes when the checkout under test sets spi_ok = 1; wrong values are slow."""
+
+    def _initialize_engine(self):
+        self.started = []
+
+    async def execute(self, state):
+        source = state["test_plan"]["source_dir"]
+        text = open(f"{source}/spi.c").read()
+        self.started.append(text)
+        passed = "spi_ok = 1;" in text
+        await asyncio.sleep(0.05 if passed else 0.5)
+        return {"test_results": [{
+            "test_id": "test_spi", "status": "passed" if passed else "failed",
+            "output": "ok" if passed else "Assertion failed: spi_ok == 1"
+        }]}
+
+
+def state_for(repo):
+    return {
+        "task_id": "spec", "iteration": 0, "repo_path": str(repo),
+        "analysis_report": {"total_issues": 1}, "test_plan": {"name": "t", "environment_type": "qemu"}
+    }
+
+
+class TestSpeculativeExplorer:
+    @pytest.mark.asyncio
+    async def test_winner_applied_and_losers_cancelled(self, repo, tmp_path, agent_config):
+        test_agent = FileTestAgent()
+        limiter = ResourceLimiter({"llm": 1, "qemu": 2})
+        explorer = SpeculativeExplorer(
+            CandidateCodeAgent(agent_config), test_agent, agents.AnalysisAgent(agent_config),
+            SpeculativeConfig(num_candidates=3, max_parallel=2, worktree_root=str(tmp_path / "wt")),
+            resources=limiter
+        )
+
+        update = await explorer(state_for(repo))
+
+        assert update["patch_applied"] and update["next_action"] == "analyze"
+        assert (repo / "spi.c").read_text() == "int spi_ok = 1;\n"
+        assert update["test_results"][0]["status"] == "passed"
+        trace = update["decision_trace"][0]
+        assert trace["winner"] == 1
+        assert trace["candidates"][0]["error"] == "cancelled"
+        assert trace["candidates"][2]["error"] == "cancelled"
+        # The third candidate never reached the test environment
+        assert len(test_agent.started) == 2
+        assert limiter.peak["llm"] == 1 and limiter.in_use["qemu"] == 0
+        # Worktrees go back to the pool clean
+        pool = shared_pool(repo, str(tmp_path / "wt"))
+        assert pool.leased == 0 and pool.idle == 2
+        worktrees = list((tmp_path / "wt").glob("*/wt-*"))
+        assert len(worktrees) == 2
+        for worktree in worktrees:
+            assert git(worktree, "status", "--porcelain") == ""
+            assert (worktree / "spi.c").read_text() == ORIGINAL
+
+    @pytest.mark.asyncio
+    async def test_best_score_wins_without_convergence(self, repo, tmp_path, agent_config):
+        class NoGoodAgent(CandidateCodeAgent):
+            VALUES = [3, 2, 2]
+
+        explorer = SpeculativeExplorer(
+            NoGoodAgent(agent_config), FileTestAgent(), agents.AnalysisAgent(agent_config),
+            SpeculativeConfig(num_candidates=3, max_parallel=3, worktree_root=str(tmp_path / "wt"))
+        )
+
+        update = await explorer(state_for(repo))
+
+        trace = update["decision_trace"][0]
+        # Duplicate proposals are evaluated once
+        assert len(trace["candidates"]) == 2
+        assert trace["winner"] == 0
+        assert (repo / "spi.c").read_text() == "int spi_ok = 3;\n"
+
+    @pytest.mark.asyncio
+    async def test_real_test_agent_runs_in_candidate_worktree(self, repo, tmp_path, agent_config):
+        analysis_agent = agents.AnalysisAgent(agent_config)
+
+        def no_root_cause(failure):
+            raise AssertionError("candidates are scored without root-cause analysis")
+
+        analysis_agent.analyzer.root_cause_analyzer.analyze = no_root_cause
+        explorer = SpeculativeExplorer(
+            CandidateCodeAgent(agent_config), agents.TestAgent(agent_config), analysis_agent,
+            SpeculativeConfig(num_candidates=3, max_parallel=3, worktree_root=str(tmp_path / "wt"))
+        )
+        state = state_for(repo)
+        state["test_plan"] = {"name": "t", "environment_type": "linux", "test_cases": [
+            {"test_id": "test_spi", "name": "spi", "command": "cat spi.c", "expected_output": "spi_ok = 1;"}
+        ]}
+
+        update = await explorer(state)
+
+        trace = update["decision_trace"][0]
+        assert trace["winner"] == 1
+        assert update["test_results"][0]["status"] == "passed"
+        assert update["test_results"][0]["output"] == "int spi_ok = 1;\n"
+        assert (repo / "spi.c").read_text() == "int spi_ok = 1;\n"
+        for candidate in trace["candidates"]:
+            if candidate["error"] is None and candidate["index"] != 1:
+                assert candidate["pass_rate"] == 0.0
+
+    @pytest.mark.asyncio
+    async def test_candidates_see_files_created_in_earlier_iterations(self, repo, tmp_path, agent_config):
+        class I2CCodeAgent(CandidateCodeAgent):
+            async def propose_patch(self, state, temperature=0.3):
+                index = round((temperature - 0.3) / 0.2)
+                return f"--- a/i2c.c\n+++ b/i2c.c\n@@ -1 +1 @@\n-int i2c_ok = 0;\n+int i2c_ok = {self.VALUES[index]};\n"
+
+        code_agent = I2CCodeAgent(agent_config)
+        # Iteration 1 added i2c.c to the checkout without committing it
+        first = await code_agent.execute({
+            "repo_path": str(repo), "next_action": "apply_patch",
+            "patch_content": "--- /dev/null\n+++ b/i2c.c\n@@ -0,0 +1 @@\n+int i2c_ok = 0;\n"
+        })
+        assert first["patch_applied"]
+
+        explorer = SpeculativeExplorer(
+            code_agent, agents.TestAgent(agent_config), agents.AnalysisAgent(agent_config),
+            SpeculativeConfig(num_candidates=3, max_parallel=3, worktree_root=str(tmp_path / "wt"))
+        )
+        state = {**state_for(repo), "iteration": 1}
+        state["test_plan"] = {"name": "t", "environment_type": "linux", "test_cases": [
+            {"test_id": "test_i2c", "name": "i2c", "command": "cat i2c.c", "expected_output": "i2c_ok = 1;"}
+        ]}
+
+        update = await explorer(state)
+
+        trace = update["decision_trace"][0]
+        assert all(candidate["error"] in (None, "cancelled") for candidate in trace["candidates"])
+        assert trace["winner"] == 1 and update["test_results"][0]["status"] == "passed"
+        assert (repo / "i2c.c").read_text() == "int i2c_ok = 1;\n"
+
+    @pytest.mark.asyncio
+    async def test_non_git_repo(self, tmp_path, agent_config):
+        explorer = SpeculativeExplorer(
+            CandidateCodeAgent(agent_config), FileTestAgent(), agents.AnalysisAgent(agent_config),
+            SpeculativeConfig(num_candidates=1, worktree_root=str(tmp_path / "wt"))
+        )
+        update = await explorer(state_for(tmp_path))
+        assert update["next_action"] == "modify" and not update["patch_applied"]
+        assert update["errors"][0].startswith("Cannot isolate candidates")
+
+
+def test_graph_uses_exploration_node(workflow_agents):
+    graph = create_workflow_graph(
+        *workflow_agents,
+        speculative=SpeculativeConfig()
+    )
+    assert "patch_exploration" in graph.nodes and "patch_generation" not in graph.nodes
+    graph.compile()
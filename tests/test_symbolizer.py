@@ -0,0 +1,187 @@
+import shutil
+import struct
+import subprocess
+import time
+
+import pytest
+
+from src.models.code import FunctionNode, Location
+from src.tools.result_analysis import ResultAnalyzer, Symbolizer, extract_backtrace
+from src.tools.result_analysis.models import FailureCategory, LogEntry, ResultAnalyzerConfig, StackFrame
+from src.tools.result_analysis.symbolizer import ElfSymbolTable, load_symbol_table
+
+
+KERNEL_OOPS = """\
+[   12.345678] BUG: kernel NULL pointer dereference, address: 0000000000000008
+[   12.345690] RIP: 0010:spi_transfer_one+0x2a/0x90 [spi_dw]
+[   12.345700] Call Trace:
+[   12.345701]  <TASK>
+[   12.345702]  ? __die+0x20/0x60
+[   12.345703]  spi_transfer_one_message+0x118/0x3b0
+[   12.345704]  [<ffffffff81a2b3c4>] __spi_pump_messages+0x2f4/0x6d0
+[   12.345705]  </TASK>
+"""
+
+ASAN_REPORT = """\
+==4242==ERROR: AddressSanitizer: heap-use-after-free on address 0x602000000010
+READ of size 4 at 0x602000000010 thread T0
+    #0 0x4f5a2b in spi_xfer /src/drivers/spi.c:42:7
+    #1 0x4f5b10 in main /src/main.c:12
+    #2 0x7f3a9c229d8f  (/lib/x86_64-linux-gnu/libc.so.6+0x29d8f)
+freed by thread T0 here:
+    #0 0x49d3a8 in free
+"""
+
+GDB_BACKTRACE = """\
+Program received signal SIGSEGV, Segmentation fault.
+#0  0x0000555555555149 in spi_xfer (dev=0x0) at drivers/spi.c:42
+#1  0x00005555555551a0 in ?? ()
+#2  main () at main.c:12
+"""
+
+
+def build_elf32(symbols, big_endian=False, machine=40):
+    """构造只有 .symtab/.strtab 的最小 ELF32 文件"""
+    e = '>' if big_endian else '<'
+    strtab = b'\0' + b''.join(name.encode() + b'\0' for name, _, _ in symbols)
+    entries = [struct.pack(e + 'IIIBBH', 0, 0, 0, 0, 0, 0)]
+    offset = 1
+    for name, value, size in symbols:
+        entries.append(struct.pack(e + 'IIIBBH', offset, value, size, 0x12, 0, 1))
+        offset += len(name) + 1
+    symtab = b''.join(entries)
+    strtab_offset = 52
+    symtab_offset = strtab_offset + len(strtab)
+    shoff = symtab_offset + len(symtab)
+    header = b'\x7fELF' + bytes([1, 2 if big_endian else 1, 1]) + b'\0' * 9
+    header += struct.pack(e + 'HHIIIIIHHHHHH', 2, machine, 1, 0, 0, shoff, 0, 52, 0, 0, 40, 3, 0)
+    sections = struct.pack(e + 'IIIIIIIIII', *[0] * 10)
+    sections += struct.pack(e + 'IIIIIIIIII', 0, 2, 0, 0, symtab_offset, len(symtab), 2, 1, 4, 16)
+    sections += struct.pack(e + 'IIIIIIIIII', 0, 3, 0, 0, strtab_offset, len(strtab), 0, 0, 1, 0)
+    return header + strtab + symtab + sections
+
+
+@pytest.fixture(scope="module")
+def program(tmp_path_factory):
+    if shutil.which("gcc") is None or shutil.which("nm") is None:
+        pytest.skip("gcc/nm not available")
+    directory = tmp_path_factory.mktemp("symbolizer")
+    source = directory / "prog.c"
+    source.write_text(
+        "static int helper(int x) { return x * 3; }\n"
+        "int spi_xfer(int n) { return helper(n) + 1; }\n"
+        "int main(void) { return spi_xfer(2); }\n"
+    )
+    binary = directory / "prog"
+    subprocess.run(["gcc", "-O0", "-o", str(binary), str(source)], check=True)
+    return str(binary)
+
+
+def nm_symbols(path):
+    output = subprocess.run(["nm", path], capture_output=True, text=True, check=True).stdout
+    return {
+        name: int(address, 16)
+        for address, kind, name in (line.split() for line in output.splitlines() if len(line.split()) == 3)
+        if kind in "tT"
+    }
+
+
+class TestExtractBacktrace:
+    def test_kernel_oops(self):
+        frames = extract_backtrace(KERNEL_OOPS)
+        assert [f.function for f in frames] == [
+            "spi_transfer_one", "spi_transfer_one_message", "__spi_pump_messages"
+        ]
+        assert [f.index for f in frames] == [0, 1, 2]
+        assert frames[0].offset == 0x2a and frames[0].module == "spi_dw"
+        assert frames[2].address == 0xffffffff81a2b3c4
+
+    def test_asan_stops_at_second_stack(self):
+        frames = extract_backtrace(ASAN_REPORT)
+        assert len(frames) == 3
+        assert (frames[0].function, frames[0].file_path, frames[0].line) == ("spi_xfer", "/src/drivers/spi.c", 42)
+        assert frames[2].function is None
+        assert (frames[2].module, frames[2].address) == ("/lib/x86_64-linux-gnu/libc.so.6", 0x29d8f)
+
+    def test_gdb_and_registers(self):
+        frames = extract_backtrace(GDB_BACKTRACE)
+        assert [f.function for f in frames] == ["spi_xfer", None, "main"]
+        assert frames[0].address == 0x555555555149 and frames[2].line == 12
+
+        frames = extract_backtrace("HardFault!\nPC: 0x08001234\nLR = 0x080011f1\n")
+        assert [(f.index, f.address) for f in frames] == [(0, 0x08001234), (1, 0x080011f1)]
+
+
+class TestElfSymbolTable:
+    def test_matches_nm(self, program):
+        table = load_symbol_table(program)
+        expected = nm_symbols(program)
+        for name in ("main", "spi_xfer", "helper"):
+            assert table.address_of(name) == expected[name]
+            assert table.resolve(expected[name] + 3) == (name, 3)
+        assert table.resolve(0) is None
+        assert load_symbol_table(program) is table
+
+    @pytest.mark.parametrize("big_endian", [False, True])
+    def test_elf32_thumb(self, tmp_path, big_endian):
+        path = tmp_path / "fw.elf"
+        path.write_bytes(build_elf32(
+            [("Reset_Handler", 0x08000101, 0x20), ("spi_irq", 0x08000201, 0x40)], big_endian
+        ))
+        table = ElfSymbolTable.from_file(str(path))
+        assert table.resolve(0x08000210) == ("spi_irq", 0x10)
+        assert table.resolve(0x08000150) is None
+
+    def test_rejects_non_elf(self, tmp_path):
+        path = tmp_path / "notes.txt"
+        path.write_text("hello")
+        with pytest.raises(ValueError):
+            ElfSymbolTable.from_file(str(path))
+        assert Symbolizer([str(path)]).tables == []
+
+
+class TestSymbolizer:
+    def test_resolves_addresses_and_maps_functions(self, program):
+        address = nm_symbols(program)["spi_xfer"] + 0x10
+        node = FunctionNode("spi_xfer", Location("drivers/spi.c", 40, 1), "int", [], 40, 44)
+        symbolizer = Symbolizer([program], functions=[node])
+
+        frames = symbolizer.symbolize_text(f"#0 {address:#x} in ?? \n#1 0x1 in ??\n")
+        assert (frames[0].function, frames[0].offset) == ("spi_xfer", 0x10)
+        assert (frames[0].file_path, frames[0].line) == ("drivers/spi.c", 40)
+        assert frames[0].format() == "#0 spi_xfer+0x10 (drivers/spi.c:40)"
+        assert frames[1].function is None
+
+        module_frames = symbolizer.symbolize_text(f"#0 0x7f00 (/opt/prog+{address:#x})\n#1 0x7f01 (/lib/libc.so.6+0x10)")
+        assert module_frames[0].function == "spi_xfer" and module_frames[1].function is None
+
+    def test_batch_symbolization(self, program):
+        symbolizer = Symbolizer([program])
+        base = nm_symbols(program)["main"]
+        frames = [StackFrame(index=i % 50, address=base + i % 8) for i in range(100_000)]
+        start = time.perf_counter()
+        symbolizer.symbolize(frames)
+        assert time.perf_counter() - start < 2.0
+        assert all(frame.function == "main" for frame in frames)
+
+
+class TestResultAnalyzerSymbolization:
+    def test_crash_site_in_report(self, program):
+        address = nm_symbols(program)["spi_xfer"] + 4
+        analyzer = ResultAnalyzer(ResultAnalyzerConfig(symbol_files=[program]))
+        output = f"Aborted (core dumped)\n#0 {address:#x} in ??\n#1 0x0 in ??\n"
+
+        report = analyzer.analyze_results("run", 1, 0, 1, 0, {"test_spi": output})
+
+        failure = report.failures[0]
+        assert failure.category == FailureCategory.CRASH
+        assert failure.frames[0].function == "spi_xfer"
+        assert failure.stack_trace.splitlines()[0] == "#0 spi_xfer+0x4"
+        assert "Crash site: #0 spi_xfer+0x4" in report.root_cause_reports[0].evidence
+
+    def test_log_entry_location(self):
+        entry = LogEntry("", "ERROR", "test_spi", "AddressSanitizer: heap-use-after-free",
+                         {"stack_trace": ASAN_REPORT})
+        failures = ResultAnalyzer().identify_failures_from_logs([entry])
+        assert failures[0].location == "/src/drivers/spi.c:42"
+        assert failures[0].stack_trace == ASAN_REPORT and len(failures[0].frames) == 3
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from src.knowledge.vector_index import LocalVectorIndex, LocalIndexConfig
+
+
+@pytest.fixture
+def index(tmp_path):
+    return LocalVectorIndex(LocalIndexConfig(index_dir=str(tmp_path), initial_capacity=2))
+
+
+def _payload(product_line):
+    return {"title": product_line, "metadata": {"product_line": product_line}}
+
+
+class TestLocalVectorIndex:
+    def test_search_returns_nearest_first(self, index):
+        index.add(
+            ["a", "b", "c"],
+            [[1, 0, 0], [0, 1, 0], [0.9, 0.1, 0]],
+            [_payload("x"), _payload("y"), _payload("x")],
+        )
+
+        hits = index.search([1, 0, 0], limit=2)
+
+        assert [h[0] for h in hits] == ["a", "c"]
+        assert hits[0][1] == pytest.approx(1.0)
+
+    def test_payload_filter(self, index):
+        index.add(["a", "b"], [[1, 0], [0.8, 0.2]], [_payload("x"), _payload("y")])
+
+        hits = index.search([1, 0], filters={"metadata.product_line": "y"})
+
+        assert [h[0] for h in hits] == ["b"]
+        assert index.search([1, 0], filters={"metadata.product_line": "z"}) == []
+
+    def test_unindexed_filter_field(self, index):
+        index.add(["a", "b"], [[1, 0], [1, 0]], [{"title": "t1"}, {"title": "t2"}])
+        assert [h[0] for h in index.search([1, 0], filters={"title": "t2"})] == ["b"]
+
+    def test_score_threshold(self, index):
+        index.add(["a", "b"], [[1, 0], [0, 1]])
+        assert [h[0] for h in index.search([1, 0], score_threshold=0.5)] == ["a"]
+
+    def test_delete_and_slot_reuse(self, index):
+        index.add(["a", "b"], [[1, 0], [0, 1]], [_payload("x"), _payload("x")])
+        assert index.delete(["a", "missing"]) == 1
+        assert "a" not in index
+        assert [h[0] for h in index.search([1, 0], filters={"metadata.product_line": "x"})] == ["b"]
+
+        index.add(["c"], [[1, 0]])
+        assert len(index) == 2
+        assert index.search([1, 0], limit=1)[0][0] == "c"
+
+    def test_upsert_replaces_vector_and_payload(self, index):
+        index.add(["a"], [[1, 0]], [_payload("x")])
+        index.add(["a"], [[0, 1]], [_payload("y")])
+
+        assert len(index) == 1
+        assert index.get("a")["metadata"]["product_line"] == "y"
+        assert index.search([0, 1], limit=1)[0][1] == pytest.approx(1.0)
+        assert index.search([1, 0], filters={"metadata.product_line": "x"}) == []
+
+    def test_blocked_search_matches_exact(self, tmp_path):
+        rng = np.random.default_rng(0)
+        vectors = rng.normal(size=(500, 16)).astype(np.float32)
+        index = LocalVectorIndex(LocalIndexConfig(index_dir=str(tmp_path), block_size=64))
+        index.add(list(range(500)), vectors)
+        query = rng.normal(size=16)
+
+        normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:10]
+
+        assert [h[0] for h in index.search(query, limit=10)] == list(expected)
+
+    def test_persistence(self, tmp_path):
+        config = LocalIndexConfig(index_dir=str(tmp_path), initial_capacity=2)
+        index = LocalVectorIndex(config)
+        index.add(["a", "b", "c"], [[1, 0], [0, 1], [1, 1]], [_payload("x"), _payload("y"), _payload("x")])
+        index.delete(["b"])
+        index.save()
+
+        reopened = LocalVectorIndex(config)
+
+        assert len(reopened) == 2
+        assert reopened.dim == 2
+        hits = reopened.search([1, 0], filters={"metadata.product_line": "x"})
+        assert [h[0] for h in hits] == ["a", "c"]
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import subprocess
+
+import pytest
+
+from src.tools.code_modification.modifier import CodeModifier
+from src.tools.code_modification.worktree import WorktreeError, WorktreePool, shared_pool, working_tree_diff
+
+
+def git(repo, *args):
+    return subprocess.run(["git", "-C", str(repo), *args], check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = tmp_path / "repo"
+    path.mkdir()
+    git(path, "init", "-q")
+    (path / ".gitignore").write_text("*.o\n")
+    (path / "spi.c").write_text("int spi;\n")
+    git(path, "add", ".")
+    git(path, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "base")
+    return path
+
+
+class TestWorktreePool:
+    def test_reset_on_release_keeps_build_outputs(self, repo, tmp_path):
+        pool = WorktreePool(repo, tmp_path / "pool", size=1)
+        path = pool.acquire()
+        (path / "spi.c").write_text("broken\n")
+        (path / "new.c").write_text("x\n")
+        (path / "spi.o").write_text("obj\n")
+        pool.release(path)
+
+        again = pool.acquire()
+        assert again == path
+        assert (path / "spi.c").read_text() == "int spi;\n"
+        assert not (path / "new.c").exists()
+        assert (path / "spi.o").exists()
+        assert git(repo, "status", "--porcelain") == ""
+
+    def test_lru_and_bounded(self, repo, tmp_path):
+        pool = WorktreePool(repo, tmp_path / "pool", size=2)
+        pool.prepare()
+        assert pool.idle == 2
+        first, second = pool.acquire(), pool.acquire()
+        with pytest.raises(WorktreeError):
+            pool.acquire(timeout=0.05)
+        pool.release(first)
+        pool.release(second)
+        assert pool.acquire() == first
+
+    def test_commit_switch_and_adopt(self, repo, tmp_path):
+        base = git(repo, "rev-parse", "HEAD")
+        (repo / "spi.c").write_text("int spi = 1;\n")
+        git(repo, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qam", "next")
+
+        pool = WorktreePool(repo, tmp_path / "pool", size=2)
+        path = pool.acquire(base)
+        assert (path / "spi.c").read_text() == "int spi;\n"
+        (path / "spi.c").write_text("dirty\n")
+
+        # A new process adopts the worktree left behind and cleans it before use
+        adopted = WorktreePool(repo, tmp_path / "pool", size=2)
+        assert adopted.idle == 1
+        assert adopted.acquire() == path
+        assert (path / "spi.c").read_text() == "int spi = 1;\n"
+
+    def test_not_a_repository(self, tmp_path):
+        with pytest.raises(WorktreeError):
+            WorktreePool(tmp_path, tmp_path / "pool")
+
+
+class TestLease:
+    @pytest.mark.asyncio
+    async def test_overlay_and_cancel(self, repo, tmp_path):
+        (repo / "spi.c").write_text("int spi = 2;\n")
+        overlay = working_tree_diff(repo)
+        pool = shared_pool(repo, tmp_path / "pools", size=1)
+        assert shared_pool(repo, tmp_path / "pools", size=1) is pool
+
+        async with pool.lease(overlay=overlay) as path:
+            assert (path / "spi.c").read_text() == "int spi = 2;\n"
+            waiter = asyncio.create_task(pool.lease().__aenter__())
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+
+        assert pool.leased == 0 and pool.idle == 1
+        async with pool.lease() as path:
+            assert (path / "spi.c").read_text() == "int spi;\n"
+
+    @pytest.mark.asyncio
+    async def test_overlay_includes_untracked_files(self, repo, tmp_path):
+        create = "--- /dev/null\n+++ b/drivers/i2c.c\n@@ -0,0 +1 @@\n+int i2c;\n"
+        assert CodeModifier(backend="native").apply_checked(create, repo).applied
+        (repo / "i2c.o").write_text("obj\n")
+
+        overlay = working_tree_diff(repo)
+        assert "drivers/i2c.c" in overlay and "i2c.o" not in overlay
+        # The checkout's own index is untouched
+        assert git(repo, "status", "--porcelain") == "?? drivers/"
+
+        async with shared_pool(repo, tmp_path / "pools", size=1).lease(overlay=overlay) as path:
+            assert (path / "drivers/i2c.c").read_text() == "int i2c;\n"
+
+    @pytest.mark.asyncio
+    async def test_waiters_do_not_starve_default_executor(self, repo, tmp_path):
+        pool = shared_pool(repo, tmp_path / "pools", size=1)
+        held = []
+
+        async def hold():
+            async with pool.lease() as path:
+                held.append(path)
+                await asyncio.sleep(0)
+
+        # More waiters than default executor threads, which release() needs
+        waiters = min(32, (os.cpu_count() or 1) + 4) + 1
+        await asyncio.wait_for(asyncio.gather(*(hold() for _ in range(waiters))), 20)
+        assert len(held) == waiters and pool.leased == 0